@@ -0,0 +1,166 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Iterable, Optional
+
+import numpy as np
+from starlette.responses import JSONResponse
+
+from logger import configure_logger
+
+logger = configure_logger(__name__)
+
+
+class OverloadError(Exception):
+
+    def __init__(self, message, retry_after: int = 1, errors = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.errors = errors
+
+
+class AdmissionOutcome:
+    # 응답 결과를 보고 호출한 쪽에서 실패로 표시한다.
+    succeeded: bool = True
+
+
+class AdmissionController:
+    """
+    예측 요청 동시성을 AIMD 방식으로 조절한다.
+    성공하고 지연시간이 목표 이내면 limit을 1/limit 씩 늘리고(RTT마다 +1), 실패하거나 목표를 넘기면 backoff 비율로 줄인다.
+    줄이는 것은 한 지연 구간에 한 번만 한다. 직전 감소 이전에 시작한 요청은 감소 전 limit에서 실행된 것이므로 다시 줄이지 않는다.
+    limit을 넘는 요청은 최대 max_queue개까지 max_queue_wait초 동안만 대기하고, 그 이상은 바로 거절한다.
+
+    이벤트 루프에서만 사용한다. sync handler가 threadpool 스레드를 받기 전에 허용 여부를 정해야
+    대기 중인 요청이 스레드를 차지하지 않고, 거절도 threadpool이 가득 찬 상태와 관계없이 바로 나간다.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 16,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        max_queue: int = 32,
+        max_queue_wait: float = 0.5,
+        latency_target_ms: Optional[float] = 500.0,
+        backoff_ratio: float = 0.9,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self.latency_target_ms = latency_target_ms
+        self.backoff_ratio = backoff_ratio
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.num_admitted = 0
+        self.num_rejected = 0
+        self._latencies_ms = deque(maxlen=1000)
+        self._queue_times_ms = deque(maxlen=1000)
+        self._decreased_at = float("-inf")
+        self._condition = asyncio.Condition()
+
+    def _retry_after(self) -> int:
+        # 대기열이 한 번 비워지는 데 걸리는 시간 추정치
+        latency_ms = np.mean(self._latencies_ms) if self._latencies_ms else 1000.0
+        return max(1, math.ceil(latency_ms / 1000 * (self.waiting + 1) / max(self.limit, 1)))
+
+    def _reject(self, reason: str):
+        self.num_rejected += 1
+        raise OverloadError(message=f"요청이 많아 처리할 수 없습니다({reason}).", retry_after=self._retry_after())
+
+    def _on_complete(self, started_at: float, latency_ms: float, succeeded: bool):
+        self._latencies_ms.append(latency_ms)
+        if succeeded and (self.latency_target_ms is None or latency_ms <= self.latency_target_ms):
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        elif started_at > self._decreased_at:
+            self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+            self._decreased_at = time.perf_counter()
+
+    @asynccontextmanager
+    async def acquire(self):
+        queued_at = time.perf_counter()
+        async with self._condition:
+            if self.in_flight >= int(self.limit):
+                if self.waiting >= self.max_queue:
+                    self._reject("queue full")
+
+                self.waiting += 1
+                try:
+                    await asyncio.wait_for(
+                        self._condition.wait_for(lambda: self.in_flight < int(self.limit)),
+                        self.max_queue_wait,
+                    )
+                except asyncio.TimeoutError:
+                    self._reject("queue timeout")
+                finally:
+                    self.waiting -= 1
+
+            self.in_flight += 1
+            self.num_admitted += 1
+            started_at = time.perf_counter()
+            self._queue_times_ms.append((started_at - queued_at) * 1000)
+
+        outcome = AdmissionOutcome()
+        try:
+            yield outcome
+        except BaseException:
+            outcome.succeeded = False
+            raise
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                self._on_complete(started_at, (time.perf_counter() - started_at) * 1000, outcome.succeeded)
+                # limit이 늘어나면 반환된 슬롯 외에도 자리가 생기므로 빈 슬롯 수만큼 깨운다.
+                self._condition.notify(max(0, int(self.limit) - self.in_flight))
+
+    def stats(self) -> dict:
+        queue_times = np.array(self._queue_times_ms) if self._queue_times_ms else np.zeros(1)
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "num_admitted": self.num_admitted,
+            "num_rejected": self.num_rejected,
+            "queue_time_ms_mean": float(queue_times.mean()),
+            "queue_time_ms_p95": float(np.percentile(queue_times, 95)),
+            "queue_time_ms_max": float(queue_times.max()),
+        }
+
+
+class AdmissionMiddleware:
+    """
+    paths로 들어온 요청을 handler(threadpool) 실행 전에 app.admission_controller로 허용/거절한다.
+    거절하면 503과 Retry-After를 바로 반환하고, 5xx 응답은 실패로 보고 limit을 줄인다.
+    """
+
+    def __init__(self, app, paths: Iterable[str]):
+        self.app = app
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        admission_controller: AdmissionController = scope["app"].admission_controller
+        try:
+            async with admission_controller.acquire() as outcome:
+
+                async def send_with_status(message):
+                    if message["type"] == "http.response.start" and message["status"] >= 500:
+                        outcome.succeeded = False
+                    await send(message)
+
+                await self.app(scope, receive, send_with_status)
+        except OverloadError as e:
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": str(e)},
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, receive, send)
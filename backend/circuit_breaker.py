@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from enum import Enum
+from typing import Optional, Tuple, Type
+
+from logger import configure_logger
+
+logger = configure_logger(__name__)
+
+
+class CircuitOpenError(Exception):
+
+    def __init__(self, message, errors = None):
+        super().__init__(message)
+        self.errors = errors
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    연속 실패(또는 slow_call_ms를 넘는 느린 호출)가 failure_threshold에 도달하면 OPEN 상태가 되어 호출을 바로 차단한다.
+    recovery_timeout초가 지나면 HALF_OPEN 상태에서 half_open_max_calls개의 시험 호출을 허용하고,
+    성공하면 CLOSED, 실패하면 다시 OPEN으로 돌아간다.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        slow_call_ms: Optional[float] = None,
+        excluded_exceptions: Tuple[Type[Exception], ...] = (),
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.slow_call_ms = slow_call_ms
+        self.excluded_exceptions = excluded_exceptions
+
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.num_calls = 0
+        self.num_failures = 0
+        self.num_short_circuited = 0
+        self.transitions = deque(maxlen=100)
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+
+    def _transition(self, state: CircuitState):
+        if state == self.state:
+            return
+        logger.warning(f"circuit breaker 상태 변경: {self.state.value} -> {state.value}")
+        self.transitions.append({
+            "at": datetime.now().isoformat(),
+            "from": self.state.value,
+            "to": state.value,
+        })
+        self.state = state
+        if state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+        elif state == CircuitState.HALF_OPEN:
+            self._half_open_calls = 0
+        elif state == CircuitState.CLOSED:
+            self.consecutive_failures = 0
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self._transition(CircuitState.HALF_OPEN)
+
+            if self.state == CircuitState.OPEN or (
+                self.state == CircuitState.HALF_OPEN and self._half_open_calls >= self.half_open_max_calls
+            ):
+                self.num_short_circuited += 1
+                raise CircuitOpenError(message="MLServer 호출이 차단되었습니다(circuit open).")
+
+            if self.state == CircuitState.HALF_OPEN:
+                self._half_open_calls += 1
+            self.num_calls += 1
+
+    def _on_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state == CircuitState.HALF_OPEN:
+                self._transition(CircuitState.CLOSED)
+
+    def _on_failure(self):
+        with self._lock:
+            self.num_failures += 1
+            self.consecutive_failures += 1
+            if self.state == CircuitState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self._transition(CircuitState.OPEN)
+
+    @contextmanager
+    def guard(self):
+        self._before_call()
+        started_at = time.perf_counter()
+        try:
+            yield
+        except self.excluded_exceptions:
+            # 호출 자체가 일어나지 않은 경우(예: admission 거절)는 성공/실패로 세지 않는다.
+            with self._lock:
+                if self.state == CircuitState.HALF_OPEN:
+                    self._half_open_calls -= 1
+            raise
+        except Exception:
+            self._on_failure()
+            raise
+
+        latency_ms = (time.perf_counter() - started_at) * 1000
+        if self.slow_call_ms is not None and latency_ms > self.slow_call_ms:
+            self._on_failure()
+        else:
+            self._on_success()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state.value,
+                "consecutive_failures": self.consecutive_failures,
+                "num_calls": self.num_calls,
+                "num_failures": self.num_failures,
+                "num_short_circuited": self.num_short_circuited,
+                "transitions": list(self.transitions),
+            }
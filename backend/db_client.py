@@ -1,4 +1,5 @@
 import pymysql
+import sqlite3
 from abc import ABC, abstractmethod
 import pandas as pd
 
@@ -26,6 +27,49 @@ class DBClient(AbstractDBClient):
 
 
 
+class _SQLiteCursor:
+    # pymysql 커서처럼 with 구문과 %s 파라미터를 사용할 수 있도록 감싼다.
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        self.cursor = connection.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cursor.close()
+        self.connection.close()
+
+    def execute(self, sql_command, params=None):
+        if params is not None and not isinstance(params, (tuple, list)):
+            params = (params,)
+        return self.cursor.execute(sql_command.replace("%s", "?"), params or ())
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    @property
+    def description(self):
+        return self.cursor.description
+
+
+class _SQLiteConnection:
+    def __init__(self, db_path: str):
+        self.connection = sqlite3.connect(db_path)
+
+    def cursor(self):
+        return _SQLiteCursor(self.connection)
+
+
+class SQLiteDBClient(AbstractDBClient):
+    """로컬 개발/벤치마크용 DB 클라이언트. MySQL 대신 같은 테이블을 가진 SQLite 파일을 사용한다."""
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def get_connection(self):
+        return _SQLiteConnection(self.db_path)
+
+
 def get_connection(db_client: DBClient):
     return db_client.get_connection()
 
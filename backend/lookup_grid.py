@@ -0,0 +1,106 @@
+"""
+격자 예측 테이블(lookup table) 저장 형식과 조회.
+
+pipeline(src/lookup_table.py)이 만들고 backend가 조회하므로 backend/lookup_grid.py에 같은 파일을 둔다.
+(backend/tests/test_lookup_table.py가 두 파일이 같은지 확인한다.)
+
+축(axis) 메타데이터
+- name: 학습 데이터 컬럼 이름
+- request_feature: backend 요청 피처 이름. 없으면 name과 같다고 본다.
+- unit: 연령 축의 단위(days | years). backend는 요청의 생년월일로 이 단위의 나이를 만든다.
+"""
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+TABLE_FILE = "lookup_table.npy"
+META_FILE = "lookup_table.json"
+
+
+class PredictionLookupTable:
+    """
+    (범주형 컬럼 x 수치형 컬럼 구간) 격자에 대한 모델 예측값 테이블.
+    범주형 축은 정확히 일치하는 값을, 수치형 축은 격자점 사이를 다중선형 보간하여 예측값을 근사한다.
+    """
+
+    def __init__(self, table: np.ndarray, axes: List[Dict], meta: Optional[Dict] = None):
+        self.table = table
+        self.axes = axes
+        self.meta = meta or {}
+        self._category_index = {
+            axis["name"]: (dim, {value: i for i, value in enumerate(axis["values"])})
+            for dim, axis in enumerate(axes) if axis["kind"] == "categorical"
+        }
+        self._numeric_axes = [
+            (dim, axis["name"], np.asarray(axis["values"], dtype=np.float64))
+            for dim, axis in enumerate(axes) if axis["kind"] == "numeric"
+        ]
+
+    @classmethod
+    def load(cls, save_dir: str) -> "PredictionLookupTable":
+        with open(os.path.join(save_dir, META_FILE), "r") as f:
+            meta = json.load(f)
+        table = np.load(os.path.join(save_dir, TABLE_FILE), mmap_mode="r")
+        return cls(table, meta["axes"], meta)
+
+    def save(self, save_dir: str) -> str:
+        np.save(os.path.join(save_dir, TABLE_FILE), self.table)
+        with open(os.path.join(save_dir, META_FILE), "w") as f:
+            json.dump({**self.meta, "axes": self.axes}, f, indent=2, default=str)
+        return save_dir
+
+    @property
+    def request_features(self) -> Dict[str, str]:
+        """{학습 컬럼: 요청 피처}"""
+        return {axis["name"]: axis.get("request_feature", axis["name"]) for axis in self.axes}
+
+    @property
+    def age_units(self) -> Dict[str, str]:
+        """{요청 피처: 단위} 단위가 기록된 축만"""
+        return {axis.get("request_feature", axis["name"]): axis["unit"] for axis in self.axes if "unit" in axis}
+
+    @property
+    def relative_error(self) -> float:
+        """격자 밖 표본에서 측정한 p99 절대 오차 / 평균 예측값. 기록이 없으면 inf."""
+        return self.meta.get("error", {}).get("p99_relative_error", float("inf"))
+
+    def lookup(self, features: Dict) -> Optional[float]:
+        """학습 컬럼 이름으로 조회합니다. 격자 밖의 값이나 학습에 없던 범주가 들어오면 None을 반환합니다."""
+        index = [0] * len(self.axes)
+        for name, (dim, categories) in self._category_index.items():
+            position = categories.get(features.get(name))
+            if position is None:
+                return None
+            index[dim] = position
+
+        corners = [(tuple(index), 1.0)]
+        for dim, name, grid in self._numeric_axes:
+            value = features.get(name)
+            if value is None or value < grid[0] or value > grid[-1]:
+                return None
+            if len(grid) == 1:
+                continue
+            i = min(int(np.searchsorted(grid, value, side="right")) - 1, len(grid) - 2)
+            t = (value - grid[i]) / (grid[i + 1] - grid[i])
+            next_corners = []
+            for corner, weight in corners:
+                low, high = list(corner), list(corner)
+                low[dim], high[dim] = i, i + 1
+                next_corners.append((tuple(low), weight * (1 - t)))
+                next_corners.append((tuple(high), weight * t))
+            corners = next_corners
+
+        return float(sum(self.table[corner] * weight for corner, weight in corners))
+
+    def lookup_request(self, request_features: Dict) -> Optional[float]:
+        """backend 요청 피처 이름으로 조회합니다."""
+        return self.lookup({name: request_features.get(feature) for name, feature in self.request_features.items()})
+
+    def lookup_batch(self, df: pd.DataFrame) -> np.ndarray:
+        return np.array([
+            np.nan if (value := self.lookup(row)) is None else value
+            for row in df.to_dict(orient="records")
+        ])
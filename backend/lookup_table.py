@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from logger import configure_logger
+from lookup_grid import META_FILE, PredictionLookupTable
+
+logger = configure_logger(__name__)
+
+# pipeline이 배포를 마친 뒤 학습 결과 디렉토리에 남기는 파일 (pipeline/src/incremental.py record_deployment)
+DEPLOYED_FILE = "deployed.json"
+AGE_UNITS = ("days", "years")
+
+
+def load_lookup_table(model_dir: str, feature_names: List[str], max_relative_error: float) -> Optional[PredictionLookupTable]:
+    """테이블이 없거나, 요청 피처로 조회할 수 없거나, 근사 오차가 허용 범위를 넘으면 사용하지 않는다."""
+    if not model_dir or not os.path.exists(os.path.join(model_dir, META_FILE)):
+        return None
+
+    lookup_table = PredictionLookupTable.load(model_dir)
+    unmapped = {column: feature for column, feature in lookup_table.request_features.items() if feature not in feature_names}
+    if unmapped:
+        logger.warning(
+            f"lookup table 축 {unmapped}에 대응하는 요청 피처가 없어 사용하지 않습니다. "
+            f"(요청 피처: {feature_names}, pipeline config.yml의 lookup_table.request_features)"
+        )
+        return None
+    unknown_units = {feature: unit for feature, unit in lookup_table.age_units.items() if unit not in AGE_UNITS}
+    if unknown_units:
+        logger.warning(f"lookup table 연령 단위 {unknown_units}를 알 수 없어 사용하지 않습니다. ({AGE_UNITS})")
+        return None
+    if lookup_table.relative_error > max_relative_error:
+        logger.warning(f"lookup table 근사 오차(p99 {lookup_table.relative_error:.2%})가 허용치({max_relative_error:.2%})를 넘어 사용하지 않습니다.")
+        return None
+
+    logger.info(f"lookup table 로드: {model_dir} shape={lookup_table.meta.get('shape')}, error={lookup_table.meta.get('error')}")
+    return lookup_table
+
+
+class DeployedLookupTable:
+    """
+    배포된 모델의 lookup table.
+    path에 deployed.json이 있으면 그 모델 디렉토리를 따라가고, 모델이 바뀌면(check_interval초마다 확인) 새 테이블을 다시 읽는다.
+    없으면 path를 모델 디렉토리로 보고 테이블이 다시 만들어졌을 때만 다시 읽는다.
+    """
+
+    def __init__(self, path: str, feature_names: List[str], max_relative_error: float, check_interval: float = 10.0):
+        self.path = path
+        self.feature_names = feature_names
+        self.max_relative_error = max_relative_error
+        self.check_interval = check_interval
+        self.model_dir: Optional[str] = None
+        self.table: Optional[PredictionLookupTable] = None
+        self.num_reloads = 0
+        self._version = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+        self.reload()
+
+    def _resolve(self):
+        """(모델 디렉토리, 변경 여부를 판단할 값)"""
+        deployed_path = os.path.join(self.path, DEPLOYED_FILE)
+        if os.path.exists(deployed_path):
+            with open(deployed_path, "r") as f:
+                model_dir = os.path.join(self.path, json.load(f)["model_name"])
+        else:
+            model_dir = self.path
+        meta_path = os.path.join(model_dir, META_FILE)
+        return model_dir, (model_dir, os.path.getmtime(meta_path) if os.path.exists(meta_path) else None)
+
+    def reload(self):
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if not self.path:
+                return
+            model_dir, version = self._resolve()
+            if version == self._version:
+                return
+            if self._version is not None:
+                logger.info(f"배포 모델이 바뀌어 lookup table을 다시 읽습니다: {self.model_dir} -> {model_dir}")
+                self.num_reloads += 1
+            # 새 모델의 테이블을 쓸 수 없으면 이전 모델의 테이블도 쓰지 않는다.
+            self.model_dir, self.table = model_dir, load_lookup_table(model_dir, self.feature_names, self.max_relative_error)
+            self._version = version
+
+    def get(self) -> Optional[PredictionLookupTable]:
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            try:
+                self.reload()
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"lookup table 확인 실패: {type(e).__name__}: {e}")
+        return self.table
+
+    def stats(self) -> Dict:
+        table = self.table
+        return {
+            "enabled": table is not None,
+            "model_dir": self.model_dir,
+            "num_reloads": self.num_reloads,
+            "table": table.meta if table is not None else None,
+        }
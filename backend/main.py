@@ -1,7 +1,13 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from typing import List
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
+import asyncio
 import os
+import threading
+
+import anyio
 
 from hydra import initialize, compose
 import uvicorn
@@ -9,16 +15,22 @@ import requests
 # from elasticapm.contrib.starlette import  ElasticAPM
 # from src.middleware.apm import apm
 
-from utils import preprocess_request_input, convert_prediction_input, postprocess_output, find_latest_file
+from utils import preprocess_request_input, preprocess_batch_request_input, postprocess_batch_output, request_features, convert_prediction_input, postprocess_output, to_predict_result, request_age, find_latest_file
 from schema import PetInfo, PetPredictResult
-from db_client import DBClient
+from db_client import DBClient, SQLiteDBClient
 # from src.middleware.exception import ExceptionHandlerMiddleware
-from summarize import Statistics
+from summarize import Statistics, age_in_years
 
 from retrieve import Retriever
 from preprocess import DataPreprocessPipeline
 
 from logger import configure_logger
+from warmup import load_warmup_requests, run_warmup
+from mlserver_client import MLServerClient, NoReplicaAvailableError
+from admission import AdmissionController, AdmissionMiddleware
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from lookup_table import DeployedLookupTable
+from request_recorder import RequestRecorder
 
 
 
@@ -27,7 +39,49 @@ logger = configure_logger(__name__)
 
 MLSERVER_URL = os.getenv('MLSERVER_URL', "http://localhost:8080")
 MLSERVER_ENDPOINT = os.getenv('MLSERVER_ENDPOINT',"/v2/models/petcare-prediction-serving/infer")
+# 쉼표로 구분된 replica 목록 (예: http://petcare-mlserver1:8080,http://petcare-mlserver2:8080)
+MLSERVER_REPLICAS = os.getenv('MLSERVER_REPLICAS', MLSERVER_URL).split(',')
+MLSERVER_MAX_OUTSTANDING = int(os.getenv('MLSERVER_MAX_OUTSTANDING', 32))
+MLSERVER_HEDGE = os.getenv('MLSERVER_HEDGE', 'false').lower() == 'true'
+MLSERVER_HEDGE_BUDGET_MS = float(os.getenv('MLSERVER_HEDGE_BUDGET_MS')) if os.getenv('MLSERVER_HEDGE_BUDGET_MS') else None # 없으면 관측된 p95 사용
+MLSERVER_TIMEOUT_SECONDS = float(os.getenv('MLSERVER_TIMEOUT_SECONDS', 3))
+MLSERVER_EJECT_SECONDS = float(os.getenv('MLSERVER_EJECT_SECONDS', 1)) # 실패한 replica 제외 시간 (연속 실패마다 2배, 최대 30초)
+
+ADMISSION_INITIAL_LIMIT = int(os.getenv('ADMISSION_INITIAL_LIMIT', 16))
+ADMISSION_MAX_LIMIT = int(os.getenv('ADMISSION_MAX_LIMIT', 64))
+ADMISSION_MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', 32))
+ADMISSION_MAX_QUEUE_WAIT_SECONDS = float(os.getenv('ADMISSION_MAX_QUEUE_WAIT_SECONDS', 0.5))
+ADMISSION_LATENCY_TARGET_MS = float(os.getenv('ADMISSION_LATENCY_TARGET_MS', 500))
+ADMISSION_PATHS = ['/predict', '/predict/batch']
+# 허용된 예측 요청(최대 ADMISSION_MAX_LIMIT개) 외에 /ready, /metrics 등이 쓸 threadpool 여유분
+THREADPOOL_RESERVE = int(os.getenv('THREADPOOL_RESERVE', 8))
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))
+CIRCUIT_RECOVERY_TIMEOUT_SECONDS = float(os.getenv('CIRCUIT_RECOVERY_TIMEOUT_SECONDS', 30))
+CIRCUIT_SLOW_CALL_MS = float(os.getenv('CIRCUIT_SLOW_CALL_MS', 2000))
+
+LOOKUP_TABLE_PATH = os.getenv('LOOKUP_TABLE_PATH', "") # 학습 결과 디렉토리(deployed.json을 따라 모델 교체 시 다시 읽음) 또는 모델 디렉토리(lookup_table.npy/json 위치)
+LOOKUP_TABLE_MAX_RELATIVE_ERROR = float(os.getenv('LOOKUP_TABLE_MAX_RELATIVE_ERROR', 0.05)) # 평균 예측값 대비 p99 근사 오차
+LOOKUP_TABLE_CHECK_INTERVAL_SECONDS = float(os.getenv('LOOKUP_TABLE_CHECK_INTERVAL_SECONDS', 10))
+REQUEST_FEATURE_NAMES = ["pet_breed_id", "gender", "neuter_yn", "weight_kg", "age"]
 MLFLOW_ARTIFACT_PATH= os.getenv('MLFLOW_ARTIFACT_PATH', "")
+PREPROCESS_PIPELINE_PATH = os.getenv('PREPROCESS_PIPELINE_PATH', 'light_gbm_regression_serving_20240618_041413.pkl')
+SPARSE_PREDICTION_INPUT = os.getenv('SPARSE_PREDICTION_INPUT', 'true').lower() == 'true' # 희소 전처리 결과를 CSR 그대로 MLServer로 전송
+
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql') # 로컬 벤치마크 시 sqlite
+SQLITE_DB_PATH = os.getenv('SQLITE_DB_PATH', 'petcare.db')
+
+CAPTURE_REQUESTS_PATH = os.getenv('CAPTURE_REQUESTS_PATH', "") # 지정하면 /predict 요청을 jsonl로 기록 (replay용)
+CAPTURE_MAX_QUEUE = int(os.getenv('CAPTURE_MAX_QUEUE', 10000))
+
+WARMUP_REQUESTS_PATH = os.getenv('WARMUP_REQUESTS_PATH', "warmup_requests.jsonl")
+WARMUP_NUM_REQUESTS = int(os.getenv('WARMUP_NUM_REQUESTS', 50))
+WARMUP_WINDOW = int(os.getenv('WARMUP_WINDOW', 10))
+WARMUP_TOLERANCE = float(os.getenv('WARMUP_TOLERANCE', 0.2))
+# 구간 중앙값이 WARMUP_STEADY_WINDOWS개 구간 이상 tolerance 안에서 유지되고, WARMUP_SLO_MS(설정 시) 이하여야 정상상태
+WARMUP_STEADY_WINDOWS = int(os.getenv('WARMUP_STEADY_WINDOWS', 3))
+WARMUP_SLO_MS = float(os.getenv('WARMUP_SLO_MS')) if os.getenv('WARMUP_SLO_MS') else None
+WARMUP_RETRY_SECONDS = float(os.getenv('WARMUP_RETRY_SECONDS', 5)) # 정상상태에 도달하지 못하면 이 간격으로 warm-up을 다시 수행
 
 
 @asynccontextmanager
@@ -35,7 +89,42 @@ async def lifespan(app: FastAPI):
     with initialize(config_path="./hydra"):
         app.cfg = compose(config_name="base.yaml")
         
-    db_client = DBClient(app.cfg.jobs.data.db)
+    app.mlserver_client = MLServerClient(
+        urls=MLSERVER_REPLICAS,
+        endpoint=MLSERVER_ENDPOINT,
+        max_outstanding=MLSERVER_MAX_OUTSTANDING,
+        hedge=MLSERVER_HEDGE,
+        hedge_budget_ms=MLSERVER_HEDGE_BUDGET_MS,
+        timeout=MLSERVER_TIMEOUT_SECONDS,
+        eject_seconds=MLSERVER_EJECT_SECONDS,
+    )
+    
+    # sync handler는 anyio threadpool(기본 40개)에서 실행된다. 허용된 요청이 모두 스레드를 받을 수 있도록 threadpool을 limit 상한에 맞춘다.
+    # (대기열의 요청은 이벤트 루프에서 기다리므로 스레드를 차지하지 않는다.)
+    thread_limiter = anyio.to_thread.current_default_thread_limiter()
+    thread_limiter.total_tokens = max(thread_limiter.total_tokens, ADMISSION_MAX_LIMIT + THREADPOOL_RESERVE)
+    
+    app.admission_controller = AdmissionController(
+        initial_limit=ADMISSION_INITIAL_LIMIT,
+        max_limit=ADMISSION_MAX_LIMIT,
+        max_queue=ADMISSION_MAX_QUEUE,
+        max_queue_wait=ADMISSION_MAX_QUEUE_WAIT_SECONDS,
+        latency_target_ms=ADMISSION_LATENCY_TARGET_MS,
+    )
+    
+    app.circuit_breaker = CircuitBreaker(
+        failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+        recovery_timeout=CIRCUIT_RECOVERY_TIMEOUT_SECONDS,
+        slow_call_ms=CIRCUIT_SLOW_CALL_MS,
+        # 모든 replica가 max_outstanding에 도달한 것은 MLServer 장애가 아니라 포화이므로 실패로 세지 않는다.
+        excluded_exceptions=(NoReplicaAvailableError,),
+    )
+    app.prediction_counts = {"total": 0, "fallback": 0, "lookup_table": 0}
+    app.lookup_table = DeployedLookupTable(LOOKUP_TABLE_PATH, REQUEST_FEATURE_NAMES, LOOKUP_TABLE_MAX_RELATIVE_ERROR,
+                                           check_interval=LOOKUP_TABLE_CHECK_INTERVAL_SECONDS)
+    app.prediction_counts_lock = threading.Lock()
+    
+    db_client = SQLiteDBClient(SQLITE_DB_PATH) if DB_BACKEND == 'sqlite' else DBClient(app.cfg.jobs.data.db)
     data_retriever = Retriever(db_client)
     app.data_retriever = data_retriever
     
@@ -53,6 +142,8 @@ async def lifespan(app: FastAPI):
     app.raw_df = app.data_retriever.retrieve_dataset(app.sql_query)
                                     #(app.cfg.jobs.data.details.date_from, app.cfg.jobs.data.details.date_to))
     app.breeds_categories_used_in_train = app.raw_df['pet_breed_id'].unique()
+    # MLServer 장애 시 반환할 견종x연령 평균 청구비
+    app.statistics = Statistics(app.raw_df.copy())
     
     logger.info(
         f"""
@@ -67,31 +158,216 @@ async def lifespan(app: FastAPI):
     
     # select latest
     # preprocess_pipeline_file_path = os.path.join(cwd, f"{model.name}_{now}")
-    preprocess_pipeline_file_path = 'light_gbm_regression_serving_20240618_041413.pkl' # find_latest_file(MLFLOW_ARTIFACT_PATH, 'pkl')# '/mlartifacts/523829024154061849/9df127f976bb4c68b4b11c69db6c5baa/artifacts/preprocess/light_gbm_regression_20240516_143950.pkl'
+    preprocess_pipeline_file_path = PREPROCESS_PIPELINE_PATH # find_latest_file(MLFLOW_ARTIFACT_PATH, 'pkl')# '/mlartifacts/523829024154061849/9df127f976bb4c68b4b11c69db6c5baa/artifacts/preprocess/light_gbm_regression_20240516_143950.pkl'
     logger.info(f'preprocess pipeline: {preprocess_pipeline_file_path}')
     app.data_preprocess_pipeline.load_pipeline(preprocess_pipeline_file_path)
     
+    # 첫 요청들의 지연(lazy load, 커넥션 생성 등)을 배포 직후 사용자에게 넘기지 않도록 준비 완료 전에 warm-up 수행
+    app.ready = False
+    app.warmup_report = None
+    app.warmup_attempts = 0
+    await anyio.to_thread.run_sync(try_warm_up, app)
+    # MLServer가 늦게 뜨는 등 첫 warm-up이 실패해도 준비 상태가 될 수 있도록 백그라운드에서 다시 시도한다.
+    warmup_task = None if app.ready else asyncio.create_task(keep_warming_up(app, WARMUP_RETRY_SECONDS))
+    
+    # warm-up 요청은 기록하지 않도록 warm-up 이후에 시작
+    app.request_recorder = RequestRecorder(CAPTURE_REQUESTS_PATH, max_queue=CAPTURE_MAX_QUEUE) if CAPTURE_REQUESTS_PATH else None
+    
     yield
     
+    if warmup_task is not None:
+        warmup_task.cancel()
+    if app.request_recorder is not None:
+        app.request_recorder.close()
+    
         
     
 
 app = FastAPI(lifespan=lifespan)
 # app.add_middleware(ExceptionHandlerMiddleware)
 # app.add_middleware(ElasticAPM, client=apm)
+# 예측 요청은 threadpool에 들어가기 전에 허용 여부를 정한다. (초과 시 503 + Retry-After)
+app.add_middleware(AdmissionMiddleware, paths=ADMISSION_PATHS)
 
     
     
-@app.post('/predict')
-def predict(requestInfo: PetInfo) -> PetPredictResult:
+def warm_up():
+    try:
+        warmup_requests = load_warmup_requests(WARMUP_REQUESTS_PATH, WARMUP_NUM_REQUESTS)
+    except FileNotFoundError:
+        logger.warning(f"warm-up 샘플 파일이 없습니다: {WARMUP_REQUESTS_PATH}")
+        return None
+
+    return run_warmup(
+        lambda request: infer_claim_price(PetInfo(**request)),
+        warmup_requests,
+        window=WARMUP_WINDOW,
+        tolerance=WARMUP_TOLERANCE,
+        min_windows=WARMUP_STEADY_WINDOWS,
+        slo_ms=WARMUP_SLO_MS,
+    )
+
+
+def try_warm_up(app: FastAPI):
+    app.warmup_attempts += 1
+    app.warmup_report = warm_up()
+    app.ready = app.warmup_report is None or app.warmup_report.steady
+    if not app.ready:
+        logger.warning(f"warm-up {app.warmup_attempts}회차에 정상상태에 도달하지 못했습니다: {app.warmup_report.to_dict()}")
+
+
+async def keep_warming_up(app: FastAPI, retry_seconds: float):
+    while not app.ready:
+        await asyncio.sleep(retry_seconds)
+        await anyio.to_thread.run_sync(try_warm_up, app)
+    logger.info(f"warm-up {app.warmup_attempts}회차에 준비 완료")
+
+
+def infer_claim_price(requestInfo: PetInfo) -> PetPredictResult:
     preprocessed_data = preprocess_request_input(app.breeds_categories_used_in_train, 
                                                  app.data_preprocess_pipeline,
                                                  requestInfo)
-    data = convert_prediction_input(preprocessed_data)
-    response = requests.post(MLSERVER_URL + MLSERVER_ENDPOINT, json = data)
-    output = postprocess_output(requestInfo, response)
+    data = convert_prediction_input(preprocessed_data, sparse=SPARSE_PREDICTION_INPUT)
+    with app.circuit_breaker.guard():
+        response = app.mlserver_client.infer(data)
+    return postprocess_output(requestInfo, response)
+
+
+def lookup_claim_price(requestInfo: PetInfo):
+    lookup_table = app.lookup_table.get()
+    if lookup_table is None:
+        return None
+    features = request_features(app.breeds_categories_used_in_train, app.data_preprocess_pipeline, requestInfo)
+    # 요청 피처의 age는 일 단위이므로 테이블에 기록된 단위로 바꾼다.
+    for feature, unit in lookup_table.age_units.items():
+        features[feature] = request_age(requestInfo, unit)
+    predicted_claim_price = lookup_table.lookup_request(features)
+    if predicted_claim_price is None:
+        return None
+    
+    with app.prediction_counts_lock:
+        app.prediction_counts["total"] += 1
+        app.prediction_counts["lookup_table"] += 1
+    return to_predict_result(requestInfo, predicted_claim_price)
+
+
+# MLServer를 쓸 수 없을 때 통계 기반 추정값으로 대신 응답하는 예외
+FALLBACK_EXCEPTIONS = (CircuitOpenError, NoReplicaAvailableError, requests.exceptions.RequestException)
+
+
+def estimate_claim_price(requestInfo: PetInfo):
+    # 통계는 DB age 컬럼(만 나이)으로 묶여 있으므로 같은 단위로 찾는다.
+    age = age_in_years(requestInfo.birth, requestInfo.created_at.date())
+    estimated_claim_price = app.statistics.average_price(requestInfo.pet_breed_id, age)
+    if estimated_claim_price is None:
+        return None
+    return to_predict_result(requestInfo, estimated_claim_price, is_fallback=True)
+
+
+def count_predictions(outputs: List[PetPredictResult]):
+    with app.prediction_counts_lock:
+        app.prediction_counts["total"] += len(outputs)
+        app.prediction_counts["fallback"] += sum(int(output.is_fallback) for output in outputs)
+
+
+def predict_claim_price(requestInfo: PetInfo) -> PetPredictResult:
+    # 예측 테이블에서 찾을 수 있는 견적은 MLServer를 거치지 않는다.
+    output = lookup_claim_price(requestInfo)
+    if output is not None:
+        return output
     
+    try:
+        output = infer_claim_price(requestInfo)
+    except FALLBACK_EXCEPTIONS as e:
+        output = estimate_claim_price(requestInfo)
+        if output is None:
+            raise
+        logger.warning(f"MLServer 추론 실패로 통계 기반 추정값을 반환합니다: {e}")
+    
+    count_predictions([output])
     return output
+
+
+def predict_batch_claim_price(requestInfos: List[PetInfo]) -> List[PetPredictResult]:
+    preprocessed_data = preprocess_batch_request_input(app.breeds_categories_used_in_train,
+                                                       app.data_preprocess_pipeline,
+                                                       requestInfos)
+    data = convert_prediction_input(preprocessed_data, sparse=SPARSE_PREDICTION_INPUT)
+    try:
+        with app.circuit_breaker.guard():
+            response = app.mlserver_client.infer(data)
+        outputs = postprocess_batch_output(requestInfos, response)
+    except FALLBACK_EXCEPTIONS as e:
+        # 단건 예측과 같이 통계 기반 추정값으로 대신 응답한다. 하나라도 추정할 수 없으면 원래 오류를 그대로 낸다.
+        outputs = [estimate_claim_price(requestInfo) for requestInfo in requestInfos]
+        if any(output is None for output in outputs):
+            raise
+        logger.warning(f"MLServer 배치 추론 실패로 통계 기반 추정값 {len(outputs)}건을 반환합니다: {e}")
+    
+    count_predictions(outputs)
+    return outputs
+
+
+@app.post('/predict')
+def predict(requestInfo: PetInfo) -> PetPredictResult:
+    if app.request_recorder is not None:
+        app.request_recorder.record('POST', '/predict', requestInfo.dict())
+    return predict_claim_price(requestInfo)
+
+
+@app.post('/predict/batch')
+def predict_batch(requestInfos: List[PetInfo]) -> List[PetPredictResult]:
+    return predict_batch_claim_price(requestInfos)
+
+
+@app.get('/ready')
+def ready():
+    report = app.warmup_report.to_dict() if app.warmup_report is not None else None
+    status_code = 200 if app.ready else 503
+    return JSONResponse(status_code=status_code, content={"ready": app.ready, "warmup_attempts": app.warmup_attempts, "warmup": report})
+
+
+@app.get('/metrics/mlserver')
+def mlserver_metrics():
+    return app.mlserver_client.stats()
+
+
+@app.get('/metrics/circuit_breaker')
+def circuit_breaker_metrics():
+    with app.prediction_counts_lock:
+        counts = dict(app.prediction_counts)
+    return {
+        **app.circuit_breaker.stats(),
+        "num_predictions": counts["total"],
+        "num_fallbacks": counts["fallback"],
+        "fallback_rate": counts["fallback"] / counts["total"] if counts["total"] else 0.0,
+    }
+
+
+@app.get('/metrics/lookup_table')
+def lookup_table_metrics():
+    with app.prediction_counts_lock:
+        counts = dict(app.prediction_counts)
+    return {
+        **app.lookup_table.stats(),
+        "num_predictions": counts["total"],
+        "num_hits": counts["lookup_table"],
+        "hit_rate": counts["lookup_table"] / counts["total"] if counts["total"] else 0.0,
+    }
+
+
+@app.get('/metrics/capture')
+def capture_metrics():
+    return {
+        "enabled": app.request_recorder is not None,
+        **(app.request_recorder.stats() if app.request_recorder is not None else {}),
+    }
+
+
+@app.get('/metrics/admission')
+async def admission_metrics():
+    # 이벤트 루프에서 갱신되는 값이므로 이벤트 루프에서 읽는다.
+    return app.admission_controller.stats()
     
 @app.get('/statistics') # cache 설정
 def statistics(breed_id: int):
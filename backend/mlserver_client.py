@@ -0,0 +1,180 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+import requests
+
+from logger import configure_logger
+
+logger = configure_logger(__name__)
+
+
+class NoReplicaAvailableError(Exception):
+
+    def __init__(self, message, errors = None):
+        super().__init__(message)
+        self.errors = errors
+
+
+@dataclass
+class Replica:
+    url: str
+    max_outstanding: int
+    ewma_latency_ms: Optional[float] = None
+    outstanding: int = 0
+    num_requests: int = 0
+    num_failures: int = 0
+    consecutive_failures: int = 0
+    # 연속으로 실패한 replica는 이 시각(time.monotonic)까지 선택하지 않는다.
+    ejected_until: float = 0.0
+
+    def ejected(self, now: float) -> bool:
+        return now < self.ejected_until
+
+    def score(self) -> float:
+        # 아직 지연시간 정보가 없는 replica는 먼저 시도해본다.
+        if self.ewma_latency_ms is None:
+            return 0.0
+        # 빨리 실패하는 replica가 지연시간이 짧아 보여 요청을 끌어가지 않도록 연속 실패 수만큼 불리하게 둔다.
+        return self.ewma_latency_ms * (self.outstanding + 1) * (1 + self.consecutive_failures)
+
+
+class MLServerClient:
+    """
+    여러 MLServer replica 중 EWMA 지연시간과 처리중인 요청 수가 가장 작은 replica로 요청을 보낸다.
+    hedge가 켜져 있으면 첫 요청이 p95 예산을 넘길 때 다른 replica로 한 번 더 요청하고, 먼저 도착한 응답을 사용한다.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        endpoint: str,
+        max_outstanding: int = 32,
+        ewma_alpha: float = 0.3,
+        hedge: bool = False,
+        hedge_budget_ms: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        timeout: float = 10.0,
+        eject_seconds: float = 1.0,
+        max_eject_seconds: float = 30.0,
+    ):
+        self.replicas = [Replica(url=url.rstrip("/"), max_outstanding=max_outstanding) for url in urls]
+        self.endpoint = endpoint
+        self.ewma_alpha = ewma_alpha
+        self.hedge = hedge
+        self.hedge_budget_ms = hedge_budget_ms
+        self.hedge_min_samples = hedge_min_samples
+        self.timeout = timeout
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+
+        self.num_hedged = 0
+        self._latencies_ms = deque(maxlen=1000)
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_outstanding * len(self.replicas)))
+
+    def _acquire(self, exclude=()) -> Replica:
+        with self._lock:
+            candidates = [
+                r for r in self.replicas
+                if r not in exclude and r.outstanding < r.max_outstanding
+            ]
+            now = time.monotonic()
+            # 제외 기간이 끝나지 않은 replica는 다른 replica가 모두 제외됐을 때만 시도한다.
+            candidates = [r for r in candidates if not r.ejected(now)] or candidates
+            if not candidates:
+                raise NoReplicaAvailableError(message="요청을 처리할 수 있는 MLServer replica가 없습니다.")
+            replica = min(candidates, key=lambda r: r.score())
+            replica.outstanding += 1
+            return replica
+
+    def _release(self, replica: Replica, latency_ms: float, failed: bool):
+        with self._lock:
+            replica.outstanding -= 1
+            replica.num_requests += 1
+            if failed:
+                # 실패한 요청의 지연시간은 EWMA와 hedge 예산(p95)에 반영하지 않고, 연속 실패 수에 따라 제외 기간을 늘린다.
+                replica.num_failures += 1
+                replica.consecutive_failures += 1
+                eject_seconds = min(self.eject_seconds * 2 ** (replica.consecutive_failures - 1), self.max_eject_seconds)
+                replica.ejected_until = time.monotonic() + eject_seconds
+                logger.warning(f"{replica.url} 요청 실패 {replica.consecutive_failures}회 연속: {eject_seconds:.1f}초 제외")
+                return
+            replica.consecutive_failures = 0
+            if replica.ewma_latency_ms is None:
+                replica.ewma_latency_ms = latency_ms
+            else:
+                replica.ewma_latency_ms = (
+                    self.ewma_alpha * latency_ms + (1 - self.ewma_alpha) * replica.ewma_latency_ms
+                )
+            self._latencies_ms.append(latency_ms)
+
+    def _send(self, replica: Replica, payload: dict) -> requests.Response:
+        started_at = time.perf_counter()
+        failed = True
+        try:
+            response = self._session.post(replica.url + self.endpoint, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            failed = False
+            return response
+        finally:
+            self._release(replica, (time.perf_counter() - started_at) * 1000, failed)
+
+    def hedge_budget_seconds(self) -> Optional[float]:
+        if self.hedge_budget_ms is not None:
+            return self.hedge_budget_ms / 1000
+        with self._lock:
+            if len(self._latencies_ms) < self.hedge_min_samples:
+                return None
+            return float(np.percentile(self._latencies_ms, 95)) / 1000
+
+    def infer(self, payload: dict) -> requests.Response:
+        primary = self._acquire()
+        if not self.hedge or len(self.replicas) < 2:
+            return self._send(primary, payload)
+
+        futures = [self._executor.submit(self._send, primary, payload)]
+        done, _ = wait(futures, timeout=self.hedge_budget_seconds())
+        if not done:
+            try:
+                secondary = self._acquire(exclude=(primary,))
+                futures.append(self._executor.submit(self._send, secondary, payload))
+                with self._lock:
+                    self.num_hedged += 1
+                logger.info(f"hedged request: {primary.url} -> {secondary.url}")
+            except NoReplicaAvailableError:
+                pass
+
+        # 먼저 성공한 응답을 사용하고, 모두 실패하면 마지막 예외를 그대로 올린다.
+        pending, error = set(futures), None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "num_hedged": self.num_hedged,
+                "replicas": [
+                    {
+                        "url": r.url,
+                        "ewma_latency_ms": r.ewma_latency_ms,
+                        "outstanding": r.outstanding,
+                        "max_outstanding": r.max_outstanding,
+                        "num_requests": r.num_requests,
+                        "num_failures": r.num_failures,
+                        "consecutive_failures": r.consecutive_failures,
+                        "ejected": r.ejected(time.monotonic()),
+                    }
+                    for r in self.replicas
+                ],
+            }
@@ -11,9 +11,10 @@ from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
+from sklearn.preprocessing import MinMaxScaler, OneHotEncoder, OrdinalEncoder
 
 from logger import configure_logger
+from preprocess_artifact import PreprocessArtifact
 
 logger = configure_logger(__name__)
 
@@ -86,11 +87,19 @@ class BasePreprocessPipeline(ABC, BaseEstimator, TransformerMixin):
 class DataPreprocessPipeline(BasePreprocessPipeline):
     def __init__(self):
         self.pipeline: Union[Pipeline, ColumnTransformer] = None
+        # 학습 파이프라인이 저장한 json/npz 전처리. 있으면 pipeline 대신 사용한다.
+        self.artifact: PreprocessArtifact = None
 
         self.categorical_columns = ["pet_breed_id", "gender", "neuter_yn"]
         self.numerical_columns = ["age", "weight"]
 
-    def define_pipeline(self):
+    def define_pipeline(self, categorical_handling: str = "one_hot"):
+        # native: 범주를 one-hot으로 펼치지 않고 정수 코드로 내보낸다. (LightGBM categorical_feature, 처음 보는 범주는 -1)
+        if categorical_handling == "native":
+            encoder = ("ordinal_encoder", OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1))
+        else:
+            encoder = ("one_hot_encoder", OneHotEncoder(handle_unknown="ignore"))
+        self.categorical_handling = categorical_handling
         self.categorical_pipeline = Pipeline(
             [
                 (
@@ -99,7 +108,7 @@ class DataPreprocessPipeline(BasePreprocessPipeline):
                         missing_values=np.nan, strategy="constant", fill_value=None
                     ),
                 ),
-                ("one_hot_encoder", OneHotEncoder(handle_unknown="ignore")),
+                encoder,
             ]
         )
 
@@ -151,7 +160,18 @@ class DataPreprocessPipeline(BasePreprocessPipeline):
         return self
 
     def transform(self, x):
+        if self.artifact is not None:
+            return self.artifact.transform(x)
         return self.pipeline.transform(x)
+
+    @property
+    def categorical_feature_indices(self) -> list:
+        """정수 코드로 내보내는 범주 feature 위치. (one-hot이면 빈 목록)"""
+        if self.artifact is not None:
+            return self.artifact.categorical_feature_indices
+        if getattr(self, "categorical_handling", "one_hot") == "native":
+            return list(range(len(self.categorical_columns)))
+        return []
         
 
     def fit_transform(self, x):
@@ -165,7 +185,12 @@ class DataPreprocessPipeline(BasePreprocessPipeline):
         return file_path
 
     def load_pipeline(self, file_path: str):
-        
+        # 학습 파이프라인이 json/npz로 저장한 전처리가 있으면 그것을 쓰고, 없으면 기존 pkl을 읽는다.
+        file, _ = os.path.splitext(file_path)
+        if os.path.exists(f"{file}.json"):
+            self.artifact = PreprocessArtifact.load(file_path)
+            logger.info(f"전처리 artifact 로드: feature {len(self.artifact.feature_names)}개, 범주 feature 위치 {self.artifact.categorical_feature_indices}")
+            return
         self.pipeline = load(file_path)
 
     def inverse_transform(self, df):
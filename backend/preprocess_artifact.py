@@ -0,0 +1,147 @@
+"""
+학습 파이프라인(pipeline/src/preprocess_artifact.py)이 저장한 전처리 파이프라인({name}.json + {name}.npz)을 읽어 변환만 수행합니다.
+
+sklearn 객체를 unpickle하지 않고 NumPy로 같은 변환을 하며, native로 인코딩한 범주 컬럼은 one-hot으로 펼치지 않고
+정수 코드 한 칸으로 내보내므로 MLServer로 보내는 feature 벡터가 견종 수와 관계없이 짧다.
+전처리 설정의 sparse_output에 따라 one-hot 결과를 CSR 행렬로 반환하며, 이 경우 0이 아닌 값만 MLServer로 보낸다. (utils.convert_prediction_input)
+"""
+import json
+import os
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+FORMAT_VERSION = 1
+# 학습 파이프라인과 같은 기준 (sparse_output == "auto")
+SPARSE_DENSITY_THRESHOLD = 0.3
+
+
+def _categories(values: np.ndarray, categories: np.ndarray, kind: str) -> np.ndarray:
+    """값마다 범주 목록에서의 위치를 반환합니다. 목록에 없는 값은 -1."""
+    if kind == "str":
+        values = values.astype(str)
+    return pd.Categorical(values, categories=categories).codes
+
+
+def _hstack_csr(blocks: List, num_rows: int) -> sp.csr_matrix:
+    """컬럼 블록(dense 또는 CSR)의 0이 아닌 값만 모아 CSR 하나로 합칩니다."""
+    rows, cols, data, offset = [], [], [], 0
+    for block in blocks:
+        if sp.issparse(block):
+            block = block.tocoo()
+            block_rows, block_cols, block_data = block.row, block.col, block.data
+        else:
+            block = np.asarray(block, dtype=np.float64)
+            block_rows, block_cols = np.nonzero(block)
+            block_data = block[block_rows, block_cols]
+        rows.append(block_rows)
+        cols.append(block_cols + offset)
+        data.append(block_data)
+        offset += block.shape[1]
+    return sp.csr_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))), shape=(num_rows, offset))
+
+
+class PreprocessArtifact:
+    def __init__(self, spec: Dict, arrays: Dict[str, np.ndarray]):
+        self.spec = spec
+        self.arrays = arrays
+
+    @property
+    def config(self) -> Dict:
+        return self.spec.get("config", {})
+
+    @property
+    def feature_names(self) -> List[str]:
+        return self.spec["feature_names"]
+
+    @property
+    def input_columns(self) -> List[str]:
+        return [column["name"] for column in self.spec["columns"]]
+
+    def _width(self, column: Dict) -> int:
+        one_hot = [step for step in column["steps"] if step["op"] == "one_hot"]
+        return len(self.arrays[one_hot[-1]["categories"]["key"]]) if one_hot else 1
+
+    @property
+    def width(self) -> int:
+        return sum(self._width(column) for column in self.spec["columns"])
+
+    @property
+    def sparse_output(self) -> bool:
+        sparse_output = self.config.get("sparse_output", False)
+        if sparse_output == "auto":
+            return self.width > 0 and len(self.spec["columns"]) / self.width < SPARSE_DENSITY_THRESHOLD
+        return bool(sparse_output)
+
+    @property
+    def categorical_feature_indices(self) -> List[int]:
+        """native 범주 컬럼(정수 코드)의 출력 feature 위치."""
+        indices, offset = [], 0
+        for column in self.spec["columns"]:
+            if column.get("categorical"):
+                indices.append(offset)
+            offset += self._width(column)
+        return indices
+
+    @classmethod
+    def load(cls, file_path: str) -> "PreprocessArtifact":
+        file, _ = os.path.splitext(file_path)
+        with open(f"{file}.json", "r", encoding="utf-8") as f:
+            spec = json.load(f)
+        if spec.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 전처리 형식 버전입니다: {spec.get('format_version')}")
+        with np.load(f"{file}.npz", allow_pickle=False) as npz:
+            arrays = {key: npz[key] for key in npz.files}
+        return cls(spec, arrays)
+
+    def _transform_column(self, values: np.ndarray, steps: List[Dict], sparse: bool = False):
+        for step in steps:
+            op = step["op"]
+            if op == "impute":
+                fill = self.arrays[step["fill"]["key"]][0]
+                if step["fill"]["kind"] == "str":
+                    values = np.where(values != values, fill, values)
+                else:
+                    values = np.asarray(values, dtype=np.float64)
+                    values = np.where(np.isnan(values), fill, values)
+            elif op == "minmax":
+                values = np.asarray(values, dtype=np.float64) * self.arrays[step["scale"]["key"]][0]
+                values = values + self.arrays[step["min"]["key"]][0]
+            elif op == "standard":
+                values = np.asarray(values, dtype=np.float64) - self.arrays[step["mean"]["key"]][0]
+                values = values / self.arrays[step["scale"]["key"]][0]
+            elif op == "log1p":
+                values = np.log1p(np.asarray(values, dtype=np.float64))
+            elif op == "one_hot":
+                categories = self.arrays[step["categories"]["key"]]
+                codes = _categories(values, categories, step["categories"]["kind"])
+                known = codes >= 0
+                if sparse:
+                    rows = np.flatnonzero(known)
+                    return sp.csr_matrix(
+                        (np.ones(len(rows), dtype=np.float64), (rows, codes[known])), shape=(len(values), len(categories)),
+                    )
+                one_hot = np.zeros((len(values), len(categories)), dtype=np.float64)
+                one_hot[np.flatnonzero(known), codes[known]] = 1.0
+                values = one_hot
+            elif op == "ordinal":
+                categories = self.arrays[step["categories"]["key"]]
+                codes = _categories(values, categories, step["categories"]["kind"]).astype(np.float64)
+                values = np.where(codes >= 0, codes, step["unknown_value"])
+            else:
+                raise ValueError(f"알 수 없는 전처리 단계입니다: {op}")
+        return np.asarray(values).reshape(len(values), -1)
+
+    def transform(self, x: pd.DataFrame):
+        sparse = self.sparse_output
+        blocks = [
+            self._transform_column(x[column["name"]].to_numpy(), column["steps"], sparse)
+            for column in self.spec["columns"]
+        ]
+        if not blocks:
+            return np.empty((len(x), 0), dtype=np.float64)
+        if sparse:
+            return _hstack_csr(blocks, len(x))
+        return np.hstack(blocks)
@@ -0,0 +1,68 @@
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+
+from logger import configure_logger
+
+logger = configure_logger(__name__)
+
+
+class RequestRecorder:
+    """
+    들어온 요청을 jsonl 파일로 기록한다. 요청 처리 스레드는 큐에 넣기만 하고(non-blocking),
+    파일 쓰기는 별도 스레드가 맡는다. 큐가 가득 차면 요청을 기다리게 하지 않고 기록을 버린다.
+    각 줄은 load_test/benchmark 의 replay 명령에서 그대로 재생할 수 있는 형식이다.
+    """
+
+    def __init__(self, file_path: str, max_queue: int = 10000, flush_interval: float = 1.0):
+        self.file_path = file_path
+        self.flush_interval = flush_interval
+        self.num_recorded = 0
+        self.num_dropped = 0
+        self._started_at = time.monotonic()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def record(self, method: str, path: str, body: dict):
+        line = {
+            "offset": time.monotonic() - self._started_at,
+            "recorded_at": datetime.now().isoformat(),
+            "method": method,
+            "path": path,
+            "body": body,
+        }
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.num_dropped += 1
+
+    def _write_loop(self):
+        with open(self.file_path, "a", encoding="utf-8") as f:
+            last_flushed_at = time.monotonic()
+            while not (self._stop.is_set() and self._queue.empty()):
+                try:
+                    line = self._queue.get(timeout=self.flush_interval)
+                    f.write(json.dumps(line, ensure_ascii=False, default=str) + "\n")
+                    self.num_recorded += 1
+                except queue.Empty:
+                    pass
+                if time.monotonic() - last_flushed_at >= self.flush_interval:
+                    f.flush()
+                    last_flushed_at = time.monotonic()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        logger.info(f"요청 기록 종료: {self.file_path} (기록 {self.num_recorded}, 누락 {self.num_dropped})")
+
+    def stats(self) -> dict:
+        return {
+            "file_path": self.file_path,
+            "num_recorded": self.num_recorded,
+            "num_dropped": self.num_dropped,
+            "queue_size": self._queue.qsize(),
+        }
@@ -26,3 +26,4 @@ class PetPredictResult(BaseModel):
     neuter_yn: str
     weight_kg: float
     predicted_claim_price: float
+    is_fallback: bool = False # MLServer 대신 통계 기반 추정값을 반환한 경우
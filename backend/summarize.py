@@ -1,3 +1,6 @@
+from datetime import date
+from typing import Optional
+
 import pandas as pd
 
 
@@ -9,10 +12,16 @@ class BreedInfoNotFoundError(Exception):
         
 
 
+def age_in_years(birth: date, at: date) -> int:
+    # DB age 컬럼과 같은 만 나이(년). average_price의 연령 키와 응답의 age에 같이 사용한다.
+    return at.year - birth.year - ((at.month, at.day) < (birth.month, birth.day))
+
 
 class Statistics:
     def __init__(self, df):
         df['claim_price'] = df['claim_price'].astype(float)
+        self.price_groupby_breed = df.groupby('pet_breed_id')['claim_price'].mean()
+        self.overall_average_price = df['claim_price'].mean()
         self.df = df.groupby(['pet_breed_id', 'age'])
         self.price_groupby_breed_and_age = self.df['claim_price'].mean()
         self.most_common_diseases_groupby_breed_and_age = self.df['disease_name'].agg(lambda x: x.mode()[0])
@@ -27,6 +36,16 @@ class Statistics:
     def most_common_disease_by_breed_and_age(self, breed):
         return self.to_dict(self.most_common_diseases_groupby_breed_and_age[breed])
     
+    def average_price(self, breed, age) -> Optional[float]:
+        # 견종x연령 평균 -> 견종 평균 -> 전체 평균 순으로 사용
+        if (breed, age) in self.price_groupby_breed_and_age.index:
+            return float(self.price_groupby_breed_and_age[(breed, age)])
+        if breed in self.price_groupby_breed.index:
+            return float(self.price_groupby_breed[breed])
+        if pd.notna(self.overall_average_price):
+            return float(self.overall_average_price)
+        return None
+    
     def aggregate_stat(self, breed):
         try:
             avg_price = self.average_price_change_by_breed_and_age(breed)
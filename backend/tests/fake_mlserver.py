@@ -0,0 +1,64 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeMLServer:
+    """
+    테스트용 로컬 MLServer. V2 추론 응답을 흉내내며 지연시간과 에러를 주입할 수 있다.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, prediction: float = 123456.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.prediction = prediction
+        self.num_requests = 0
+        self._lock = threading.Lock()
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with fake._lock:
+                    fake.num_requests += 1
+                latency = fake.latency() if callable(fake.latency) else fake.latency
+                time.sleep(latency)
+
+                if random.random() < fake.error_rate:
+                    self.send_response(500)
+                    self.end_headers()
+                    return
+
+                batch_size = len(json.loads(body)["inputs"][0]["data"]) if body else 1
+                content = json.dumps({
+                    "outputs": [{
+                        "name": "predict",
+                        "shape": [batch_size, 1],
+                        "datatype": "FP64",
+                        "data": [fake.prediction] * batch_size,
+                    }]
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,183 @@
+import asyncio
+import threading
+import time
+
+import anyio
+import httpx
+import pytest
+
+import main
+from admission import AdmissionController, OverloadError
+from schema import PetPredictResult
+
+CAPACITY = 4
+SERVICE_TIME = 0.02
+CLIENT_DEADLINE = 0.25
+# anyio 기본 threadpool(40개)을 축소한 크기. 처리 용량보다 많은 요청이 threadpool에 들어가면 전부 느려진다.
+THREADPOOL_SIZE = 8
+REQUEST = {"pet_breed_id": 1224, "birth": "2014-07-21", "gender": "남자", "neuter_yn": "y", "weight_kg": 24.9}
+
+
+class SaturatingMLServer:
+    '''
+    동시 요청 수가 capacity를 넘으면 처리시간이 비례해서 늘어나는 MLServer 흉내. predict_claim_price 대신 호출된다.
+    '''
+
+    def __init__(self, service_time: float = SERVICE_TIME):
+        self.service_time = service_time
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def predict(self, requestInfo) -> PetPredictResult:
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            load = self.in_flight
+        time.sleep(self.service_time * max(1.0, load / CAPACITY))
+        with self._lock:
+            self.in_flight -= 1
+        return PetPredictResult(pet_breed_id=requestInfo.pet_breed_id, age=9, gender=requestInfo.gender,
+                                neuter_yn=requestInfo.neuter_yn, weight_kg=requestInfo.weight_kg, predicted_claim_price=1.0)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = SaturatingMLServer()
+    monkeypatch.setattr(main, "predict_claim_price", server.predict)
+    monkeypatch.setattr(main.app, "request_recorder", None, raising=False)
+    return server
+
+
+async def post_predictions(admission: AdmissionController, rate: float, num_requests: int):
+    '''
+    실제 backend app에 ASGI로 고정 도착률 요청을 보내고, (응답, 도착 후 응답까지 걸린 시간) 목록을 반환한다.
+    '''
+    main.app.admission_controller = admission
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://backend") as client:
+
+        async def request(scheduled_at):
+            response = await client.post("/predict", json=REQUEST)
+            return response, time.perf_counter() - scheduled_at
+
+        started_at = time.perf_counter()
+        tasks = []
+        for i in range(num_requests):
+            scheduled_at = started_at + i / rate
+            await asyncio.sleep(max(0.0, scheduled_at - time.perf_counter()))
+            tasks.append(asyncio.create_task(request(scheduled_at)))
+        return await asyncio.gather(*tasks)
+
+
+def goodput(results, duration: float) -> float:
+    # 클라이언트 deadline 안에 성공한 요청의 초당 처리량
+    return sum(1 for response, elapsed in results if response.status_code == 200 and elapsed <= CLIENT_DEADLINE) / duration
+
+
+def test_goodput_stays_flat_at_twice_capacity(server):
+    capacity_rps = CAPACITY / SERVICE_TIME
+    duration = 1.0
+
+    def controller():
+        return AdmissionController(initial_limit=CAPACITY, max_limit=THREADPOOL_SIZE, max_queue=CAPACITY,
+                                   max_queue_wait=0.05, latency_target_ms=SERVICE_TIME * 1000 * 1.5)
+
+    at_capacity = asyncio.run(post_predictions(controller(), capacity_rps, int(capacity_rps * duration)))
+    overloaded = asyncio.run(post_predictions(controller(), capacity_rps * 2, int(capacity_rps * 2 * duration)))
+    # admission 없이(limit 무제한) threadpool에서 대기하는 경우
+    uncontrolled = asyncio.run(post_predictions(AdmissionController(initial_limit=10**6, max_limit=10**6),
+                                                capacity_rps * 2, int(capacity_rps * 2 * duration)))
+
+    assert goodput(overloaded, duration) >= goodput(at_capacity, duration) * 0.7
+    assert goodput(overloaded, duration) > goodput(uncontrolled, duration)
+    assert any(response.status_code == 503 for response, _ in overloaded)
+
+
+def test_rejects_before_threadpool_with_retry_after(server):
+    # 허용된 요청이 threadpool을 모두 차지해도 나머지 요청은 스레드를 기다리지 않고 바로 거절된다.
+    server.service_time = 0.3
+    admission = AdmissionController(initial_limit=THREADPOOL_SIZE, max_limit=THREADPOOL_SIZE, max_queue=0)
+
+    results = asyncio.run(post_predictions(admission, rate=1000, num_requests=THREADPOOL_SIZE * 3))
+
+    rejected = [(response, elapsed) for response, elapsed in results if response.status_code == 503]
+    assert len(rejected) == THREADPOOL_SIZE * 2
+    assert all(elapsed < 0.1 for _, elapsed in rejected)
+    assert all(int(response.headers["Retry-After"]) >= 1 for response, _ in rejected)
+    assert server.max_in_flight <= THREADPOOL_SIZE
+    assert admission.stats()["num_rejected"] == THREADPOOL_SIZE * 2
+    assert admission.in_flight == 0
+
+
+def test_rejects_fast_with_retry_after_when_queue_is_full():
+    admission = AdmissionController(initial_limit=1, max_queue=0)
+
+    async def run():
+        async with admission.acquire():
+            started_at = time.perf_counter()
+            with pytest.raises(OverloadError) as e:
+                async with admission.acquire():
+                    pass
+            assert time.perf_counter() - started_at < 0.05
+        return e.value
+
+    error = asyncio.run(run())
+
+    assert error.retry_after >= 1
+    assert admission.stats()["num_rejected"] == 1
+
+
+def test_decreases_once_per_latency_window():
+    admission = AdmissionController(initial_limit=10, max_limit=10, latency_target_ms=None)
+
+    async def fail(started: asyncio.Event, release: asyncio.Event):
+        with pytest.raises(RuntimeError):
+            async with admission.acquire():
+                started.set()
+                await release.wait()
+                raise RuntimeError("mlserver down")
+
+    async def run():
+        # 같은 구간에 실행된 요청 5개가 모두 실패해도 limit은 한 번만 줄인다.
+        release = asyncio.Event()
+        events = [asyncio.Event() for _ in range(5)]
+        tasks = [asyncio.create_task(fail(started, release)) for started in events]
+        await asyncio.gather(*(started.wait() for started in events))
+        release.set()
+        await asyncio.gather(*tasks)
+        assert admission.limit == pytest.approx(9.0)
+
+        # 감소 이후에 시작한 요청이 실패하면 다시 줄인다.
+        release = asyncio.Event()
+        release.set()
+        await fail(asyncio.Event(), release)
+        assert admission.limit == pytest.approx(8.1)
+
+    asyncio.run(run())
+
+
+def test_wakes_every_waiter_when_limit_increases():
+    admission = AdmissionController(initial_limit=1, max_limit=4, max_queue_wait=0.5)
+
+    async def run():
+        admitted = []
+        release = asyncio.Event()
+
+        async def wait_in_queue(i):
+            async with admission.acquire():
+                admitted.append(i)
+                await release.wait()
+
+        async with admission.acquire():
+            waiters = [asyncio.create_task(wait_in_queue(i)) for i in range(2)]
+            while admission.waiting < 2:
+                await asyncio.sleep(0)
+        # 첫 요청이 성공하면 limit이 1 -> 2가 되어 반환된 슬롯과 새로 생긴 슬롯에 대기 요청 2개가 모두 들어간다.
+        await asyncio.sleep(0.05)
+        assert sorted(admitted) == [0, 1]
+        release.set()
+        await asyncio.gather(*waiters)
+
+    asyncio.run(run())
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+import requests
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+from mlserver_client import MLServerClient, NoReplicaAvailableError
+from summarize import Statistics
+from tests.fake_mlserver import FakeMLServer
+
+ENDPOINT = "/v2/models/petcare-prediction-serving/infer"
+PAYLOAD = {"inputs": [{"name": "pet_info", "shape": [1, 3], "datatype": "FP32", "data": [[0.0, 1.0, 0.5]]}]}
+
+
+def call(breaker: CircuitBreaker, client: MLServerClient):
+    with breaker.guard():
+        return client.infer(PAYLOAD)
+
+
+def test_breaker_opens_on_errors_and_recovers():
+    with FakeMLServer(error_rate=1.0) as server:
+        client = MLServerClient(urls=[server.url], endpoint=ENDPOINT)
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=0.2)
+
+        for _ in range(3):
+            with pytest.raises(requests.exceptions.HTTPError):
+                call(breaker, client)
+        assert breaker.state == CircuitState.OPEN
+
+        # OPEN 상태에서는 MLServer를 호출하지 않고 바로 차단한다.
+        started_at = time.perf_counter()
+        with pytest.raises(CircuitOpenError):
+            call(breaker, client)
+        assert time.perf_counter() - started_at < 0.05
+        assert server.num_requests == 3
+
+        server.error_rate = 0.0
+        time.sleep(0.25)
+        assert call(breaker, client).status_code == 200
+
+    assert breaker.state == CircuitState.CLOSED
+    assert [(t["from"], t["to"]) for t in breaker.stats()["transitions"]] == [
+        ("closed", "open"),
+        ("open", "half_open"),
+        ("half_open", "closed"),
+    ]
+
+
+def test_breaker_opens_on_slow_mlserver():
+    with FakeMLServer(latency=0.3) as server:
+        client = MLServerClient(urls=[server.url], endpoint=ENDPOINT, timeout=0.1)
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+
+        for _ in range(2):
+            with pytest.raises(requests.exceptions.Timeout):
+                call(breaker, client)
+
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.stats()["num_failures"] == 2
+
+
+def test_saturated_replicas_do_not_open_breaker():
+    # replica가 모두 max_outstanding에 도달해 거절된 호출은 MLServer 장애가 아니므로 실패로 세지 않는다. (main.py와 같은 설정)
+    with FakeMLServer(latency=0.3) as server:
+        client = MLServerClient(urls=[server.url], endpoint=ENDPOINT, max_outstanding=1)
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60, excluded_exceptions=(NoReplicaAvailableError,))
+
+        in_flight = threading.Thread(target=call, args=(breaker, client))
+        in_flight.start()
+        time.sleep(0.1)
+        for _ in range(3):
+            with pytest.raises(NoReplicaAvailableError):
+                call(breaker, client)
+        in_flight.join()
+
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.stats()["num_failures"] == 0
+    assert server.num_requests == 1
+
+
+def test_fallback_estimate_from_breed_and_age_average():
+    stat = Statistics(pd.DataFrame({
+        "pet_breed_id": [1144, 1144, 1144, 1121],
+        "age": [3, 3, 5, 3],
+        "claim_price": [100000, 200000, 400000, 50000],
+        "disease_name": ["a", "a", "b", "c"],
+    }))
+
+    assert stat.average_price(1144, 3) == 150000
+    assert stat.average_price(1144, 7) == pytest.approx(700000 / 3)
+    assert stat.average_price(9999, 3) == 187500
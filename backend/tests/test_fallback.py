@@ -0,0 +1,97 @@
+import sqlite3
+import threading
+from datetime import date, datetime
+
+import pytest
+
+import main
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from db_client import SQLiteDBClient
+from lookup_table import DeployedLookupTable
+from retrieve import Retriever
+from schema import PetInfo
+from summarize import Statistics
+
+ROWS = [
+    # pet_breed_id, birth, age(만 나이), gender, neuter_yn, weight_kg, claim_price, disease_name
+    (7, "2020-01-10", 3, "남자", "y", 5.0, 30000, "피부염"),
+    (7, "2019-06-01", 3, "여자", "n", 4.0, 32000, "피부염"),
+    (7, "2019-01-01", 4, "남자", "y", 6.0, 90000, "슬개골 탈구"),
+    (8, "2018-01-01", 5, "여자", "y", 9.0, 50000, "장염"),
+]
+
+
+@pytest.fixture
+def statistics(tmp_path):
+    db_path = str(tmp_path / "petcare.db")
+    connection = sqlite3.connect(db_path)
+    connection.execute(
+        "CREATE TABLE pet_insurance_claim_ml_fake_data "
+        "(pet_breed_id INTEGER, birth TEXT, age INTEGER, gender TEXT, neuter_yn TEXT, weight_kg REAL, claim_price INTEGER, disease_name TEXT)"
+    )
+    connection.executemany("INSERT INTO pet_insurance_claim_ml_fake_data VALUES (?, ?, ?, ?, ?, ?, ?, ?)", ROWS)
+    connection.commit()
+    connection.close()
+
+    raw_df = Retriever(SQLiteDBClient(db_path)).retrieve_dataset(
+        "SELECT pet_breed_id, birth, age, gender, neuter_yn, weight_kg, claim_price, disease_name FROM pet_insurance_claim_ml_fake_data;"
+    )
+    return Statistics(raw_df)
+
+
+@pytest.fixture
+def app_with_open_circuit(monkeypatch, statistics):
+    def infer_claim_price(requestInfo):
+        raise CircuitOpenError("circuit open")
+
+    monkeypatch.setattr(main, "infer_claim_price", infer_claim_price)
+    monkeypatch.setattr(main.app, "statistics", statistics, raising=False)
+    monkeypatch.setattr(main.app, "lookup_table", DeployedLookupTable("", main.REQUEST_FEATURE_NAMES, 0.05), raising=False)
+    monkeypatch.setattr(main.app, "prediction_counts", {"total": 0, "fallback": 0, "lookup_table": 0}, raising=False)
+    monkeypatch.setattr(main.app, "prediction_counts_lock", threading.Lock(), raising=False)
+    return main.app
+
+
+def test_fallback_uses_db_age_bucket(app_with_open_circuit):
+    # 만 3세 11개월(1456일). 30일 x 12개월 단위로 나누면 4세가 되어 다른 구간의 평균을 반환한다.
+    request = PetInfo(pet_breed_id=7, birth=date(2020, 1, 10), gender="남자", neuter_yn="y", weight_kg=5.0,
+                      created_at=datetime(2024, 1, 5))
+
+    output = main.predict_claim_price(request)
+
+    assert output.is_fallback
+    assert output.age == 3
+    assert output.predicted_claim_price == 31000
+    assert app_with_open_circuit.prediction_counts == {"total": 1, "fallback": 1, "lookup_table": 0}
+
+
+def test_fallback_falls_back_to_breed_average_for_unseen_age(app_with_open_circuit):
+    request = PetInfo(pet_breed_id=8, birth=date(2023, 6, 1), gender="여자", neuter_yn="y", weight_kg=3.0,
+                      created_at=datetime(2024, 6, 1))
+
+    output = main.predict_claim_price(request)
+
+    assert output.age == 1
+    assert output.predicted_claim_price == 50000
+
+
+def test_batch_fallback_when_circuit_open(app_with_open_circuit, monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+    with pytest.raises(RuntimeError):
+        with breaker.guard():
+            raise RuntimeError("mlserver down")
+    monkeypatch.setattr(main.app, "circuit_breaker", breaker, raising=False)
+    monkeypatch.setattr(main.app, "breeds_categories_used_in_train", [7, 8], raising=False)
+    monkeypatch.setattr(main.app, "data_preprocess_pipeline", None, raising=False)
+    monkeypatch.setattr(main, "preprocess_batch_request_input", lambda breeds, pipeline, inputs: None)
+    monkeypatch.setattr(main, "convert_prediction_input", lambda x, sparse: {})
+    requests = [
+        PetInfo(pet_breed_id=7, birth=date(2020, 1, 10), gender="남자", neuter_yn="y", weight_kg=5.0, created_at=datetime(2024, 1, 5)),
+        PetInfo(pet_breed_id=8, birth=date(2023, 6, 1), gender="여자", neuter_yn="y", weight_kg=3.0, created_at=datetime(2024, 6, 1)),
+    ]
+
+    outputs = main.predict_batch(requests)
+
+    assert [output.is_fallback for output in outputs] == [True, True]
+    assert [output.predicted_claim_price for output in outputs] == [31000, 50000]
+    assert app_with_open_circuit.prediction_counts == {"total": 2, "fallback": 2, "lookup_table": 0}
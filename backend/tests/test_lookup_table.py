@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+import main
+from lookup_grid import PredictionLookupTable
+from lookup_table import DeployedLookupTable, load_lookup_table
+from preprocess import DataPreprocessPipeline
+from schema import PetInfo
+
+PIPELINE_COPY = os.path.join(os.path.dirname(__file__), "..", "..", "pipeline", "src", "lookup_grid.py")
+AGES = [0, 1, 2, 3, 4, 5]
+# pipeline 학습 데이터의 컬럼 이름과 backend 요청 피처의 대응 (pipeline config.yml lookup_table.request_features)
+AXES = [
+    {"name": "breed", "kind": "categorical", "values": [7, 8], "request_feature": "pet_breed_id"},
+    {"name": "gender", "kind": "categorical", "values": ["남자", "여자"]},
+    {"name": "neutralized", "kind": "categorical", "values": ["n", "y"], "request_feature": "neuter_yn"},
+    {"name": "weight", "kind": "numeric", "values": [0.0, 10.0], "request_feature": "weight_kg"},
+    {"name": "age", "kind": "numeric", "discrete": True, "values": AGES, "request_feature": "age", "unit": "years"},
+]
+REQUEST = PetInfo(pet_breed_id=7, birth=date(2020, 1, 10), gender="남자", neuter_yn="y", weight_kg=5.0,
+                  created_at=datetime(2024, 1, 5))
+
+
+def save_table(model_dir, base_price: float = 10000.0, axes=AXES, p99_relative_error: float = 0.01):
+    # 예측값 = base_price + 연령(년) x 5000 + 체중 x 1000
+    os.makedirs(model_dir, exist_ok=True)
+    weight = np.array([0.0, 1.0])[None, None, None, :, None] * 10000
+    age = np.array(AGES, dtype=np.float64)[None, None, None, None, :] * 5000
+    table = np.broadcast_to(base_price + weight + age, [len(axis["values"]) for axis in axes]).astype(np.float32)
+    PredictionLookupTable(table, axes, {"error": {"p99_relative_error": p99_relative_error}}).save(str(model_dir))
+    return str(model_dir)
+
+
+@pytest.fixture
+def app_with_lookup_table(monkeypatch, tmp_path):
+    def use(lookup_table: DeployedLookupTable):
+        monkeypatch.setattr(main.app, "lookup_table", lookup_table, raising=False)
+        monkeypatch.setattr(main.app, "breeds_categories_used_in_train", [7, 8], raising=False)
+        monkeypatch.setattr(main.app, "data_preprocess_pipeline", DataPreprocessPipeline(), raising=False)
+        monkeypatch.setattr(main.app, "prediction_counts", {"total": 0, "fallback": 0, "lookup_table": 0}, raising=False)
+        monkeypatch.setattr(main.app, "prediction_counts_lock", threading.Lock(), raising=False)
+        return main.app
+    return use
+
+
+def test_pipeline_columns_are_looked_up_by_request_features(app_with_lookup_table, tmp_path):
+    model_dir = save_table(tmp_path / "model")
+    app = app_with_lookup_table(DeployedLookupTable(model_dir, main.REQUEST_FEATURE_NAMES, 0.05))
+
+    output = main.lookup_claim_price(REQUEST)
+
+    # 만 3세(일 단위 1456이면 격자 밖), 체중 5kg
+    assert output.predicted_claim_price == 10000 + 3 * 5000 + 5000
+    assert app.prediction_counts["lookup_table"] == 1
+
+
+def test_unmapped_axis_or_large_relative_error_disables_table(tmp_path):
+    unmapped = AXES + [{"name": "district", "kind": "categorical", "values": ["서울"]}]
+    table = np.zeros([len(axis["values"]) for axis in unmapped], dtype=np.float32)
+    PredictionLookupTable(table, unmapped, {"error": {"p99_relative_error": 0.01}}).save(str(tmp_path))
+    assert load_lookup_table(str(tmp_path), main.REQUEST_FEATURE_NAMES, 0.05) is None
+
+    assert load_lookup_table(save_table(tmp_path / "inaccurate", p99_relative_error=0.1), main.REQUEST_FEATURE_NAMES, 0.05) is None
+    assert load_lookup_table(save_table(tmp_path / "accurate"), main.REQUEST_FEATURE_NAMES, 0.05) is not None
+
+
+def test_reloads_table_when_deployed_model_changes(app_with_lookup_table, tmp_path):
+    save_table(tmp_path / "model_a", base_price=10000.0)
+    save_table(tmp_path / "model_b", base_price=50000.0)
+
+    def deploy(model_name):
+        with open(tmp_path / "deployed.json", "w") as f:
+            json.dump({"model_name": model_name, "model_path": f"/app/data_storage/train_results/{model_name}"}, f)
+
+    deploy("model_a")
+    lookup_table = DeployedLookupTable(str(tmp_path), main.REQUEST_FEATURE_NAMES, 0.05, check_interval=0)
+    app_with_lookup_table(lookup_table)
+    assert main.lookup_claim_price(REQUEST).predicted_claim_price == 30000
+
+    deploy("model_b")
+    assert main.lookup_claim_price(REQUEST).predicted_claim_price == 70000
+    assert lookup_table.num_reloads == 1
+    assert lookup_table.stats()["model_dir"] == os.path.join(str(tmp_path), "model_b")
+
+
+def test_pipeline_copy_matches():
+    with open(os.path.join(os.path.dirname(__file__), "..", "lookup_grid.py"), "r", encoding="utf-8") as f:
+        backend_source = f.read().replace("\r\n", "\n")
+    with open(PIPELINE_COPY, "r", encoding="utf-8") as f:
+        pipeline_source = f.read().replace("\r\n", "\n")
+
+    assert backend_source == pipeline_source
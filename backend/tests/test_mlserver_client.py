@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mlserver_client import MLServerClient, NoReplicaAvailableError
+from tests.fake_mlserver import FakeMLServer
+
+ENDPOINT = "/v2/models/petcare-prediction-serving/infer"
+PAYLOAD = {"inputs": [{"name": "pet_info", "shape": [1, 3], "datatype": "FP32", "data": [[0.0, 1.0, 0.5]]}]}
+
+
+def test_ewma_routes_traffic_away_from_slow_replica():
+    '''
+    느린 replica가 섞여 있어도 대부분의 요청은 빠른 replica로 보낸다.
+    '''
+    with FakeMLServer(latency=0.1) as slow, FakeMLServer(latency=0.005) as fast:
+        client = MLServerClient(urls=[slow.url, fast.url], endpoint=ENDPOINT)
+        for _ in range(40):
+            client.infer(PAYLOAD)
+
+    assert fast.num_requests >= 35
+    assert client.stats()["replicas"][0]["ewma_latency_ms"] > client.stats()["replicas"][1]["ewma_latency_ms"]
+
+
+def test_hedged_request_cuts_tail_latency():
+    '''
+    첫 요청이 예산을 넘기면 다른 replica로 보낸 요청의 응답을 사용한다.
+    '''
+    with FakeMLServer(latency=0.5) as slow, FakeMLServer(latency=0.005) as fast:
+        client = MLServerClient(urls=[slow.url, fast.url], endpoint=ENDPOINT, hedge=True, hedge_budget_ms=30)
+
+        started_at = time.perf_counter()
+        response = client.infer(PAYLOAD)
+        elapsed = time.perf_counter() - started_at
+
+    assert response.status_code == 200
+    assert elapsed < 0.3
+    assert client.num_hedged == 1
+    assert slow.num_requests == 1 and fast.num_requests == 1
+
+
+def test_outstanding_limit_per_replica():
+    with FakeMLServer(latency=0.3) as server:
+        client = MLServerClient(urls=[server.url], endpoint=ENDPOINT, max_outstanding=1)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            in_flight = executor.submit(client.infer, PAYLOAD)
+            time.sleep(0.05)
+            with pytest.raises(NoReplicaAvailableError):
+                client.infer(PAYLOAD)
+            assert in_flight.result().status_code == 200
+
+
+def test_fast_failing_replica_is_ejected_instead_of_preferred():
+    '''
+    바로 실패하는(지연시간이 짧은) replica가 요청을 끌어가지 않고, 실패한 요청은 지연시간 통계에 들어가지 않는다.
+    '''
+    with FakeMLServer(latency=0.0, error_rate=1.0) as failing, FakeMLServer(latency=0.02) as healthy:
+        client = MLServerClient(urls=[failing.url, healthy.url], endpoint=ENDPOINT, eject_seconds=10)
+        num_errors = 0
+        for _ in range(20):
+            try:
+                client.infer(PAYLOAD)
+            except Exception:
+                num_errors += 1
+
+    stats = client.stats()["replicas"]
+    assert num_errors == 1 and failing.num_requests == 1
+    assert healthy.num_requests == 19
+    assert stats[0]["ewma_latency_ms"] is None and stats[0]["ejected"]
+    assert len(client._latencies_ms) == 19
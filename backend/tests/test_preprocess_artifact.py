@@ -0,0 +1,102 @@
+import json
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from preprocess import DataPreprocessPipeline
+from utils import convert_prediction_input
+
+
+def save_artifact(file_path, handling, sparse_output=False):
+    '''
+    학습 파이프라인이 저장하는 형식과 같은 json/npz: 견종(handling), 성별(one-hot), 몸무게(minmax)
+    '''
+    encode = {"op": "ordinal", "categories": {"key": "breed.1.categories", "kind": "i"}, "unknown_value": -1} \
+        if handling == "native" else {"op": "one_hot", "categories": {"key": "breed.1.categories", "kind": "i"}}
+    spec = {
+        "format_version": 1,
+        "config": {"sparse_output": sparse_output},
+        "columns": [
+            {"name": "pet_breed_id", "steps": [{"op": "impute", "fill": {"key": "breed.0.fill", "kind": "f"}}, encode],
+             "categorical": handling == "native"},
+            {"name": "gender", "steps": [{"op": "one_hot", "categories": {"key": "gender.0.categories", "kind": "str"}}]},
+            {"name": "weight_kg", "steps": [{"op": "minmax", "scale": {"key": "weight_kg.0.scale", "kind": "f"},
+                                              "min": {"key": "weight_kg.0.min", "kind": "f"}}]},
+        ],
+        "feature_names": [],
+    }
+    np.savez(
+        file_path.with_suffix(".npz"),
+        **{
+            "breed.0.fill": np.array([1.0]),
+            "breed.1.categories": np.arange(300),
+            "gender.0.categories": np.array(["F", "M"]),
+            "weight_kg.0.scale": np.array([0.1]),
+            "weight_kg.0.min": np.array([-0.1]),
+        },
+    )
+    file_path.with_suffix(".json").write_text(json.dumps(spec), encoding="utf-8")
+
+
+def load_pipeline(tmp_path, handling, sparse_output=False):
+    file_path = tmp_path / f"preprocess_{handling}_{sparse_output}.json"
+    save_artifact(file_path, handling, sparse_output)
+    pipeline = DataPreprocessPipeline()
+    pipeline.define_pipeline()
+    pipeline.load_pipeline(str(file_path))
+    return pipeline
+
+
+REQUESTS = pd.DataFrame({"pet_breed_id": [3, 299, 1000, None], "gender": ["M", "F", "M", "F"], "weight_kg": [1.0, 11.0, 6.0, 3.0]})
+
+
+def test_native_artifact_sends_integer_codes_instead_of_one_hot(tmp_path):
+    native = load_pipeline(tmp_path, "native")
+    one_hot = load_pipeline(tmp_path, "one_hot")
+
+    x_native = native.transform(REQUESTS)
+    x_one_hot = one_hot.transform(REQUESTS)
+
+    assert x_native.shape == (4, 1 + 2 + 1)
+    assert x_one_hot.shape == (4, 300 + 2 + 1)
+    # 처음 보는 견종은 -1(LightGBM은 결측으로 취급), 결측은 최빈값으로 대체
+    assert x_native[:, 0].tolist() == [3, 299, -1, 1]
+    assert np.allclose(x_native[:, 1:], x_one_hot[:, 300:])
+    assert native.categorical_feature_indices == [0]
+    assert one_hot.categorical_feature_indices == []
+
+
+def test_convert_prediction_input_accepts_dense_matrix(tmp_path):
+    x = load_pipeline(tmp_path, "native").transform(REQUESTS.iloc[[0]])
+
+    payload = convert_prediction_input(x)
+
+    assert payload["inputs"][0]["shape"] == [1, 4]
+    assert payload["inputs"][0]["data"] == [[3.0, 0.0, 1.0, 0.0]]
+
+
+def test_sparse_output_artifact_returns_csr_with_same_values(tmp_path):
+    dense = load_pipeline(tmp_path, "one_hot").transform(REQUESTS)
+    x = load_pipeline(tmp_path, "one_hot", sparse_output=True).transform(REQUESTS)
+    auto = load_pipeline(tmp_path, "one_hot", sparse_output="auto").transform(REQUESTS)
+
+    assert sp.issparse(x) and sp.issparse(auto)
+    assert np.array_equal(x.toarray(), dense)
+    # 행마다 견종/성별 one-hot 1칸 + 몸무게. 처음 보는 견종과 0으로 스케일된 몸무게(1.0)는 저장하지 않는다.
+    assert x.nnz == 4 * 3 - 2
+
+
+def test_convert_prediction_input_sends_csr_parts(tmp_path):
+    x = load_pipeline(tmp_path, "one_hot", sparse_output=True).transform(REQUESTS.iloc[[0, 1]])
+
+    payload = convert_prediction_input(x)
+    tensors = {tensor["name"]: tensor for tensor in payload["inputs"]}
+
+    assert payload["parameters"] == {"sparse_format": "csr", "sparse_shape": [2, 303]}
+    rebuilt = sp.csr_matrix(
+        (tensors["pet_info.data"]["data"], tensors["pet_info.indices"]["data"], tensors["pet_info.indptr"]["data"]),
+        shape=payload["parameters"]["sparse_shape"],
+    )
+    assert np.array_equal(rebuilt.toarray(), x.toarray())
+    assert convert_prediction_input(x, sparse=False)["inputs"][0]["data"] == x.toarray().tolist()
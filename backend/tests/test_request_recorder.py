@@ -0,0 +1,27 @@
+import json
+
+from request_recorder import RequestRecorder
+
+
+def test_recorder_writes_replayable_lines(tmp_path):
+    file_path = tmp_path / "requests.jsonl"
+    recorder = RequestRecorder(str(file_path), flush_interval=0.05)
+    for i in range(5):
+        recorder.record("POST", "/predict", {"pet_breed_id": i})
+    recorder.close()
+
+    lines = [json.loads(line) for line in file_path.read_text(encoding="utf-8").splitlines()]
+    assert [line["body"]["pet_breed_id"] for line in lines] == list(range(5))
+    assert all(line["method"] == "POST" and line["path"] == "/predict" for line in lines)
+    assert lines == sorted(lines, key=lambda line: line["offset"])
+
+
+def test_recorder_drops_instead_of_blocking_when_queue_is_full(tmp_path):
+    recorder = RequestRecorder(str(tmp_path / "requests.jsonl"), max_queue=1)
+    for i in range(10000):
+        recorder.record("POST", "/predict", {"pet_breed_id": i})
+    recorder.close()
+
+    stats = recorder.stats()
+    assert stats["num_dropped"] > 0
+    assert stats["num_recorded"] + stats["num_dropped"] == 10000
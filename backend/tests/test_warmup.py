@@ -0,0 +1,72 @@
+import asyncio
+import os
+
+import main
+from steady_state import find_steady_state
+from warmup import WarmupReport, run_warmup
+
+PIPELINE_COPY = os.path.join(os.path.dirname(__file__), "..", "..", "pipeline", "src", "steady_state.py")
+
+
+def test_still_decreasing_latency_is_not_steady():
+    # 마지막 구간은 항상 자기 자신과 같으므로, 그 구간만으로 정상상태가 되면 안 된다.
+    latencies = [100.0 - i for i in range(50)]
+
+    assert find_steady_state(latencies, window=10, tolerance=0.2) is None
+
+
+def test_steady_after_cold_start_and_slo():
+    latencies = [80.0] * 10 + [10.0, 11.0] * 20
+
+    assert find_steady_state(latencies, window=10, tolerance=0.2) == 10
+    # 구간 수가 min_windows보다 적거나, 정상상태 지연시간이 SLO를 넘으면 정상상태가 아니다.
+    assert find_steady_state(latencies, window=10, tolerance=0.2, min_windows=5) is None
+    assert find_steady_state(latencies, window=10, tolerance=0.2, slo_ms=5) is None
+
+
+def test_run_warmup_reports_not_steady_while_latency_decreases(monkeypatch):
+    clock = {"now": 0.0, "latency": 0.1}
+
+    def send(request):
+        # 요청마다 지연시간이 2ms씩 줄어든다.
+        clock["now"] += clock["latency"]
+        clock["latency"] -= 0.002
+
+    monkeypatch.setattr("warmup.time.perf_counter", lambda: clock["now"])
+    report = run_warmup(send, [{}] * 40, window=10, tolerance=0.2)
+
+    assert not report.steady
+    assert report.requests_to_steady_state is None
+
+
+def test_keep_warming_up_until_steady(monkeypatch):
+    # MLServer가 늦게 떠서 첫 warm-up이 정상상태에 도달하지 못해도, 다시 시도해서 준비 상태가 되어야 한다.
+    reports = [
+        WarmupReport(num_requests=40, num_failures=40, total_seconds=0.1, first_latency_ms=None, steady_state_latency_ms=None,
+                     requests_to_steady_state=None, time_to_steady_state_seconds=None),
+        WarmupReport(num_requests=40, num_failures=0, total_seconds=1.2, first_latency_ms=80.0, steady_state_latency_ms=10.0,
+                     requests_to_steady_state=10, time_to_steady_state_seconds=0.9),
+    ]
+    monkeypatch.setattr(main, "warm_up", lambda: reports.pop(0))
+    monkeypatch.setattr(main.app, "ready", False, raising=False)
+    monkeypatch.setattr(main.app, "warmup_attempts", 0, raising=False)
+    monkeypatch.setattr(main.app, "warmup_report", None, raising=False)
+
+    main.try_warm_up(main.app)
+    assert not main.app.ready
+
+    asyncio.run(asyncio.wait_for(main.keep_warming_up(main.app, retry_seconds=0), timeout=5))
+
+    assert main.app.ready
+    assert main.app.warmup_attempts == 2
+    response = main.ready()
+    assert response.status_code == 200
+
+
+def test_pipeline_copy_matches():
+    # backend와 pipeline은 이미지가 따로 빌드되므로 같은 파일을 둔다.
+    with open(os.path.join(os.path.dirname(__file__), "..", "steady_state.py"), "rb") as f:
+        backend = f.read().replace(b"\r\n", b"\n")
+    with open(PIPELINE_COPY, "rb") as f:
+        pipeline = f.read().replace(b"\r\n", b"\n")
+    assert backend == pipeline
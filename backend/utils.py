@@ -1,12 +1,15 @@
 import os
 from datetime import datetime
 import glob
+from typing import List
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
 
 from mlserver.rest.responses import Response
 
 from schema import PetInfo, PetPredictResult
+from summarize import age_in_years
 from preprocess import DataPreprocessPipeline
 
 
@@ -18,15 +21,44 @@ def preprocess_request_input(breeds_categories_used_in_train: list, data_preproc
         x = data_preprocess_pipeline.transform(preprocessed_df)
         
         return x
+
+def preprocess_batch_request_input(breeds_categories_used_in_train: list, data_preprocess_pipeline: DataPreprocessPipeline, inputs: List[PetInfo]):
+        df = pd.DataFrame([input.dict() for input in inputs])
+        
+        preprocessed_df = data_preprocess_pipeline.preprocess(df, breeds_categories_used_in_train)
+        x = data_preprocess_pipeline.transform(preprocessed_df)
+        
+        return x
+
+def request_features(breeds_categories_used_in_train: list, data_preprocess_pipeline: DataPreprocessPipeline, input: PetInfo) -> dict:
+        df = pd.DataFrame([input.dict()])
+        
+        preprocessed_df = data_preprocess_pipeline.preprocess(df, breeds_categories_used_in_train)
+        
+        return preprocessed_df.iloc[0].to_dict()
     
-def convert_prediction_input(x):
+def convert_prediction_input(x, sparse: bool = True):
+    """
+    V2 추론 요청. 희소 행렬은 펼치지 않고 CSR 구성 배열(data/indices/indptr)을 텐서 세 개로 보낸다. (mlserver/runtime.py가 다시 CSR로 만든다)
+    sparse=False이면 이전처럼 dense로 펼쳐 보낸다. (CSR 요청을 모르는 MLServer)
+    """
+    if sp.issparse(x) and sparse:
+        x = sp.csr_matrix(x)
+        return {
+            "parameters": {"sparse_format": "csr", "sparse_shape": list(x.shape)},
+            "inputs": [
+                {"name": "pet_info.data", "shape": [x.nnz], "datatype": "FP32", "data": x.data.tolist()},
+                {"name": "pet_info.indices", "shape": [x.nnz], "datatype": "INT32", "data": x.indices.tolist()},
+                {"name": "pet_info.indptr", "shape": [len(x.indptr)], "datatype": "INT32", "data": x.indptr.tolist()},
+            ]
+        }
     return {
         "inputs": [
             {
                 "name": "pet_info",
-                "shape": x.shape,
+                "shape": list(x.shape),
                 "datatype": "FP32",
-                "data": x.toarray().tolist()
+                "data": (x.toarray() if sp.issparse(x) else np.asarray(x)).tolist()
             }
         ]
     }
@@ -43,17 +75,32 @@ def glob_recursive(dirname, pattern):
     
 
     
-def postprocess_output(input: PetInfo, prediction_response: Response) -> PetPredictResult:
-    predicted_claim_price = [res['data'][0] for res in prediction_response.json()['outputs']][0] # batch or parallel model deployment will be different.
-    age = input.created_at.date() - input.birth
-    
+def request_age(input: PetInfo, unit: str) -> int:
+    created_at = input.created_at.date()
+    if unit == "years":
+        return age_in_years(input.birth, created_at)
+    return (created_at - input.birth).days
+
+
+def to_predict_result(input: PetInfo, predicted_claim_price: float, is_fallback: bool = False) -> PetPredictResult:
     return PetPredictResult(
             pet_breed_id=input.pet_breed_id,
-            age=age.days // 30 // 12,
+            age=age_in_years(input.birth, input.created_at.date()),
             gender=input.gender,
             neuter_yn=input.neuter_yn,
             weight_kg=input.weight_kg,
-            predicted_claim_price=round(predicted_claim_price/1000)* 1000)
+            predicted_claim_price=round(predicted_claim_price/1000)* 1000,
+            is_fallback=is_fallback)
+
+
+def postprocess_output(input: PetInfo, prediction_response: Response) -> PetPredictResult:
+    predicted_claim_price = [res['data'][0] for res in prediction_response.json()['outputs']][0] # batch or parallel model deployment will be different.
+    return to_predict_result(input, predicted_claim_price)
+    
+
+def postprocess_batch_output(inputs: List[PetInfo], prediction_response: Response) -> List[PetPredictResult]:
+    predicted_claim_prices = prediction_response.json()['outputs'][0]['data']
+    return [to_predict_result(input, predicted_claim_price) for input, predicted_claim_price in zip(inputs, predicted_claim_prices)]
     
 
 def find_latest_file(folder_path, ext):
@@ -0,0 +1,78 @@
+import json
+import statistics
+import time
+from dataclasses import dataclass, asdict
+from typing import Callable, List, Optional
+
+from logger import configure_logger
+from steady_state import find_steady_state
+
+logger = configure_logger(__name__)
+
+
+@dataclass
+class WarmupReport:
+    num_requests: int
+    num_failures: int
+    total_seconds: float
+    first_latency_ms: Optional[float]
+    steady_state_latency_ms: Optional[float]
+    requests_to_steady_state: Optional[int]
+    time_to_steady_state_seconds: Optional[float]
+
+    @property
+    def steady(self) -> bool:
+        return self.requests_to_steady_state is not None
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "steady": self.steady}
+
+
+def load_warmup_requests(file_path: str, num_requests: int) -> List[dict]:
+    """jsonl 샘플 파일에서 warm-up 요청을 읽어 num_requests 개가 되도록 반복합니다."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        samples = [json.loads(line) for line in f if line.strip()]
+
+    if not samples:
+        return []
+    return [samples[i % len(samples)] for i in range(num_requests)]
+
+
+def run_warmup(
+    send: Callable[[dict], object],
+    requests: List[dict],
+    window: int = 10,
+    tolerance: float = 0.2,
+    min_windows: int = 3,
+    slo_ms: Optional[float] = None,
+) -> WarmupReport:
+    latencies, elapsed = [], []
+    num_failures = 0
+
+    started_at = time.perf_counter()
+    for request in requests:
+        request_started_at = time.perf_counter()
+        try:
+            send(request)
+        except Exception as e:
+            num_failures += 1
+            logger.warning(f"warm-up 요청 실패: {e}")
+            continue
+        finally:
+            now = time.perf_counter()
+        latencies.append((now - request_started_at) * 1000)
+        elapsed.append(now - started_at)
+    total_seconds = time.perf_counter() - started_at
+
+    steady_index = find_steady_state(latencies, window, tolerance, min_windows, slo_ms)
+    report = WarmupReport(
+        num_requests=len(requests),
+        num_failures=num_failures,
+        total_seconds=total_seconds,
+        first_latency_ms=latencies[0] if latencies else None,
+        steady_state_latency_ms=statistics.median(latencies[steady_index:]) if steady_index is not None else None,
+        requests_to_steady_state=steady_index,
+        time_to_steady_state_seconds=elapsed[steady_index] if steady_index is not None else None,
+    )
+    logger.info(f"warm-up 완료: {report.to_dict()}")
+    return report
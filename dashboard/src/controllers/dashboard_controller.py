@@ -5,6 +5,7 @@ from models.container import Container
 from services.data_service import DataService
 from services.prediction_service import PredictionService
 from services.district_service import DistrictService
+from services.record_store import RecordStore, read_file
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -40,9 +41,10 @@ class DashboardController:
     def load_insurance_claim_data(self, container: Container, date: str) -> bool:
         """보험 청구 데이터 로드"""
         try:
-            file_path = os.path.join(container.settings.insurance_claim_records_dir, date, "insurance_claim.csv")
+            # migrate된 날짜는 insurance_claim.parquet, 아니면 insurance_claim.csv를 읽는다.
+            file_path = RecordStore(container.settings.insurance_claim_records_dir).file(date)
             if os.path.exists(file_path):
-                df = pd.read_csv(file_path)
+                df = read_file(file_path)
                 container.set_insurance_claim_df(df)
                 container.selected_date = date
                 logger.info(f"{date} 날짜의 보험 청구 데이터 로드 성공")
@@ -0,0 +1,196 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+from benchmark.compare import find_regressions, format_table
+from benchmark.runner import run_open_loop, run_schedule
+from benchmark.standins import (
+    BackendProcess,
+    FakeMLServer,
+    create_preprocess_pipeline,
+    create_sqlite_db,
+    generate_claims,
+)
+from benchmark.traffic import TrafficModel, load_requests, write_requests
+from benchmark.workloads import WORKLOADS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("benchmark")
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+@contextmanager
+def backend_url(args):
+    """--backend-url 이 없으면 stand-in DB/MLServer로 backend를 띄운다."""
+    if args.backend_url:
+        yield args.backend_url.rstrip("/")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        df = generate_claims(args.num_rows, seed=args.seed)
+        db_path = create_sqlite_db(os.path.join(tmp_dir, "petcare.db"), df)
+        pipeline_path = create_preprocess_pipeline(os.path.join(tmp_dir, "preprocess.pkl"), df)
+        env = {"WARMUP_REQUESTS_PATH": os.path.join(tmp_dir, "no_warmup.jsonl")}
+        with FakeMLServer(latency_ms=args.mlserver_latency_ms) as mlserver, \
+                BackendProcess(mlserver.url, db_path, pipeline_path, env=env, log_path=args.backend_log) as backend:
+            yield backend.url
+
+
+def _meta(args, **kwargs) -> dict:
+    return {
+        "started_at": datetime.now().isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "backend_url": args.backend_url,
+        "mlserver_latency_ms": None if args.backend_url else args.mlserver_latency_ms,
+        "num_rows": None if args.backend_url else args.num_rows,
+        **kwargs,
+    }
+
+
+def _save(results: dict, output: str):
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    logger.info(f"결과 저장: {output}")
+
+
+def run(args) -> int:
+    workloads = args.workloads.split(",")
+    results = {
+        "meta": _meta(args, rate_rps=args.rate, duration_seconds=args.duration),
+        "workloads": {},
+    }
+
+    with backend_url(args) as url:
+        for name in workloads:
+            logger.info(f"{name} 워크로드 실행: {args.rate} rps x {args.duration}s")
+            # 이전 워크로드의 잔여 요청이 섞이지 않도록 워크로드마다 짧게 warm-up
+            run_open_loop(url, WORKLOADS[name], args.rate, min(args.duration, 2), seed=args.seed + 1)
+            results["workloads"][name] = run_open_loop(url, WORKLOADS[name], args.rate, args.duration, seed=args.seed)
+            logger.info(f"{name}: {results['workloads'][name]}")
+
+    _save(results, args.output)
+    return 0
+
+
+def generate(args) -> int:
+    if args.csv:
+        traffic_model = TrafficModel.from_csv(args.csv)
+    else:
+        # raw_df 와 같은 테이블을 조회한다(로컬에서는 stand-in 데이터).
+        traffic_model = TrafficModel(generate_claims(args.num_rows, seed=args.seed))
+    logger.info(f"요청 분포: {traffic_model.summary()}")
+
+    num_lines = write_requests(args.output, traffic_model.generate(args.num_requests, args.rate, seed=args.seed))
+    logger.info(f"{num_lines}개 요청 생성: {args.output}")
+    return 0
+
+
+def replay(args) -> int:
+    lines = load_requests(args.requests)
+    planned = [
+        (line["method"], line["path"], {"json": line["body"]} if line["method"] != "GET" else {"params": line["body"]})
+        for line in lines
+    ]
+    offsets = np.array([line["offset"] for line in lines]) / args.speed
+    logger.info(f"{len(planned)}개 요청 재생: {args.speed}x ({offsets[-1] if len(offsets) else 0:.1f}s)")
+
+    with backend_url(args) as url:
+        result = run_schedule(url, planned, offsets, timeout=args.timeout)
+    logger.info(f"replay: {result}")
+
+    _save({
+        "meta": _meta(args, requests=args.requests, speed=args.speed),
+        "workloads": {"replay": result},
+    }, args.output)
+    return 0
+
+
+def compare(args) -> int:
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    with open(args.current, "r") as f:
+        current = json.load(f)
+
+    print(format_table(baseline, current))
+    regressions = find_regressions(
+        baseline,
+        current,
+        latency_tolerance=args.latency_tolerance,
+        throughput_tolerance=args.throughput_tolerance,
+        error_rate_tolerance=args.error_rate_tolerance,
+    )
+    if regressions:
+        print("\n성능 저하가 감지되었습니다:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print("\n성능 저하 없음")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmark", description="backend 서빙 벤치마크")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_backend_arguments(subparser):
+        subparser.add_argument("--seed", type=int, default=42)
+        subparser.add_argument("--num-rows", type=int, default=10000, help="stand-in DB의 청구 데이터 수")
+        subparser.add_argument("--mlserver-latency-ms", type=float, default=5.0, help="stand-in MLServer의 추론 지연시간")
+        subparser.add_argument("--backend-url", default=None, help="지정하면 stand-in 없이 실행 중인 backend에 부하를 줍니다.")
+        subparser.add_argument("--backend-log", default=os.devnull)
+        subparser.add_argument("--output", default="benchmark_result.json")
+
+    run_parser = subparsers.add_parser("run", help="stand-in DB/MLServer로 backend를 띄우고 워크로드를 실행합니다.")
+    run_parser.add_argument("--workloads", default=",".join(WORKLOADS), help=f"쉼표로 구분 ({', '.join(WORKLOADS)})")
+    run_parser.add_argument("--rate", type=float, default=50.0, help="초당 요청 수(고정 도착률)")
+    run_parser.add_argument("--duration", type=float, default=30.0, help="워크로드별 실행 시간(초)")
+    add_backend_arguments(run_parser)
+    run_parser.set_defaults(func=run)
+
+    generate_parser = subparsers.add_parser("generate", help="실제 데이터 분포를 따르는 /predict 요청 파일(jsonl)을 생성합니다.")
+    generate_parser.add_argument("--csv", default=None, help="records CSV glob (예: '../pipeline/data_storage/records/*/*.csv'). 없으면 stand-in DB 데이터 사용")
+    generate_parser.add_argument("--num-requests", type=int, default=10000)
+    generate_parser.add_argument("--rate", type=float, default=50.0, help="평균 초당 요청 수(포아송 도착)")
+    generate_parser.add_argument("--seed", type=int, default=42)
+    generate_parser.add_argument("--num-rows", type=int, default=10000)
+    generate_parser.add_argument("--output", default="requests.jsonl")
+    generate_parser.set_defaults(func=generate)
+
+    replay_parser = subparsers.add_parser("replay", help="기록/생성된 요청 파일을 원래 간격대로(또는 --speed 배속으로) 재생합니다.")
+    replay_parser.add_argument("requests", help="CAPTURE_REQUESTS_PATH로 기록했거나 generate로 만든 jsonl")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="재생 배속 (예: 10 이면 10배 빠르게)")
+    replay_parser.add_argument("--timeout", type=float, default=10.0)
+    add_backend_arguments(replay_parser)
+    replay_parser.set_defaults(func=replay)
+
+    compare_parser = subparsers.add_parser("compare", help="저장된 baseline과 결과를 비교합니다. 성능 저하가 있으면 exit code 1")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--latency-tolerance", type=float, default=0.1)
+    compare_parser.add_argument("--throughput-tolerance", type=float, default=0.1)
+    compare_parser.add_argument("--error-rate-tolerance", type=float, default=0.01)
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
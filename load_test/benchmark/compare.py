@@ -0,0 +1,53 @@
+from typing import Dict, List
+
+LATENCY_KEYS = ["p50", "p95", "p99"]
+
+
+def find_regressions(
+    baseline: Dict,
+    current: Dict,
+    latency_tolerance: float = 0.1,
+    throughput_tolerance: float = 0.1,
+    error_rate_tolerance: float = 0.01,
+) -> List[str]:
+    """
+    baseline 대비 지연시간(p50/p95/p99)이 latency_tolerance 비율 이상 늘었거나,
+    처리량이 throughput_tolerance 비율 이상 줄었거나, 에러율이 error_rate_tolerance 이상 늘어난 항목을 반환합니다.
+    """
+    regressions = []
+    for name, base in baseline["workloads"].items():
+        result = current["workloads"].get(name)
+        if result is None:
+            regressions.append(f"{name}: 현재 결과에 워크로드가 없습니다.")
+            continue
+
+        for key in LATENCY_KEYS:
+            before, after = base["latency_ms"][key], result["latency_ms"][key]
+            if before and after is not None and after > before * (1 + latency_tolerance):
+                regressions.append(f"{name}: latency {key} {before:.1f}ms -> {after:.1f}ms (+{(after / before - 1) * 100:.1f}%)")
+
+        before, after = base["throughput_rps"], result["throughput_rps"]
+        if before and after < before * (1 - throughput_tolerance):
+            regressions.append(f"{name}: throughput {before:.1f}rps -> {after:.1f}rps ({(after / before - 1) * 100:.1f}%)")
+
+        before, after = base["error_rate"], result["error_rate"]
+        if after > before + error_rate_tolerance:
+            regressions.append(f"{name}: error rate {before:.2%} -> {after:.2%}")
+    return regressions
+
+
+def format_table(baseline: Dict, current: Dict) -> str:
+    lines = [f"{'workload':<12}{'metric':<16}{'baseline':>12}{'current':>12}{'change':>10}"]
+    for name, base in baseline["workloads"].items():
+        result = current["workloads"].get(name)
+        if result is None:
+            continue
+        rows = [(f"{key}_ms", base["latency_ms"][key], result["latency_ms"][key]) for key in LATENCY_KEYS]
+        rows += [
+            ("throughput_rps", base["throughput_rps"], result["throughput_rps"]),
+            ("error_rate", base["error_rate"], result["error_rate"]),
+        ]
+        for metric, before, after in rows:
+            change = f"{(after / before - 1) * 100:+.1f}%" if before else "-"
+            lines.append(f"{name:<12}{metric:<16}{before:>12.3f}{after:>12.3f}{change:>10}")
+    return "\n".join(lines)
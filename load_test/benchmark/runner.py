@@ -0,0 +1,94 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+import numpy as np
+import requests
+
+from benchmark.workloads import Request
+
+logger = logging.getLogger(__name__)
+
+
+def summarize(latencies_ms: np.ndarray, num_errors: int, duration_seconds: float) -> Dict:
+    num_requests = len(latencies_ms)
+    num_success = num_requests - num_errors
+    return {
+        "num_requests": num_requests,
+        "num_errors": num_errors,
+        "error_rate": num_errors / num_requests if num_requests else 0.0,
+        "throughput_rps": num_success / duration_seconds if duration_seconds else 0.0,
+        "latency_ms": {
+            "p50": float(np.percentile(latencies_ms, 50)) if num_requests else None,
+            "p95": float(np.percentile(latencies_ms, 95)) if num_requests else None,
+            "p99": float(np.percentile(latencies_ms, 99)) if num_requests else None,
+            "mean": float(latencies_ms.mean()) if num_requests else None,
+            "max": float(latencies_ms.max()) if num_requests else None,
+        },
+    }
+
+
+def run_schedule(
+    base_url: str,
+    planned: List[Request],
+    offsets: np.ndarray,
+    timeout: float = 10.0,
+    max_workers: int = 256,
+) -> Dict:
+    """
+    planned[i] 요청을 시작 시각으로부터 offsets[i]초에 보낸다(open-loop).
+    응답을 기다리지 않고 예정된 시각에 다음 요청을 보내므로 서버가 느려져도 부하가 줄지 않으며,
+    지연시간은 예정된 전송 시각부터 측정하여 대기 시간(coordinated omission)까지 포함한다.
+    """
+    num_requests = len(planned)
+    latencies_ms = np.zeros(num_requests)
+    errors = np.zeros(num_requests, dtype=bool)
+    local = threading.local()
+
+    def session() -> requests.Session:
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return local.session
+
+    def send(i: int, scheduled_at: float):
+        method, path, kwargs = planned[i]
+        delay = scheduled_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        try:
+            response = session().request(method, base_url + path, timeout=timeout, **kwargs)
+            errors[i] = response.status_code >= 400
+        except requests.exceptions.RequestException:
+            errors[i] = True
+        latencies_ms[i] = (time.perf_counter() - scheduled_at) * 1000
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for i in range(num_requests):
+            scheduled_at = started_at + offsets[i]
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0.001:
+                time.sleep(delay - 0.001)
+            executor.submit(send, i, scheduled_at)
+    elapsed = time.perf_counter() - started_at
+
+    return summarize(latencies_ms, int(errors.sum()), elapsed)
+
+
+def run_open_loop(
+    base_url: str,
+    workload: Callable[[np.random.Generator], Request],
+    rate: float,
+    duration_seconds: float,
+    seed: int = 42,
+    timeout: float = 10.0,
+    max_workers: int = 256,
+) -> Dict:
+    """고정 도착률(rate rps)로 duration_seconds 동안 workload 요청을 보낸다."""
+    rng = np.random.default_rng(seed)
+    num_requests = int(rate * duration_seconds)
+    planned = [workload(rng) for _ in range(num_requests)]
+    offsets = np.arange(num_requests) / rate
+    return run_schedule(base_url, planned, offsets, timeout=timeout, max_workers=max_workers)
@@ -0,0 +1,187 @@
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import requests
+from joblib import dump
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "backend"))
+
+TABLE_NAME = "pet_insurance_claim_ml_fake_data"
+BREED_IDS = list(range(1, 41))
+GENDERS = ["남자", "여자"]
+NEUTER_YN = ["y", "n"]
+DISEASE_NAMES = ["피부염", "외이염", "슬개골 탈구", "장염", "치주염"]
+
+
+def _breed_share(skew: float = 1.1) -> np.ndarray:
+    share = 1 / np.arange(1, len(BREED_IDS) + 1) ** skew
+    return share / share.sum()
+
+
+def generate_claims(num_rows: int, seed: int = 42) -> pd.DataFrame:
+    """벤치마크용 가짜 청구 데이터. 매 실행마다 같은 seed로 같은 데이터를 만든다."""
+    rng = np.random.default_rng(seed)
+    age = rng.integers(0, 16, num_rows)
+    weight_kg = np.round(rng.uniform(1, 40, num_rows), 1)
+    birth = [date(2024, 1, 1) - timedelta(days=int(a) * 365 + int(d)) for a, d in zip(age, rng.integers(0, 365, num_rows))]
+    return pd.DataFrame({
+        # 실제 데이터처럼 일부 견종에 청구가 몰리도록 Zipf 형태의 분포를 사용한다.
+        "pet_breed_id": rng.choice(BREED_IDS, num_rows, p=_breed_share()),
+        "birth": [b.isoformat() for b in birth],
+        "age": age,
+        "gender": rng.choice(GENDERS, num_rows),
+        "neuter_yn": rng.choice(NEUTER_YN, num_rows),
+        "weight_kg": weight_kg,
+        "claim_price": np.round(rng.lognormal(11, 0.8, num_rows), -3),
+        "disease_name": rng.choice(DISEASE_NAMES, num_rows),
+    })
+
+
+def create_sqlite_db(db_path: str, df: pd.DataFrame) -> str:
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    with sqlite3.connect(db_path) as connection:
+        df.to_sql(TABLE_NAME, connection, index=False)
+    return db_path
+
+
+def create_preprocess_pipeline(file_path: str, df: pd.DataFrame) -> str:
+    """backend가 불러오는 전처리 파이프라인(pkl)과 같은 구성의 ColumnTransformer를 가짜 데이터로 학습해 저장한다."""
+    categorical_pipeline = Pipeline([
+        ("simple_imputer", SimpleImputer(missing_values=np.nan, strategy="constant", fill_value=None)),
+        ("one_hot_encoder", OneHotEncoder(handle_unknown="ignore")),
+    ])
+    numerical_pipeline = Pipeline([
+        ("simple_imputer", SimpleImputer(missing_values=np.nan, strategy="constant", fill_value=None, add_indicator=True)),
+        ("scaler", MinMaxScaler()),
+    ])
+    pipeline = ColumnTransformer(transformers=[
+        ("categorical", categorical_pipeline, ["pet_breed_id", "gender", "neuter_yn"]),
+        ("min_max_scaler", numerical_pipeline, ["age", "weight_kg"]),
+    ])
+    pipeline.fit(df[["pet_breed_id", "gender", "neuter_yn", "age", "weight_kg"]])
+    dump(pipeline, file_path)
+    return file_path
+
+
+class FakeMLServer:
+    """
+    V2 추론 프로토콜을 흉내내는 로컬 MLServer. 고정 지연시간(latency_ms)을 주입할 수 있다.
+    """
+
+    def __init__(self, latency_ms: float = 5.0, prediction: float = 150000.0):
+        self.latency_ms = latency_ms
+        self.prediction = prediction
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                time.sleep(fake.latency_ms / 1000)
+
+                batch_size = len(json.loads(body)["inputs"][0]["data"]) if body else 1
+                content = json.dumps({
+                    "outputs": [{
+                        "name": "predict",
+                        "shape": [batch_size, 1],
+                        "datatype": "FP64",
+                        "data": [fake.prediction] * batch_size,
+                    }]
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class BackendProcess:
+    """
+    stand-in DB/MLServer를 바라보는 backend(uvicorn)를 별도 프로세스로 띄운다.
+    /ready 가 200을 반환할 때까지 기다린 뒤 url을 사용할 수 있다.
+    """
+
+    def __init__(self, mlserver_url: str, db_path: str, preprocess_pipeline_path: str, env: dict = None,
+                 workers: int = 1, startup_timeout: float = 60.0, log_path: str = os.devnull):
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.startup_timeout = startup_timeout
+        self.workers = workers
+        self.log_path = log_path
+        self.env = {
+            **os.environ,
+            "DB_BACKEND": "sqlite",
+            "SQLITE_DB_PATH": os.path.abspath(db_path),
+            "PREPROCESS_PIPELINE_PATH": os.path.abspath(preprocess_pipeline_path),
+            "MLSERVER_URL": mlserver_url,
+            "MLSERVER_REPLICAS": mlserver_url,
+            **(env or {}),
+        }
+        self.process = None
+
+    def __enter__(self):
+        self._log = open(self.log_path, "w")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--workers", str(self.workers), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=self.env, stdout=self._log, stderr=subprocess.STDOUT,
+        )
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"backend 프로세스가 종료되었습니다(exit code {self.process.returncode}). 로그: {self.log_path}")
+            try:
+                if requests.get(self.url + "/ready", timeout=1).status_code == 200:
+                    return self
+            except requests.exceptions.ConnectionError:
+                pass
+            time.sleep(0.5)
+        self.__exit__()
+        raise TimeoutError(f"backend가 {self.startup_timeout}초 안에 준비되지 않았습니다.")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self._log.close()
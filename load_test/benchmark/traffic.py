@@ -0,0 +1,107 @@
+import json
+from datetime import datetime, timedelta
+from glob import glob
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# records CSV(pipeline/data_storage/records) 컬럼 -> backend raw_df 컬럼
+RECORDS_COLUMN_MAP = {
+    "breed": "pet_breed_id",
+    "neutralized": "neuter_yn",
+    "weight": "weight_kg",
+}
+COLUMNS = ["pet_breed_id", "gender", "neuter_yn", "age", "weight_kg"]
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.rename(columns=RECORDS_COLUMN_MAP)
+    if "age" not in df.columns and "birth" in df.columns:
+        df["age"] = (pd.Timestamp.now() - pd.to_datetime(df["birth"])).dt.days // 365
+    df = df[COLUMNS].dropna().copy()
+
+    if df["neuter_yn"].dtype == bool or set(df["neuter_yn"].unique()) <= {0, 1}:
+        df["neuter_yn"] = df["neuter_yn"].map(lambda x: "y" if x else "n")
+    # 견종이 이름으로 기록된 경우에도 분포는 유지되도록 정수 id로 바꾼다.
+    if not pd.api.types.is_integer_dtype(df["pet_breed_id"]):
+        numeric = pd.to_numeric(df["pet_breed_id"], errors="coerce")
+        df["pet_breed_id"] = numeric if numeric.notna().all() else pd.factorize(df["pet_breed_id"])[0] + 1
+    df["pet_breed_id"] = df["pet_breed_id"].astype(int)
+    df["age"] = df["age"].astype(int).clip(lower=0)
+    df["weight_kg"] = df["weight_kg"].astype(float)
+    return df.reset_index(drop=True)
+
+
+class TrafficModel:
+    """
+    실제 청구 데이터(raw_df 또는 records CSV)의 (견종, 성별, 중성화, 나이, 체중) 결합분포를 따르는 PetInfo 요청을 생성한다.
+    행 단위로 복원추출하므로 견종 쏠림과 견종별 나이/체중 분포가 그대로 유지되고,
+    체중에는 작은 잡음을 더해 같은 입력이 과도하게 반복되지 않게 한다.
+    """
+
+    def __init__(self, df: pd.DataFrame, weight_noise: float = 0.05):
+        self.df = _normalize(df)
+        self.weight_noise = weight_noise
+
+    @classmethod
+    def from_csv(cls, pattern: str, **kwargs) -> "TrafficModel":
+        file_paths = sorted(glob(pattern, recursive=True))
+        if not file_paths:
+            raise FileNotFoundError(f"CSV 파일이 없습니다: {pattern}")
+        return cls(pd.concat([pd.read_csv(file_path) for file_path in file_paths], ignore_index=True), **kwargs)
+
+    def summary(self, top_k: int = 10) -> Dict:
+        breed_share = self.df["pet_breed_id"].value_counts(normalize=True)
+        return {
+            "num_rows": len(self.df),
+            "num_breeds": int(breed_share.size),
+            "top_breeds": {int(k): float(v) for k, v in breed_share.head(top_k).items()},
+            "gender": self.df["gender"].value_counts(normalize=True).to_dict(),
+            "neuter_yn": self.df["neuter_yn"].value_counts(normalize=True).to_dict(),
+            "age": self.df["age"].describe().to_dict(),
+            "weight_kg": self.df["weight_kg"].describe().to_dict(),
+        }
+
+    def sample(self, num_requests: int, rng: np.random.Generator, created_at: Optional[datetime] = None) -> List[Dict]:
+        created_at = created_at or datetime.now().replace(microsecond=0)
+        rows = self.df.iloc[rng.integers(0, len(self.df), num_requests)]
+        weights = rows["weight_kg"].to_numpy() * (1 + rng.normal(0, self.weight_noise, num_requests))
+        birth_days = rows["age"].to_numpy() * 365 + rng.integers(0, 365, num_requests)
+        return [
+            {
+                "pet_breed_id": int(breed),
+                "birth": (created_at - timedelta(days=int(days))).date().isoformat(),
+                "gender": str(gender),
+                "neuter_yn": str(neuter_yn),
+                "weight_kg": round(max(float(weight), 0.1), 1),
+                "created_at": created_at.isoformat(),
+            }
+            for breed, gender, neuter_yn, weight, days in zip(
+                rows["pet_breed_id"], rows["gender"], rows["neuter_yn"], weights, birth_days
+            )
+        ]
+
+    def generate(self, num_requests: int, rate: float, seed: int = 42) -> Iterator[Dict]:
+        """평균 rate rps의 포아송 도착 간격으로 replay 형식(offset, method, path, body)의 요청을 생성합니다."""
+        rng = np.random.default_rng(seed)
+        offsets = np.cumsum(rng.exponential(1 / rate, num_requests))
+        for offset, body in zip(offsets, self.sample(num_requests, rng)):
+            yield {"offset": float(offset), "method": "POST", "path": "/predict", "body": body}
+
+
+def write_requests(file_path: str, lines) -> int:
+    num_lines = 0
+    with open(file_path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+            num_lines += 1
+    return num_lines
+
+
+def load_requests(file_path: str) -> List[Dict]:
+    with open(file_path, "r", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    # 기록된 파일의 첫 요청을 0초로 맞춘다.
+    start = min((line["offset"] for line in lines), default=0.0)
+    return sorted(({**line, "offset": line["offset"] - start} for line in lines), key=lambda line: line["offset"])
@@ -0,0 +1,47 @@
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+from benchmark.standins import BREED_IDS, GENDERS, NEUTER_YN
+
+# (method, path, requests kwargs)
+Request = Tuple[str, str, dict]
+
+
+def _pet_info(rng: np.random.Generator) -> dict:
+    birth = date(2024, 1, 1) - timedelta(days=int(rng.integers(0, 15 * 365)))
+    return {
+        "pet_breed_id": int(rng.choice(BREED_IDS)),
+        "birth": birth.isoformat(),
+        "gender": str(rng.choice(GENDERS)),
+        "neuter_yn": str(rng.choice(NEUTER_YN)),
+        "weight_kg": round(float(rng.uniform(1, 40)), 1),
+        "created_at": datetime(2024, 6, 1).isoformat(),
+    }
+
+
+def single_predict(rng: np.random.Generator) -> Request:
+    return "POST", "/predict", {"json": _pet_info(rng)}
+
+
+def batch_predict(rng: np.random.Generator, batch_size: int = 32) -> Request:
+    return "POST", "/predict/batch", {"json": [_pet_info(rng) for _ in range(batch_size)]}
+
+
+def statistics(rng: np.random.Generator) -> Request:
+    return "GET", "/statistics", {"params": {"breed_id": int(rng.choice(BREED_IDS))}}
+
+
+def mixed(rng: np.random.Generator) -> Request:
+    # 실제 트래픽처럼 단건 예측 위주에 통계 조회와 배치 예측이 섞인 구성
+    workload = rng.choice([single_predict, statistics, batch_predict], p=[0.7, 0.2, 0.1])
+    return workload(rng)
+
+
+WORKLOADS: Dict[str, Callable[[np.random.Generator], Request]] = {
+    "single": single_predict,
+    "batch": batch_predict,
+    "statistics": statistics,
+    "mixed": mixed,
+}
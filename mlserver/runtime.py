@@ -0,0 +1,103 @@
+import json
+import os
+import socket
+import time
+
+import scipy.sparse as sp
+from mlserver.codecs import NumpyCodec
+from mlserver.logging import logger
+from mlserver.types import InferenceRequest, InferenceResponse
+from mlserver_mlflow import MLflowRuntime
+from mlserver_mlflow.codecs import TensorDictCodec
+
+WARMUP_NUM_REQUESTS = int(os.getenv("WARMUP_NUM_REQUESTS", 50))
+MLSERVER_INSTANCE = os.getenv("MLSERVER_INSTANCE", socket.gethostname())
+SPARSE_PARTS = ["data", "indices", "indptr"]
+
+
+def decode_csr_request(payload: InferenceRequest):
+    """
+    희소 행렬 요청(parameters.sparse_format == "csr", 입력 텐서 pet_info.data/indices/indptr)이면 CSR 행렬을, 아니면 None을 반환한다.
+    one-hot 범주가 많아도 요청 크기와 디코딩 비용이 0이 아닌 값 수에만 비례한다.
+    """
+    if getattr(payload.parameters, "sparse_format", None) != "csr":
+        return None
+    tensors = {request_input.name.rsplit(".", 1)[-1]: request_input for request_input in payload.inputs}
+    missing = [part for part in SPARSE_PARTS if part not in tensors]
+    if missing:
+        raise ValueError(f"CSR 요청에 없는 입력입니다: {missing}")
+    parts = tuple(NumpyCodec.decode_input(tensors[part]) for part in SPARSE_PARTS)
+    return sp.csr_matrix(parts, shape=tuple(payload.parameters.sparse_shape))
+
+
+class WarmupMLflowRuntime(MLflowRuntime):
+    """
+    모델 로드 후 샘플 요청을 재생하여 warm-up을 마친 뒤에 ready 상태가 되는 MLflow 런타임.
+    MLServer는 load()가 끝나야 /v2/models/{name}/ready 에 200을 반환하므로, 배포 시 준비 여부 확인에 그대로 사용된다.
+    """
+
+    async def load(self) -> bool:
+        loaded = await super().load()
+        await self._warm_up()
+        return loaded
+
+    async def predict(self, payload: InferenceRequest) -> InferenceResponse:
+        x = decode_csr_request(payload)
+        if x is None:
+            return await super().predict(payload)
+        # LightGBM은 CSR을 그대로 예측하므로 dense로 펼치지 않는다.
+        model_output = self._model.predict(x)
+        return self.encode_response(model_output, default_codec=TensorDictCodec)
+
+    def _warmup_requests_path(self) -> str:
+        return os.getenv(
+            "WARMUP_REQUESTS_PATH",
+            os.path.join(self._settings.parameters.uri, "warmup_requests.jsonl"),
+        )
+
+    async def _warm_up(self):
+        requests_path = self._warmup_requests_path()
+        if not os.path.exists(requests_path):
+            logger.warning(f"warm-up 샘플 파일이 없습니다: {requests_path}")
+            return
+
+        with open(requests_path, "r", encoding="utf-8") as f:
+            samples = [json.loads(line) for line in f if line.strip()]
+        if not samples:
+            return
+
+        # 샘플 하나가 잘못되어도 모델 로드(load)가 실패하지 않도록 요청별로 실패를 세고 계속한다. (backend/warmup.py와 같은 방식)
+        latencies, elapsed = [], []
+        num_failures = 0
+        started_at_epoch = time.time()
+        started_at = time.perf_counter()
+        for i in range(WARMUP_NUM_REQUESTS):
+            request_started_at = time.perf_counter()
+            try:
+                await self.predict(InferenceRequest(**samples[i % len(samples)]))
+            except Exception as e:
+                num_failures += 1
+                logger.warning(f"warm-up 요청 실패: {type(e).__name__}: {e}")
+                continue
+            now = time.perf_counter()
+            latencies.append((now - request_started_at) * 1000)
+            elapsed.append(now - started_at)
+
+        # 정상상태 판단은 배포하는 쪽(pipeline/src/deploy.py)이 이 지연시간으로 한다.
+        report = {
+            "instance": MLSERVER_INSTANCE,
+            "started_at": started_at_epoch,
+            "num_requests": WARMUP_NUM_REQUESTS,
+            "num_failures": num_failures,
+            "total_seconds": time.perf_counter() - started_at,
+            "first_latency_ms": latencies[0] if latencies else None,
+            "latencies_ms": latencies,
+            "elapsed_seconds": elapsed,
+        }
+        logger.info(f"warm-up 완료: {report}")
+
+        report_path = os.path.join(
+            self._settings.parameters.uri, f"warmup_report_{MLSERVER_INSTANCE}.json"
+        )
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
@@ -9,7 +9,7 @@ from pathlib import Path
 def create_model_settings():
     model_settings = {
         "name": f"petcare-prediction-serving-{os.path.basename(MODEL_WEIGHT_PATH)}",
-        "implementation": "mlserver_mlflow.MLflowRuntime",
+        "implementation": "runtime.WarmupMLflowRuntime",
         "parameters": {
             "uri": MODEL_WEIGHT_PATH,
             "version": "v1.0.0"
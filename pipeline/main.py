@@ -1,14 +1,118 @@
 import streamlit as st
+import pandas as pd
+import json
 import os
+import time
 
 import datetime
-from src.train import train_model
+from src.jobs import JobQueue, ensure_worker, QUEUED, RUNNING, SUCCEEDED
 from src.configure import load_config, configure_data, configure_model, configure_preprocessing
 from src.deploy import ModelDeploymentView
 # 스타일 및 설정
 st.set_page_config(page_title="PETCARE COST PREDICTION MODEL", layout="wide")
 
 
+def render_result(job_queue: JobQueue, job):
+    result = job_queue.read_result(job.id)
+    if result is None:
+        return
+    st.success("학습이 완료되었습니다!")
+    st.text(f'run_name: {job.run_name}')
+    slice_metrics_path = os.path.join(result["model_file_path"], "slice_metrics.parquet")
+    eval_df_path = os.path.join(result["model_file_path"], "eval_df.csv")
+    if os.path.exists(slice_metrics_path):
+        st.subheader("구간별 지표")
+        st.dataframe(pd.read_parquet(slice_metrics_path))
+    elif os.path.exists(eval_df_path):
+        # 이전 학습 결과
+        st.dataframe(pd.read_csv(eval_df_path, index_col=0))
+    st.text(f'MAE: {result["mean_absolute_error"]}')
+    st.text(f'MAPE: {result["mean_absolute_percentage_error"]}')
+    st.text(f'RMSE: {result["root_mean_squared_error"]}')
+    cv = result.get("cross_validation")
+    if cv is not None:
+        st.subheader(f"교차검증 ({cv['n_splits']} fold x {cv['n_repeats']}회)")
+        st.dataframe(pd.DataFrame({
+            metric: {"mean": summary["mean"], "std": summary["std"], "95% CI low": summary["ci_low"], "95% CI high": summary["ci_high"]}
+            for metric, summary in cv["metrics"].items()
+        }))
+    render_profile(result["model_file_path"])
+    
+    # 학습 결과 저장
+    st.session_state.last_run_name = job.run_name
+    st.session_state.last_model_path = result["model_file_path"]
+
+
+def render_profile(model_file_path: str):
+    """metadata.json에 기록된 단계별 학습 비용 (src.profiler)"""
+    metadata_path = os.path.join(model_file_path, "metadata.json")
+    if not os.path.exists(metadata_path):
+        return
+    with open(metadata_path, "r") as f:
+        profile = json.load(f).get("profile")
+    if not profile or not profile["stages"]:
+        return
+    st.subheader("학습 단계별 비용")
+    st.text(
+        f'전체 {profile["total_wall_seconds"]:.1f}초, CPU {profile["total_cpu_seconds"]:.1f}초 '
+        f'(자식 프로세스 {profile["total_children_cpu_seconds"]:.1f}초), 최대 RSS {profile["peak_rss_mb"]:.0f}MB'
+    )
+    stages = pd.DataFrame(profile["stages"]).set_index("name")
+    st.bar_chart(stages["wall_seconds"])
+    st.dataframe(stages)
+    if profile.get("capture"):
+        st.text(f'프로파일 결과: {profile["capture"]}')
+
+
+def render_jobs(job_queue: JobQueue):
+    """학습 작업 목록/진행률/로그. 다른 사용자가 등록한 작업도 함께 보인다."""
+    st.header("학습 작업")
+    jobs = job_queue.list(limit=20)
+    if not jobs:
+        st.info("등록된 학습 작업이 없습니다.")
+        return
+    
+    st.dataframe(pd.DataFrame([{
+        "id": job.id,
+        "실행 이름": job.run_name,
+        "상태": job.status,
+        "진행률": f"{job.progress * 100:.0f}%",
+        "CPU": job.cpu_slots,
+        "등록": job.created_at,
+        "시작": job.started_at,
+        "종료": job.finished_at,
+    } for job in jobs]))
+    
+    job_ids = [job.id for job in jobs]
+    default_job_id = st.session_state.get("job_id")
+    selected_job_id = st.selectbox(
+        "작업 선택", job_ids, index=job_ids.index(default_job_id) if default_job_id in job_ids else 0
+    )
+    job = job_queue.get(selected_job_id)
+    
+    st.progress(job.progress, text=f"{job.status} - {job.message or ''}")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.button("새로고침")
+    with col2:
+        if job.status in (QUEUED, RUNNING) and st.button("작업 취소"):
+            job_queue.cancel(job.id)
+            st.rerun()
+    with col3:
+        auto_refresh = st.checkbox("자동 새로고침", value=True)
+    
+    if job.error:
+        st.error(job.error)
+    with st.expander("학습 로그", expanded=job.status == RUNNING):
+        st.code(job_queue.read_log(job.id, max_lines=200) or "(로그 없음)")
+    
+    if job.status == SUCCEEDED:
+        render_result(job_queue, job)
+    elif job.status in (QUEUED, RUNNING) and auto_refresh:
+        time.sleep(2)
+        st.rerun()
+
+
 def main():
     st.title("Pet Insurance Claim Pipeline")
     
@@ -62,30 +166,30 @@ def main():
             st.json(config)
         
         
-        # 학습 버튼
+        # 학습 버튼 (작업 큐에 등록만 하고, 학습은 워커 프로세스에서 실행)
+        jobs_config = base_config.get("jobs", {})
+        cpu_slots_per_job = st.number_input(
+            "작업당 CPU 수", 1, os.cpu_count(), min(jobs_config.get("cpu_slots_per_job", 2), os.cpu_count())
+        )
         train_button = st.button("학습 시작", type="primary")
         
-    # 학습 실행
+    job_queue = JobQueue()
+    # 학습 작업 등록
     if train_button:
-        with st.spinner("모델 학습 중..."):
-            try:
-                
-                evaluation, artifact = train_model(config)
-                
-                st.success("학습이 완료되었습니다!")
-                st.text(f'run_name: {config.get("run_name")}')
-                st.dataframe(evaluation.eval_df)
-                st.text(f'MAE: {evaluation.mean_absolute_error}')
-                st.text(f'MAPE: {evaluation.mean_absolute_percentage_error}')
-                st.text(f'RMSE: {evaluation.root_mean_squared_error}')
-                
-                # 학습 결과 저장
-                st.session_state.last_run_name = config.get("run_name")
-                st.session_state.last_model_path = artifact.model_file_path
+        try:
+            ensure_worker(
+                job_queue,
+                cpu_slots=jobs_config.get("cpu_slots") or None,
+                max_jobs=jobs_config.get("max_concurrent_jobs", 2),
+            )
+            job_id = job_queue.submit(config, cpu_slots=int(cpu_slots_per_job))
+            st.session_state.job_id = job_id
+            st.success(f"학습 작업이 등록되었습니다: {job_id}")
+        except Exception as e:
+            st.error(f"학습 작업 등록 중 오류가 발생했습니다: {e}")
+            st.exception(e)
 
-            except Exception as e:
-                st.error(f"학습 실행 중 오류가 발생했습니다: {e}")
-                st.exception(e)
+    render_jobs(job_queue)
     
 
     # # 테스트 버튼
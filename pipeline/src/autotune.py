@@ -0,0 +1,265 @@
+"""
+LightGBM 학습 자원 파라미터 자동 조정.
+
+전처리 캐시에 저장된 실제 학습 데이터로 스레드 수, 히스토그램 구성 방식(col-wise/row-wise), max_bin 조합마다
+짧게 학습해 보고, 검증 손실이 기준 설정(전체 CPU, 자동 선택, max_bin 255) 대비 tolerance 안에 있는 조합 중
+round당 학습 시간이 가장 짧은 것을 config.yml의 autotune_profiles.{호스트 프로파일}에 저장한다.
+학습 시 train_model이 현재 호스트의 설정을 모델 파라미터에 적용한다. (직접 지정한 값이 우선, 스레드 수는 작업 CPU 수 이하)
+
+    python -m src.autotune run [--cache-key KEY] [--profile NAME]
+    python -m src.autotune show
+
+호스트 프로파일 이름은 AUTOTUNE_PROFILE 환경 변수, 없으면 호스트 이름이다.
+"""
+import argparse
+import json
+import os
+import platform
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import lightgbm as lgb
+import numpy as np
+import yaml
+from sklearn.model_selection import train_test_split as sk_train_test_split
+
+from src.cache import PIPELINE_FILE, PreprocessCache
+from src.lgb_dataset import dataset_params
+from src.logger import setup_logger
+from src.preprocess_artifact import PreprocessArtifact
+
+logger = setup_logger(__name__)
+
+CONFIG_PATH = os.getenv("PIPELINE_CONFIG_PATH", "./config.yml")
+PROFILES_KEY = "autotune_profiles"
+LAYOUTS = {
+    "auto": {},
+    "col_wise": {"force_col_wise": True},
+    "row_wise": {"force_row_wise": True},
+}
+DEFAULT_MAX_BIN = 255
+# 짧은 학습에서는 제외하는 파라미터
+_EXCLUDED_PARAMS = {"name", "task", "num_iterations", "early_stopping_rounds", "verbose_eval", "num_threads", "metric"}
+
+
+def host_profile_name() -> str:
+    return os.getenv("AUTOTUNE_PROFILE") or platform.node() or "default"
+
+
+def _thread_candidates(cpu_count: int) -> List[int]:
+    counts, n = {cpu_count}, 1
+    while n < cpu_count:
+        counts.add(n)
+        n *= 2
+    return sorted(counts)
+
+
+@dataclass
+class Probe:
+    num_threads: int
+    layout: str
+    max_bin: int
+    seconds_per_round: float
+    construct_seconds: float
+    valid_loss: float
+
+    @property
+    def params(self) -> Dict:
+        return {"num_threads": self.num_threads, **LAYOUTS[self.layout], "max_bin": self.max_bin}
+
+
+class Autotuner:
+    """
+    1단계: max_bin 255에서 스레드 수 x 구성 방식 조합의 속도를 비교한다. (손실은 거의 같다)
+    2단계: 1단계에서 가장 빠른 스레드 수/구성 방식으로 max_bin 후보를 비교한다. (bin이 적을수록 빠르지만 손실이 달라진다)
+    """
+
+    def __init__(self, autotune_cfg: Optional[Dict] = None, cpu_count: Optional[int] = None):
+        autotune_cfg = autotune_cfg or {}
+        cpu_count = cpu_count or os.cpu_count()
+        self.threads = [t for t in autotune_cfg.get("threads") or _thread_candidates(cpu_count) if t <= cpu_count]
+        self.max_bins = autotune_cfg.get("max_bins", [DEFAULT_MAX_BIN, 127, 63])
+        self.probe_rounds = autotune_cfg.get("probe_rounds", 100)
+        self.repeats = autotune_cfg.get("repeats", 2)
+        self.tolerance = autotune_cfg.get("tolerance", 0.002)
+        self.validation_ratio = autotune_cfg.get("validation_ratio", 0.2)
+        self.cpu_count = cpu_count
+        self.base_params = {
+            k: v for k, v in autotune_cfg.get("probe_params", {}).items() if k not in _EXCLUDED_PARAMS
+        }
+        self.base_params.update({"objective": "regression", "metric": "rmse", "verbose": -1, "seed": 1234, "deterministic": True})
+        self._datasets: Dict[int, tuple] = {}
+
+    def _build_datasets(self, max_bin: int):
+        if max_bin not in self._datasets:
+            started_at = time.perf_counter()
+            train_set = lgb.Dataset(
+                self._x_fit, self._y_fit, params=dataset_params({"max_bin": max_bin}),
+                categorical_feature=self._categorical_feature, free_raw_data=False,
+            )
+            valid_set = lgb.Dataset(self._x_valid, self._y_valid, reference=train_set,
+                categorical_feature=self._categorical_feature, free_raw_data=False,
+            )
+            train_set.construct()
+            valid_set.construct()
+            self._datasets[max_bin] = (train_set, valid_set, time.perf_counter() - started_at)
+        return self._datasets[max_bin]
+
+    def _probe(self, num_threads: int, layout: str, max_bin: int) -> Probe:
+        train_set, valid_set, construct_seconds = self._build_datasets(max_bin)
+        params = {**self.base_params, "num_threads": num_threads, **LAYOUTS[layout]}
+        seconds, valid_loss = [], None
+        for _ in range(self.repeats):
+            result = {}
+            started_at = time.perf_counter()
+            lgb.train(
+                params,
+                train_set,
+                num_boost_round=self.probe_rounds,
+                valid_sets=[valid_set],
+                valid_names=["valid"],
+                callbacks=[lgb.record_evaluation(result)],
+            )
+            seconds.append(time.perf_counter() - started_at)
+            valid_loss = float(result["valid"]["rmse"][-1])
+        probe = Probe(num_threads, layout, max_bin, min(seconds) / self.probe_rounds, construct_seconds, valid_loss)
+        logger.info(
+            f"probe threads={num_threads} layout={layout} max_bin={max_bin}: "
+            f"{probe.seconds_per_round * 1000:.2f}ms/round, valid rmse {valid_loss:.4f}"
+        )
+        return probe
+
+    def run(self, x_train, y_train, categorical_feature: Optional[List[int]] = None) -> Dict:
+        """categorical_feature: 학습 때와 같이 native 범주 컬럼 위치 (전처리 캐시의 파이프라인에서 구한다)"""
+        self._categorical_feature = list(categorical_feature or []) or "auto"
+        self._x_fit, self._x_valid, self._y_fit, self._y_valid = sk_train_test_split(
+            x_train, np.asarray(y_train, dtype=np.float64).ravel(),
+            test_size=self.validation_ratio, random_state=42,
+        )
+        self._datasets = {}
+        logger.info(
+            f"자동 조정 시작: {x_train.shape[0]}행 x {x_train.shape[1]}열, "
+            f"스레드 {self.threads}, 구성 방식 {list(LAYOUTS)}, max_bin {self.max_bins}"
+        )
+
+        probes = [self._probe(t, layout, DEFAULT_MAX_BIN) for t in self.threads for layout in LAYOUTS]
+        baseline = next(p for p in probes if p.num_threads == max(self.threads) and p.layout == "auto")
+        fastest = min(probes, key=lambda p: p.seconds_per_round)
+        probes += [self._probe(fastest.num_threads, fastest.layout, b) for b in self.max_bins if b != DEFAULT_MAX_BIN]
+
+        max_loss = baseline.valid_loss * (1 + self.tolerance)
+        accepted = [p for p in probes if p.valid_loss <= max_loss]
+        best = min(accepted, key=lambda p: p.seconds_per_round)
+        profile = {
+            "params": best.params,
+            "seconds_per_round": best.seconds_per_round,
+            "baseline_seconds_per_round": baseline.seconds_per_round,
+            "speedup": baseline.seconds_per_round / best.seconds_per_round,
+            "valid_loss": best.valid_loss,
+            "baseline_valid_loss": baseline.valid_loss,
+            "tolerance": self.tolerance,
+            "rows": int(x_train.shape[0]),
+            "features": int(x_train.shape[1]),
+            "cpu_count": self.cpu_count,
+            "lightgbm_version": lgb.__version__,
+            "tuned_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        logger.info(f"자동 조정 결과: {best.params} ({profile['speedup']:.2f}배)")
+        return {"profile": profile, "probes": [asdict(p) for p in probes]}
+
+
+def _write_section(config_path: str, key: str, value: Dict):
+    """config.yml의 최상위 key 항목만 다시 씁니다. 다른 항목의 주석과 순서는 그대로 둔다."""
+    with open(config_path, "r", encoding="utf-8", newline="") as f:
+        text = f.read()
+    newline = "\r\n" if "\r\n" in text else "\n"
+    lines = text.replace("\r\n", "\n").split("\n")
+    section = yaml.safe_dump({key: value}, sort_keys=False, allow_unicode=True).rstrip("\n").split("\n")
+
+    start = next((i for i, line in enumerate(lines) if line.startswith(f"{key}:")), None)
+    if start is None:
+        while lines and lines[-1] == "":
+            lines.pop()
+        lines += ["", "# 호스트별 LightGBM 자원 파라미터 (python -m src.autotune run 이 기록)", *section, ""]
+    else:
+        end = next(
+            (i for i in range(start + 1, len(lines)) if lines[i] and not lines[i].startswith((" ", "\t", "#"))),
+            len(lines),
+        )
+        # 다음 항목 앞의 빈 줄/주석은 다음 항목의 것으로 둔다.
+        while end > start + 1 and (lines[end - 1] == "" or lines[end - 1].startswith("#")):
+            end -= 1
+        lines[start:end] = section
+
+    tmp_path = f"{config_path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        f.write(newline.join(lines))
+    os.replace(tmp_path, config_path)
+
+
+def save_profile(config_path: str, name: str, profile: Dict):
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+    profiles = config.get(PROFILES_KEY) or {}
+    profiles[name] = profile
+    _write_section(config_path, PROFILES_KEY, profiles)
+
+
+def apply_host_profile(cfg: Dict) -> Optional[Dict]:
+    """현재 호스트의 자동 조정 결과를 cfg['model']['params']에 적용하고, 적용한 값을 반환합니다."""
+    if not (cfg.get("autotune") or {}).get("apply", True):
+        return None
+    name = host_profile_name()
+    profile = (cfg.get(PROFILES_KEY) or {}).get(name)
+    if not profile:
+        return None
+
+    params = cfg.setdefault("model", {}).setdefault("params", {})
+    applied = {}
+    for key, value in profile["params"].items():
+        if key == "num_threads":
+            # 작업 워커가 정한 CPU 슬롯(limit_cpu)을 넘지 않는다.
+            limit = params.get("num_threads") or 0
+            value = min(value, limit) if limit > 0 else value
+        elif key in ("force_col_wise", "force_row_wise"):
+            if "force_col_wise" in params or "force_row_wise" in params:
+                continue
+        elif key in params:
+            continue
+        params[key] = value
+        applied[key] = value
+    logger.info(f"자동 조정 프로파일 적용 ({name}): {applied}")
+    return applied
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LightGBM 학습 자원 파라미터 자동 조정")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="전처리 캐시 데이터로 조합을 측정하고 config.yml에 저장")
+    run_parser.add_argument("--cache-key", help="전처리 캐시 키. 없으면 가장 최근에 사용한 항목")
+    run_parser.add_argument("--profile", default=None, help="호스트 프로파일 이름")
+    run_parser.add_argument("--config", default=CONFIG_PATH)
+    run_parser.add_argument("--dry-run", action="store_true", help="config.yml에 저장하지 않음")
+    show_parser = subparsers.add_parser("show", help="저장된 호스트 프로파일 조회")
+    show_parser.add_argument("--config", default=CONFIG_PATH)
+
+    args = parser.parse_args()
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+    if args.command == "show":
+        print(json.dumps({"current": host_profile_name(), PROFILES_KEY: config.get(PROFILES_KEY) or {}}, indent=2, ensure_ascii=False))
+    else:
+        cache = PreprocessCache(max_bytes=int(config.get("preprocess_cache", {}).get("max_size_mb", 2048) * 1024 ** 2))
+        cache_key = args.cache_key or cache.latest_key()
+        if cache_key is None:
+            raise SystemExit("전처리 캐시가 비어 있습니다. 먼저 한 번 학습하거나 --cache-key를 지정해주세요.")
+        x_train, y_train = cache.load_train_arrays(cache_key)
+        artifact = PreprocessArtifact.load(os.path.join(cache.entry_dir(cache_key), PIPELINE_FILE))
+        result = Autotuner(config.get("autotune")).run(x_train, y_train, artifact.categorical_feature_indices)
+        result["profile"]["cache_key"] = cache_key
+        name = args.profile or host_profile_name()
+        if not args.dry_run:
+            save_profile(args.config, name, result["profile"])
+        print(json.dumps({"profile_name": name, **result}, indent=2, ensure_ascii=False))
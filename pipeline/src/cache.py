@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from src.dataset.schema import XY
+from src.preprocess import DataPreprocessPipeline, split_train_test
+from src.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+CACHE_DIR = os.getenv("PREPROCESS_CACHE_DIR", './data_storage/preprocess_cache')
+META_FILE = "meta.json"
+PIPELINE_FILE = "pipeline.json"
+
+
+def hash_dataframe(df: pd.DataFrame) -> str:
+    """행 순서와 컬럼 이름/타입까지 포함한 데이터프레임 내용 해시."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([(c, str(t)) for c, t in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+def _dir_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+
+
+def _save_matrix(save_dir: str, name: str, x):
+    if sp.issparse(x):
+        sp.save_npz(os.path.join(save_dir, f"{name}.npz"), sp.csr_matrix(x))
+    else:
+        np.save(os.path.join(save_dir, f"{name}.npy"), np.asarray(x))
+
+
+def _load_matrix(save_dir: str, name: str):
+    npy_path = os.path.join(save_dir, f"{name}.npy")
+    if os.path.exists(npy_path):
+        return np.load(npy_path, mmap_mode="r")
+    return sp.load_npz(os.path.join(save_dir, f"{name}.npz"))
+
+
+class PreprocessCache:
+    """
+    split_train_test 결과(전처리된 X/y train/test)와 학습된 전처리 파이프라인을 저장해두는 캐시.
+    키는 데이터 내용, 분할 비율, seed, 전처리 설정의 해시이므로 모델 파라미터만 바꿔 다시 학습할 때는 전처리를 건너뛴다.
+    전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 삭제한다(LRU).
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = 2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def make_key(self, raw_df: pd.DataFrame, preprocess_config: Dict, test_split_ratio: float, random_state: int) -> Tuple[str, Dict]:
+        inputs = {
+            "data": hash_dataframe(raw_df),
+            "test_split_ratio": test_split_ratio,
+            "random_state": random_state,
+            "preprocessing": preprocess_config,
+        }
+        key = hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()[:32]
+        return key, inputs
+
+    def entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def _entries(self) -> List[str]:
+        return [
+            os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+            if os.path.exists(os.path.join(self.cache_dir, name, META_FILE))
+        ]
+
+    def latest_key(self) -> Optional[str]:
+        """가장 최근에 사용한 항목의 키."""
+        entries = sorted(self._entries(), key=os.path.getmtime)
+        return os.path.basename(entries[-1]) if entries else None
+
+    def load_train_arrays(self, key: str):
+        """전처리 파이프라인 없이 학습셋 X/y만 불러옵니다. (src.autotune)"""
+        entry_dir = self.entry_dir(key)
+        if not os.path.exists(os.path.join(entry_dir, META_FILE)):
+            raise FileNotFoundError(f"전처리 캐시 항목이 없습니다: {key}")
+        return _load_matrix(entry_dir, "x_train"), np.load(os.path.join(entry_dir, "y_train.npy"))
+
+    def _load(self, entry_dir: str, data_preprocess_pipeline: DataPreprocessPipeline) -> Tuple[XY, XY]:
+        data_preprocess_pipeline.load_pipeline(os.path.join(entry_dir, PIPELINE_FILE))
+        xy = []
+        for split in ["train", "test"]:
+            y = pd.DataFrame(
+                np.load(os.path.join(entry_dir, f"y_{split}.npy")),
+                index=np.load(os.path.join(entry_dir, f"y_{split}_index.npy")),
+                columns=["price"],
+            )
+            xy.append(XY(x=_load_matrix(entry_dir, f"x_{split}"), y=y))
+        # LRU 순서는 디렉토리 수정 시각으로 관리한다.
+        os.utime(entry_dir)
+        return xy[0], xy[1]
+
+    def _store(self, entry_dir: str, inputs: Dict, sources, xy_train: XY, xy_test: XY,
+               data_preprocess_pipeline: DataPreprocessPipeline) -> int:
+        # 다른 학습이 같은 키를 동시에 쓰더라도 반쯤 쓰인 항목을 읽지 않도록 임시 경로에 쓴 뒤 이름을 바꾼다.
+        tmp_dir = f"{entry_dir}.tmp-{os.getpid()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+        for split, xy in [("train", xy_train), ("test", xy_test)]:
+            _save_matrix(tmp_dir, f"x_{split}", xy.x)
+            np.save(os.path.join(tmp_dir, f"y_{split}.npy"), xy.y["price"].to_numpy(dtype=np.float64))
+            np.save(os.path.join(tmp_dir, f"y_{split}_index.npy"), xy.y.index.to_numpy())
+        data_preprocess_pipeline.dump_pipeline(os.path.join(tmp_dir, PIPELINE_FILE))
+        with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+            json.dump({**inputs, "sources": sources, "created_at": datetime.now().isoformat()}, f, indent=2, default=str)
+
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return _dir_size(entry_dir)
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        entries = sorted(self._entries(), key=os.path.getmtime)
+        sizes = {entry: _dir_size(entry) for entry in entries}
+        total = sum(sizes.values())
+
+        evicted = []
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= sizes[entry]
+            evicted.append(os.path.basename(entry))
+        if evicted:
+            logger.info(f"전처리 캐시 정리: {evicted} (남은 크기 {total / 1024 ** 2:.1f}MB)")
+        return evicted
+
+    def split_train_test(
+        self,
+        raw_df: pd.DataFrame,
+        test_split_ratio: float,
+        data_preprocess_pipeline: DataPreprocessPipeline,
+        random_state: int = 42,
+        sources=None,
+    ) -> Tuple[XY, XY, Dict]:
+        """캐시에 있으면 불러오고, 없으면 split_train_test를 수행한 뒤 저장합니다. 세 번째 값은 run metadata용 리포트입니다."""
+        started_at = time.perf_counter()
+        key, inputs = self.make_key(raw_df, data_preprocess_pipeline.config, test_split_ratio, random_state)
+        entry_dir = self.entry_dir(key)
+
+        if os.path.exists(os.path.join(entry_dir, META_FILE)):
+            xy_train, xy_test = self._load(entry_dir, data_preprocess_pipeline)
+            report = {"hit": True, "key": key, "size_bytes": _dir_size(entry_dir), "evicted": []}
+            logger.info(f"전처리 캐시 사용: {key}")
+        else:
+            xy_train, xy_test = split_train_test(
+                raw_df=raw_df,
+                test_split_ratio=test_split_ratio,
+                data_preprocess_pipeline=data_preprocess_pipeline,
+                random_state=random_state,
+            )
+            size_bytes = self._store(entry_dir, inputs, sources, xy_train, xy_test, data_preprocess_pipeline)
+            report = {"hit": False, "key": key, "size_bytes": size_bytes, "evicted": self.evict(keep=entry_dir)}
+            logger.info(f"전처리 결과를 캐시에 저장: {key}")
+
+        report["seconds"] = time.perf_counter() - started_at
+        return xy_train, xy_test, report
@@ -2,9 +2,10 @@ import streamlit as st
 import pandas as pd
 import datetime
 import os
-from glob import glob
 import yaml
 
+from src.record_store import RecordStore, read_file
+
 def load_config():
     """config.yml 파일에서 설정을 로드합니다."""
     config_path = os.path.join("./config.yml")
@@ -27,8 +28,9 @@ def configure_data(data_dir):
     archive_path = os.path.join(data_dir, "archive")
     os.makedirs(archive_path, exist_ok=True)
     
-    # 날짜별 폴더 목록
-    date_folders = [d for d in glob(os.path.join(data_dir, "*")) if os.path.isdir(d) and d != archive_path]
+    # 날짜별 폴더 목록 (records/{YYYY-MM-DD}, Parquet로 migrate된 파티션은 Parquet를 읽는다)
+    record_store = RecordStore(data_dir)
+    date_folders = [os.path.join(data_dir, date) for date in record_store.dates()]
     date_folders.sort(reverse=True)  # 최신 날짜순 정렬
     
     if date_folders:
@@ -39,15 +41,19 @@ def configure_data(data_dir):
             format_func=lambda x: os.path.basename(x)
         )
         
+        # 메모리에 모두 올리기 어려운 기간은 파일을 chunk 단위로 읽으며 학습한다. (config.yml streaming 설정)
+        streaming = st.checkbox("스트리밍 학습 (대용량 데이터)", value=False)
+        
         if selected_folders:
             # 선택된 폴더들의 데이터 로드 및 병합
             dfs = []
             for folder in selected_folders:
-                csv_files = glob(f'{folder}/*.csv')
-                if csv_files:
-                    # 각 폴더의 첫 번째 CSV 파일 사용 (동일한 이름의 파일)
-                    file_path = csv_files[0]
-                    df = pd.read_csv(file_path)
+                record_files = record_store.files(os.path.basename(folder))
+                if record_files:
+                    # 각 폴더의 첫 번째 파일 사용 (동일한 이름의 파일)
+                    file_path = record_files[0]
+                    # 스트리밍 학습이면 미리보기/컬럼 정보용 일부만 읽는다.
+                    df = read_file(file_path, nrows=1000 if streaming else None)
                     dfs.append(df)
             
             if dfs:
@@ -62,7 +68,7 @@ def configure_data(data_dir):
                 st.subheader("데이터 정보")
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    st.metric("행 수", len(df))
+                    st.metric("행 수", f"{len(df)} (미리보기)" if streaming else len(df))
                 with col2:
                     st.metric("열 수", len(df.columns))
                 with col3:
@@ -87,7 +93,7 @@ def configure_data(data_dir):
                         st.success(f"선택된 폴더들이 아카이브되었습니다.")
                         st.experimental_rerun()
             else:
-                st.warning("선택된 폴더에 CSV 파일이 없습니다.")
+                st.warning("선택된 폴더에 CSV/Parquet 파일이 없습니다.")
                 return None
         else:
             st.warning("날짜 폴더를 선택해주세요.")
@@ -123,8 +129,9 @@ def configure_data(data_dir):
     
     # 데이터 설정 구성
     data_config = { 
-        "source": [os.path.join(folder, glob(f'{folder}/*.csv')[0]) for folder in selected_folders],
-        "dataframe": df,
+        "source": [record_store.files(os.path.basename(folder))[0] for folder in selected_folders],
+        "dataframe": None if streaming else df,
+        "streaming": streaming,
         "details": {
             "date_from": date_from.strftime("%Y-%m-%d"),
             "date_to": date_to.strftime("%Y-%m-%d"),
@@ -170,11 +177,37 @@ def configure_model():
         }
     
     eval_metrics = st.selectbox("평가 지표", ["mse", "rmse", "mae", "mape"])
+    # 끄면 학습 중 매 반복마다 학습 데이터 전체를 평가하지 않아 학습이 빨라진다.
+    evaluate_train_set = st.checkbox("학습 데이터 평가", value=config.get("evaluate_train_set", True))
     
+    # 하이퍼파라미터 탐색 (탐색 범위는 config.yml의 hpo.search_space)
+    hpo_config = config.get("hpo", {})
+    search_mode = st.selectbox("하이퍼파라미터 탐색", ["none", "grid", "random", "successive_halving"])
+    search_config = {"mode": search_mode}
+    if search_mode != "none":
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            search_config["num_trials"] = st.number_input("trial 수", 1, 1000, hpo_config.get("num_trials", 20))
+        with col2:
+            search_config["cpu_budget"] = st.number_input("사용할 CPU 수", 1, os.cpu_count(), hpo_config.get("cpu_budget") or os.cpu_count())
+        with col3:
+            search_config["threads_per_trial"] = st.number_input("trial당 스레드 수", 1, os.cpu_count(), hpo_config.get("threads_per_trial", 1))
+    
+    # 교차검증 (fold 수가 2 이상이면 holdout 평가와 함께 fold별 지표의 신뢰구간을 계산)
+    col1, col2 = st.columns(2)
+    with col1:
+        cv_splits = st.number_input("교차검증 fold 수 (0: 사용 안 함)", 0, 20, 0)
+    with col2:
+        cv_repeats = st.number_input("교차검증 반복 횟수", 1, 10, 1)
+    cv_config = {"n_splits": cv_splits, "n_repeats": cv_repeats}
+
     model_config = {
         "name": model_type,
         "eval_metrics": eval_metrics,
-        "params": model_params
+        "params": model_params,
+        "search": search_config,
+        "evaluate_train_set": evaluate_train_set,
+        "cv": cv_config,
     }
     
     return model_config
@@ -225,8 +258,9 @@ def configure_preprocessing(data_config):
                 elif data_type == "categorical":
                     handling = st.selectbox(
                         "전처리 방식",
-                        ["one_hot", "label", "none"],
-                        key=f"handling_{col}"
+                        ["one_hot", "native", "label", "none"],
+                        key=f"handling_{col}",
+                        help="native: 정수 코드 하나로 내보내고 LightGBM이 범주로 분할합니다. (범주가 많을 때 one_hot보다 행렬이 작다)"
                     )
                     missing = st.selectbox(
                         "결측치 처리",
@@ -243,9 +277,15 @@ def configure_preprocessing(data_config):
         st.warning("먼저 데이터를 로드하세요.")
     
     # 전체 전처리 설정
+    sparse_output = st.selectbox(
+        "전처리 결과 형식",
+        ["auto", "dense", "sparse"],
+        help="sparse: one-hot 결과를 CSR 희소 행렬로 학습/평가/서빙합니다. auto: one-hot 폭이 넓어 밀도가 낮을 때만 sparse"
+    )
     preprocess_config = {
         "columns": columns_config,
-        "drop_columns": st.multiselect("제외할 컬럼", st.session_state.get("df_columns", []))
+        "drop_columns": st.multiselect("제외할 컬럼", st.session_state.get("df_columns", [])),
+        "sparse_output": {"auto": "auto", "dense": False, "sparse": True}[sparse_output],
     }
     
     return preprocess_config
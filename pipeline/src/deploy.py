@@ -5,9 +5,13 @@ import plotly.express as px
 import json
 import requests
 from typing import Dict, List
-from dataclasses import dataclass
+from dataclasses import asdict
 import os
+import time
 from src.logger import setup_logger
+from src.incremental import record_deployment
+from src.steady_state import find_steady_state
+from src.experiment_store import ExperimentStore, ExperimentRecord, METRICS, SORT_COLUMNS
 import docker
 
 DEPLOY_URL = os.getenv("DEPLOY_URL")
@@ -17,35 +21,32 @@ MLSERVER2_HOST = os.getenv("MLSERVER2_HOST", "petcare-mlserver2")
 MODEL_WEIGHT_PATH = os.getenv("MODEL_WEIGHT_PATH", "/app/data_storage/train_results/")
 MLSERVER1_PORT = os.getenv("MLSERVER1_PORT", 8000)
 MLSERVER2_PORT = os.getenv("MLSERVER2_PORT", 8002)
+MLSERVER_READY_TIMEOUT_SECONDS = float(os.getenv("MLSERVER_READY_TIMEOUT_SECONDS", 300))
+WARMUP_MAX_STEADY_STATE_SECONDS = float(os.getenv("WARMUP_MAX_STEADY_STATE_SECONDS", 60))
+# MLServer warm-up 지연시간의 정상상태 판단 기준 (backend와 같은 src.steady_state)
+WARMUP_WINDOW = int(os.getenv("WARMUP_WINDOW", 10))
+WARMUP_TOLERANCE = float(os.getenv("WARMUP_TOLERANCE", 0.2))
+WARMUP_STEADY_WINDOWS = int(os.getenv("WARMUP_STEADY_WINDOWS", 3))
+WARMUP_SLO_MS = float(os.getenv("WARMUP_SLO_MS")) if os.getenv("WARMUP_SLO_MS") else None
 
 
 logger = setup_logger(__name__)
 
-@dataclass
-class ExperimentResult:
-    name: str
-    mean_absolute_error: float
-    mean_absolute_percentage_error: float
-    root_mean_squared_error: float
-
 class ModelDeploymentView:
-    def __init__(self, experiments_dir: str = "data_storage/train_results"):
+    def __init__(self, experiments_dir: str = "data_storage/train_results", page_size: int = 20):
         self.experiments_dir = Path(experiments_dir)
+        self.page_size = page_size
+        # 학습 결과 디렉토리를 매번 읽지 않고 실험 색인(SQLite)에서 한 페이지만 조회한다.
+        self.store = ExperimentStore(str(self.experiments_dir))
+        if self.store.count() == 0:
+            # 색인이 생기기 전의 학습 결과
+            self.store.backfill()
         
-    def load_experiments(self) -> List[ExperimentResult]:
-        """모든 실험 결과 로드"""
-        experiments = []
-        for exp_dir in self.experiments_dir.glob("*"):
-            if exp_dir.is_dir():
-                metrics_file = exp_dir / "metrics.json"
-                if metrics_file.exists():
-                    with open(metrics_file, "r") as f:
-                        metrics = json.load(f)
-                        experiments.append(ExperimentResult(
-                            name=exp_dir.name,
-                            **metrics
-                        ))
-        return experiments
+    def load_experiments(self, sort_by: str = "created_at", descending: bool = True, page: int = 1) -> List[ExperimentRecord]:
+        """정렬 기준으로 page번째 페이지의 실험 결과 조회"""
+        return self.store.query(
+            sort_by=sort_by, descending=descending, limit=self.page_size, offset=(page - 1) * self.page_size,
+        )
 
     def plot_metrics_comparison(self, experiments_df: pd.DataFrame):
         """메트릭 비교 시각화"""
@@ -76,19 +77,66 @@ class ModelDeploymentView:
         model_path = os.path.join(MODEL_WEIGHT_PATH, model_name)
         logger.info(f"배포할 모델 경로: {model_path}")
 
+        # 이번 배포 전에 남은 warm-up 리포트는 보지 않는다.
+        deploy_started_at = time.time()
         if self._restart_container(MLSERVER1_HOST, model_path):
             logger.info("MLserver1 restart successful")
         else:
             logger.error("MLserver1 restart failed")
         
+        # MLserver1이 warm-up을 마치고 정상상태에 도달하기 전에는 MLserver2를 내리지 않는다.
+        if not self._wait_until_ready(MLSERVER1_HOST, MLSERVER1_PORT, model_path, deploy_started_at):
+            logger.error("MLserver1 warm-up gate failed. MLserver2 배포를 중단합니다.")
+            return False
+        
         # MLserver2 재시작
         logger.info("Restarting MLserver2...")
-        if self._restart_container(MLSERVER2_HOST, model_path):
+        deploy_started_at = time.time()
+        if self._restart_container(MLSERVER2_HOST, model_path) and self._wait_until_ready(MLSERVER2_HOST, MLSERVER2_PORT, model_path, deploy_started_at):
             logger.info("MLserver2 restart successful")
+            # 증분 재학습의 기준 모델로 사용
+            record_deployment(str(self.experiments_dir), model_name)
             return {"status": "success"}
         else:
             logger.error("MLserver2 restart failed")
             return False
+
+    def _wait_until_ready(self, host: str, port, model_path: str, deploy_started_at: float) -> bool:
+        """MLServer의 ready 엔드포인트와 이번 배포의 warm-up 리포트를 확인하여 배포 진행 여부를 결정"""
+        model_name = f"petcare-prediction-serving-{os.path.basename(model_path)}"
+        ready_url = f"http://{host}:{port}/v2/models/{model_name}/ready"
+        deadline = time.monotonic() + MLSERVER_READY_TIMEOUT_SECONDS
+
+        while time.monotonic() < deadline:
+            try:
+                if requests.get(ready_url, timeout=5).status_code == 200:
+                    break
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(2)
+        else:
+            logger.error(f"{host} ready timeout ({MLSERVER_READY_TIMEOUT_SECONDS}s)")
+            return False
+
+        report_path = os.path.join(model_path, f"warmup_report_{host}.json")
+        if not os.path.exists(report_path):
+            logger.warning(f"warm-up 리포트가 없습니다: {report_path}")
+            return True
+        if os.path.getmtime(report_path) < deploy_started_at:
+            # MLServer는 warm-up을 마친 뒤 ready가 되므로, ready인데 리포트가 이전 배포의 것이면 이번에는 warm-up을 하지 않은 것이다.
+            logger.warning(f"{host} warm-up 리포트가 이번 배포 전의 것입니다: {report_path}")
+            return True
+
+        with open(report_path, "r") as f:
+            report = json.load(f)
+        latencies = report.get("latencies_ms") or []
+        steady_index = find_steady_state(latencies, WARMUP_WINDOW, WARMUP_TOLERANCE, WARMUP_STEADY_WINDOWS, WARMUP_SLO_MS)
+        time_to_steady_state = report["elapsed_seconds"][steady_index] if steady_index is not None else None
+        logger.info(
+            f"{host} warm-up: {report.get('num_requests')}건 (실패 {report.get('num_failures', 0)}건), 첫 요청 {report.get('first_latency_ms')}ms, "
+            f"정상상태 도달 {steady_index}번째 요청 ({time_to_steady_state}s)"
+        )
+        return time_to_steady_state is not None and time_to_steady_state <= WARMUP_MAX_STEADY_STATE_SECONDS
         
     def render_performance_section(self, df: pd.DataFrame):
         """성능 지표 섹션 렌더링"""
@@ -98,6 +146,12 @@ class ModelDeploymentView:
     
         
 
+    def render_top_section(self, k: int = 5):
+        """지표별 상위 모델"""
+        with st.expander(f"지표별 상위 {k}개 모델"):
+            metric = st.selectbox("지표", METRICS, index=METRICS.index("root_mean_squared_error"))
+            st.dataframe(pd.DataFrame([asdict(record) for record in self.store.top_k(metric, k)]))
+
     def render_deployment_section(self, df: pd.DataFrame):
         """배포 섹션 렌더링"""
         col3, col4 = st.columns([1, 1])
@@ -139,14 +193,25 @@ class ModelDeploymentView:
         """뷰 렌더링"""
         st.header("모델 배포 설정")
         
-        experiments = self.load_experiments()
-        if not experiments:
+        total = self.store.count()
+        if total == 0:
             st.warning("학습된 모델이 없습니다.")
             return
+        
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            sort_by = st.selectbox("정렬 기준", SORT_COLUMNS)
+        with col2:
+            descending = st.checkbox("내림차순", value=sort_by == "created_at")
+        with col3:
+            num_pages = -(-total // self.page_size)
+            page = st.number_input(f"페이지 (전체 {num_pages})", min_value=1, max_value=num_pages, value=1)
             
-        df = pd.DataFrame(experiments)
+        experiments = self.load_experiments(sort_by=sort_by, descending=descending, page=int(page))
+        df = pd.DataFrame([asdict(record) for record in experiments])
         
         self.render_performance_section(df)
+        self.render_top_section()
         st.subheader("모델 배포")
         self.render_deployment_section(df)
 
@@ -174,7 +239,8 @@ class ModelDeploymentView:
                 name=container_name,
                 environment={
                     **dict(env.split('=') for env in config['Config'].get('Env', []) if '=' in env),
-                    'MODEL_WEIGHT_PATH': model_path
+                    'MODEL_WEIGHT_PATH': model_path,
+                    'MLSERVER_INSTANCE': container_name,
                 },
                 volumes=host_config.get('Binds', []),
                 ports={port: host_config['PortBindings'].get(port, []) 
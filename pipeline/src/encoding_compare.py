@@ -0,0 +1,179 @@
+"""
+범주 컬럼 인코딩 비교: one_hot(dense) vs one_hot_sparse(CSR) vs native(정수 코드 + LightGBM categorical_feature).
+
+같은 데이터/분할/파라미터로 두 방식을 학습하여 학습 행렬 크기, 전처리/학습 시간, 테스트 지표,
+요청 하나의 feature 벡터 길이와 변환 시간을 비교한다.
+
+    python -m src.encoding_compare data_storage/records [--date-from 2024-01-01] [--preprocessing preprocessing.json]
+
+--preprocessing이 없으면 문자열 컬럼은 범주(최빈값 대체), 숫자 컬럼은 minmax(평균 대체)로 설정한다.
+"""
+import argparse
+import json
+import time
+from typing import Dict, List, Optional
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, mean_absolute_percentage_error, mean_squared_error
+
+from src.lgb_dataset import categorical_feature, dataset_params, with_categorical_feature, without_categorical_feature
+from src.logger import setup_logger
+from src.preprocess import DataPreprocessPipeline, split_train_test
+from src.preprocess_artifact import matrix_nbytes
+from src.record_store import RecordStore
+from src.utils import convert_prediction_input
+
+logger = setup_logger(__name__)
+
+ENCODINGS = ["one_hot", "native"]
+# 비교 이름: (범주 컬럼 handling, 전처리 sparse_output)
+VARIANTS = {
+    "one_hot": ("one_hot", False),
+    "one_hot_sparse": ("one_hot", True),
+    "native": ("native", False),
+}
+# 학습 탭에서도 전처리 대상에서 제외하는 컬럼
+EXCLUDED_COLUMNS = ["price", "issued_at", "claim_id", "pet_id"]
+DEFAULT_PARAMS = {
+    "objective": "regression",
+    "num_leaves": 31,
+    "learning_rate": 0.05,
+    "feature_fraction": 0.9,
+    "seed": 1234,
+    "verbose": -1,
+}
+
+
+def default_preprocessing(df: pd.DataFrame) -> Dict:
+    columns = {}
+    for column in df.columns:
+        if column in EXCLUDED_COLUMNS:
+            continue
+        if pd.api.types.is_numeric_dtype(df[column]):
+            columns[column] = {"type": "numeric", "handling": "minmax_scale", "missing_value": "mean"}
+        else:
+            columns[column] = {"type": "categorical", "handling": "one_hot", "missing_value": "mode"}
+    return {"columns": columns, "drop_columns": []}
+
+
+def with_encoding(preprocess_config: Dict, encoding: str, sparse_output: bool = False) -> Dict:
+    """범주 컬럼의 one_hot/native 설정을 encoding으로 바꾼 전처리 설정."""
+    columns = {
+        column: {**settings, "handling": encoding}
+        if settings.get("type") == "categorical" and settings.get("handling") in ENCODINGS else settings
+        for column, settings in preprocess_config["columns"].items()
+    }
+    return {**preprocess_config, "columns": columns, "sparse_output": sparse_output}
+
+
+def run_encoding(
+    df: pd.DataFrame,
+    preprocess_config: Dict,
+    variant: str,
+    params: Dict,
+    num_boost_round: int = 2000,
+    early_stopping_rounds: int = 100,
+    test_split_ratio: float = 0.2,
+) -> Dict:
+    encoding, sparse_output = VARIANTS[variant]
+    data_preprocess_pipeline = DataPreprocessPipeline(with_encoding(preprocess_config, encoding, sparse_output))
+    data_preprocess_pipeline.define_pipeline()
+    started_at = time.perf_counter()
+    xy_train, xy_test = split_train_test(df, test_split_ratio, data_preprocess_pipeline)
+    preprocess_seconds = time.perf_counter() - started_at
+
+    params = with_categorical_feature(params, data_preprocess_pipeline.get_categorical_feature_indices())
+    started_at = time.perf_counter()
+    train_set = lgb.Dataset(
+        xy_train.x, xy_train.y["price"].to_numpy(), params=dataset_params(params), categorical_feature=categorical_feature(params),
+    )
+    valid_set = lgb.Dataset(
+        xy_test.x, xy_test.y["price"].to_numpy(), reference=train_set, categorical_feature=categorical_feature(params),
+    )
+    train_set.construct()
+    valid_set.construct()
+    dataset_seconds = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    booster = lgb.train(
+        {**without_categorical_feature(params), "metric": "rmse"},
+        train_set,
+        num_boost_round=num_boost_round,
+        valid_sets=[valid_set],
+        valid_names=["valid"],
+        callbacks=[lgb.early_stopping(early_stopping_rounds, verbose=False)],
+    )
+    train_seconds = time.perf_counter() - started_at
+
+    y_true = xy_test.y["price"].to_numpy()
+    y_pred = booster.predict(xy_test.x)
+    # 백엔드가 요청마다 하는 변환과 MLServer로 보내는 벡터
+    request = df.drop(columns=["price"]).iloc[[0]]
+    started_at = time.perf_counter()
+    for _ in range(100):
+        request_vector = data_preprocess_pipeline.transform(request)
+    transform_ms = (time.perf_counter() - started_at) * 10
+
+    feature_names = data_preprocess_pipeline.get_feature_names()
+    return {
+        "encoding": variant,
+        "sparse": bool(data_preprocess_pipeline.is_sparse_output()),
+        "num_features": len(feature_names),
+        "categorical_features": [feature_names[i] for i in data_preprocess_pipeline.get_categorical_feature_indices()],
+        "train_matrix_mb": matrix_nbytes(xy_train.x) / 1024 ** 2,
+        "request_vector_length": int(request_vector.shape[1]),
+        # MLServer로 보내는 값 수 (희소 행렬은 0이 아닌 값만 보낸다)
+        "request_values": int(request_vector.nnz if data_preprocess_pipeline.is_sparse_output() else request_vector.size),
+        "request_payload_bytes": len(json.dumps(convert_prediction_input(request_vector))),
+        "request_transform_ms": transform_ms,
+        "preprocess_seconds": preprocess_seconds,
+        "dataset_seconds": dataset_seconds,
+        "train_seconds": train_seconds,
+        "best_iteration": booster.best_iteration,
+        "seconds_per_iteration": train_seconds / max(booster.current_iteration(), 1),
+        "mean_absolute_error": float(mean_absolute_error(y_true, y_pred)),
+        "mean_absolute_percentage_error": float(mean_absolute_percentage_error(y_true, y_pred)),
+        "root_mean_squared_error": float(np.sqrt(mean_squared_error(y_true, y_pred))),
+    }
+
+
+def compare_encodings(df: pd.DataFrame, preprocess_config: Optional[Dict] = None, params: Optional[Dict] = None, **kwargs) -> Dict:
+    preprocess_config = preprocess_config or default_preprocessing(df)
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    results: List[Dict] = []
+    for variant in VARIANTS:
+        results.append(run_encoding(df, preprocess_config, variant, params, **kwargs))
+        logger.info(f"{variant}: {results[-1]}")
+    one_hot = results[0]
+    return {
+        "rows": len(df),
+        "results": results,
+        # 각 방식 / one_hot(dense)
+        "ratio": {
+            result["encoding"]: {
+                key: result[key] / one_hot[key] if one_hot[key] else None
+                for key in ["train_matrix_mb", "request_payload_bytes", "seconds_per_iteration", "train_seconds", "root_mean_squared_error"]
+            }
+            for result in results[1:]
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="범주 컬럼 인코딩 비교 (one_hot vs one_hot_sparse vs native)")
+    parser.add_argument("data_dir")
+    parser.add_argument("--date-from")
+    parser.add_argument("--date-to")
+    parser.add_argument("--preprocessing", help="전처리 설정 json (학습 탭의 preprocessing과 같은 형식)")
+    parser.add_argument("--params", default="{}", help="LightGBM 파라미터 json")
+
+    args = parser.parse_args()
+    df = RecordStore(args.data_dir).read(args.date_from, args.date_to)
+    preprocess_config = None
+    if args.preprocessing:
+        with open(args.preprocessing, "r", encoding="utf-8") as f:
+            preprocess_config = json.load(f)
+    report = compare_encodings(df, preprocess_config, json.loads(args.params))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
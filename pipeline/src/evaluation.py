@@ -0,0 +1,211 @@
+"""
+테스트셋 평가: 전체 지표와 구간(slice)별 지표(견종, 성별, 나이 구간)를 NumPy 배열 위에서 한 번에 계산합니다.
+
+- 예측은 chunk_rows 행씩 나누어 수행하고, 행마다 (오차, 오차 제곱, 오차율...)를 구간 코드별로 np.bincount로 누적한다.
+- 테스트셋이 max_prediction_rows보다 크면 예측값을 보관하지 않고 지표만 누적한다(메모리 사용량이 테스트셋 크기와 무관).
+- 결과는 slice_metrics.parquet, predictions.parquet로 저장한다. (피처 행렬은 저장하지 않는다)
+"""
+import os
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# sklearn mean_absolute_percentage_error와 같은 분모 하한
+EPSILON = np.finfo(np.float64).eps
+SUMS = ["count", "abs_error", "squared_error", "abs_percentage_error", "error", "over_predicted", "under_predicted"]
+DEFAULT_SLICES = {
+    "breed": {"column": "breed"},
+    "gender": {"column": "gender"},
+    "age_bucket": {"column": "age", "bins": [1, 3, 7, 10]},
+}
+MISSING_LABEL = "(missing)"
+SLICE_METRICS_FILE = "slice_metrics.parquet"
+PREDICTIONS_FILE = "predictions.parquet"
+
+
+@dataclass
+class Slice:
+    name: str
+    column: str
+    bins: Optional[List[float]] = None
+    categories: Optional[np.ndarray] = None
+
+    @property
+    def labels(self) -> List[str]:
+        if self.bins is not None:
+            edges = [f"{edge:g}" for edge in self.bins]
+            labels = [f"<{edges[0]}"] + [f"{a}~{b}" for a, b in zip(edges, edges[1:])] + [f"{edges[-1]}+"]
+        else:
+            labels = list(self.categories)
+        # 결측치와 학습 때 정한 범주에 없는 값은 마지막 코드로 모은다.
+        return labels + [MISSING_LABEL]
+
+    def fit(self, values) -> "Slice":
+        """범주 목록을 정합니다. 스트리밍 학습처럼 전체 범주를 미리 알면 categories를 지정하고 호출하지 않는다."""
+        if self.bins is None and self.categories is None:
+            values = pd.Series(values).dropna()
+            self.categories = np.sort(values.astype(str).unique())
+        return self
+
+    def encode(self, values) -> np.ndarray:
+        values = pd.Series(values)
+        missing_code = len(self.labels) - 1
+        if self.bins is not None:
+            numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+            codes = np.digitize(numbers, self.bins)
+            codes[np.isnan(numbers)] = missing_code
+            return codes.astype(np.int32)
+        codes = pd.Categorical(values.astype(str), categories=self.categories).codes.astype(np.int32)
+        codes[(codes < 0) | values.isna().to_numpy()] = missing_code
+        return codes
+
+
+class MetricAccumulator:
+    """전체/구간별로 지표 계산에 필요한 합계만 누적합니다. chunk 단위로 update를 여러 번 호출할 수 있다."""
+
+    def __init__(self, slices: List[Slice], large_error: float):
+        self.slices = slices
+        self.large_error = large_error
+        self.total = np.zeros(len(SUMS))
+        self.sums = {s.name: np.zeros((len(s.labels), len(SUMS))) for s in slices}
+
+    def update(self, y_true: np.ndarray, y_pred: np.ndarray, codes: Dict[str, np.ndarray]):
+        y_true = np.asarray(y_true, dtype=np.float64)
+        error = np.asarray(y_pred, dtype=np.float64) - y_true
+        values = np.column_stack([
+            np.ones_like(error),
+            np.abs(error),
+            error ** 2,
+            np.abs(error) / np.maximum(np.abs(y_true), EPSILON),
+            error,
+            error >= self.large_error,
+            error <= -self.large_error,
+        ])
+        self.total += values.sum(axis=0)
+        for s in self.slices:
+            num_groups = len(s.labels)
+            for j in range(len(SUMS)):
+                self.sums[s.name][:, j] += np.bincount(codes[s.name], weights=values[:, j], minlength=num_groups)
+
+    @staticmethod
+    def _metrics(sums: np.ndarray) -> Dict[str, np.ndarray]:
+        count = sums[..., 0]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return {
+                "count": count.astype(np.int64),
+                "mean_absolute_error": sums[..., 1] / count,
+                "mean_absolute_percentage_error": sums[..., 3] / count,
+                "root_mean_squared_error": np.sqrt(sums[..., 2] / count),
+                "bias": sums[..., 4] / count,
+                "over_predicted": sums[..., 5].astype(np.int64),
+                "under_predicted": sums[..., 6].astype(np.int64),
+            }
+
+    def global_metrics(self) -> Dict[str, float]:
+        return {name: value.item() for name, value in self._metrics(self.total).items()}
+
+    def slice_metrics(self) -> pd.DataFrame:
+        frames = []
+        for s in self.slices:
+            frame = pd.DataFrame({"slice": s.name, "value": s.labels, **self._metrics(self.sums[s.name])})
+            frames.append(frame[frame["count"] > 0])
+        if not frames:
+            return pd.DataFrame(columns=["slice", "value", *self._metrics(self.total).keys()])
+        return pd.concat(frames, ignore_index=True)
+
+
+@dataclass
+class EvaluationResult:
+    metrics: Dict[str, float]
+    slice_metrics: pd.DataFrame
+    eval_df: Optional[pd.DataFrame]
+
+
+def _rows(x, start: int, end: int):
+    return x.iloc[start:end] if isinstance(x, pd.DataFrame) else x[start:end]
+
+
+class Evaluator:
+    def __init__(self, evaluation_cfg: Optional[Dict] = None):
+        evaluation_cfg = evaluation_cfg or {}
+        self.slices = [
+            Slice(name=name, column=spec["column"], bins=spec.get("bins"))
+            for name, spec in evaluation_cfg.get("slices", DEFAULT_SLICES).items()
+        ]
+        self.large_error = evaluation_cfg.get("large_error", 100000)
+        self.chunk_rows = evaluation_cfg.get("chunk_rows", 200000)
+        self.max_prediction_rows = evaluation_cfg.get("max_prediction_rows", 1000000)
+
+    @property
+    def slice_columns(self) -> List[str]:
+        return sorted({s.column for s in self.slices})
+
+    def encode_slices(
+        self, slice_df: Optional[pd.DataFrame], categories: Optional[Dict[str, np.ndarray]] = None,
+    ) -> Dict[str, Tuple[Slice, np.ndarray]]:
+        """테스트셋 원본 컬럼을 구간 코드로 바꿉니다. slice_df에 없는 컬럼의 구간은 건너뛴다."""
+        if slice_df is None:
+            return {}
+        categories = categories or {}
+        encoded = {}
+        for s in self.slices:
+            if s.column not in slice_df.columns:
+                continue
+            fitted = replace(s, categories=categories.get(s.column)).fit(slice_df[s.column])
+            encoded[s.name] = (fitted, fitted.encode(slice_df[s.column]))
+        return encoded
+
+    def evaluate(self, model, x, y_true: np.ndarray, slice_codes: Optional[Dict[str, Tuple[Slice, np.ndarray]]] = None) -> EvaluationResult:
+        slice_codes = slice_codes or {}
+        y_true = np.asarray(y_true, dtype=np.float64).ravel()
+        num_rows = len(y_true)
+        accumulator = MetricAccumulator([s for s, _ in slice_codes.values()], self.large_error)
+        keep_predictions = num_rows <= self.max_prediction_rows
+        predictions = np.empty(num_rows, dtype=np.float64) if keep_predictions else None
+
+        # memmap/희소 행렬도 chunk만 읽어서 예측한다.
+        for start in range(0, num_rows, self.chunk_rows):
+            end = min(start + self.chunk_rows, num_rows)
+            y_pred = model.predict(_rows(x, start, end))
+            accumulator.update(y_true[start:end], y_pred, {name: codes[start:end] for name, (_, codes) in slice_codes.items()})
+            if keep_predictions:
+                predictions[start:end] = y_pred
+
+        metrics = accumulator.global_metrics()
+        slice_metrics = accumulator.slice_metrics()
+        logger.info(
+            f"평가 완료: {num_rows}행, 실제값보다 {self.large_error:,.0f}원 이상 '높게' 예측 {metrics['over_predicted']}건, "
+            f"'낮게' 예측 {metrics['under_predicted']}건"
+        )
+        logger.info(f"구간별 지표 구간 수: {slice_metrics.groupby('slice').size().to_dict()}")
+
+        eval_df = None
+        if keep_predictions:
+            eval_df = pd.DataFrame({"y_true": y_true, "y_pred": predictions})
+            eval_df["diff"] = eval_df["y_true"] - eval_df["y_pred"]
+            eval_df["error_rate"] = eval_df["diff"] / eval_df["y_true"]
+            for name, (s, codes) in slice_codes.items():
+                eval_df[name] = pd.Categorical.from_codes(codes, categories=s.labels)
+        else:
+            logger.info(f"테스트셋이 {self.max_prediction_rows}행보다 커서 예측값은 보관하지 않고 지표만 계산했습니다.")
+        return EvaluationResult(metrics=metrics, slice_metrics=slice_metrics, eval_df=eval_df)
+
+
+def save_evaluation(evaluation, save_dir: str) -> Dict[str, Optional[str]]:
+    """구간별 지표와 (보관한 경우) 예측값을 zstd 압축 Parquet로 저장합니다."""
+    paths = {"slice_metrics": None, "predictions": None}
+    if evaluation.slice_metrics is not None:
+        paths["slice_metrics"] = os.path.join(save_dir, SLICE_METRICS_FILE)
+        evaluation.slice_metrics.to_parquet(paths["slice_metrics"], index=False, compression="zstd")
+    if evaluation.eval_df is not None:
+        # diff/error_rate는 y_true/y_pred로 다시 계산할 수 있으므로 저장하지 않는다.
+        predictions = evaluation.eval_df.drop(columns=["diff", "error_rate"]).astype({"y_true": np.float32, "y_pred": np.float32})
+        paths["predictions"] = os.path.join(save_dir, PREDICTIONS_FILE)
+        predictions.to_parquet(paths["predictions"], index=False, compression="zstd")
+    return paths
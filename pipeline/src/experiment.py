@@ -1,14 +1,22 @@
 import json
 import os
+import sqlite3
 from datetime import datetime
 from typing import Dict, Any
 from pathlib import Path
 
+from src.experiment_store import ExperimentStore
+from src.logger import setup_logger
+
+logger = setup_logger(__name__)
+
 class ExperimentTracker:
-    def __init__(self, save_dir: str):
+    def __init__(self, save_dir: str, register: bool = True):
+        """register=True면 save_dir의 상위 디렉토리(train_results)의 실험 색인에도 기록합니다. (배포 탭 조회용)"""
         self.save_dir = Path(save_dir)
         self.save_dir.mkdir(parents=True, exist_ok=True)
         self.metrics = {}
+        self.store = ExperimentStore(str(self.save_dir.parent)) if register else None
         
     def log_experiment(self, info: Dict[str, Any]) -> str:        
         # 실험 디렉토리 생성
@@ -19,8 +27,18 @@ class ExperimentTracker:
         # 메타데이터 저장
         with open(self.save_dir / "metadata.json", "w") as f:
             json.dump(info, f, indent=2)
+        self._record(lambda: self.store.record_metadata(str(self.save_dir), info))
             
         return self.save_dir
+
+    def _record(self, write):
+        # 색인은 조회용 사본이므로 기록에 실패해도 학습 결과 저장은 계속한다. (backfill로 다시 채울 수 있다)
+        if self.store is None:
+            return
+        try:
+            write()
+        except sqlite3.Error as e:
+            logger.warning(f"실험 색인 기록 실패: {self.save_dir} ({e})")
     
     def get_experiment(self) -> Dict[str, Any]:
         """실험 결과 조회"""
@@ -39,4 +57,5 @@ class ExperimentTracker:
         # 메트릭 저장
         metrics_file = self.save_dir / "metrics.json"
         with open(metrics_file, "w") as f:
-            json.dump(self.metrics, f, indent=2)
\ No newline at end of file
+            json.dump(self.metrics, f, indent=2)
+        self._record(lambda: self.store.record_metrics(str(self.save_dir), self.metrics))
\ No newline at end of file
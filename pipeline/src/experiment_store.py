@@ -0,0 +1,195 @@
+"""
+학습 결과(train_results/*/metadata.json, metrics.json) 색인.
+
+ExperimentTracker가 log_experiment/save_metric 때 같은 내용을 SQLite(train_results/experiments.sqlite)에 기록하므로,
+배포 탭은 디렉토리를 모두 열지 않고 정렬/페이지 단위 질의만 한다.
+이 색인이 생기기 전의 학습 결과는 backfill로 옮긴다.
+
+    python -m src.experiment_store backfill data_storage/train_results
+"""
+import argparse
+import json
+import os
+import sqlite3
+from contextlib import closing
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+DB_FILE = "experiments.sqlite"
+METRICS = ["mean_absolute_error", "mean_absolute_percentage_error", "root_mean_squared_error"]
+# ORDER BY에 들어가는 컬럼은 이 목록에서만 고른다.
+# 학습 비용 (metadata.json의 profile, src.profiler)
+COST_COLUMNS = ["train_seconds", "peak_rss_mb"]
+SORT_COLUMNS = ["created_at", "name", "experiment_name", "model_name", *METRICS, *COST_COLUMNS]
+
+
+@dataclass
+class ExperimentRecord:
+    name: str
+    path: str
+    experiment_name: Optional[str]
+    run_name: Optional[str]
+    model_name: Optional[str]
+    mean_absolute_error: Optional[float]
+    mean_absolute_percentage_error: Optional[float]
+    root_mean_squared_error: Optional[float]
+    train_seconds: Optional[float]
+    peak_rss_mb: Optional[float]
+    created_at: str
+
+
+RECORD_COLUMNS = list(ExperimentRecord.__dataclass_fields__)
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class ExperimentStore:
+    def __init__(self, experiments_dir: str):
+        self.experiments_dir = experiments_dir
+        os.makedirs(experiments_dir, exist_ok=True)
+        self.db_path = os.path.join(experiments_dir, DB_FILE)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS experiments (
+                    name TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    experiment_name TEXT,
+                    run_name TEXT,
+                    model_name TEXT,
+                    mean_absolute_error REAL,
+                    mean_absolute_percentage_error REAL,
+                    root_mean_squared_error REAL,
+                    train_seconds REAL,
+                    peak_rss_mb REAL,
+                    metadata TEXT,
+                    metrics TEXT,
+                    created_at TEXT NOT NULL
+                )
+                """
+            )
+            # 학습 비용 컬럼이 생기기 전에 만든 색인
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(experiments)")}
+            for column in COST_COLUMNS:
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE experiments ADD COLUMN {column} REAL")
+            for column in ["experiment_name", "model_name", "created_at", *METRICS, *COST_COLUMNS]:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_experiments_{column} ON experiments ({column})")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def _upsert(self, name: str, path: str, values: Dict, created_at: Optional[str] = None):
+        columns = ["name", "path", "created_at", *values]
+        updates = ", ".join(f"{column} = excluded.{column}" for column in ["path", *values])
+        with closing(self._connect()) as conn:
+            conn.execute(
+                f"INSERT INTO experiments ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT(name) DO UPDATE SET {updates}",
+                (name, path, created_at or _now(), *values.values()),
+            )
+
+    def record_metadata(self, path: str, metadata: Dict, created_at: Optional[str] = None):
+        profile = metadata.get("profile") or {}
+        self._upsert(os.path.basename(path), path, {
+            "experiment_name": metadata.get("experiment_name"),
+            "run_name": metadata.get("run_name"),
+            "model_name": metadata.get("model_name"),
+            "train_seconds": profile.get("total_wall_seconds"),
+            "peak_rss_mb": profile.get("peak_rss_mb"),
+            "metadata": json.dumps(metadata, default=str),
+        }, created_at)
+
+    def record_metrics(self, path: str, metrics: Dict, created_at: Optional[str] = None):
+        self._upsert(os.path.basename(path), path, {
+            **{metric: metrics.get(metric) for metric in METRICS},
+            "metrics": json.dumps(metrics, default=str),
+        }, created_at)
+
+    def _where(self, experiment_name: Optional[str], model_name: Optional[str]):
+        # 지표가 기록되지 않은(학습 중이거나 실패한) 실험은 배포 대상이 아니므로 제외한다.
+        clauses, params = ["root_mean_squared_error IS NOT NULL"], []
+        if experiment_name is not None:
+            clauses.append("experiment_name = ?")
+            params.append(experiment_name)
+        if model_name is not None:
+            clauses.append("model_name = ?")
+            params.append(model_name)
+        return " AND ".join(clauses), params
+
+    def count(self, experiment_name: Optional[str] = None, model_name: Optional[str] = None) -> int:
+        where, params = self._where(experiment_name, model_name)
+        with closing(self._connect()) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM experiments WHERE {where}", params).fetchone()[0]
+
+    def query(
+        self,
+        sort_by: str = "created_at",
+        descending: bool = True,
+        limit: int = 20,
+        offset: int = 0,
+        experiment_name: Optional[str] = None,
+        model_name: Optional[str] = None,
+    ) -> List[ExperimentRecord]:
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"정렬할 수 없는 컬럼입니다: {sort_by} (가능: {SORT_COLUMNS})")
+        where, params = self._where(experiment_name, model_name)
+        order = "DESC" if descending else "ASC"
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(RECORD_COLUMNS)} FROM experiments WHERE {where} "
+                f"ORDER BY {sort_by} {order}, name {order} LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+        return [ExperimentRecord(*row) for row in rows]
+
+    def top_k(self, metric: str = "root_mean_squared_error", k: int = 5, **filters) -> List[ExperimentRecord]:
+        """오차 지표가 가장 작은 k개."""
+        if metric not in METRICS:
+            raise ValueError(f"지원하지 않는 지표입니다: {metric} (가능: {METRICS})")
+        return self.query(sort_by=metric, descending=False, limit=k, **filters)
+
+    def get_metadata(self, name: str) -> Optional[Dict]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT metadata FROM experiments WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def backfill(self) -> int:
+        """색인이 생기기 전에 저장된 실험 디렉토리(metrics.json이 있는)를 기록합니다. 이미 있는 항목은 덮어쓴다."""
+        count = 0
+        for name in sorted(os.listdir(self.experiments_dir)):
+            path = os.path.join(self.experiments_dir, name)
+            metrics_path = os.path.join(path, "metrics.json")
+            if not os.path.isfile(metrics_path):
+                continue
+            created_at = datetime.fromtimestamp(os.path.getmtime(metrics_path)).isoformat(timespec="seconds")
+            metadata_path = os.path.join(path, "metadata.json")
+            if os.path.isfile(metadata_path):
+                with open(metadata_path, "r") as f:
+                    self.record_metadata(path, json.load(f), created_at)
+            with open(metrics_path, "r") as f:
+                self.record_metrics(path, json.load(f), created_at)
+            count += 1
+        return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="학습 결과 색인 (SQLite)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = subparsers.add_parser("backfill", help="기존 train_results 디렉토리를 색인에 기록")
+    backfill_parser.add_argument("experiments_dir")
+    top_parser = subparsers.add_parser("top", help="지표가 가장 좋은 실험 조회")
+    top_parser.add_argument("experiments_dir")
+    top_parser.add_argument("--metric", default="root_mean_squared_error", choices=METRICS)
+    top_parser.add_argument("-k", type=int, default=5)
+
+    args = parser.parse_args()
+    store = ExperimentStore(args.experiments_dir)
+    if args.command == "backfill":
+        print(json.dumps({"backfilled": store.backfill(), "db_path": store.db_path}, indent=2))
+    else:
+        print(json.dumps([asdict(record) for record in store.top_k(args.metric, args.k)], indent=2, ensure_ascii=False))
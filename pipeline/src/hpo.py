@@ -0,0 +1,334 @@
+import itertools
+import math
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from multiprocessing import Manager
+from typing import Dict, List, Optional, Union
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.model_selection import train_test_split as sk_train_test_split
+
+from src.experiment import ExperimentTracker
+from src.lgb_dataset import (
+    DATASET_PARAM_KEYS, build_or_load_datasets, categorical_feature, dataset_key, dataset_params, load_datasets,
+    without_categorical_feature,
+)
+from src.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SEARCH_MODES = ["none", "grid", "random", "successive_halving"]
+
+# 학습 데이터는 부모 프로세스에서 한 번만 저장하고 워커는 읽기만 한다.
+# 구간화 파라미터를 탐색하지 않으면 LightGBM binary Dataset을, 탐색하면 .npy(memory-map, 희소 행렬은 CSR 구성 배열)를 공유한다.
+_SHARED: Dict[str, np.ndarray] = {}
+_SHARED_FILES: Dict[str, str] = {}
+_DATASETS: Dict = {}
+
+
+@dataclass
+class Trial:
+    trial_id: int
+    params: Dict
+    num_boost_round: int
+    status: str = "pending"  # completed / pruned / failed
+    score: Optional[float] = None
+    best_iteration: Optional[int] = None
+    seconds: float = 0.0
+    rung: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class SearchResult:
+    mode: str
+    metric: str
+    best_params: Dict
+    best_score: float
+    best_iteration: Optional[int]
+    trials: List[Trial] = field(default_factory=list)
+    seconds: float = 0.0
+    dataset_report: Optional[Dict] = None
+
+    def summary(self) -> Dict:
+        statuses = pd.Series([t.status for t in self.trials]).value_counts().to_dict()
+        return {
+            "mode": self.mode,
+            "metric": self.metric,
+            "num_trials": len({t.trial_id for t in self.trials}),
+            "num_runs": len(self.trials),
+            "status": statuses,
+            "best_score": self.best_score,
+            "best_iteration": self.best_iteration,
+            "best_params": self.best_params,
+            "seconds": self.seconds,
+            "lgb_dataset": self.dataset_report,
+        }
+
+
+def share_arrays(save_dir: str, arrays: Dict[str, np.ndarray]) -> Dict[str, Union[str, Dict]]:
+    """희소 행렬은 펼치지 않고 CSR 구성 배열(data/indices/indptr)을 각각 .npy로 저장한다."""
+    os.makedirs(save_dir, exist_ok=True)
+    paths = {}
+    for name, array in arrays.items():
+        if sp.issparse(array):
+            array = sp.csr_matrix(array)
+            paths[name] = {"shape": list(array.shape)}
+            for part in ["data", "indices", "indptr"]:
+                paths[name][part] = os.path.join(save_dir, f"{name}_{part}.npy")
+                np.save(paths[name][part], getattr(array, part))
+            continue
+        paths[name] = os.path.join(save_dir, f"{name}.npy")
+        np.save(paths[name], np.ascontiguousarray(np.asarray(array, dtype=np.float64)))
+    return paths
+
+
+def _load_shared(path: Union[str, Dict]):
+    if isinstance(path, dict):
+        parts = tuple(np.load(path[part], mmap_mode="r") for part in ["data", "indices", "indptr"])
+        return sp.csr_matrix(parts, shape=tuple(path["shape"]), copy=False)
+    return np.load(path, mmap_mode="r")
+
+
+def _init_worker(paths: Dict[str, Union[str, Dict]], files: Dict[str, str]):
+    _SHARED.update({name: _load_shared(path) for name, path in paths.items()})
+    _SHARED_FILES.update(files)
+
+
+def _datasets(params: Dict):
+    # 구간화(binning) 관련 파라미터가 같으면 워커 안에서 lgb.Dataset을 재사용한다.
+    key = dataset_key(params)
+    if key not in _DATASETS:
+        if _SHARED_FILES:
+            _DATASETS[key] = load_datasets(_SHARED_FILES["train"], _SHARED_FILES["valid"], params)
+        else:
+            train_set = lgb.Dataset(
+                _SHARED["x_train"], _SHARED["y_train"], params=dataset_params(params),
+                categorical_feature=categorical_feature(params), free_raw_data=False,
+            )
+            valid_set = lgb.Dataset(
+                _SHARED["x_valid"], _SHARED["y_valid"], reference=train_set,
+                categorical_feature=categorical_feature(params), free_raw_data=False,
+            )
+            _DATASETS[key] = (train_set, valid_set)
+    return _DATASETS[key]
+
+
+def _median_pruning_callback(shared_scores, lock, interval: int, min_trials: int, state: Dict):
+    """interval 반복마다 검증 점수를 공유하고, 같은 시점의 다른 trial 중앙값보다 나쁘면 학습을 중단한다."""
+    def _callback(env: lgb.callback.CallbackEnv):
+        iteration = env.iteration + 1
+        if iteration % interval != 0 or not env.evaluation_result_list:
+            return
+        _, _, score, higher_better = env.evaluation_result_list[0]
+        with lock:
+            previous = shared_scores.get(iteration, [])
+            shared_scores[iteration] = previous + [score]
+        if len(previous) < min_trials:
+            return
+        median = float(np.median(previous))
+        if (score < median) if higher_better else (score > median):
+            state["pruned"] = True
+            raise lgb.callback.EarlyStopException(env.iteration, env.evaluation_result_list)
+    return _callback
+
+
+def _run_trial(trial: Trial, base_params: Dict, early_stopping_rounds: int, pruning: Optional[Dict]) -> Trial:
+    started_at = time.perf_counter()
+    params = {**base_params, **trial.params, "verbose": -1}
+    state = {"pruned": False}
+    callbacks = [lgb.early_stopping(early_stopping_rounds, verbose=False)]
+    if pruning is not None:
+        callbacks.append(_median_pruning_callback(state=state, **pruning))
+
+    try:
+        train_set, valid_set = _datasets(params)
+        booster = lgb.train(
+            without_categorical_feature(params),
+            train_set,
+            num_boost_round=trial.num_boost_round,
+            valid_sets=[valid_set],
+            valid_names=["valid"],
+            callbacks=callbacks,
+        )
+        trial.score = float(next(iter(booster.best_score["valid"].values())))
+        trial.best_iteration = booster.best_iteration or booster.current_iteration()
+        trial.status = "pruned" if state["pruned"] else "completed"
+    except Exception as e:
+        trial.status, trial.error = "failed", str(e)
+    trial.seconds = time.perf_counter() - started_at
+    return trial
+
+
+def _sample(space: Dict, rng: np.random.Generator) -> Dict:
+    params = {}
+    for name, spec in space.items():
+        kind = spec.get("type", "float")
+        if "low" not in spec:
+            params[name] = spec["values"][int(rng.integers(0, len(spec["values"])))]
+        elif kind == "int":
+            params[name] = int(rng.integers(spec["low"], spec["high"] + 1))
+        elif kind == "log_float":
+            params[name] = float(np.exp(rng.uniform(np.log(spec["low"]), np.log(spec["high"]))))
+        else:
+            params[name] = float(rng.uniform(spec["low"], spec["high"]))
+    return params
+
+
+def _grid(space: Dict) -> List[Dict]:
+    names = list(space.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name]["values"] for name in names))]
+
+
+class HyperparameterSearch:
+    """
+    LightGBM 파라미터 조합을 프로세스 풀에서 병렬로 학습하여 검증 점수가 가장 좋은 조합을 찾는다.
+    - grid: search_space의 values 전체 조합
+    - random: low/high 범위(또는 values)에서 num_trials개 샘플링
+    - successive_halving: 적은 boosting round로 모두 학습한 뒤 상위 1/eta만 eta배 round로 다시 학습
+    grid/random에서는 같은 반복 시점의 다른 trial 중앙값보다 나쁜 trial을 중간에 중단(pruning)한다.
+    """
+
+    def __init__(self, search_cfg: Dict, base_params: Dict, metric: str, save_dir: str):
+        self.mode = search_cfg.get("mode", "random")
+        if self.mode not in SEARCH_MODES[1:]:
+            raise ValueError(f"지원하지 않는 탐색 방식입니다: {self.mode} ({SEARCH_MODES})")
+        self.search_space = search_cfg["search_space"]
+        self.num_trials = search_cfg.get("num_trials", 20)
+        self.max_boost_round = search_cfg.get("max_boost_round", 2000)
+        self.early_stopping_rounds = search_cfg.get("early_stopping_rounds", 100)
+        self.eta = search_cfg.get("eta", 3)
+        self.prune_interval = search_cfg.get("prune_interval", 50)
+        self.prune_min_trials = search_cfg.get("prune_min_trials", 4)
+        self.validation_ratio = search_cfg.get("validation_ratio", 0.2)
+        self.seed = search_cfg.get("seed", 1234)
+
+        cpu_budget = search_cfg.get("cpu_budget") or os.cpu_count()
+        self.threads_per_trial = max(1, min(search_cfg.get("threads_per_trial", 1), cpu_budget))
+        self.num_workers = max(1, cpu_budget // self.threads_per_trial)
+
+        # 탐색 대상이 아닌 학습 관련 값(num_iterations, early_stopping_rounds 등)은 lgb.train 인자로 따로 넘긴다.
+        excluded = {"name", "task", "num_iterations", "early_stopping_rounds", "verbose_eval", "num_threads"}
+        self.base_params = {k: v for k, v in base_params.items() if k not in excluded}
+        self.base_params.update({"metric": metric, "num_threads": self.threads_per_trial})
+        self.metric = metric
+        self.save_dir = save_dir
+
+    def _candidates(self) -> List[Dict]:
+        if self.mode == "grid":
+            return _grid(self.search_space)
+        rng = np.random.default_rng(self.seed)
+        return [_sample(self.search_space, rng) for _ in range(self.num_trials)]
+
+    def _log_trial(self, trial: Trial):
+        # 탐색 trial은 배포 대상이 아니므로 실험 색인에는 기록하지 않는다.
+        tracker = ExperimentTracker(os.path.join(self.save_dir, f"trial_{trial.trial_id:03d}_rung_{trial.rung}"), register=False)
+        tracker.log_experiment({**asdict(trial), "mode": self.mode, "threads": self.threads_per_trial})
+        if trial.score is not None:
+            tracker.log_metric(self.metric, trial.score)
+        tracker.save_metric()
+
+    def _run_batch(self, executor, trials: List[Trial], pruning: Optional[Dict]) -> List[Trial]:
+        futures = [
+            executor.submit(_run_trial, trial, self.base_params, self.early_stopping_rounds, pruning)
+            for trial in trials
+        ]
+        results = []
+        for future in futures:
+            trial = future.result()
+            self._log_trial(trial)
+            logger.info(
+                f"trial {trial.trial_id} (rung {trial.rung}, {trial.num_boost_round} rounds): "
+                f"{trial.status} {self.metric}={trial.score} ({trial.seconds:.1f}s) {trial.params}"
+            )
+            results.append(trial)
+        return results
+
+    def run(self, x_train, y_train, dataset_dir: Optional[str] = None) -> SearchResult:
+        """dataset_dir(전처리 캐시 경로)가 주어지면 탐색용 lgb.Dataset binary를 그곳에 저장하고 다음 탐색에서 재사용합니다."""
+        started_at = time.perf_counter()
+        # 최종 평가용 테스트셋을 탐색에 쓰지 않도록 학습셋에서 검증셋을 분리한다.
+        x_fit, x_valid, y_fit, y_valid = sk_train_test_split(
+            x_train, np.asarray(y_train, dtype=np.float64).ravel(),
+            test_size=self.validation_ratio, random_state=42,
+        )
+        paths, files, self.dataset_report = {}, {}, None
+        if dataset_dir is not None and not set(self.search_space) & set(DATASET_PARAM_KEYS):
+            _, _, self.dataset_report = build_or_load_datasets(
+                dataset_dir, f"hpo_{self.validation_ratio}", x_fit, y_fit, x_valid, y_valid, params=self.base_params,
+            )
+            files = {"train": self.dataset_report["train_file"], "valid": self.dataset_report["valid_file"]}
+        else:
+            paths = share_arrays(
+                os.path.join(self.save_dir, "shared"),
+                {"x_train": x_fit, "y_train": y_fit, "x_valid": x_valid, "y_valid": y_valid},
+            )
+
+        candidates = self._candidates()
+        logger.info(
+            f"하이퍼파라미터 탐색 시작: {self.mode}, {len(candidates)}개 조합, "
+            f"워커 {self.num_workers}개 x 스레드 {self.threads_per_trial}개"
+        )
+
+        trials: List[Trial] = []
+        # 부모 프로세스가 이미 lgb.Dataset을 만들어 OpenMP 스레드가 떠 있으므로 fork 대신 spawn으로 워커를 띄운다.
+        with Manager() as manager, ProcessPoolExecutor(
+            max_workers=self.num_workers, initializer=_init_worker, initargs=(paths, files),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            if self.mode == "successive_halving":
+                num_rungs = max(1, int(math.log(len(candidates), self.eta)) + 1)
+                rounds = max(self.prune_interval, int(self.max_boost_round / self.eta ** (num_rungs - 1)))
+                survivors = [Trial(i, params, rounds) for i, params in enumerate(candidates)]
+                for rung in range(num_rungs):
+                    results = self._run_batch(executor, survivors, pruning=None)
+                    trials.extend(results)
+                    completed = sorted((t for t in results if t.score is not None), key=lambda t: t.score)
+                    num_keep = max(1, len(completed) // self.eta)
+                    if rung == num_rungs - 1 or len(completed) <= 1:
+                        break
+                    rounds = min(self.max_boost_round, rounds * self.eta)
+                    survivors = [Trial(t.trial_id, t.params, rounds, rung=rung + 1) for t in completed[:num_keep]]
+            else:
+                pruning = {
+                    "shared_scores": manager.dict(),
+                    "lock": manager.Lock(),
+                    "interval": self.prune_interval,
+                    "min_trials": self.prune_min_trials,
+                }
+                trials = self._run_batch(
+                    executor,
+                    [Trial(i, params, self.max_boost_round) for i, params in enumerate(candidates)],
+                    pruning=pruning,
+                )
+
+        if paths:
+            shutil.rmtree(os.path.join(self.save_dir, "shared"), ignore_errors=True)
+
+        completed = [t for t in trials if t.status == "completed"] or [t for t in trials if t.score is not None]
+        if not completed:
+            raise RuntimeError("완료된 trial이 없습니다. 로그를 확인해주세요.")
+        # successive halving은 가장 많은 round로 학습한 rung 안에서 고른다.
+        last_rung = max(t.rung for t in completed)
+        best = min((t for t in completed if t.rung == last_rung), key=lambda t: t.score)
+
+        result = SearchResult(
+            mode=self.mode,
+            metric=self.metric,
+            best_params=best.params,
+            best_score=best.score,
+            best_iteration=best.best_iteration,
+            trials=trials,
+            seconds=time.perf_counter() - started_at,
+            dataset_report=self.dataset_report,
+        )
+        pd.DataFrame([asdict(t) for t in trials]).to_csv(os.path.join(self.save_dir, "trials.csv"), index=False)
+        logger.info(f"하이퍼파라미터 탐색 완료: {result.summary()}")
+        return result
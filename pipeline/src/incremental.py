@@ -0,0 +1,270 @@
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import lightgbm as lgb
+import mlflow
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import train_test_split as sk_train_test_split
+
+from src.evaluation import save_evaluation
+from src.experiment import ExperimentTracker
+from src.lgb_dataset import CATEGORICAL_FEATURE, categorical_feature, dataset_params, with_categorical_feature
+from src.logger import setup_logger
+from src.lookup_table import build_lookup_table
+from src.model_trainer import Artifact, Trainer
+from src.models.models import MODELS
+from src.preprocess import DataPreprocessPipeline
+from src.profiler import StageProfiler
+from src.record_store import RecordStore, iter_file
+from src.utils import dump_warmup_requests
+
+logger = setup_logger(__name__)
+
+DATE_FORMAT = "%Y-%m-%d"
+DEPLOYED_FILE = "deployed.json"
+
+
+def record_deployment(artifact_dir: str, model_name: str) -> Dict:
+    """배포된 모델을 artifact_dir/deployed.json에 기록합니다. 증분 학습은 이 모델에서 이어서 학습한다."""
+    deployment = {
+        "model_name": model_name,
+        "model_path": os.path.join(artifact_dir, model_name),
+        "deployed_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    with open(os.path.join(artifact_dir, DEPLOYED_FILE), "w") as f:
+        json.dump(deployment, f, indent=2)
+    return deployment
+
+
+def load_deployment(artifact_dir: str) -> Optional[Dict]:
+    deployed_path = os.path.join(artifact_dir, DEPLOYED_FILE)
+    if not os.path.exists(deployed_path):
+        return None
+    with open(deployed_path, "r") as f:
+        deployment = json.load(f)
+    with open(os.path.join(deployment["model_path"], "metadata.json"), "r") as f:
+        deployment["metadata"] = json.load(f)
+    return deployment
+
+
+def load_booster(model_dir: str) -> lgb.Booster:
+    # 학습 경로에 따라 mlflow에 lgb.Booster 또는 LGBMRegressor로 저장되어 있다.
+    model = mlflow.lightgbm.load_model(model_dir)
+    return model.booster_ if hasattr(model, "booster_") else model
+
+
+def _count_rows(file_path: str) -> int:
+    if file_path.endswith(".parquet"):
+        return pq.ParquetFile(file_path).metadata.num_rows
+    return sum(len(chunk) for chunk in iter_file(file_path, columns=["price"]))
+
+
+def sample_records(sources: List[str], num_rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    여러 파티션 파일의 전체 행에서 num_rows행을 비복원 균등 추출합니다.
+    파일별 행 수만 먼저 세고, 뽑힌 행이 있는 파일만 chunk 단위로 읽어 전체 기록을 메모리에 올리지 않는다.
+    """
+    counts = np.array([_count_rows(file_path) for file_path in sources], dtype=np.int64)
+    total = int(counts.sum())
+    num_rows = min(num_rows, total)
+    if num_rows <= 0:
+        return pd.DataFrame()
+    positions = np.sort(np.random.default_rng(seed).choice(total, size=num_rows, replace=False))
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    samples = []
+    for file_path, file_start, file_end in zip(sources, offsets[:-1], offsets[1:]):
+        local = positions[(positions >= file_start) & (positions < file_end)] - file_start
+        if len(local) == 0:
+            continue
+        chunk_start = 0
+        for chunk in iter_file(file_path):
+            in_chunk = local[(local >= chunk_start) & (local < chunk_start + len(chunk))] - chunk_start
+            if len(in_chunk):
+                samples.append(chunk.iloc[in_chunk])
+            chunk_start += len(chunk)
+    return pd.concat(samples, ignore_index=True)
+
+
+def split_incremental_data(
+    record_store: RecordStore,
+    base_date_to: str,
+    replay_ratio: float,
+    holdout_ratio: float,
+    validation_ratio: float = 0.2,
+    seed: int = 42,
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, Dict]:
+    """
+    배포 모델 학습 이후(base_date_to 다음 날부터)의 새 데이터와, 그 이전 데이터에서 뽑은 replay 표본으로 학습셋을 만듭니다.
+    새 데이터는 학습 / early stopping 검증 / holdout(기존 모델과의 비교)으로 나누어, 비교 기준이 반복 수 선택에 쓰이지 않게 한다.
+    검증셋과 holdout은 배포 모델이 본 적 없는 새 데이터에서만 떼어낸다. validation_ratio가 0이면 검증셋은 비어 있다.
+    """
+    date_from = (datetime.strptime(base_date_to, DATE_FORMAT) + timedelta(days=1)).strftime(DATE_FORMAT)
+    new_df = record_store.read(date_from=date_from).dropna(subset=["price"])
+
+    new_train, holdout = sk_train_test_split(new_df, test_size=holdout_ratio, random_state=seed)
+    if validation_ratio > 0:
+        new_train, valid = sk_train_test_split(new_train, test_size=validation_ratio, random_state=seed)
+    else:
+        valid = new_train.iloc[:0]
+    # 기존 데이터 전체를 읽지 않고 파티션 파일에서 필요한 행만 뽑는다.
+    replay = sample_records(record_store.sources(date_to=base_date_to), int(len(new_train) * replay_ratio), seed=seed)
+    replay = replay.dropna(subset=["price"]) if not replay.empty else replay
+    train_df = pd.concat([new_train, replay], ignore_index=True)
+
+    new_dates = [date for date in record_store.dates() if date >= date_from]
+    report = {
+        "date_from": date_from,
+        "date_to": max(new_dates) if new_dates else base_date_to,
+        "new_rows": len(new_df),
+        "replay_rows": len(replay),
+        "train_rows": len(train_df),
+        "valid_rows": len(valid),
+        "holdout_rows": len(holdout),
+    }
+    return train_df, valid, holdout, report
+
+
+def train_model_incremental(cfg: Dict, profiler: Optional[StageProfiler] = None):
+    """
+    현재 배포된 모델(deployed.json)에서 LightGBM init_model로 트리를 이어서 추가합니다.
+    새 데이터 holdout에서 기존 모델보다 RMSE가 tolerance 이상 나빠지면 저장하지 않고 실패로 끝낸다.
+    early stopping은 holdout과 겹치지 않는 새 데이터 검증셋으로 한다.
+    전처리 파이프라인은 배포 모델의 것을 그대로 쓰므로, 새 범주가 많이 생긴 경우에는 전체 재학습을 해야 한다.
+    """
+    retrain_cfg = cfg['retrain']
+    profiler = profiler or StageProfiler.from_config(cfg.get('profiling'))
+    artifact_dir = os.getenv("ARTIFACT_PATH", './data_storage/train_results')
+    deployment = load_deployment(artifact_dir)
+    if deployment is None:
+        raise ValueError(f"배포된 모델 기록({DEPLOYED_FILE})이 없어 증분 학습을 할 수 없습니다.")
+    base_dir = deployment["model_path"]
+    base_metadata = deployment["metadata"]
+    logger.info(f"증분 학습 시작: 기준 모델 {deployment['model_name']}")
+
+    booster = load_booster(base_dir)
+    data_preprocess_pipeline = DataPreprocessPipeline()
+    data_preprocess_pipeline.load_pipeline(f"{base_dir}.json")
+
+    with profiler.stage("data_load"):
+        train_df, valid_df, holdout_df, data_report = split_incremental_data(
+            record_store=RecordStore(cfg.get('data_dir', 'data_storage/records')),
+            base_date_to=base_metadata["date_to"],
+            replay_ratio=retrain_cfg.get('replay_ratio', 2.0),
+            holdout_ratio=retrain_cfg.get('holdout_ratio', 0.2),
+            validation_ratio=retrain_cfg.get('validation_ratio', 0.2),
+        )
+    if data_report["new_rows"] < retrain_cfg.get('min_new_rows', 30):
+        raise ValueError(f"증분 학습할 새 데이터가 부족합니다: {data_report}")
+
+    with profiler.stage("transform"):
+        x_train = data_preprocess_pipeline.transform(train_df.drop(columns=["price"]))
+        y_train = train_df["price"].to_numpy(dtype=np.float64)
+        x_holdout = data_preprocess_pipeline.transform(holdout_df.drop(columns=["price"]))
+        y_holdout = holdout_df[["price"]].astype(np.float64)
+        if len(valid_df):
+            x_valid = data_preprocess_pipeline.transform(valid_df.drop(columns=["price"]))
+            y_valid = valid_df["price"].to_numpy(dtype=np.float64)
+
+    # 배포 모델과 같은 전처리 파이프라인이므로 native 범주 컬럼 위치도 같다.
+    params = cfg['model']['params'] = with_categorical_feature(
+        cfg['model']['params'], data_preprocess_pipeline.get_categorical_feature_indices()
+    )
+    train_params = {
+        k: v for k, v in params.items()
+        if k not in ("name", "verbose_eval", "num_iterations", "early_stopping_rounds", CATEGORICAL_FEATURE)
+    }
+    train_params.update({"metric": cfg['model']['eval_metrics'], "feature_pre_filter": False, "verbose": -1})
+    train_set = lgb.Dataset(x_train, y_train, params=dataset_params(params), categorical_feature=categorical_feature(params))
+    valid_sets, valid_names, callbacks = [], [], [lgb.log_evaluation(params.get("verbose_eval", 1000))]
+    if len(valid_df):
+        valid_sets.append(lgb.Dataset(x_valid, y_valid, reference=train_set, categorical_feature=categorical_feature(params)))
+        valid_names.append("valid")
+        callbacks.append(lgb.early_stopping(retrain_cfg.get('early_stopping_rounds', 20), verbose=False))
+    # 기존 트리의 예측값을 init_score로 두고 그 잔차에 대해 트리를 추가한다.
+    with profiler.stage("lgb_fit"):
+        updated = lgb.train(
+            train_params,
+            train_set,
+            num_boost_round=retrain_cfg.get('num_boost_round', 200),
+            init_model=booster,
+            valid_sets=valid_sets,
+            valid_names=valid_names,
+            callbacks=callbacks,
+        )
+
+    base_rmse = float(mean_squared_error(y_holdout["price"], booster.predict(x_holdout)) ** 0.5)
+    updated_rmse = float(mean_squared_error(y_holdout["price"], updated.predict(x_holdout)) ** 0.5)
+    tolerance = retrain_cfg.get('tolerance', 0.0)
+    accepted = updated_rmse <= base_rmse * (1 + tolerance)
+    incremental_report = {
+        "base_model": deployment["model_name"],
+        **data_report,
+        "base_trees": booster.num_trees(),
+        "added_trees": updated.num_trees() - booster.num_trees(),
+        "base_holdout_rmse": base_rmse,
+        "updated_holdout_rmse": updated_rmse,
+        "tolerance": tolerance,
+        "accepted": accepted,
+    }
+    logger.info(f"증분 학습 holdout 비교: {incremental_report}")
+    if not accepted:
+        raise RuntimeError(
+            f"증분 학습 모델이 holdout에서 기존 모델보다 나쁩니다 (RMSE {updated_rmse:.2f} > {base_rmse:.2f}). 저장하지 않습니다."
+        )
+
+    # 전체 학습과 같은 구조로 저장하여 배포/다음 증분 학습에 그대로 쓴다.
+    model_name = cfg['model']['name']
+    save_dir = os.path.join(artifact_dir, f"{model_name}_{cfg['run_name']}")
+    tracker = ExperimentTracker(save_dir=save_dir)
+    model = MODELS.get_model(name=model_name).model()
+    model.reset_model(params=params)
+    model.model = updated
+
+    trainer = Trainer(evaluation_cfg=cfg.get('evaluation'))
+    with profiler.stage("evaluate"):
+        evaluation = trainer.evaluate(model=model, x=x_holdout, y=y_holdout, slice_df=holdout_df)
+    artifact = Artifact()
+    with profiler.stage("dump"):
+        artifact.preprocessed_file_path = data_preprocess_pipeline.dump_pipeline(file_path=save_dir)
+        model.save(save_dir)
+        artifact.model_file_path = save_dir
+        artifact.warmup_requests_file_path = dump_warmup_requests(x_holdout, save_dir)
+
+    with profiler.stage("lookup_table"):
+        lookup_table_report = build_lookup_table(
+            model=model,
+            data_preprocess_pipeline=data_preprocess_pipeline,
+            raw_df=train_df,
+            save_dir=save_dir,
+            request_features=cfg.get('lookup_table', {}).get('request_features'),
+        )
+
+    with profiler.stage("save_results"):
+        save_evaluation(evaluation, save_dir)
+    profiler.save_capture(save_dir)
+
+    tracker.log_experiment({
+        **base_metadata,
+        "experiment_name": cfg['name'],
+        "run_name": cfg['run_name'],
+        "data_source": str(cfg['data'].get('source')),
+        "date_to": data_report["date_to"],
+        "model_params": params,
+        "lookup_table": lookup_table_report,
+        "incremental": incremental_report,
+        "cross_validation": None,
+        "profile": profiler.report(),
+    })
+    tracker.log_metric("mean_absolute_error", evaluation.mean_absolute_error)
+    tracker.log_metric("mean_absolute_percentage_error", evaluation.mean_absolute_percentage_error)
+    tracker.log_metric("root_mean_squared_error", evaluation.root_mean_squared_error)
+    tracker.save_metric()
+
+    logger.info(f"증분 학습 완료. 결과가 {save_dir}에 저장되었습니다.")
+    return evaluation, artifact
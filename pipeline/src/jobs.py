@@ -0,0 +1,482 @@
+"""
+Streamlit 세션과 분리된 학습 작업 큐.
+
+UI는 설정을 큐(로컬 SQLite)에 넣고 상태만 조회하며, 학습은 워커 프로세스가 CPU 슬롯이 남을 때 하나씩 가져가 별도 프로세스로 실행한다.
+여러 사용자가 동시에 학습을 요청해도 같은 장비에서 실행되는 작업 수와 CPU 사용량은 워커 설정을 넘지 않는다.
+
+    python -m src.jobs worker --cpu-slots 8 --max-jobs 2
+"""
+import argparse
+import fcntl
+import json
+import logging
+import multiprocessing
+import os
+import pickle
+import shutil
+import signal
+import sqlite3
+import subprocess
+import sys
+import time
+import traceback
+import uuid
+from contextlib import closing
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from src.logger import setup_logger
+from src.profiler import StageProfiler
+
+logger = setup_logger(__name__)
+
+JOBS_DIR = os.getenv("TRAINING_JOBS_DIR", "./data_storage/jobs")
+DB_FILE = "jobs.sqlite"
+CONFIG_FILE = "config.pkl"
+LOG_FILE = "train.log"
+RESULT_FILE = "result.json"
+WORKER_LOCK_FILE = "worker.lock"
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+# 학습 중 로그를 남기는 모듈로 진행 단계를 추정한다. (train_model 흐름 순서)
+PROGRESS_STAGES = {
+    "src.cache": 0.1,
+    "src.preprocess": 0.1,
+    "src.streaming": 0.1,
+    "src.record_store": 0.1,
+    "src.hpo": 0.3,
+    "src.lgb_dataset": 0.5,
+    "light_gbm_regression": 0.6, # src/models/light_gbm_regression.py는 모듈 경로가 아닌 이 이름으로 로거를 만든다.
+    "src.model_trainer": 0.8,
+    "src.lookup_table": 0.9,
+}
+
+
+@dataclass
+class Job:
+    id: str
+    status: str
+    run_name: str
+    cpu_slots: int
+    progress: float
+    message: Optional[str]
+    created_at: str
+    started_at: Optional[str]
+    finished_at: Optional[str]
+    pid: Optional[int]
+    cancel_requested: int
+    error: Optional[str]
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    def __init__(self, jobs_dir: str = JOBS_DIR):
+        self.jobs_dir = jobs_dir
+        os.makedirs(jobs_dir, exist_ok=True)
+        self.db_path = os.path.join(jobs_dir, DB_FILE)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    run_name TEXT,
+                    cpu_slots INTEGER NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    message TEXT,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    pid INTEGER,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    error TEXT
+                )
+                """
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS workers (pid INTEGER PRIMARY KEY, cpu_slots INTEGER, max_jobs INTEGER, heartbeat_at REAL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: 자동 커밋, 여러 문장을 묶을 때만 BEGIN IMMEDIATE로 쓰기 잠금을 먼저 잡는다.
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id)
+
+    def submit(self, config: Dict, cpu_slots: int = 1) -> str:
+        """설정을 작업 디렉토리에 저장한 뒤 큐에 넣고 작업 id를 반환합니다. (데이터프레임이 있어 pickle로 저장)"""
+        if cpu_slots < 1:
+            raise ValueError(f"작업 CPU 슬롯은 1개 이상이어야 합니다: {cpu_slots}")
+        # 워커 전체 슬롯보다 많이 요청한 작업은 영원히 가져가지 않으므로 워커 크기로 줄인다.
+        max_slots = self.max_cpu_slots()
+        if cpu_slots > max_slots:
+            logger.warning(f"작업 CPU 슬롯 {cpu_slots}개가 워커 전체({max_slots}개)보다 많아 {max_slots}개로 줄입니다.")
+            cpu_slots = max_slots
+
+        job_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        os.makedirs(self.job_dir(job_id), exist_ok=True)
+        with open(os.path.join(self.job_dir(job_id), CONFIG_FILE), "wb") as f:
+            pickle.dump(config, f)
+
+        # 같은 실행 이름은 같은 결과 경로에 저장되므로 대기/실행 중이거나 성공한 작업과 겹치면 받지 않는다.
+        # 동시에 같은 이름을 등록해도 하나만 들어가도록 확인과 등록을 한 쓰기 트랜잭션에서 한다.
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            duplicated = conn.execute(
+                "SELECT id FROM jobs WHERE run_name = ? AND status IN (?, ?, ?)",
+                (config.get("run_name"), QUEUED, RUNNING, SUCCEEDED),
+            ).fetchone()
+            if duplicated is None:
+                conn.execute(
+                    "INSERT INTO jobs (id, status, run_name, cpu_slots, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (job_id, QUEUED, config.get("run_name"), cpu_slots, _now()),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+            raise
+        finally:
+            conn.close()
+        if duplicated:
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+            raise ValueError(f"같은 실행 이름의 작업이 이미 있습니다: {config.get('run_name')} ({duplicated[0]})")
+        logger.info(f"학습 작업 등록: {job_id} (CPU {cpu_slots}개)")
+        return job_id
+
+    def max_cpu_slots(self, timeout: float = 10.0) -> int:
+        """살아 있는 워커의 CPU 슬롯 수. 워커가 아직 없으면 장비의 CPU 수."""
+        with closing(self._connect()) as conn:
+            (cpu_slots,) = conn.execute("SELECT MAX(cpu_slots) FROM workers WHERE heartbeat_at >= ?", (time.time() - timeout,)).fetchone()
+        return cpu_slots or os.cpu_count() or 1
+
+    def claim(self, free_slots: int, total_slots: int) -> Optional[Job]:
+        """
+        남은 CPU 슬롯 안에 들어가는 가장 오래된 대기 작업을 실행 상태로 바꾸어 가져옵니다.
+        워커 전체 슬롯(total_slots)보다 많이 요청한 작업은 전체 슬롯으로 줄여서 가져온다.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? AND MIN(cpu_slots, ?) <= ? ORDER BY created_at LIMIT 1",
+                (QUEUED, total_slots, free_slots),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, message = ?, cpu_slots = MIN(cpu_slots, ?) WHERE id = ?",
+                (RUNNING, _now(), "시작", total_slots, row[0]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return self.get(row[0])
+
+    def update(self, job_id: str, **fields):
+        columns = ", ".join(f"{key} = ?" for key in fields)
+        with closing(self._connect()) as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def finish(self, job_id: str, status: str, error: Optional[str] = None):
+        # 이미 끝난 작업(예: 취소)의 상태는 덮어쓰지 않는다.
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = COALESCE(?, error), progress = CASE WHEN ? = ? THEN 1 ELSE progress END "
+                "WHERE id = ? AND status NOT IN (?, ?, ?)",
+                (status, _now(), error, status, SUCCEEDED, job_id, *FINISHED),
+            )
+
+    def cancel(self, job_id: str):
+        """대기 중이면 바로 취소하고, 실행 중이면 워커가 프로세스를 종료하도록 표시합니다."""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, _now(), job_id, QUEUED),
+            )
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?", (job_id, RUNNING))
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(f"SELECT {', '.join(Job.__dataclass_fields__)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job(*row) if row else None
+
+    def list(self, limit: int = 20, statuses: Optional[List[str]] = None) -> List[Job]:
+        query = f"SELECT {', '.join(Job.__dataclass_fields__)} FROM jobs"
+        params: list = []
+        if statuses:
+            query += f" WHERE status IN ({', '.join('?' for _ in statuses)})"
+            params.extend(statuses)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query, (*params, limit)).fetchall()
+        return [Job(*row) for row in rows]
+
+    def read_log(self, job_id: str, max_lines: int = 200) -> str:
+        log_path = os.path.join(self.job_dir(job_id), LOG_FILE)
+        if not os.path.exists(log_path):
+            return ""
+        with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+            return "".join(f.readlines()[-max_lines:])
+
+    def read_result(self, job_id: str) -> Optional[Dict]:
+        result_path = os.path.join(self.job_dir(job_id), RESULT_FILE)
+        if not os.path.exists(result_path):
+            return None
+        with open(result_path, "r") as f:
+            return json.load(f)
+
+    def heartbeat(self, pid: int, cpu_slots: int, max_jobs: int):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO workers (pid, cpu_slots, max_jobs, heartbeat_at) VALUES (?, ?, ?, ?)",
+                (pid, cpu_slots, max_jobs, time.time()),
+            )
+
+    def worker_alive(self, timeout: float = 10.0) -> bool:
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT pid FROM workers WHERE heartbeat_at >= ?", (time.time() - timeout,)).fetchall()
+        return any(_pid_alive(pid) for (pid,) in rows)
+
+    def recover(self) -> List[str]:
+        """실행 중으로 남아 있지만 프로세스가 없는 작업(워커 재시작 등)을 실패로 정리합니다."""
+        orphaned = [job.id for job in self.list(limit=1000, statuses=[RUNNING]) if not _pid_alive(job.pid)]
+        for job_id in orphaned:
+            self.finish(job_id, FAILED, error="워커가 종료되어 작업이 중단되었습니다.")
+        return orphaned
+
+
+class _JobLogHandler(logging.Handler):
+    """작업 프로세스의 로그를 진행률/마지막 메시지로 큐에 반영한다. (DB 쓰기는 interval 간격으로 제한)"""
+
+    def __init__(self, queue: JobQueue, job_id: str, interval: float = 1.0):
+        super().__init__(level=logging.INFO)
+        self.queue = queue
+        self.job_id = job_id
+        self.interval = interval
+        self.progress = 0.0
+        self.updated_at = 0.0
+
+    def emit(self, record: logging.LogRecord):
+        stage = next((p for name, p in PROGRESS_STAGES.items() if record.name.startswith(name)), None)
+        if stage is not None:
+            self.progress = max(self.progress, stage)
+        now = time.time()
+        if now - self.updated_at < self.interval:
+            return
+        self.updated_at = now
+        try:
+            self.queue.update(self.job_id, progress=self.progress, message=record.getMessage().strip().split("\n")[0][:200])
+        except sqlite3.Error:
+            pass
+
+
+def limit_cpu(config: Dict, cpu_slots: int) -> Dict:
+    """작업에 배정된 CPU 슬롯을 LightGBM 스레드 수, 탐색/교차검증 병렬도의 상한으로 설정합니다."""
+    model_cfg = config.setdefault("model", {})
+    params = model_cfg.setdefault("params", {})
+    # 설정에 더 적은 스레드 수가 있으면 그대로 둔다. (0 이하는 LightGBM 기본값인 모든 코어이므로 슬롯 수로 바꾼다.)
+    num_threads = params.get("num_threads") or 0
+    params["num_threads"] = min(num_threads, cpu_slots) if num_threads > 0 else cpu_slots
+    for key in ("search", "cv"):
+        if key in model_cfg:
+            model_cfg[key]["cpu_budget"] = min(model_cfg[key].get("cpu_budget") or cpu_slots, cpu_slots)
+    if "hpo" in config:
+        config["hpo"]["cpu_budget"] = min(config["hpo"].get("cpu_budget") or cpu_slots, cpu_slots)
+    return config
+
+
+def _result(evaluation, artifact) -> Dict:
+    return {
+        "mean_absolute_error": evaluation.mean_absolute_error,
+        "mean_absolute_percentage_error": evaluation.mean_absolute_percentage_error,
+        "root_mean_squared_error": evaluation.root_mean_squared_error,
+        "cross_validation": asdict(evaluation.cross_validation) if evaluation.cross_validation else None,
+        "model_file_path": artifact.model_file_path,
+        "preprocessed_file_path": artifact.preprocessed_file_path,
+    }
+
+
+def run_job(jobs_dir: str, job_id: str, cpu_slots: int):
+    """
+    작업 프로세스 진입점. 학습 로그는 작업 디렉토리의 train.log에 남긴다.
+    새 세션(프로세스 그룹)을 만들어, 취소/종료 시 워커가 탐색·교차검증 풀의 자식 프로세스까지 함께 종료할 수 있게 한다.
+    """
+    os.setsid()
+    os.environ["OMP_NUM_THREADS"] = str(cpu_slots)
+    queue = JobQueue(jobs_dir)
+    job_dir = queue.job_dir(job_id)
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    file_handler = logging.FileHandler(os.path.join(job_dir, LOG_FILE), encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter("[%(asctime)s] %(levelname)s [%(name)s:%(lineno)s] %(message)s", "%Y-%m-%d %H:%M:%S"))
+    root_logger.addHandler(file_handler)
+    root_logger.addHandler(_JobLogHandler(queue, job_id))
+
+    try:
+        # 설정에 학습 데이터프레임이 담겨 있으므로 읽는 시간도 data_load 단계로 기록한다.
+        profiler = StageProfiler()
+        with profiler.stage("data_load"):
+            with open(os.path.join(job_dir, CONFIG_FILE), "rb") as f:
+                config = limit_cpu(pickle.load(f), cpu_slots)
+        from src.train import train_model
+
+        evaluation, artifact = train_model(config, profiler=profiler.configure(config.get("profiling")))
+        with open(os.path.join(job_dir, RESULT_FILE), "w") as f:
+            json.dump(_result(evaluation, artifact), f, indent=2, default=str)
+        queue.update(job_id, message="학습 완료")
+        queue.finish(job_id, SUCCEEDED)
+    except Exception as e:
+        logging.getLogger(__name__).error(traceback.format_exc())
+        queue.finish(job_id, FAILED, error=str(e))
+        raise
+
+
+def _signal_group(process, sig: int):
+    """작업 프로세스 그룹 전체에 신호를 보낸다. 그룹을 만들기 전(setsid 이전)이면 작업 프로세스에만 보낸다."""
+    try:
+        os.killpg(process.pid, sig)
+    except ProcessLookupError:
+        if process.is_alive():
+            try:
+                os.kill(process.pid, sig)
+            except ProcessLookupError:
+                pass
+
+
+def _terminate(process, timeout: float = 10.0):
+    _signal_group(process, signal.SIGTERM)
+    process.join(timeout=timeout)
+    # 작업 프로세스가 먼저 끝나도 풀의 자식 프로세스가 남아 있을 수 있다.
+    _signal_group(process, signal.SIGKILL)
+    process.join()
+
+
+class JobWorker:
+    """
+    큐에서 작업을 가져와 프로세스로 실행하는 워커.
+    실행 중인 작업의 cpu_slots 합이 cpu_slots를, 작업 수가 max_jobs를 넘지 않게 가져온다.
+    같은 jobs_dir에는 파일 잠금으로 워커가 하나만 뜬다.
+    """
+
+    def __init__(self, queue: JobQueue, cpu_slots: Optional[int] = None, max_jobs: int = 2, poll_interval: float = 1.0):
+        self.queue = queue
+        self.cpu_slots = cpu_slots or os.cpu_count()
+        self.max_jobs = max_jobs
+        self.poll_interval = poll_interval
+        self.running: Dict[str, tuple] = {}
+        self._context = multiprocessing.get_context("spawn")
+        self._stopped = False
+
+    def free_slots(self) -> int:
+        return self.cpu_slots - sum(cpu_slots for _, cpu_slots in self.running.values())
+
+    def start_jobs(self):
+        while len(self.running) < self.max_jobs and self.free_slots() > 0:
+            job = self.queue.claim(self.free_slots(), self.cpu_slots)
+            if job is None:
+                return
+            process = self._context.Process(
+                target=run_job, args=(self.queue.jobs_dir, job.id, job.cpu_slots), name=f"train-{job.id}"
+            )
+            process.start()
+            self.queue.update(job.id, pid=process.pid)
+            self.running[job.id] = (process, job.cpu_slots)
+            logger.info(f"학습 작업 시작: {job.id} (pid {process.pid}, CPU {job.cpu_slots}개)")
+
+    def check_jobs(self):
+        for job_id, (process, _) in list(self.running.items()):
+            job = self.queue.get(job_id)
+            if process.is_alive() and job is not None and job.cancel_requested:
+                _terminate(process)
+                self.queue.finish(job_id, CANCELLED)
+                logger.info(f"학습 작업 취소: {job_id}")
+            if process.is_alive():
+                continue
+            # 비정상 종료한 작업이 남긴 풀의 자식 프로세스도 정리한다.
+            _terminate(process)
+            if process.exitcode != 0:
+                self.queue.finish(job_id, FAILED, error=f"프로세스 종료 코드 {process.exitcode}")
+            del self.running[job_id]
+
+    def stop(self, *_):
+        self._stopped = True
+
+    def run_forever(self):
+        lock_file = open(os.path.join(self.queue.jobs_dir, WORKER_LOCK_FILE), "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            logger.info("이미 실행 중인 워커가 있어 종료합니다.")
+            return
+
+        signal.signal(signal.SIGTERM, self.stop)
+        recovered = self.queue.recover()
+        if recovered:
+            logger.info(f"중단된 작업 정리: {recovered}")
+        logger.info(f"학습 워커 시작: CPU 슬롯 {self.cpu_slots}개, 동시 작업 {self.max_jobs}개")
+        try:
+            while not self._stopped:
+                self.queue.heartbeat(os.getpid(), self.cpu_slots, self.max_jobs)
+                self.check_jobs()
+                self.start_jobs()
+                time.sleep(self.poll_interval)
+        finally:
+            for job_id, (process, _) in self.running.items():
+                _terminate(process)
+                self.queue.finish(job_id, FAILED, error="워커가 종료되어 작업이 중단되었습니다.")
+            lock_file.close()
+
+
+def ensure_worker(queue: JobQueue, cpu_slots: Optional[int] = None, max_jobs: int = 2) -> bool:
+    """살아 있는 워커가 없으면 백그라운드로 띄웁니다. 새로 띄웠으면 True."""
+    if queue.worker_alive():
+        return False
+    command = [sys.executable, "-m", "src.jobs", "worker", "--jobs-dir", queue.jobs_dir, "--max-jobs", str(max_jobs)]
+    if cpu_slots:
+        command += ["--cpu-slots", str(cpu_slots)]
+    with open(os.path.join(queue.jobs_dir, "worker.log"), "a") as log_file:
+        subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT, start_new_session=True)
+    logger.info(f"학습 워커 실행: {' '.join(command)}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="학습 작업 워커")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    worker_parser = subparsers.add_parser("worker")
+    worker_parser.add_argument("--jobs-dir", default=JOBS_DIR)
+    worker_parser.add_argument("--cpu-slots", type=int, default=None)
+    worker_parser.add_argument("--max-jobs", type=int, default=2)
+    worker_parser.add_argument("--poll-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    JobWorker(
+        JobQueue(args.jobs_dir), cpu_slots=args.cpu_slots, max_jobs=args.max_jobs, poll_interval=args.poll_interval,
+    ).run_forever()
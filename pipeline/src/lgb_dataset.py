@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+import lightgbm as lgb
+import numpy as np
+
+from src.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# 구간화(binning) 결과에 영향을 주는 파라미터. 이 값이 같으면 저장된 binary Dataset을 그대로 쓸 수 있다.
+DATASET_PARAM_KEYS = ["max_bin", "min_data_in_bin", "bin_construct_sample_cnt", "use_missing", "zero_as_missing"]
+REPORT_FILE = "lgb_dataset.json"
+# 전처리가 정수 코드로 내보낸(native) 범주 컬럼 위치. 모델 파라미터(metadata.json의 model_params)에 함께 기록하지만,
+# LightGBM은 이 값을 params가 아닌 Dataset 인자로 받으므로 학습 파라미터에서는 뺀다.
+CATEGORICAL_FEATURE = "categorical_feature"
+
+
+def dataset_params(params: Optional[Dict] = None) -> Dict:
+    # min_data_in_leaf 등 학습 파라미터를 trial마다 바꿀 수 있도록 feature_pre_filter는 끈다.
+    params = params or {}
+    return {
+        **{key: params[key] for key in DATASET_PARAM_KEYS if key in params},
+        "feature_pre_filter": False,
+        "verbose": -1,
+    }
+
+
+def categorical_feature(params: Optional[Dict] = None) -> Union[List[int], str]:
+    """lgb.Dataset의 categorical_feature 인자. native 범주 컬럼이 없으면 "auto"(numpy 입력에서는 범주 없음)."""
+    return list((params or {}).get(CATEGORICAL_FEATURE) or []) or "auto"
+
+
+def with_categorical_feature(params: Dict, indices: List[int]) -> Dict:
+    params = without_categorical_feature(params)
+    if indices:
+        params[CATEGORICAL_FEATURE] = [int(i) for i in indices]
+    return params
+
+
+def without_categorical_feature(params: Dict) -> Dict:
+    return {k: v for k, v in params.items() if k != CATEGORICAL_FEATURE}
+
+
+def dataset_key(params: Optional[Dict] = None) -> str:
+    key = dataset_params(params)
+    if categorical_feature(params) != "auto":
+        key[CATEGORICAL_FEATURE] = categorical_feature(params)
+    return json.dumps(key, sort_keys=True)
+
+
+def _label(y) -> np.ndarray:
+    if hasattr(y, "to_numpy"):
+        y = y.to_numpy()
+    return np.asarray(y, dtype=np.float64).ravel()
+
+
+def dataset_files(save_dir: str, name: str, params: Optional[Dict] = None) -> Tuple[str, str]:
+    key = hashlib.sha256(dataset_key(params).encode()).hexdigest()[:12]
+    return (
+        os.path.join(save_dir, f"{name}_{key}_train.bin"),
+        os.path.join(save_dir, f"{name}_{key}_valid.bin"),
+    )
+
+
+def load_datasets(train_file: str, valid_file: str, params: Optional[Dict] = None) -> Tuple[lgb.Dataset, lgb.Dataset]:
+    train_set = lgb.Dataset(train_file, params=dataset_params(params), free_raw_data=False)
+    valid_set = lgb.Dataset(valid_file, reference=train_set, free_raw_data=False)
+    return train_set, valid_set
+
+
+def build_or_load_datasets(
+    save_dir: str,
+    name: str,
+    x_train,
+    y_train,
+    x_valid,
+    y_valid,
+    params: Optional[Dict] = None,
+) -> Tuple[lgb.Dataset, lgb.Dataset, Dict]:
+    """
+    학습/검증 lgb.Dataset을 LightGBM binary 형식으로 save_dir에 저장해두고, 다음 학습부터는 구간화 없이 바로 불러옵니다.
+    검증셋은 학습셋의 bin 경계를 참조(reference)하여 만듭니다.
+    세 번째 값은 저장된 학습/검증 binary 경로(train_file, valid_file)와 생성 시간 대비 로드 시간(절약된 시간) 리포트입니다.
+    """
+    train_file, valid_file = dataset_files(save_dir, name, params)
+    report_file = os.path.join(save_dir, REPORT_FILE)
+    reports = {}
+    if os.path.exists(report_file):
+        with open(report_file, "r") as f:
+            reports = json.load(f)
+
+    started_at = time.perf_counter()
+    if os.path.exists(train_file) and os.path.exists(valid_file):
+        train_set, valid_set = load_datasets(train_file, valid_file, params)
+        train_set.construct()
+        valid_set.construct()
+        load_seconds = time.perf_counter() - started_at
+        construct_seconds = reports.get(os.path.basename(train_file), {}).get("construct_seconds")
+        report = {
+            "hit": True,
+            "train_file": train_file,
+            "valid_file": valid_file,
+            "construct_seconds": construct_seconds,
+            "load_seconds": load_seconds,
+            "saved_seconds": construct_seconds - load_seconds if construct_seconds is not None else None,
+        }
+        logger.info(f"저장된 lgb.Dataset 사용: {train_file} ({load_seconds:.3f}s, 생성 시 {construct_seconds}s)")
+        return train_set, valid_set, report
+
+    train_set = lgb.Dataset(
+        x_train, _label(y_train), params=dataset_params(params), categorical_feature=categorical_feature(params), free_raw_data=False,
+    )
+    valid_set = lgb.Dataset(
+        x_valid, _label(y_valid), reference=train_set, categorical_feature=categorical_feature(params), free_raw_data=False,
+    )
+    train_set.construct()
+    valid_set.construct()
+    construct_seconds = time.perf_counter() - started_at
+
+    os.makedirs(save_dir, exist_ok=True)
+    train_set.save_binary(train_file)
+    valid_set.save_binary(valid_file)
+    reports[os.path.basename(train_file)] = {"construct_seconds": construct_seconds}
+    with open(report_file, "w") as f:
+        json.dump(reports, f, indent=2)
+
+    logger.info(f"lgb.Dataset 생성 후 저장: {train_file} ({construct_seconds:.3f}s)")
+    return train_set, valid_set, {
+        "hit": False,
+        "train_file": train_file,
+        "valid_file": valid_file,
+        "construct_seconds": construct_seconds,
+        "load_seconds": None,
+        "saved_seconds": 0.0,
+    }
@@ -0,0 +1,134 @@
+import time
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.preprocess import DataPreprocessPipeline
+from src.lookup_grid import PredictionLookupTable
+from src.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def _request_feature(column: str, request_features: Dict[str, Union[str, Dict]]) -> Dict:
+    """config의 lookup_table.request_features 항목을 축 메타데이터(request_feature, unit)로 바꿉니다."""
+    mapping = request_features.get(column)
+    if mapping is None:
+        return {}
+    if isinstance(mapping, str):
+        return {"request_feature": mapping}
+    return {"request_feature": mapping["name"], **({"unit": mapping["unit"]} if "unit" in mapping else {})}
+
+
+def _define_axes(
+    raw_df: pd.DataFrame,
+    data_preprocess_pipeline: DataPreprocessPipeline,
+    num_buckets: int,
+    request_features: Dict[str, Union[str, Dict]],
+) -> List[Dict]:
+    column_configs = data_preprocess_pipeline.config.get("columns", {})
+    used_columns = data_preprocess_pipeline.get_input_columns()
+
+    axes = []
+    for column in used_columns:
+        values = raw_df[column].dropna()
+        mapping = _request_feature(column, request_features)
+        if column_configs.get(column, {}).get("type") == "categorical":
+            axes.append({"name": column, "kind": "categorical", "values": sorted(values.unique().tolist()), **mapping})
+            continue
+
+        unique_values = np.sort(values.unique())
+        # 정수형처럼 값의 종류가 적은 컬럼은 모든 값을 격자로 사용해 보간 오차를 없앤다.
+        discrete = len(unique_values) <= num_buckets
+        if discrete:
+            grid = unique_values.astype(np.float64)
+        else:
+            grid = np.linspace(values.min(), values.max(), num_buckets)
+        axes.append({"name": column, "kind": "numeric", "discrete": bool(discrete), "values": grid.tolist(), **mapping})
+    return axes
+
+
+def _grid_frame(axes: List[Dict], flat_index: np.ndarray, shape) -> pd.DataFrame:
+    indices = np.unravel_index(flat_index, shape)
+    return pd.DataFrame({
+        axis["name"]: np.asarray(axis["values"], dtype=object if axis["kind"] == "categorical" else np.float64)[idx]
+        for axis, idx in zip(axes, indices)
+    })
+
+
+def _random_frame(axes: List[Dict], num_samples: int, rng: np.random.Generator) -> pd.DataFrame:
+    columns = {}
+    for axis in axes:
+        values = axis["values"]
+        if axis["kind"] == "categorical" or axis.get("discrete"):
+            columns[axis["name"]] = [values[i] for i in rng.integers(0, len(values), num_samples)]
+        else:
+            columns[axis["name"]] = rng.uniform(values[0], values[-1], num_samples)
+    return pd.DataFrame(columns)
+
+
+def build_lookup_table(
+    model,
+    data_preprocess_pipeline: DataPreprocessPipeline,
+    raw_df: pd.DataFrame,
+    save_dir: str,
+    num_buckets: int = 32,
+    batch_size: int = 65536,
+    max_cells: int = 20_000_000,
+    num_validation_samples: int = 2000,
+    seed: int = 1234,
+    request_features: Optional[Dict[str, Union[str, Dict]]] = None,
+) -> Optional[Dict]:
+    """
+    학습된 모델로 격자 전체를 큰 배치 단위로 예측하여 테이블로 저장하고,
+    격자 밖 임의의 점에서 실제 예측값과 비교한 근사 오차, 테이블 크기, 생성 시간, 조회 지연을 리포트합니다.
+    request_features: {학습 컬럼: backend 요청 피처 이름 또는 {name, unit}}. 축 메타데이터에 기록되어 backend가 이 이름으로 조회한다.
+    """
+    axes = _define_axes(raw_df, data_preprocess_pipeline, num_buckets, request_features or {})
+    shape = tuple(len(axis["values"]) for axis in axes)
+    num_cells = int(np.prod(shape))
+    if num_cells > max_cells:
+        logger.warning(f"lookup table 격자가 너무 큽니다({num_cells} > {max_cells}). 생성을 건너뜁니다.")
+        return None
+
+    started_at = time.perf_counter()
+    table = np.empty(num_cells, dtype=np.float32)
+    for start in range(0, num_cells, batch_size):
+        flat_index = np.arange(start, min(start + batch_size, num_cells))
+        x = data_preprocess_pipeline.transform(_grid_frame(axes, flat_index, shape))
+        table[flat_index] = model.predict(x)
+    build_seconds = time.perf_counter() - started_at
+
+    lookup_table = PredictionLookupTable(table.reshape(shape), axes)
+
+    # 격자점이 아닌 임의의 입력에서 근사 오차 측정
+    validation_df = _random_frame(axes, num_validation_samples, np.random.default_rng(seed))
+    y_true = model.predict(data_preprocess_pipeline.transform(validation_df))
+    started_at = time.perf_counter()
+    y_table = lookup_table.lookup_batch(validation_df)
+    lookup_latency_us = (time.perf_counter() - started_at) / num_validation_samples * 1e6
+    abs_error = np.abs(y_table - y_true)
+    # 청구비 규모와 관계없이 같은 기준을 쓰도록 평균 예측값 대비 비율로도 기록한다. (backend 허용 기준)
+    mean_prediction = float(np.mean(np.abs(y_true)))
+
+    lookup_table.meta = {
+        "shape": list(shape),
+        "num_cells": num_cells,
+        "dtype": str(table.dtype),
+        "size_bytes": int(table.nbytes),
+        "build_seconds": build_seconds,
+        "lookup_latency_us": lookup_latency_us,
+        "error": {
+            "num_samples": num_validation_samples,
+            "max_abs_error": float(np.nanmax(abs_error)),
+            "p99_abs_error": float(np.nanpercentile(abs_error, 99)),
+            "mean_abs_error": float(np.nanmean(abs_error)),
+            "mean_prediction": mean_prediction,
+            "p99_relative_error": float(np.nanpercentile(abs_error, 99)) / max(mean_prediction, 1e-9),
+        },
+    }
+    lookup_table.save(save_dir)
+
+    logger.info(f"lookup table 생성 완료: {lookup_table.meta}")
+    return lookup_table.meta
@@ -1,103 +1,176 @@
+import multiprocessing
+import os
+import time
+import numpy as np
 import pandas as pd
-from typing import Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from scipy import stats
 from sklearn.metrics import (
     mean_absolute_error,
     mean_absolute_percentage_error,
     mean_squared_error,
 )
-from dataclasses import dataclass
+from sklearn.model_selection import RepeatedKFold
+from sklearn.model_selection import train_test_split as sk_train_test_split
+from dataclasses import dataclass, field
 
+from src.evaluation import Evaluator, Slice
+from src.lgb_dataset import with_categorical_feature
+from src.profiler import StageProfiler
 from src.preprocess import DataPreprocessPipeline
+from src.models.models import MODELS
 from src.logger import setup_logger
+from src.utils import dump_warmup_requests
 
 
 logger = setup_logger(__name__)
 
 
+METRICS = ["mean_absolute_error", "mean_absolute_percentage_error", "root_mean_squared_error"]
+
+
+@dataclass
+class MetricSummary:
+    mean: float
+    std: float
+    ci_low: float
+    ci_high: float
+    values: List[float] = field(default_factory=list)
+
+
+@dataclass
+class CrossValidation:
+    n_splits: int
+    n_repeats: int
+    metrics: Dict[str, MetricSummary]
+    best_iterations: List[Optional[int]]
+    num_workers: int
+    threads_per_fold: int
+    seconds: float
+
+
 @dataclass
 class Evaluation:
-    eval_df: pd.DataFrame
+    # y_true/y_pred/diff/error_rate와 구간 컬럼. 테스트셋이 커서 예측값을 보관하지 않은 경우 None
+    eval_df: Optional[pd.DataFrame]
     mean_absolute_error: float
     mean_absolute_percentage_error: float
     root_mean_squared_error: float
+    cross_validation: Optional[CrossValidation] = None
+    slice_metrics: Optional[pd.DataFrame] = None
+
+
+# 교차검증 워커 프로세스에 한 번만 전달되는 원본 데이터
+_CV_DATA: Dict = {}
+
+
+def _init_cv_worker(x: pd.DataFrame, y: pd.DataFrame, threads_per_fold: int):
+    os.environ["OMP_NUM_THREADS"] = str(threads_per_fold)
+    _CV_DATA.update({"x": x, "y": y})
+
+
+def _run_fold(
+    train_index, test_index, model_name: str, params: Dict, eval_metrics, preprocess_config: Dict,
+    validation_ratio: float, random_state: int,
+) -> Dict:
+    """
+    fold마다 전처리 파이프라인을 학습 fold로만 새로 학습하여 평가 fold로 정보가 새지 않게 한다.
+    early stopping은 학습 fold에서 떼어 낸 검증셋으로 하고, 평가 fold는 점수 계산에만 쓴다.
+    """
+    x, y = _CV_DATA["x"], _CV_DATA["y"]
+    x_valid = y_valid = None
+    if params.get("early_stopping_rounds"):
+        train_index, valid_index = sk_train_test_split(train_index, test_size=validation_ratio, random_state=random_state)
+    data_preprocess_pipeline = DataPreprocessPipeline(preprocess_config)
+    data_preprocess_pipeline.define_pipeline()
+    x_train = data_preprocess_pipeline.fit_transform(x.iloc[train_index])
+    x_test = data_preprocess_pipeline.transform(x.iloc[test_index])
+    y_train, y_test = y.iloc[train_index], y.iloc[test_index]
+    if params.get("early_stopping_rounds"):
+        x_valid, y_valid = data_preprocess_pipeline.transform(x.iloc[valid_index]), y.iloc[valid_index]
+    # one-hot 폭이 fold마다 달라질 수 있으므로 native 범주 컬럼 위치도 fold 파이프라인에서 다시 구한다.
+    params = with_categorical_feature(params, data_preprocess_pipeline.get_categorical_feature_indices())
+
+    model = MODELS.get_model(name=model_name).model()
+    model.reset_model(params=params)
+    model.set_eval_metrics(eval_metrics=eval_metrics)
+    model.train(x_train=x_train, y_train=y_train, x_test=x_valid, y_test=y_valid, evaluate_train_set=False)
+
+    y_true, y_pred = y_test["price"].to_numpy(), model.predict(x_test)
+    best_iteration = getattr(model.model, "best_iteration_", None) or getattr(model.model, "best_iteration", None)
+    return {
+        "mean_absolute_error": mean_absolute_error(y_true, y_pred),
+        "mean_absolute_percentage_error": mean_absolute_percentage_error(y_true, y_pred),
+        "root_mean_squared_error": float(np.sqrt(mean_squared_error(y_true, y_pred))),
+        "best_iteration": int(best_iteration) if best_iteration else None,
+    }
+
+
+def summarize_folds(values: List[float], test_train_ratio: float, confidence: float = 0.95) -> MetricSummary:
+    """
+    fold 점수의 평균과 신뢰구간. fold 간 학습 데이터가 겹쳐 점수가 독립이 아니므로
+    분산을 (1/n + n_test/n_train)으로 보정한 t-분포 구간을 사용한다(Nadeau & Bengio).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    mean = float(values.mean())
+    std = float(values.std(ddof=1)) if n > 1 else 0.0
+    half_width = 0.0
+    if n > 1:
+        half_width = stats.t.ppf((1 + confidence) / 2, n - 1) * std * np.sqrt(1 / n + test_train_ratio)
+    return MetricSummary(
+        mean=mean, std=std, ci_low=float(mean - half_width), ci_high=float(mean + half_width), values=values.tolist()
+    )
 
 
 class Artifact:
     preprocessed_file_path: Optional[str]
     model_file_path: Optional[str]
+    warmup_requests_file_path: Optional[str]
 
 
 class Trainer:
-    def __init__(self):
-        pass
+    def __init__(self, evaluation_cfg: Optional[Dict] = None, profiler: Optional[StageProfiler] = None):
+        self.evaluator = Evaluator(evaluation_cfg)
+        self.profiler = profiler or StageProfiler(enabled=False)
 
-    def train(self, model, x_train, y_train, x_test, y_test):
+    def train(self, model, x_train, y_train, x_test, y_test, datasets=None, evaluate_train_set=True):
+        train_set, valid_set = datasets if datasets is not None else (None, None)
         model.train (
             x_train=x_train, 
             y_train=y_train, 
             x_test=x_test, 
-            y_test=y_test
+            y_test=y_test,
+            train_set=train_set,
+            valid_set=valid_set,
+            evaluate_train_set=evaluate_train_set,
             ) # eval_set = [(x_test, y_test)],
 
-    def __organize_eval_df(self, df: pd.DataFrame):
-        logger.info(
-            '데이터 확인을 위해 추가적인 후처리 필요X'   
-        )
-        return df
-
-    def __evaluate(self, df: pd.DataFrame):
-        
-        expensive_prediction_df = df[df["diff"] >= 100000]
-        logger.info(
-            f""" [실제값보다 10만원 이상 '높게' 예측한 데이터 # {len(expensive_prediction_df)}]
-            {expensive_prediction_df}
-            """
-        )
-        cheaper_prediction_df = df[df["diff"] <= -100000]
-        logger.info(
-            f""" [실제값보다 10만원 이상 '낮게' 예측한 데이터 # {len(cheaper_prediction_df)}]
-            {cheaper_prediction_df}
-            """
-        )
-        
-
-    def evaluate(self, model, x, y):
-        predictions = model.predict(x)
-        eval_df = self.__organize_eval_df(df=x)
-        eval_df = pd.concat(
-            [pd.DataFrame(eval_df).reset_index(drop = True), 
-             pd.DataFrame({"y_true": y.price.to_list(), "y_pred": predictions})],
-            axis=1,
-        )
-        
-        
-
-        eval_df["diff"] = eval_df["y_true"] - eval_df["y_pred"]
-        eval_df["error_rate"] = eval_df["diff"] / eval_df["y_true"]
-        self.__evaluate(df=eval_df)
-
-        rmse = mean_squared_error(
-            y_true=eval_df.y_true, y_pred=eval_df.y_pred, squared=False
-        )
-        mae = mean_absolute_error(
-            y_true=eval_df.y_true,
-            y_pred=eval_df.y_pred,
-        )
-
-        mape = mean_absolute_percentage_error(
-            y_true=eval_df.y_true,
-            y_pred=eval_df.y_pred,
-        )
-
-        evaluation = Evaluation(
-            eval_df=eval_df,
-            mean_absolute_error=mae,
-            mean_absolute_percentage_error=mape,
-            root_mean_squared_error=rmse,
+    def evaluate(
+        self,
+        model,
+        x,
+        y,
+        slice_df: Optional[pd.DataFrame] = None,
+        slice_codes: Optional[Dict[str, Tuple[Slice, np.ndarray]]] = None,
+    ) -> Evaluation:
+        """
+        전체 지표와 구간별 지표를 계산합니다. (src.evaluation)
+        slice_df는 x와 같은 행 순서의 원본 컬럼(견종, 성별, 나이 등), slice_codes는 이미 구간 코드로 바꾼 값이다.
+        """
+        if slice_codes is None:
+            slice_codes = self.evaluator.encode_slices(slice_df)
+        y_true = y["price"].to_numpy() if isinstance(y, pd.DataFrame) else y
+        result = self.evaluator.evaluate(model, x, y_true, slice_codes)
+        return Evaluation(
+            eval_df=result.eval_df,
+            mean_absolute_error=result.metrics["mean_absolute_error"],
+            mean_absolute_percentage_error=result.metrics["mean_absolute_percentage_error"],
+            root_mean_squared_error=result.metrics["root_mean_squared_error"],
+            slice_metrics=result.slice_metrics,
         )
 
-        return evaluation
-
     def train_and_evaluate(
         self,
         model,
@@ -108,32 +181,102 @@ class Trainer:
         data_preprocess_pipeline: Optional[DataPreprocessPipeline] = None,
         preprocess_pipeline_file_path: Optional[str] = None,
         save_file_path: Optional[str] = None,
+        datasets: Optional[Tuple] = None,
+        evaluate_train_set: bool = True,
+        slice_df: Optional[pd.DataFrame] = None,
     ) -> Tuple[Evaluation, Artifact]:
-        self.train(
-            model=model,
-            x_train=x_train,
-            y_train=y_train,
-            x_test=x_test,
-            y_test=y_test,
-        )
+        with self.profiler.stage("lgb_fit"):
+            self.train(
+                model=model,
+                x_train=x_train,
+                y_train=y_train,
+                x_test=x_test,
+                y_test=y_test,
+                datasets=datasets,
+                evaluate_train_set=evaluate_train_set,
+            )
         
 
-        evaluation = self.evaluate(model=model, x=x_test, y=y_test)
+        with self.profiler.stage("evaluate"):
+            evaluation = self.evaluate(model=model, x=x_test, y=y_test, slice_df=slice_df)
 
         artifact = Artifact()
-        if (
-            data_preprocess_pipeline is not None
-            and preprocess_pipeline_file_path is not None
-        ):
-            artifact.preprocessed_file_path = data_preprocess_pipeline.dump_pipeline(
-                file_path=preprocess_pipeline_file_path
-            )
+        with self.profiler.stage("dump"):
+            if (
+                data_preprocess_pipeline is not None
+                and preprocess_pipeline_file_path is not None
+            ):
+                artifact.preprocessed_file_path = data_preprocess_pipeline.dump_pipeline(
+                    file_path=preprocess_pipeline_file_path
+                )
 
-        if save_file_path is not None:
-            model.save(save_file_path) # bst ext
-            artifact.model_file_path = save_file_path
+            if save_file_path is not None:
+                model.save(save_file_path) # bst ext
+                artifact.model_file_path = save_file_path
+                # MLServer가 ready 전에 재생할 warm-up 요청을 모델과 함께 저장
+                artifact.warmup_requests_file_path = dump_warmup_requests(x_test, save_file_path)
 
         return evaluation, artifact
 
+    def cross_validate(
+        self,
+        raw_df: pd.DataFrame,
+        model_name: str,
+        params: Dict,
+        eval_metrics,
+        preprocess_config: Dict,
+        n_splits: int = 5,
+        n_repeats: int = 1,
+        cpu_budget: Optional[int] = None,
+        threads_per_fold: Optional[int] = None,
+        validation_ratio: float = 0.2,
+        random_state: int = 42,
+    ) -> CrossValidation:
+        """
+        (반복) K-fold 교차검증을 fold 단위로 병렬 학습합니다.
+        동시에 실행되는 fold 수 x fold당 LightGBM 스레드 수가 cpu_budget을 넘지 않도록 맞춥니다.
+        params에 early_stopping_rounds가 있으면 학습 fold의 validation_ratio만큼을 early stopping 검증셋으로 쓴다.
+        """
+        started_at = time.perf_counter()
+        x = raw_df.drop(columns=["price"])
+        y = raw_df[["price"]].astype(np.float64)
+        folds = list(RepeatedKFold(n_splits=n_splits, n_repeats=n_repeats, random_state=random_state).split(x))
+
+        cpu_budget = cpu_budget or os.cpu_count()
+        if threads_per_fold is None:
+            threads_per_fold = max(1, cpu_budget // len(folds))
+        threads_per_fold = max(1, min(threads_per_fold, cpu_budget))
+        num_workers = max(1, min(len(folds), cpu_budget // threads_per_fold))
+        params = {**params, "num_threads": threads_per_fold}
+        logger.info(f"교차검증 시작: {n_splits} fold x {n_repeats}회, 워커 {num_workers}개 x 스레드 {threads_per_fold}개")
+
+        # fork로 띄우면 부모 프로세스의 LightGBM/OpenMP 스레드 상태를 물려받아 워커가 멈출 수 있다.
+        with ProcessPoolExecutor(
+            max_workers=num_workers, initializer=_init_cv_worker, initargs=(x, y, threads_per_fold),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _run_fold, train_index, test_index, model_name, params, eval_metrics, preprocess_config,
+                    validation_ratio, random_state,
+                )
+                for train_index, test_index in folds
+            ]
+            results = [future.result() for future in futures]
+
+        test_train_ratio = 1 / (n_splits - 1)
+        cross_validation = CrossValidation(
+            n_splits=n_splits,
+            n_repeats=n_repeats,
+            metrics={metric: summarize_folds([r[metric] for r in results], test_train_ratio) for metric in METRICS},
+            best_iterations=[r["best_iteration"] for r in results],
+            num_workers=num_workers,
+            threads_per_fold=threads_per_fold,
+            seconds=time.perf_counter() - started_at,
+        )
+        for metric, summary in cross_validation.metrics.items():
+            logger.info(f"- {metric}: {summary.mean:.4f} (95% CI {summary.ci_low:.4f} ~ {summary.ci_high:.4f})")
+        return cross_validation
+
     def export_onnx(self):
         pass
\ No newline at end of file
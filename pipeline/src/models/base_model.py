@@ -26,6 +26,9 @@ class BasePetCareCostPredictionModel(ABC):
         y_train: Union[np.ndarray, pd.DataFrame],
         x_test: Optional[Union[np.ndarray, pd.DataFrame]] = None,
         y_test: Optional[Union[np.ndarray, pd.DataFrame]] = None,
+        train_set=None,
+        valid_set=None,
+        evaluate_train_set: bool = True,
     ):
         raise NotImplementedError
 
@@ -10,6 +10,7 @@ import mlflow
 from mlserver.utils import get_model_uri
 
 from src.models.base_model import BasePetCareCostPredictionModel
+from src.lgb_dataset import categorical_feature, without_categorical_feature
 from src.logger import get_logger
 
 logger = get_logger("light_gbm_regression")
@@ -175,7 +176,8 @@ class LightGBMRegressionModelServing(BasePetCareCostPredictionModel):
             logger.info("서빙용 모델 파라미터를 재설정합니다.")
             logger.debug(f"새로운 파라미터: {params}")
 
-        self.model = LGBMRegressor(**self.params)
+        # categorical_feature는 fit 인자로 넘긴다.
+        self.model = LGBMRegressor(**without_categorical_feature(self.params))
 
     def train(
         self,
@@ -183,9 +185,20 @@ class LightGBMRegressionModelServing(BasePetCareCostPredictionModel):
         y_train: Union[np.ndarray, pd.DataFrame],
         x_test: Optional[Union[np.ndarray, pd.DataFrame]] = None,
         y_test: Optional[Union[np.ndarray, pd.DataFrame]] = None,
+        train_set: Optional[lgb.Dataset] = None,
+        valid_set: Optional[lgb.Dataset] = None,
+        evaluate_train_set: bool = True,
     ):
+        """
+        train_set/valid_set(미리 구간화된 lgb.Dataset)이 주어지면 x/y 대신 그대로 사용하여 lgb.train으로 학습합니다.
+        evaluate_train_set=False면 매 반복마다 학습 데이터 전체를 평가하지 않습니다.
+        """
         logger.info("서빙용 모델 학습을 시작합니다.")
-        eval_set = [(x_train, y_train)]
+        if train_set is not None:
+            self._train_dataset(train_set, valid_set, evaluate_train_set)
+            return
+
+        eval_set = [(x_train, y_train)] if evaluate_train_set else []
         if x_test is not None and y_test is not None:
             eval_set.append((x_test, y_test))
             logger.info("검증 데이터셋이 포함되었습니다.")
@@ -196,6 +209,39 @@ class LightGBMRegressionModelServing(BasePetCareCostPredictionModel):
                 y=y_train,
                 eval_set=eval_set,
                 eval_metric=self.eval_metrics,
+                categorical_feature=categorical_feature(self.params),
+            )
+            logger.info("서빙용 모델 학습이 완료되었습니다.")
+        except Exception as e:
+            logger.error(f"서빙용 모델 학습 중 오류가 발생했습니다: {str(e)}", exc_info=True)
+            raise
+
+    def _train_dataset(
+        self,
+        train_set: lgb.Dataset,
+        valid_set: Optional[lgb.Dataset],
+        evaluate_train_set: bool,
+    ):
+        valid_sets, valid_names = [], []
+        if evaluate_train_set:
+            valid_sets.append(train_set)
+            valid_names.append("train")
+        if valid_set is not None:
+            valid_sets.append(valid_set)
+            valid_names.append("valid")
+            logger.info("검증 데이터셋이 포함되었습니다.")
+
+        # native 범주 컬럼은 train_set을 만들 때 지정되어 있다.
+        params = {k: v for k, v in without_categorical_feature(self.params).items() if k not in ("name", "verbose_eval")}
+        params.update({"metric": self.eval_metrics, "feature_pre_filter": False, "verbose": -1})
+        try:
+            # lgb.Booster도 mlflow.lightgbm.save_model / predict 인터페이스가 같다.
+            self.model = lgb.train(
+                params,
+                train_set,
+                valid_sets=valid_sets,
+                valid_names=valid_names,
+                callbacks=[lgb.log_evaluation(self.params.get("verbose_eval", 1000))],
             )
             logger.info("서빙용 모델 학습이 완료되었습니다.")
         except Exception as e:
@@ -1,16 +1,17 @@
 from typing import Union, Dict, List, Optional, Tuple
 import os
-from joblib import dump, load
+from joblib import load
 import pandas as pd
 import numpy as np
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import MinMaxScaler, OneHotEncoder, StandardScaler, RobustScaler
+from sklearn.preprocessing import FunctionTransformer, MinMaxScaler, OneHotEncoder, OrdinalEncoder, StandardScaler, RobustScaler
 from sklearn.model_selection import train_test_split as sk_train_test_split
 from src.dataset.schema import XY
 from src.logger import setup_logger
+from src.preprocess_artifact import PreprocessArtifact
 
 logger = setup_logger(__name__)
 
@@ -18,6 +19,7 @@ class DataPreprocessPipeline(BaseEstimator, TransformerMixin):
     def __init__(self, config: Dict = None):
         self.config = config or {}
         self.pipeline = None
+        self.artifact: Optional[PreprocessArtifact] = None
         logger.info("전처리 파이프라인 초기화")
     
     def define_pipeline(self):
@@ -55,12 +57,16 @@ class DataPreprocessPipeline(BaseEstimator, TransformerMixin):
                 elif handling == "minmax_scale":
                     steps.append(("scale", MinMaxScaler()))
                 elif handling == "log_transform":
-                    steps.append(("log", lambda x: np.log1p(x)))
+                    steps.append(("log", FunctionTransformer(np.log1p, feature_names_out="one-to-one")))
             elif column_type == "categorical":
                 if handling == "one_hot":
-                    steps.append(("encode", OneHotEncoder(sparse_output=False, handle_unknown='ignore')))
-                elif handling == "label":
-                    steps.append(("encode", lambda x: pd.factorize(x)[0]))
+                    # 학습(fit) 중에만 쓰이는 출력이므로 희소로 두어 범주가 많아도 dense 행렬을 만들지 않는다.
+                    # 변환 결과의 dense/희소 여부는 sparse_output 설정을 따른다. (src.preprocess_artifact)
+                    steps.append(("encode", OneHotEncoder(sparse_output=True, handle_unknown='ignore')))
+                elif handling in ("label", "native"):
+                    # 학습 데이터의 범주 순서로 고정하고, 처음 보는 범주는 -1로 둔다.
+                    # native는 이 정수 코드를 LightGBM categorical_feature로 넘긴다. (-1은 결측으로 취급)
+                    steps.append(("encode", OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1)))
             
             if steps:
                 pipeline = Pipeline(steps)
@@ -76,50 +82,84 @@ class DataPreprocessPipeline(BaseEstimator, TransformerMixin):
         if self.pipeline is None:
             self.define_pipeline()
         self.pipeline.fit(x)
+        self.build_artifact()
         logger.info("전처리 파이프라인 학습 완료")
         return self
+
+    def build_artifact(self):
+        """학습된 sklearn 파이프라인의 값을 NumPy 평가기로 옮깁니다. 학습 후 값을 직접 바꿨다면 다시 호출해야 한다."""
+        self.artifact = PreprocessArtifact.from_pipeline(self.pipeline, self.config)
     
-    def transform(self, x: pd.DataFrame) -> np.ndarray:
+    def transform(self, x: pd.DataFrame):
+        """sparse_output 설정에 따라 np.ndarray 또는 CSR 행렬을 반환합니다."""
         logger.info("데이터 변환 시작")
-        if self.pipeline is None:
+        if self.artifact is None:
             raise ValueError("파이프라인이 학습되지 않았습니다.")
-        result = self.pipeline.transform(x)
+        result = self.artifact.transform(x)
         logger.info("데이터 변환 완료")
         return result
 
-    def fit_transform(self, x: pd.DataFrame, y=None) -> np.ndarray:
+    def fit_transform(self, x: pd.DataFrame, y=None):
         return self.fit(x).transform(x)
 
     def dump_pipeline(self, file_path: str) -> str:
+        """{file}.json + {file}.npz로 저장합니다. (src.preprocess_artifact)"""
+        if self.artifact is None:
+            raise ValueError("파이프라인이 학습되지 않았습니다.")
+        file_path = self.artifact.save(file_path)
         logger.info(f"파이프라인 저장: {file_path}")
-        file, ext = os.path.splitext(file_path)
-        if ext != ".pkl":
-            file_path = f"{file}.pkl"
-        dump({"pipeline": self.pipeline, "config": self.config}, file_path)
         return file_path
 
     def load_pipeline(self, file_path: str):
-        logger.info(f"파이프라인 로드: {file_path}")
-        saved_dict = load(file_path)
+        """json/npz 형식을 우선 읽고, 없으면 이전 형식(.pkl)을 읽습니다."""
+        file, _ = os.path.splitext(file_path)
+        if os.path.exists(f"{file}.json"):
+            logger.info(f"파이프라인 로드: {file}.json")
+            self.artifact = PreprocessArtifact.load(file_path)
+            self.pipeline = None
+            self.config = self.artifact.config
+            return
+        logger.warning(f"pickle 형식 파이프라인 로드: {file}.pkl (python -m src.preprocess_artifact convert 로 변환 가능)")
+        saved_dict = load(f"{file}.pkl")
         self.pipeline = saved_dict["pipeline"]
         self.config = saved_dict["config"]
+        self.build_artifact()
 
     def get_feature_names(self) -> list:
-        if self.pipeline is None:
+        if self.artifact is None:
+            raise ValueError("파이프라인이 학습되지 않았습니다.")
+        return list(self.artifact.feature_names)
+
+    def is_sparse_output(self) -> bool:
+        if self.artifact is None:
             raise ValueError("파이프라인이 학습되지 않았습니다.")
-        return self.pipeline.get_feature_names_out().tolist()
+        return self.artifact.sparse_output
+
+    def get_categorical_feature_indices(self) -> List[int]:
+        """native로 인코딩한 범주 컬럼의 출력 위치 (LightGBM categorical_feature)"""
+        if self.artifact is None:
+            raise ValueError("파이프라인이 학습되지 않았습니다.")
+        return self.artifact.categorical_feature_indices
+
+    def get_input_columns(self) -> list:
+        if self.artifact is not None:
+            return self.artifact.input_columns
+        if self.pipeline is None:
+            self.define_pipeline()
+        return [column for _, _, columns in self.pipeline.transformers for column in columns]
 
 def split_train_test(
     raw_df: pd.DataFrame,
     test_split_ratio: float,
     data_preprocess_pipeline: DataPreprocessPipeline,
+    random_state: int = 42,
 ) -> Tuple[XY, XY]:
     """데이터를 학습/테스트 세트로 분할하고 전처리를 수행합니다."""
     x = raw_df.drop(columns=["price"])
     y = raw_df[["price"]].astype(np.float64)
 
     x_train, x_test, y_train, y_test = sk_train_test_split(
-        x, y, test_size=test_split_ratio, random_state=42
+        x, y, test_size=test_split_ratio, random_state=random_state
     )
     
     preprocessed_train_x = data_preprocess_pipeline.fit_transform(x_train)
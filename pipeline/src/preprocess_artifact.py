@@ -0,0 +1,280 @@
+"""
+학습된 전처리 파이프라인을 pickle 없이 저장/평가하는 형식.
+
+- {name}.json: 컬럼별 전처리 단계(결측치 처리 → 스케일/인코딩)와 출력 feature 이름, native 범주 컬럼
+- {name}.npz: 단계별 학습값 (범주 목록, min/max 변환 계수, 평균/표준편차, 결측치 대체값)
+
+전처리 설정의 sparse_output이 true이거나, "auto"이면서 one-hot으로 펼친 행렬의 밀도 상한(입력 컬럼 수 / 출력 폭)이
+SPARSE_DENSITY_THRESHOLD보다 낮으면 transform은 CSR 행렬을 반환한다. (메모리가 0이 아닌 값 수에 비례)
+
+sklearn ColumnTransformer를 unpickle하지 않고 NumPy만으로 같은 변환을 수행하므로, 로드가 빠르고 sklearn 버전에 묶이지 않으며
+임의 코드가 실행될 위험이 없다. (npz는 allow_pickle=False로 읽는다)
+
+    python -m src.preprocess_artifact convert data_storage/train_results/*.pkl
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+FORMAT_VERSION = 1
+# sklearn ColumnTransformer의 sparse_threshold 기본값과 같다.
+SPARSE_DENSITY_THRESHOLD = 0.3
+
+
+def matrix_nbytes(x) -> int:
+    """dense 배열은 전체 크기, 희소 행렬은 저장된 값/인덱스 크기."""
+    if sp.issparse(x):
+        x = x.tocsr()
+        return int(x.data.nbytes + x.indices.nbytes + x.indptr.nbytes)
+    return int(np.asarray(x).nbytes)
+
+
+def _as_array(values) -> Tuple[np.ndarray, str]:
+    """npz에 pickle 없이 저장할 수 있도록 object 배열(문자열 범주 등)은 유니코드 배열로 바꾼다."""
+    array = np.asarray(values)
+    if array.dtype == object:
+        return array.astype(str), "str"
+    return array, array.dtype.kind
+
+
+def _export_step(step, column: str, index: int, arrays: Dict[str, np.ndarray]) -> Dict:
+    # sklearn은 이 함수에서만 필요하므로 평가(로드) 시에는 import하지 않는다.
+    from sklearn.impute import SimpleImputer
+    from sklearn.preprocessing import FunctionTransformer, MinMaxScaler, OneHotEncoder, OrdinalEncoder, StandardScaler
+
+    def add(name: str, values) -> Dict:
+        key = f"{column}.{index}.{name}"
+        arrays[key], kind = _as_array(values)
+        return {"key": key, "kind": kind}
+
+    if isinstance(step, SimpleImputer):
+        return {"op": "impute", "fill": add("fill", step.statistics_)}
+    if isinstance(step, MinMaxScaler):
+        return {"op": "minmax", "scale": add("scale", step.scale_), "min": add("min", step.min_)}
+    if isinstance(step, StandardScaler):
+        return {
+            "op": "standard",
+            "mean": add("mean", step.mean_ if step.with_mean else np.zeros(1)),
+            "scale": add("scale", step.scale_ if step.with_std else np.ones(1)),
+        }
+    if isinstance(step, FunctionTransformer) and step.func is np.log1p:
+        return {"op": "log1p"}
+    if isinstance(step, OneHotEncoder):
+        if step.drop is not None:
+            raise ValueError(f"drop을 사용하는 OneHotEncoder는 지원하지 않습니다: {column}")
+        return {"op": "one_hot", "categories": add("categories", step.categories_[0])}
+    if isinstance(step, OrdinalEncoder):
+        unknown_value = step.unknown_value if step.handle_unknown == "use_encoded_value" else -1
+        return {"op": "ordinal", "categories": add("categories", step.categories_[0]), "unknown_value": unknown_value}
+    raise ValueError(f"변환할 수 없는 전처리 단계입니다: {column} {step!r}")
+
+
+def _categories(values: np.ndarray, categories: np.ndarray, kind: str) -> np.ndarray:
+    """값마다 범주 목록에서의 위치를 반환합니다. 목록에 없는 값은 -1."""
+    if kind == "str":
+        # 저장할 때 범주를 str로 바꿨으므로 입력도 같은 방식으로 바꾼다. (None → "None": sklearn도 None을 범주로 취급)
+        values = values.astype(str)
+    return pd.Categorical(values, categories=categories).codes
+
+
+def _hstack_csr(blocks: List, num_rows: int) -> sp.csr_matrix:
+    """컬럼 블록(dense 또는 CSR)을 0이 아닌 값만 모아 CSR 하나로 합칩니다. (sp.hstack보다 요청 한 건 변환이 빠르다)"""
+    rows, cols, data, offset = [], [], [], 0
+    for block in blocks:
+        if sp.issparse(block):
+            block = block.tocoo()
+            block_rows, block_cols, block_data = block.row, block.col, block.data
+        else:
+            block = np.asarray(block, dtype=np.float64)
+            block_rows, block_cols = np.nonzero(block)
+            block_data = block[block_rows, block_cols]
+        rows.append(block_rows)
+        cols.append(block_cols + offset)
+        data.append(block_data)
+        offset += block.shape[1]
+    return sp.csr_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))), shape=(num_rows, offset))
+
+
+class PreprocessArtifact:
+    def __init__(self, spec: Dict, arrays: Dict[str, np.ndarray]):
+        self.spec = spec
+        self.arrays = arrays
+
+    @property
+    def config(self) -> Dict:
+        return self.spec["config"]
+
+    @property
+    def feature_names(self) -> List[str]:
+        return self.spec["feature_names"]
+
+    @property
+    def input_columns(self) -> List[str]:
+        return [column["name"] for column in self.spec["columns"]]
+
+    def _width(self, column: Dict) -> int:
+        one_hot = [step for step in column["steps"] if step["op"] == "one_hot"]
+        return len(self.arrays[one_hot[-1]["categories"]["key"]]) if one_hot else 1
+
+    @property
+    def width(self) -> int:
+        return sum(self._width(column) for column in self.spec["columns"])
+
+    @property
+    def sparse_output(self) -> bool:
+        sparse_output = self.config.get("sparse_output", False)
+        if sparse_output == "auto":
+            # 입력 컬럼마다 행당 0이 아닌 값은 최대 하나
+            return self.width > 0 and len(self.spec["columns"]) / self.width < SPARSE_DENSITY_THRESHOLD
+        return bool(sparse_output)
+
+    @property
+    def categorical_feature_indices(self) -> List[int]:
+        """정수 코드로 내보내 LightGBM이 범주로 다루는(native) 출력 feature 위치."""
+        indices, offset = [], 0
+        for column in self.spec["columns"]:
+            if column.get("categorical"):
+                indices.append(offset)
+            offset += self._width(column)
+        return indices
+
+    @classmethod
+    def from_pipeline(cls, pipeline, config: Dict) -> "PreprocessArtifact":
+        """학습된 ColumnTransformer(컬럼마다 Pipeline 하나)에서 단계별 학습값을 꺼냅니다."""
+        arrays = {}
+        columns = []
+        for name, transformer, transformer_columns in pipeline.transformers_:
+            if transformer == "drop" or name == "remainder":
+                continue
+            if len(transformer_columns) != 1:
+                raise ValueError(f"컬럼 하나씩 변환하는 파이프라인만 지원합니다: {name} {transformer_columns}")
+            column = transformer_columns[0]
+            steps = transformer.steps if hasattr(transformer, "steps") else [(name, transformer)]
+            columns.append({
+                "name": column,
+                "steps": [_export_step(step, column, i, arrays) for i, (_, step) in enumerate(steps)],
+                "categorical": config.get("columns", {}).get(column, {}).get("handling") == "native",
+            })
+
+        spec = {
+            "format_version": FORMAT_VERSION,
+            "config": config,
+            "columns": columns,
+            "feature_names": pipeline.get_feature_names_out().tolist(),
+        }
+        return cls(spec, arrays)
+
+    def save(self, file_path: str) -> str:
+        """{file}.json과 {file}.npz를 저장하고 json 경로를 반환합니다."""
+        file, _ = os.path.splitext(file_path)
+        json_path, npz_path = f"{file}.json", f"{file}.npz"
+        # json이 진입점이므로 npz를 먼저 쓰고, 반쯤 쓰인 파일을 읽지 않도록 임시 파일에 쓴 뒤 이름을 바꾼다.
+        tmp_npz_path = f"{file}.tmp-{os.getpid()}.npz"
+        np.savez(tmp_npz_path, **self.arrays)
+        os.replace(tmp_npz_path, npz_path)
+        tmp_json_path = f"{json_path}.tmp-{os.getpid()}"
+        with open(tmp_json_path, "w", encoding="utf-8") as f:
+            json.dump(self.spec, f, indent=2, ensure_ascii=False, default=str)
+        os.replace(tmp_json_path, json_path)
+        return json_path
+
+    @classmethod
+    def load(cls, file_path: str) -> "PreprocessArtifact":
+        file, _ = os.path.splitext(file_path)
+        with open(f"{file}.json", "r", encoding="utf-8") as f:
+            spec = json.load(f)
+        if spec.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 전처리 형식 버전입니다: {spec.get('format_version')}")
+        with np.load(f"{file}.npz", allow_pickle=False) as npz:
+            arrays = {key: npz[key] for key in npz.files}
+        return cls(spec, arrays)
+
+    def _transform_column(self, values: np.ndarray, steps: List[Dict], sparse: bool = False):
+        for step in steps:
+            op = step["op"]
+            if op == "impute":
+                fill = self.arrays[step["fill"]["key"]][0]
+                if step["fill"]["kind"] == "str":
+                    # sklearn SimpleImputer(missing_values=np.nan)와 같이 object 배열에서는 NaN만 채우고 None은 그대로 둔다.
+                    values = np.where(values != values, fill, values)
+                else:
+                    values = np.asarray(values, dtype=np.float64)
+                    values = np.where(np.isnan(values), fill, values)
+            elif op == "minmax":
+                values = np.asarray(values, dtype=np.float64) * self.arrays[step["scale"]["key"]][0]
+                values = values + self.arrays[step["min"]["key"]][0]
+            elif op == "standard":
+                values = np.asarray(values, dtype=np.float64) - self.arrays[step["mean"]["key"]][0]
+                values = values / self.arrays[step["scale"]["key"]][0]
+            elif op == "log1p":
+                values = np.log1p(np.asarray(values, dtype=np.float64))
+            elif op == "one_hot":
+                categories = self.arrays[step["categories"]["key"]]
+                codes = _categories(values, categories, step["categories"]["kind"])
+                known = codes >= 0
+                if sparse:
+                    # one-hot은 마지막 단계이므로 바로 CSR 블록을 반환한다.
+                    rows = np.flatnonzero(known)
+                    return sp.csr_matrix(
+                        (np.ones(len(rows), dtype=np.float64), (rows, codes[known])), shape=(len(values), len(categories)),
+                    )
+                one_hot = np.zeros((len(values), len(categories)), dtype=np.float64)
+                one_hot[np.flatnonzero(known), codes[known]] = 1.0
+                values = one_hot
+            elif op == "ordinal":
+                categories = self.arrays[step["categories"]["key"]]
+                codes = _categories(values, categories, step["categories"]["kind"]).astype(np.float64)
+                values = np.where(codes >= 0, codes, step["unknown_value"])
+            else:
+                raise ValueError(f"알 수 없는 전처리 단계입니다: {op}")
+        return np.asarray(values).reshape(len(values), -1)
+
+    def transform(self, x: pd.DataFrame):
+        sparse = self.sparse_output
+        blocks = [
+            self._transform_column(x[column["name"]].to_numpy(), column["steps"], sparse)
+            for column in self.spec["columns"]
+        ]
+        if not blocks:
+            return np.empty((len(x), 0), dtype=np.float64)
+        if sparse:
+            return _hstack_csr(blocks, len(x))
+        return np.hstack(blocks)
+
+
+def convert_pickle(pkl_path: str, output_path: Optional[str] = None) -> Dict:
+    """기존 dump_pipeline이 저장한 .pkl({"pipeline", "config"})을 json/npz 형식으로 변환합니다."""
+    from joblib import load
+
+    saved_dict = load(pkl_path)
+    artifact = PreprocessArtifact.from_pipeline(saved_dict["pipeline"], saved_dict["config"])
+    json_path = artifact.save(output_path or pkl_path)
+
+    started_at = time.perf_counter()
+    PreprocessArtifact.load(json_path)
+    load_seconds = time.perf_counter() - started_at
+    npz_path = f"{os.path.splitext(json_path)[0]}.npz"
+    return {
+        "source": pkl_path,
+        "output": json_path,
+        "pkl_bytes": os.path.getsize(pkl_path),
+        "artifact_bytes": os.path.getsize(json_path) + os.path.getsize(npz_path),
+        "load_seconds": load_seconds,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="전처리 파이프라인 저장 형식 (pickle → json/npz)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    convert_parser = subparsers.add_parser("convert", help=".pkl 파이프라인을 json/npz로 변환")
+    convert_parser.add_argument("pkl_paths", nargs="+")
+
+    args = parser.parse_args()
+    result = [convert_pickle(pkl_path) for pkl_path in args.pkl_paths]
+    print(json.dumps(result, indent=2, ensure_ascii=False))
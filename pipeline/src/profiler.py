@@ -0,0 +1,137 @@
+"""
+학습 단계별 비용 측정.
+
+    profiler = StageProfiler()
+    with profiler.stage("lgb_fit"):
+        ...
+    profiler.report()  # metadata.json의 profile
+
+단계마다 실제 경과 시간, 이 프로세스의 CPU 시간, 자식 프로세스(탐색/교차검증 워커)의 CPU 시간, 최대 RSS를 기록한다.
+tracemalloc을 켜면 단계별 Python 메모리 할당 최대치도 기록하며(느려진다), capture로 전체 실행의 cProfile/pyinstrument 결과를 남길 수 있다.
+"""
+import cProfile
+import os
+import platform
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from src.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+CAPTURE_MODES = ("none", "cprofile", "pyinstrument")
+# ru_maxrss 단위: Linux는 KB, macOS는 byte
+_MAXRSS_BYTES = 1 if platform.system() == "Darwin" else 1024
+
+
+def _usage():
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    children_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        "cpu": self_usage.ru_utime + self_usage.ru_stime,
+        "children_cpu": children_usage.ru_utime + children_usage.ru_stime,
+        "maxrss": self_usage.ru_maxrss * _MAXRSS_BYTES,
+    }
+
+
+class StageProfiler:
+    def __init__(self, enabled: bool = True, use_tracemalloc: bool = False, capture: str = "none"):
+        self.stages: List[Dict] = []
+        self.started_at = time.perf_counter()
+        self._capture_profiler = None
+        self._capture_path: Optional[str] = None
+        self.configure({"enabled": enabled, "tracemalloc": use_tracemalloc, "capture": capture})
+
+    @classmethod
+    def from_config(cls, profiling_cfg: Optional[Dict]) -> "StageProfiler":
+        return cls().configure(profiling_cfg)
+
+    def configure(self, profiling_cfg: Optional[Dict]) -> "StageProfiler":
+        """config.yml의 profiling 설정을 적용합니다. 학습 설정을 읽기 전에 만든 profiler에도 나중에 적용할 수 있다."""
+        profiling_cfg = profiling_cfg or {}
+        capture = profiling_cfg.get("capture", "none")
+        if capture not in CAPTURE_MODES:
+            raise ValueError(f"capture는 {CAPTURE_MODES} 중 하나여야 합니다: {capture}")
+        self.enabled = profiling_cfg.get("enabled", True)
+        self.use_tracemalloc = self.enabled and profiling_cfg.get("tracemalloc", False)
+        self.capture = capture if self.enabled else "none"
+
+        if self.use_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self._capture_profiler is not None:
+            return self
+        if self.capture == "cprofile":
+            self._capture_profiler = cProfile.Profile()
+            self._capture_profiler.enable()
+        elif self.capture == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                logger.warning("pyinstrument가 설치되어 있지 않아 capture를 건너뜁니다.")
+                self.capture = "none"
+            else:
+                self._capture_profiler = Profiler()
+                self._capture_profiler.start()
+        return self
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        before = _usage()
+        if self.use_tracemalloc:
+            tracemalloc.reset_peak()
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_seconds = time.perf_counter() - started_at
+            after = _usage()
+            record = {
+                "name": name,
+                "wall_seconds": wall_seconds,
+                "cpu_seconds": after["cpu"] - before["cpu"],
+                "children_cpu_seconds": after["children_cpu"] - before["children_cpu"],
+                "peak_rss_mb": after["maxrss"] / 1024 ** 2,
+                # 이 단계에서 프로세스 최대 RSS가 늘어난 양 (0이면 이전 단계의 최대치를 넘지 않음)
+                "rss_growth_mb": (after["maxrss"] - before["maxrss"]) / 1024 ** 2,
+            }
+            if self.use_tracemalloc:
+                record["python_peak_mb"] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+            self.stages.append(record)
+            logger.info(
+                f"[profile] {name}: {wall_seconds:.2f}s (CPU {record['cpu_seconds']:.2f}s, "
+                f"자식 CPU {record['children_cpu_seconds']:.2f}s, 최대 RSS {record['peak_rss_mb']:.0f}MB)"
+            )
+
+    def save_capture(self, save_dir: str) -> Optional[str]:
+        """capture 결과를 save_dir에 저장합니다. (cprofile: profile.pstats, pyinstrument: profile.html)"""
+        if self._capture_profiler is None:
+            return None
+        if self.capture == "cprofile":
+            self._capture_profiler.disable()
+            self._capture_path = os.path.join(save_dir, "profile.pstats")
+            self._capture_profiler.dump_stats(self._capture_path)
+        else:
+            self._capture_profiler.stop()
+            self._capture_path = os.path.join(save_dir, "profile.html")
+            with open(self._capture_path, "w") as f:
+                f.write(self._capture_profiler.output_html())
+        self._capture_profiler = None
+        return self._capture_path
+
+    def report(self) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        return {
+            "total_wall_seconds": time.perf_counter() - self.started_at,
+            "total_cpu_seconds": sum(stage["cpu_seconds"] for stage in self.stages),
+            "total_children_cpu_seconds": sum(stage["children_cpu_seconds"] for stage in self.stages),
+            "peak_rss_mb": max((stage["peak_rss_mb"] for stage in self.stages), default=None),
+            "stages": self.stages,
+            "capture": self._capture_path,
+        }
@@ -0,0 +1,210 @@
+"""
+날짜별로 나뉜 보험 청구 기록(records/{YYYY-MM-DD}/) 저장소.
+
+CSV 대신 타입이 고정된 zstd 압축 Parquet 파일로 저장하여, 읽을 때마다 문자열을 다시 파싱하고 타입을 추론하지 않는다.
+- 날짜 범위는 디렉토리 이름으로 먼저 걸러서 범위 밖 파티션은 열지 않는다.
+- 필요한 컬럼만 읽는다(column projection).
+- Parquet가 없는 파티션은 기존 CSV를 그대로 읽으므로 migrate 전후 모두 동작한다.
+
+pipeline / dashboard / scheduler 는 이미지가 따로 빌드되므로 같은 파일을 각 서비스에 둔다.
+(사용법 예시를 뺀 나머지가 같은지 scheduler/tests/test_record_store.py가 확인한다.)
+
+    python -m src.record_store migrate data_storage/records
+    python -m src.record_store benchmark data_storage/records
+"""
+import argparse
+import json
+import os
+import re
+import time
+from glob import glob
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+RECORD_NAME = "insurance_claim"
+
+# 알려진 컬럼은 이 타입으로 고정하고, 그 밖의 컬럼은 pandas가 추론한 타입을 따른다.
+# 문자열 컬럼은 Parquet가 사전(dictionary) 인코딩으로 압축하므로 읽은 뒤의 타입은 CSV와 같게 둔다.
+SCHEMA = {
+    "gender": pa.string(),
+    "breed": pa.string(),
+    "neutralized": pa.string(),
+    "district": pa.string(),
+    "age": pa.int64(),
+    "weight": pa.float64(),
+    "price": pa.int64(),
+    "issued_at": pa.string(),
+}
+
+
+def to_table(df: pd.DataFrame) -> pa.Table:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, name in enumerate(table.column_names):
+        if name in SCHEMA and table.schema.field(name).type != SCHEMA[name]:
+            try:
+                table = table.set_column(i, name, table.column(name).cast(SCHEMA[name]))
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                # 결측치가 있는 정수 컬럼 등 변환할 수 없는 값은 원래 타입으로 둔다.
+                pass
+    return table
+
+
+def read_file(file_path: str, columns: Optional[List[str]] = None, nrows: Optional[int] = None) -> pd.DataFrame:
+    if file_path.endswith(".parquet"):
+        if nrows is not None:
+            batch = next(pq.ParquetFile(file_path).iter_batches(batch_size=nrows, columns=columns), None)
+            return batch.to_pandas() if batch is not None else pd.DataFrame(columns=columns)
+        return pq.read_table(file_path, columns=columns).to_pandas()
+    return pd.read_csv(file_path, usecols=columns, nrows=nrows)
+
+
+def iter_file(file_path: str, columns: Optional[List[str]] = None, chunk_rows: int = 100000):
+    """파일을 chunk_rows 행씩 나누어 읽습니다. Parquet는 row group 단위로 필요한 컬럼만 읽는다."""
+    if file_path.endswith(".parquet"):
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(file_path, usecols=columns, chunksize=chunk_rows)
+
+
+def write_file(df: pd.DataFrame, file_path: str, compression: str = "zstd") -> str:
+    if file_path.endswith(".parquet"):
+        # 반쯤 쓰인 파일을 다른 프로세스가 읽지 않도록 임시 파일에 쓴 뒤 이름을 바꾼다.
+        tmp_path = f"{file_path}.tmp-{os.getpid()}"
+        pq.write_table(to_table(df), tmp_path, compression=compression)
+        os.replace(tmp_path, file_path)
+    else:
+        df.to_csv(file_path, index=False)
+    return file_path
+
+
+def read_sources(sources: List[str], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    if not sources:
+        return pd.DataFrame(columns=columns)
+    return pd.concat([read_file(file_path, columns) for file_path in sources], ignore_index=True)
+
+
+class RecordStore:
+    def __init__(self, root: str, compression: str = "zstd"):
+        self.root = root
+        self.compression = compression
+
+    def dates(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if DATE_PATTERN.match(name) and os.path.isdir(os.path.join(self.root, name))
+        )
+
+    def files(self, date: str) -> List[str]:
+        """파티션의 데이터 파일. Parquet가 있으면 Parquet만, 없으면 CSV를 반환한다."""
+        partition = os.path.join(self.root, date)
+        parquet_files = sorted(glob(os.path.join(partition, "*.parquet")))
+        return parquet_files or sorted(glob(os.path.join(partition, "*.csv")))
+
+    def file(self, date: str, name: str = RECORD_NAME) -> str:
+        parquet_path = os.path.join(self.root, date, f"{name}.parquet")
+        return parquet_path if os.path.exists(parquet_path) else os.path.join(self.root, date, f"{name}.csv")
+
+    def sources(self, date_from: Optional[str] = None, date_to: Optional[str] = None) -> List[str]:
+        # 날짜 문자열(YYYY-MM-DD)은 사전순 비교가 곧 날짜 비교다.
+        return [
+            file_path
+            for date in self.dates()
+            if (date_from is None or date >= date_from) and (date_to is None or date <= date_to)
+            for file_path in self.files(date)
+        ]
+
+    def read(
+        self,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        sources: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        return read_sources(sources if sources is not None else self.sources(date_from, date_to), columns)
+
+    def write(self, df: pd.DataFrame, date: str, name: str = RECORD_NAME) -> str:
+        partition = os.path.join(self.root, date)
+        os.makedirs(partition, exist_ok=True)
+        return write_file(df, os.path.join(partition, f"{name}.parquet"), compression=self.compression)
+
+    def migrate(self, remove_csv: bool = False) -> List[Dict]:
+        """CSV만 있는 파티션을 Parquet로 변환합니다. 이미 변환된 파티션은 건너뜁니다."""
+        reports = []
+        for date in self.dates():
+            partition = os.path.join(self.root, date)
+            if glob(os.path.join(partition, "*.parquet")):
+                continue
+            for csv_path in sorted(glob(os.path.join(partition, "*.csv"))):
+                name = os.path.splitext(os.path.basename(csv_path))[0]
+                parquet_path = self.write(pd.read_csv(csv_path), date, name)
+                reports.append({
+                    "date": date,
+                    "csv_bytes": os.path.getsize(csv_path),
+                    "parquet_bytes": os.path.getsize(parquet_path),
+                })
+                if remove_csv:
+                    os.remove(csv_path)
+        return reports
+
+
+def benchmark(root: str, columns: Optional[List[str]] = None, repeat: int = 3) -> Dict:
+    """같은 파티션을 CSV와 Parquet로 읽는 시간을 비교합니다. (두 형식이 모두 있는 파티션만 사용)"""
+    store = RecordStore(root)
+    pairs = []
+    for date in store.dates():
+        partition = os.path.join(root, date)
+        for csv_path in sorted(glob(os.path.join(partition, "*.csv"))):
+            parquet_path = f"{os.path.splitext(csv_path)[0]}.parquet"
+            if os.path.exists(parquet_path):
+                pairs.append((csv_path, parquet_path))
+
+    def timed(file_paths):
+        seconds = []
+        for _ in range(repeat):
+            started_at = time.perf_counter()
+            df = pd.concat([read_file(file_path, columns) for file_path in file_paths], ignore_index=True)
+            seconds.append(time.perf_counter() - started_at)
+        return min(seconds), df
+
+    csv_seconds, csv_df = timed([csv_path for csv_path, _ in pairs])
+    parquet_seconds, parquet_df = timed([parquet_path for _, parquet_path in pairs])
+    return {
+        "partitions": len(pairs),
+        "rows": len(parquet_df),
+        "columns": columns,
+        "csv_seconds": csv_seconds,
+        "parquet_seconds": parquet_seconds,
+        "speedup": csv_seconds / parquet_seconds if parquet_seconds else None,
+        "csv_bytes": sum(os.path.getsize(csv_path) for csv_path, _ in pairs),
+        "parquet_bytes": sum(os.path.getsize(parquet_path) for _, parquet_path in pairs),
+        "csv_memory_bytes": int(csv_df.memory_usage(deep=True).sum()),
+        "parquet_memory_bytes": int(parquet_df.memory_usage(deep=True).sum()),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="날짜별 기록 저장소 (CSV → Parquet)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="CSV 파티션을 Parquet로 변환")
+    migrate_parser.add_argument("root")
+    migrate_parser.add_argument("--remove-csv", action="store_true")
+
+    benchmark_parser = subparsers.add_parser("benchmark", help="CSV / Parquet 로드 시간 비교")
+    benchmark_parser.add_argument("root")
+    benchmark_parser.add_argument("--columns", nargs="*")
+    benchmark_parser.add_argument("--repeat", type=int, default=3)
+
+    args = parser.parse_args()
+    if args.command == "migrate":
+        result = RecordStore(args.root).migrate(remove_csv=args.remove_csv)
+    else:
+        result = benchmark(args.root, columns=args.columns, repeat=args.repeat)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
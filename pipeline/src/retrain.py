@@ -0,0 +1,99 @@
+"""
+스케줄러의 재학습 요청을 받아 학습 작업 큐에 등록하는 API.
+
+    uvicorn src.retrain:app --host 0.0.0.0 --port 5002
+
+POST /retrain?mode=incremental|full&reason=...
+- full: 전체 기록으로 배포 모델과 같은 전처리/파라미터 설정을 다시 학습
+- incremental: 배포 모델에서 새 데이터 + replay 표본으로 트리를 이어서 학습 (src.incremental)
+
+GET /deployment
+- 현재 배포된 모델(deployed.json). 스케줄러는 재학습 모델이 배포된 것을 확인한 뒤에 drift 비교 기준을 바꾼다.
+"""
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+import yaml
+from fastapi import FastAPI, HTTPException
+
+from src.incremental import load_deployment
+from src.jobs import JobQueue, ensure_worker
+from src.logger import setup_logger
+from src.record_store import RecordStore
+
+logger = setup_logger(__name__)
+
+ARTIFACT_PATH = os.getenv("ARTIFACT_PATH", './data_storage/train_results')
+CONFIG_PATH = os.getenv("PIPELINE_CONFIG_PATH", "./config.yml")
+RETRAIN_MODES = ("full", "incremental")
+
+app = FastAPI()
+
+
+def build_retrain_config(mode: str, reason: Optional[str] = None) -> Dict:
+    """배포 모델의 metadata.json에 남은 설정(model_params, preprocessing)으로 학습 설정을 만듭니다."""
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        base_config = yaml.safe_load(f)
+    deployment = load_deployment(ARTIFACT_PATH)
+    if deployment is None:
+        raise ValueError("배포된 모델이 없어 재학습 설정을 만들 수 없습니다.")
+    metadata = deployment["metadata"]
+    if "model_params" not in metadata or "preprocessing" not in metadata:
+        raise ValueError(f"배포 모델의 metadata.json에 학습 설정이 없습니다: {deployment['model_name']}")
+
+    record_store = RecordStore(base_config.get("data_dir", "data_storage/records"))
+    dates = record_store.dates()
+    if not dates:
+        raise ValueError("학습할 기록이 없습니다.")
+
+    run_name = f"{mode}-retrain-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    return {
+        **base_config,
+        "name": metadata.get("experiment_name", "petcare_cost_prediction"),
+        "run_name": run_name,
+        "data": {
+            # 전체 기록을 API 요청 안에서 읽어 작업 설정에 pickle하지 않도록 경로만 넘기고, 작업이 직접 읽는다.
+            # (전체 재학습은 src.train, 증분 학습은 필요한 날짜만 src.incremental에서 읽는다.)
+            "source": record_store.sources(),
+            "dataframe": None,
+            "details": {
+                "date_from": dates[0],
+                "date_to": dates[-1],
+                "test_split_ratio": metadata.get("test_split_ratio", 0.2),
+            },
+        },
+        "model": {
+            "name": metadata["model_name"],
+            "eval_metrics": metadata["eval_metrics"],
+            "params": dict(metadata["model_params"]),
+            "evaluate_train_set": False,
+        },
+        "preprocessing": metadata["preprocessing"],
+        "retrain": {**base_config.get("retrain", {}), "mode": mode, "reason": reason},
+    }
+
+
+@app.post("/retrain")
+def retrain(mode: str = "incremental", reason: Optional[str] = None):
+    if mode not in RETRAIN_MODES:
+        raise HTTPException(status_code=400, detail=f"mode는 {RETRAIN_MODES} 중 하나여야 합니다: {mode}")
+    try:
+        config = build_retrain_config(mode, reason)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    job_queue = JobQueue()
+    jobs_config = config.get("jobs", {})
+    ensure_worker(job_queue, cpu_slots=jobs_config.get("cpu_slots") or None, max_jobs=jobs_config.get("max_concurrent_jobs", 2))
+    job_id = job_queue.submit(config, cpu_slots=jobs_config.get("cpu_slots_per_job", 2))
+    logger.info(f"재학습 요청 등록: {job_id} (mode={mode}, reason={reason})")
+    return {"job_id": job_id, "mode": mode, "run_name": config["run_name"]}
+
+
+@app.get("/deployment")
+def deployment():
+    deployment = load_deployment(ARTIFACT_PATH)
+    if deployment is None:
+        raise HTTPException(status_code=404, detail="배포된 모델이 없습니다.")
+    return {"model_name": deployment["model_name"], "deployed_at": deployment["deployed_at"]}
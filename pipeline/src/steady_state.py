@@ -0,0 +1,37 @@
+"""
+warm-up 지연시간으로 정상상태 도달 여부를 판단합니다.
+
+요청을 window개씩 묶은 구간 중앙값이 어느 구간부터 끝까지 서로 (1 + tolerance)배 이내이고,
+그런 구간이 min_windows개 이상 이어져야 정상상태로 본다. 지연시간이 계속 줄어드는 중이면 정상상태가 아니다.
+slo_ms를 주면 그 구간들의 중앙값이 모두 slo_ms 이하여야 한다.
+
+backend(warmup.py)와 pipeline(배포 시 MLServer warm-up 판단)이 같은 기준을 쓰도록 두 이미지에 같은 파일을 둔다.
+(backend/tests/test_warmup.py에서 두 파일이 같은지 확인)
+"""
+import statistics
+from typing import List, Optional
+
+
+def window_medians(latencies: List[float], window: int) -> List[float]:
+    return [statistics.median(latencies[i:i + window]) for i in range(0, len(latencies) - window + 1, window)]
+
+
+def find_steady_state(
+    latencies: List[float],
+    window: int,
+    tolerance: float,
+    min_windows: int = 3,
+    slo_ms: Optional[float] = None,
+) -> Optional[int]:
+    """정상상태가 시작되는 요청 인덱스. 정상상태에 도달하지 못했으면 None."""
+    medians = window_medians(latencies, window)
+    steady_from = None
+    low, high = float("inf"), 0.0
+    # 마지막 구간부터 거꾸로 범위를 넓히며, 끝까지 기준을 지키는 가장 이른 구간을 찾는다.
+    for i in range(len(medians) - 1, -1, -1):
+        low, high = min(low, medians[i]), max(high, medians[i])
+        if high > low * (1 + tolerance) or (slo_ms is not None and high > slo_ms):
+            break
+        if len(medians) - i >= min_windows:
+            steady_from = i * window
+    return steady_from
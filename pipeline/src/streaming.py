@@ -0,0 +1,304 @@
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.preprocessing import MinMaxScaler, OneHotEncoder, OrdinalEncoder, StandardScaler
+from sklearn.impute import SimpleImputer
+
+from src.evaluation import Slice
+from src.preprocess import DataPreprocessPipeline
+from src.lgb_dataset import categorical_feature, dataset_params
+from src.record_store import iter_file, read_file
+from src.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+TARGET = "price"
+
+
+def used_columns(preprocess_config: Dict) -> List[str]:
+    drop_columns = preprocess_config.get("drop_columns", [])
+    return [c for c in preprocess_config.get("columns", {}) if c not in drop_columns]
+
+
+def estimate_chunk_rows(sources: List[str], columns: List[str], memory_budget_bytes: int, share: float = 0.25) -> int:
+    """첫 파일 일부를 읽어 행당 메모리를 추정하고, 예산의 share 비율 안에 들어가는 chunk 행 수를 반환합니다."""
+    sample = read_file(sources[0], columns=columns, nrows=1000)
+    bytes_per_row = max(1, sample.memory_usage(deep=True).sum() / max(len(sample), 1))
+    return max(1000, int(memory_budget_bytes * share / bytes_per_row))
+
+
+def estimate_transform_rows(num_features: int, memory_budget_bytes: int, share: float = 0.25) -> int:
+    """
+    변환 결과(dense float64 행렬과 memmap에 쓸 float32 사본)가 예산의 share 비율 안에 들어가는 행 수.
+    one-hot 등으로 피처 수가 원본 컬럼 수보다 훨씬 많아질 수 있으므로 원본 행 크기로 정한 chunk보다 작을 수 있다.
+    """
+    return max(1000, int(memory_budget_bytes * share / (max(num_features, 1) * (8 + 4))))
+
+
+def iter_chunks(sources: List[str], columns: List[str], chunk_rows: int) -> Iterator[pd.DataFrame]:
+    for source in sources:
+        yield from iter_file(source, columns=columns, chunk_rows=chunk_rows)
+
+
+@dataclass
+class StreamingStats:
+    """chunk를 한 번씩만 보면서 누적하는 전처리 통계와, bin 구성/파이프라인 학습용 균등 표본(reservoir sample)."""
+    num_rows: int = 0
+    count: Dict[str, int] = field(default_factory=dict)
+    sum: Dict[str, float] = field(default_factory=dict)
+    sumsq: Dict[str, float] = field(default_factory=dict)
+    min: Dict[str, float] = field(default_factory=dict)
+    max: Dict[str, float] = field(default_factory=dict)
+    vocab: Dict[str, pd.Series] = field(default_factory=dict)
+    sample: Optional[pd.DataFrame] = None
+
+    def update(self, chunk: pd.DataFrame, numeric_columns: List[str], categorical_columns: List[str]):
+        for column in numeric_columns:
+            values = chunk[column].dropna().astype(np.float64)
+            if values.empty:
+                continue
+            self.count[column] = self.count.get(column, 0) + len(values)
+            self.sum[column] = self.sum.get(column, 0.0) + float(values.sum())
+            self.sumsq[column] = self.sumsq.get(column, 0.0) + float((values ** 2).sum())
+            self.min[column] = min(self.min.get(column, np.inf), float(values.min()))
+            self.max[column] = max(self.max.get(column, -np.inf), float(values.max()))
+        for column in categorical_columns:
+            counts = chunk[column].value_counts()
+            self.vocab[column] = counts if column not in self.vocab else self.vocab[column].add(counts, fill_value=0)
+        self.num_rows += len(chunk)
+
+    def update_sample(self, chunk: pd.DataFrame, sample_rows: int, rng: np.random.Generator, offset: int):
+        # reservoir sampling: 지금까지 본 모든 행이 같은 확률로 표본에 남는다.
+        if self.sample is None:
+            self.sample = chunk.iloc[:0].copy()
+        if len(self.sample) < sample_rows:
+            take = sample_rows - len(self.sample)
+            self.sample = pd.concat([self.sample, chunk.iloc[:take]], ignore_index=True)
+            chunk, offset = chunk.iloc[take:], offset + take
+        if chunk.empty:
+            return
+        positions = rng.integers(0, offset + np.arange(1, len(chunk) + 1))
+        replace = positions < sample_rows
+        self.sample.iloc[positions[replace]] = chunk[replace].to_numpy()
+
+    def mean(self, column: str) -> float:
+        return self.sum[column] / self.count[column]
+
+    def var(self, column: str) -> float:
+        return max(0.0, self.sumsq[column] / self.count[column] - self.mean(column) ** 2)
+
+
+def collect_stats(
+    sources: List[str],
+    preprocess_config: Dict,
+    chunk_rows: int,
+    sample_rows: int,
+    seed: int = 42,
+) -> StreamingStats:
+    columns = used_columns(preprocess_config)
+    column_configs = preprocess_config.get("columns", {})
+    categorical_columns = [c for c in columns if column_configs[c].get("type") == "categorical"]
+    numeric_columns = [c for c in columns if c not in categorical_columns]
+
+    stats = StreamingStats()
+    rng = np.random.default_rng(seed)
+    for chunk in iter_chunks(sources, columns + [TARGET], chunk_rows):
+        chunk = chunk.dropna(subset=[TARGET])
+        offset = stats.num_rows
+        stats.update(chunk, numeric_columns + [TARGET], categorical_columns)
+        stats.update_sample(chunk, sample_rows, rng, offset)
+    logger.info(f"스트리밍 통계 수집 완료: {stats.num_rows}행, 표본 {len(stats.sample)}행")
+    return stats
+
+
+def fit_pipeline_from_stats(data_preprocess_pipeline: DataPreprocessPipeline, stats: StreamingStats) -> DataPreprocessPipeline:
+    """
+    표본으로 파이프라인 구조를 학습한 뒤, 전체 데이터에서 누적한 통계로 값을 덮어씁니다.
+    - 범주: 전체 vocab을 OneHotEncoder/OrdinalEncoder categories로 지정
+    - min/max: MinMaxScaler.partial_fit으로 전체 최소/최대까지 확장
+    - 평균/분산/최빈값: SimpleImputer, StandardScaler 값을 전체 통계로 교체 (median은 표본 기준 근사)
+    """
+    data_preprocess_pipeline.define_pipeline()
+    for _, pipeline, columns in data_preprocess_pipeline.pipeline.transformers:
+        column = columns[0]
+        for _, step in pipeline.steps:
+            if isinstance(step, (OneHotEncoder, OrdinalEncoder)) and column in stats.vocab:
+                step.set_params(categories=[np.sort(stats.vocab[column].index.to_numpy())])
+
+    data_preprocess_pipeline.fit(stats.sample)
+
+    for _, pipeline, columns in data_preprocess_pipeline.pipeline.transformers_:
+        if not hasattr(pipeline, "steps"):
+            continue
+        column = columns[0]
+        for _, step in pipeline.steps:
+            if isinstance(step, SimpleImputer):
+                if step.strategy == "mean" and column in stats.count:
+                    step.statistics_ = np.array([stats.mean(column)])
+                elif step.strategy == "most_frequent" and column in stats.vocab:
+                    step.statistics_ = np.array([stats.vocab[column].idxmax()], dtype=object)
+            elif isinstance(step, MinMaxScaler) and column in stats.min:
+                step.partial_fit(np.array([[stats.min[column]], [stats.max[column]]]))
+            elif isinstance(step, StandardScaler) and column in stats.count:
+                step.mean_ = np.array([stats.mean(column)])
+                step.var_ = np.array([stats.var(column)])
+                step.scale_ = np.array([np.sqrt(stats.var(column)) or 1.0])
+                step.n_samples_seen_ = stats.count[column]
+    data_preprocess_pipeline.build_artifact()
+    return data_preprocess_pipeline
+
+
+class MemmapSequence(lgb.Sequence):
+    """디스크의 memmap 행렬을 batch_size 단위로 LightGBM에 넘겨 전체 행렬을 메모리에 올리지 않는다."""
+
+    def __init__(self, x: np.ndarray, batch_size: int):
+        self.x = x
+        self.batch_size = batch_size
+
+    def __getitem__(self, index):
+        # 디스크에는 float32로 저장하고, LightGBM이 요구하는 float64로는 읽는 batch만 변환한다.
+        return np.asarray(self.x[index], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.x)
+
+
+@dataclass
+class StreamingDataset:
+    x_train: np.memmap
+    y_train: np.memmap
+    x_test: np.memmap
+    y_test: np.memmap
+    batch_rows: int
+    # 두 번째 스트리밍(변환)에서 읽은 chunk 행 수
+    transform_chunk_rows: int
+    # 테스트셋 행별 평가 구간 코드 (src.evaluation)
+    slice_codes: Dict[str, Tuple[Slice, np.memmap]] = field(default_factory=dict)
+
+    def lgb_datasets(self, params: Optional[Dict] = None) -> Tuple[lgb.Dataset, lgb.Dataset]:
+        # bin 경계는 bin_construct_sample_cnt개 표본 행만 임의 접근하여 정하고, 나머지는 batch 단위로 읽어 구간화한다.
+        train_set = lgb.Dataset(
+            MemmapSequence(self.x_train, self.batch_rows), label=np.asarray(self.y_train), params=dataset_params(params),
+            categorical_feature=categorical_feature(params),
+        )
+        valid_set = lgb.Dataset(
+            MemmapSequence(self.x_test, self.batch_rows), label=np.asarray(self.y_test), reference=train_set,
+            categorical_feature=categorical_feature(params),
+        )
+        return train_set, valid_set
+
+
+
+def write_transformed(
+    sources: List[str],
+    data_preprocess_pipeline: DataPreprocessPipeline,
+    stats: StreamingStats,
+    save_dir: str,
+    chunk_rows: int,
+    test_split_ratio: float,
+    memory_budget_bytes: int,
+    seed: int = 42,
+    slices: Optional[List[Slice]] = None,
+) -> StreamingDataset:
+    """
+    chunk마다 전처리한 결과를 학습/테스트 memmap(.npy)에 이어 씁니다.
+    학습/테스트 분할은 행마다 seed 기반 난수로 정하므로 같은 데이터/seed면 항상 같은 분할이 나옵니다.
+    slices가 있으면 테스트 행의 평가 구간 코드도 함께 저장한다. 범주 목록은 전체 통계(stats.vocab)로 고정하므로
+    전처리에 쓰는 컬럼의 구간만 저장한다.
+    chunk_rows는 원본 행 크기로 정한 값이므로, 변환 후 피처 수로 다시 계산한 행 수가 더 작으면 그 값으로 읽는다.
+    """
+    os.makedirs(save_dir, exist_ok=True)
+    columns = used_columns(data_preprocess_pipeline.config)
+    num_features = len(data_preprocess_pipeline.get_feature_names())
+    chunk_rows = min(chunk_rows, estimate_transform_rows(num_features, memory_budget_bytes))
+    rng = np.random.default_rng(seed)
+    is_test = rng.random(stats.num_rows) < test_split_ratio
+    num_test = int(is_test.sum())
+    num_train = stats.num_rows - num_test
+
+    def open_memmap(name, shape):
+        return np.lib.format.open_memmap(os.path.join(save_dir, f"{name}.npy"), mode="w+", dtype=np.float32, shape=shape)
+
+    x_train, y_train = open_memmap("x_train", (num_train, num_features)), open_memmap("y_train", (num_train,))
+    x_test, y_test = open_memmap("x_test", (num_test, num_features)), open_memmap("y_test", (num_test,))
+    slice_codes = {}
+    for s in slices or []:
+        if s.column not in columns or (s.bins is None and s.column not in stats.vocab):
+            continue
+        fitted = s if s.bins is not None else Slice(
+            name=s.name, column=s.column, categories=np.sort(stats.vocab[s.column].index.astype(str).unique()),
+        )
+        codes = np.lib.format.open_memmap(
+            os.path.join(save_dir, f"slice_{s.name}.npy"), mode="w+", dtype=np.int32, shape=(num_test,),
+        )
+        slice_codes[s.name] = (fitted, codes)
+
+    row, train_row, test_row = 0, 0, 0
+    for chunk in iter_chunks(sources, columns + [TARGET], chunk_rows):
+        chunk = chunk.dropna(subset=[TARGET])
+        x = data_preprocess_pipeline.transform(chunk.drop(columns=[TARGET]))
+        # memmap은 dense이므로 sparse_output이어도 chunk 단위로만 펼친다. (chunk 크기는 변환 후 피처 수 기준 예산 안)
+        x = np.asarray(x.toarray() if sp.issparse(x) else x, dtype=np.float32)
+        y = chunk[TARGET].to_numpy(dtype=np.float32)
+        test_mask = is_test[row:row + len(chunk)]
+        n_train, n_test = int((~test_mask).sum()), int(test_mask.sum())
+        x_train[train_row:train_row + n_train], y_train[train_row:train_row + n_train] = x[~test_mask], y[~test_mask]
+        x_test[test_row:test_row + n_test], y_test[test_row:test_row + n_test] = x[test_mask], y[test_mask]
+        for s, codes in slice_codes.values():
+            codes[test_row:test_row + n_test] = s.encode(chunk[s.column].to_numpy()[test_mask])
+        row, train_row, test_row = row + len(chunk), train_row + n_train, test_row + n_test
+
+    for array in [x_train, y_train, x_test, y_test, *(codes for _, codes in slice_codes.values())]:
+        array.flush()
+
+    # LightGBM이 한 번에 읽는 batch도 예산의 일부만 쓰도록 맞춘다.
+    batch_rows = max(1000, int(memory_budget_bytes * 0.1 / (num_features * 4)))
+    logger.info(f"전처리 결과 저장: 학습 {num_train}행, 테스트 {num_test}행, 피처 {num_features}개 ({save_dir})")
+    return StreamingDataset(
+        x_train=x_train, y_train=y_train, x_test=x_test, y_test=y_test, batch_rows=batch_rows,
+        transform_chunk_rows=chunk_rows, slice_codes=slice_codes,
+    )
+
+
+def prepare_streaming_dataset(
+    sources: List[str],
+    data_preprocess_pipeline: DataPreprocessPipeline,
+    save_dir: str,
+    test_split_ratio: float,
+    memory_budget_mb: int = 1024,
+    sample_rows: int = 200000,
+    seed: int = 42,
+    slices: Optional[List[Slice]] = None,
+) -> Tuple[StreamingDataset, StreamingStats, Dict]:
+    """
+    날짜별 CSV를 메모리에 모두 올리지 않고 두 번 스트리밍합니다.
+    1) 전처리 통계 누적 + 표본 추출 → 파이프라인 학습, 2) chunk 단위 변환 → memmap 저장.
+    """
+    started_at = time.perf_counter()
+    memory_budget_bytes = memory_budget_mb * 1024 ** 2
+    columns = used_columns(data_preprocess_pipeline.config)
+    chunk_rows = estimate_chunk_rows(sources, columns + [TARGET], memory_budget_bytes)
+
+    stats = collect_stats(sources, data_preprocess_pipeline.config, chunk_rows, sample_rows, seed=seed)
+    fit_pipeline_from_stats(data_preprocess_pipeline, stats)
+    dataset = write_transformed(
+        sources, data_preprocess_pipeline, stats, save_dir, chunk_rows, test_split_ratio, memory_budget_bytes,
+        seed=seed, slices=slices,
+    )
+    report = {
+        "num_rows": stats.num_rows,
+        "num_sources": len(sources),
+        "chunk_rows": chunk_rows,
+        "transform_chunk_rows": dataset.transform_chunk_rows,
+        "batch_rows": dataset.batch_rows,
+        "sample_rows": len(stats.sample),
+        "memory_budget_mb": memory_budget_mb,
+        "seconds": time.perf_counter() - started_at,
+    }
+    return dataset, stats, report
@@ -2,22 +2,61 @@ from datetime import datetime
 import os
 import mlflow
 from functools import wraps
+from dataclasses import asdict
 import json
+import scipy.sparse as sp
 
-from src.preprocess import split_train_test
-from src.model_trainer import Trainer
+from src.model_trainer import Trainer, Artifact
+from src.evaluation import save_evaluation
 from src.models.models import MODELS
 from src.preprocess import DataPreprocessPipeline
+from src.preprocess_artifact import matrix_nbytes
 from src.logger import setup_logger
 from src.experiment import ExperimentTracker
+from src.lookup_table import build_lookup_table
+from src.hpo import HyperparameterSearch
+from src.cache import PreprocessCache
+from src.lgb_dataset import build_or_load_datasets, with_categorical_feature
+from src.streaming import prepare_streaming_dataset
+from src.autotune import apply_host_profile
+from src.incremental import train_model_incremental
+from src.profiler import StageProfiler
+from src.record_store import read_sources
+from src.utils import dump_warmup_requests
 logger = setup_logger(__name__)
 
 DATE_FORMAT = "%Y-%m-%d"
 ARTIFACT_PATH = os.getenv("ARTIFACT_PATH", './data_storage/train_results')
 
-def train_model(cfg):
+def feature_report(data_preprocess_pipeline: DataPreprocessPipeline, x_train) -> dict:
+    """학습 행렬 크기와 native 범주 컬럼 (one-hot 대비 비교용). 희소 행렬은 저장된 값 기준 크기."""
+    feature_names = data_preprocess_pipeline.get_feature_names()
+    num_values = x_train.shape[0] * x_train.shape[1]
+    return {
+        "num_features": len(feature_names),
+        "categorical_features": [feature_names[i] for i in data_preprocess_pipeline.get_categorical_feature_indices()],
+        "sparse": bool(sp.issparse(x_train)),
+        "density": x_train.nnz / max(num_values, 1) if sp.issparse(x_train) else None,
+        "train_matrix_mb": matrix_nbytes(x_train) / 1024 ** 2,
+    }
+
+
+def train_model(cfg, profiler: StageProfiler = None):
+    """profiler를 넘기면(작업 워커가 데이터 로드 단계를 먼저 기록한 경우) 이어서 단계별 비용을 기록합니다."""
+    profiler = profiler or StageProfiler.from_config(cfg.get('profiling'))
+    # 이 호스트에서 측정한 스레드 수/히스토그램 구성 방식/max_bin (src.autotune)
+    apply_host_profile(cfg)
+    if cfg.get('retrain', {}).get('mode') == 'incremental':
+        return train_model_incremental(cfg, profiler=profiler)
+    if cfg['data'].get('streaming'):
+        return train_model_streaming(cfg, profiler=profiler)
+
     model_name = cfg['model']['name']
-    data = cfg['data']['dataframe']
+    data = cfg['data'].get('dataframe')
+    if data is None:
+        # 재학습 요청(src.retrain)은 API 요청 안에서 전체 기록을 읽지 않도록 파일 경로만 넘기므로 작업에서 읽는다.
+        with profiler.stage("data_load"):
+            data = read_sources(cfg['data']['source'])
     run_name = cfg['run_name']
     logger.info("학습 파이프라인을 시작합니다.")
     logger.info(f"config: {cfg}")
@@ -33,13 +72,41 @@ def train_model(cfg):
 
     logger.info(f"raw_data\n{data}")
 
-    # 데이터 분할 및 전처리
-    xy_train, xy_test = split_train_test(
-        raw_df=data,
-        test_split_ratio=0.2,
-        data_preprocess_pipeline=data_preprocess_pipeline
+    # 데이터 분할 및 전처리 (같은 데이터/전처리 설정이면 캐시 사용)
+    cache_cfg = cfg.get('preprocess_cache', {})
+    preprocess_cache = PreprocessCache(max_bytes=int(cache_cfg.get('max_size_mb', 2048) * 1024 ** 2))
+    with profiler.stage("split_train_test"):
+        xy_train, xy_test, cache_report = preprocess_cache.split_train_test(
+            raw_df=data,
+            test_split_ratio=0.2,
+            data_preprocess_pipeline=data_preprocess_pipeline,
+            sources=cfg['data']['source'],
+        )
+    # native 범주 컬럼(정수 코드)은 LightGBM categorical_feature로 학습한다.
+    cfg['model']['params'] = with_categorical_feature(
+        cfg['model']['params'], data_preprocess_pipeline.get_categorical_feature_indices()
     )
 
+    # 하이퍼파라미터 탐색 (탐색 후 최적 조합으로 아래에서 다시 학습)
+    search_cfg = {**cfg.get('hpo', {}), **cfg['model'].get('search', {})}
+    search_summary = None
+    if search_cfg.get('mode', 'none') != 'none':
+        search = HyperparameterSearch(
+            search_cfg=search_cfg,
+            base_params=cfg['model']['params'],
+            metric=cfg['model']['eval_metrics'],
+            save_dir=f"{save_dir}_hpo", # mlflow 모델 저장 경로(save_dir)는 비어 있어야 하므로 별도 경로 사용
+        )
+        with profiler.stage("hpo"):
+            search_result = search.run(xy_train.x, xy_train.y, dataset_dir=preprocess_cache.entry_dir(cache_report['key']))
+        search_summary = search_result.summary()
+        cfg['model']['params'].update(search_result.best_params)
+        if search_result.best_iteration:
+            # 탐색 검증셋에서 찾은 반복 수로 다시 학습한다. (아래 검증셋은 테스트셋이므로 early stopping에 쓰지 않는다)
+            cfg['model']['params']['num_iterations'] = search_result.best_iteration
+            cfg['model']['params'].pop('early_stopping_rounds', None)
+        logger.info(f"최적 파라미터로 다시 학습합니다: {search_result.best_params}, {search_result.best_iteration} rounds")
+
     # 모델 초기화
     _model = MODELS.get_model(name=cfg['model']['name'])
     model = _model.model()
@@ -51,8 +118,23 @@ def train_model(cfg):
 
     # 결과 저장 경로 설정
     
-    # 학습 및 평가
-    trainer = Trainer()
+    # 구간화된 lgb.Dataset을 전처리 캐시 옆에 binary로 저장해두고 재사용
+    with profiler.stage("lgb_dataset"):
+        train_set, valid_set, dataset_report = build_or_load_datasets(
+            save_dir=preprocess_cache.entry_dir(cache_report['key']),
+            name="train_test",
+            x_train=xy_train.x,
+            y_train=xy_train.y,
+            x_valid=xy_test.x,
+            y_valid=xy_test.y,
+            params=cfg['model']['params'],
+        )
+    
+    # 학습 및 평가 (lgb_fit, evaluate, dump 단계는 Trainer가 기록)
+    trainer = Trainer(evaluation_cfg=cfg.get('evaluation'), profiler=profiler)
+    # 구간별 평가(견종/성별/나이 구간)에 쓸 테스트셋 원본 컬럼. 전처리 결과와 같은 행 순서로 맞춘다.
+    slice_columns = [column for column in trainer.evaluator.slice_columns if column in data.columns]
+    slice_df = data.loc[xy_test.y.index, slice_columns] if data.index.is_unique else None
     evaluation, artifact = trainer.train_and_evaluate(
         model=model,
         x_train=xy_train.x,
@@ -62,8 +144,43 @@ def train_model(cfg):
         data_preprocess_pipeline=data_preprocess_pipeline,
         preprocess_pipeline_file_path=save_dir,
         save_file_path=save_dir,
+        datasets=(train_set, valid_set),
+        evaluate_train_set=cfg['model'].get('evaluate_train_set', True),
+        slice_df=slice_df,
     )
 
+    # K-fold 교차검증으로 지표의 신뢰구간 계산 (fold별 전처리 파이프라인을 새로 학습)
+    cv_cfg = cfg['model'].get('cv', {})
+    if cv_cfg.get('n_splits', 0) > 1:
+        with profiler.stage("cross_validation"):
+            evaluation.cross_validation = trainer.cross_validate(
+                raw_df=data,
+                model_name=cfg['model']['name'],
+                params=cfg['model']['params'],
+                eval_metrics=cfg['model']['eval_metrics'],
+                preprocess_config=cfg['preprocessing'],
+                n_splits=cv_cfg['n_splits'],
+                n_repeats=cv_cfg.get('n_repeats', 1),
+                cpu_budget=cv_cfg.get('cpu_budget'),
+                threads_per_fold=cv_cfg.get('threads_per_fold'),
+                validation_ratio=cv_cfg.get('validation_ratio', 0.2),
+            )
+
+    # 배포 시 대부분의 견적을 추론 없이 응답할 수 있도록 격자 예측 테이블 생성
+    with profiler.stage("lookup_table"):
+        lookup_table_report = build_lookup_table(
+            model=model,
+            data_preprocess_pipeline=data_preprocess_pipeline,
+            raw_df=data,
+            save_dir=save_dir,
+            request_features=cfg.get('lookup_table', {}).get('request_features'),
+        )
+
+    # 결과 저장 (slice_metrics.parquet, predictions.parquet)
+    with profiler.stage("save_results"):
+        save_evaluation(evaluation, save_dir)
+    profiler.save_capture(save_dir)
+
     tracker.log_experiment({
         # 실험 정보
         "experiment_name": cfg['name'],
@@ -83,21 +200,47 @@ def train_model(cfg):
         "feature_fraction": cfg['model']['params']['feature_fraction'],
         "max_depth": cfg['model']['params']['max_depth'],
         "num_iterations": cfg['model']['params']['num_iterations'],
-        "early_stopping_rounds": cfg['model']['params']['early_stopping_rounds'],
+        # 탐색 후 다시 학습할 때는 early stopping 없이 탐색에서 찾은 반복 수로 학습한다. (None)
+        "early_stopping_rounds": cfg['model']['params'].get('early_stopping_rounds'),
         
         # 전처리 설정
         "preprocessing_columns": str(list(cfg['preprocessing']['columns'].keys())),
-        "drop_columns": str(cfg['preprocessing']['drop_columns'])
+        "drop_columns": str(cfg['preprocessing']['drop_columns']),
+        
+        # 재학습(전체/증분)에서 같은 설정을 다시 쓰기 위한 원본 설정
+        "model_params": cfg['model']['params'],
+        "preprocessing": cfg['preprocessing'],
+        "features": feature_report(data_preprocess_pipeline, xy_train.x),
+        
+        # 예측 테이블
+        "lookup_table": lookup_table_report,
+        
+        # 하이퍼파라미터 탐색
+        "hpo": search_summary,
+        
+        # 전처리 캐시
+        "preprocess_cache": cache_report,
+        "lgb_dataset": dataset_report,
+        "evaluate_train_set": cfg['model'].get('evaluate_train_set', True),
+        
+        # 교차검증
+        "cross_validation": asdict(evaluation.cross_validation) if evaluation.cross_validation else None,
+        
+        # 단계별 학습 비용 (src.profiler)
+        "profile": profiler.report(),
     })
 
     tracker.log_metric("mean_absolute_error", evaluation.mean_absolute_error)
     tracker.log_metric("mean_absolute_percentage_error", evaluation.mean_absolute_percentage_error)
     tracker.log_metric("root_mean_squared_error", evaluation.root_mean_squared_error)
 
-    tracker.save_metric()
+    if evaluation.cross_validation is not None:
+        for metric, summary in evaluation.cross_validation.metrics.items():
+            tracker.log_metric(f"cv_{metric}", summary.mean)
+            tracker.log_metric(f"cv_{metric}_ci_low", summary.ci_low)
+            tracker.log_metric(f"cv_{metric}_ci_high", summary.ci_high)
 
-    # 결과 저장
-    evaluation.eval_df.to_csv(os.path.join(save_dir, "eval_df.csv"))
+    tracker.save_metric()
     
     logger.info(f"학습 완료. 결과가 {save_dir}에 저장되었습니다.")
     logger.info(f"평가 지표:")
@@ -105,4 +248,120 @@ def train_model(cfg):
     logger.info(f"- MAPE: {evaluation.mean_absolute_percentage_error:.2f}%")
     logger.info(f"- RMSE: {evaluation.root_mean_squared_error:.2f}")
 
-    return evaluation, artifact
\ No newline at end of file
+    return evaluation, artifact
+
+
+def train_model_streaming(cfg, profiler: StageProfiler = None):
+    """
+    선택한 날짜별 CSV를 메모리에 모두 올리지 않고 학습합니다.
+    전처리 통계는 chunk 단위로 누적하고, 변환 결과는 디스크(memmap)에 쓴 뒤 LightGBM에 batch 단위로 넘긴다.
+    최대 메모리는 config의 streaming.memory_budget_mb 안에서 chunk/batch 크기를 정하는 방식으로 제한한다.
+    """
+    model_name = cfg['model']['name']
+    run_name = cfg['run_name']
+    streaming_cfg = cfg.get('streaming', {})
+    logger.info("스트리밍 학습 파이프라인을 시작합니다.")
+    logger.info(f"config: {cfg}")
+
+    experiment_name = f"{model_name}_{run_name}"
+    save_dir = os.path.join(ARTIFACT_PATH, experiment_name)
+    tracker = ExperimentTracker(save_dir=save_dir)
+
+    data_preprocess_pipeline = DataPreprocessPipeline(cfg['preprocessing'])
+    params = cfg['model']['params']
+    if streaming_cfg.get('bin_sample_rows'):
+        params.setdefault('bin_construct_sample_cnt', streaming_cfg['bin_sample_rows'])
+
+    profiler = profiler or StageProfiler.from_config(cfg.get('profiling'))
+    trainer = Trainer(evaluation_cfg=cfg.get('evaluation'), profiler=profiler)
+    # mlflow 모델 저장 경로(save_dir)는 비어 있어야 하므로 전처리 결과는 별도 경로에 둔다.
+    with profiler.stage("prepare_streaming"):
+        dataset, stats, streaming_report = prepare_streaming_dataset(
+            sources=cfg['data']['source'],
+            data_preprocess_pipeline=data_preprocess_pipeline,
+            save_dir=f"{save_dir}_streaming",
+            test_split_ratio=cfg['data']['details']['test_split_ratio'],
+            memory_budget_mb=streaming_cfg.get('memory_budget_mb', 1024),
+            sample_rows=streaming_cfg.get('sample_rows', 200000),
+            slices=trainer.evaluator.slices,
+        )
+    params = cfg['model']['params'] = with_categorical_feature(params, data_preprocess_pipeline.get_categorical_feature_indices())
+    train_set, valid_set = dataset.lgb_datasets(params)
+
+    _model = MODELS.get_model(name=model_name)
+    model = _model.model()
+    model.reset_model(params=params)
+    model.set_eval_metrics(eval_metrics=cfg['model']['eval_metrics'])
+
+    # lgb.Sequence에서 bin을 구성하는 시간도 lgb_fit에 포함된다.
+    with profiler.stage("lgb_fit"):
+        trainer.train(
+            model=model,
+            x_train=None,
+            y_train=None,
+            x_test=None,
+            y_test=None,
+            datasets=(train_set, valid_set),
+            evaluate_train_set=cfg['model'].get('evaluate_train_set', True),
+        )
+    # 테스트셋도 memmap에서 chunk 단위로 예측하며 지표를 누적한다.
+    with profiler.stage("evaluate"):
+        evaluation = trainer.evaluate(model=model, x=dataset.x_test, y=dataset.y_test, slice_codes=dataset.slice_codes)
+
+    artifact = Artifact()
+    with profiler.stage("dump"):
+        artifact.preprocessed_file_path = data_preprocess_pipeline.dump_pipeline(file_path=save_dir)
+        model.save(save_dir)
+        artifact.model_file_path = save_dir
+        artifact.warmup_requests_file_path = dump_warmup_requests(dataset.x_test, save_dir)
+
+    # 격자 축(범주/구간)은 전체 데이터의 균등 표본으로 정한다.
+    with profiler.stage("lookup_table"):
+        lookup_table_report = build_lookup_table(
+            model=model,
+            data_preprocess_pipeline=data_preprocess_pipeline,
+            raw_df=stats.sample,
+            save_dir=save_dir,
+            request_features=cfg.get('lookup_table', {}).get('request_features'),
+        )
+
+    with profiler.stage("save_results"):
+        save_evaluation(evaluation, save_dir)
+    profiler.save_capture(save_dir)
+
+    tracker.log_experiment({
+        "experiment_name": cfg['name'],
+        "run_name": cfg['run_name'],
+        "data_source": str(cfg['data']['source']),
+        "date_from": cfg['data']['details']['date_from'],
+        "date_to": cfg['data']['details']['date_to'],
+        "test_split_ratio": cfg['data']['details']['test_split_ratio'],
+        "model_name": model_name,
+        "eval_metrics": cfg['model']['eval_metrics'],
+        "num_leaves": params['num_leaves'],
+        "learning_rate": params['learning_rate'],
+        "feature_fraction": params['feature_fraction'],
+        "max_depth": params['max_depth'],
+        "num_iterations": params['num_iterations'],
+        "early_stopping_rounds": params.get('early_stopping_rounds'),
+        "preprocessing_columns": str(list(cfg['preprocessing']['columns'].keys())),
+        "drop_columns": str(cfg['preprocessing']['drop_columns']),
+        "model_params": params,
+        "preprocessing": cfg['preprocessing'],
+        "lookup_table": lookup_table_report,
+        "streaming": streaming_report,
+        "features": feature_report(data_preprocess_pipeline, dataset.x_train),
+        "evaluate_train_set": cfg['model'].get('evaluate_train_set', True),
+        "profile": profiler.report(),
+    })
+    tracker.log_metric("mean_absolute_error", evaluation.mean_absolute_error)
+    tracker.log_metric("mean_absolute_percentage_error", evaluation.mean_absolute_percentage_error)
+    tracker.log_metric("root_mean_squared_error", evaluation.root_mean_squared_error)
+    tracker.save_metric()
+
+    logger.info(f"스트리밍 학습 완료. 결과가 {save_dir}에 저장되었습니다.")
+    logger.info(f"- MAE: {evaluation.mean_absolute_error:.2f}")
+    logger.info(f"- MAPE: {evaluation.mean_absolute_percentage_error:.2f}%")
+    logger.info(f"- RMSE: {evaluation.root_mean_squared_error:.2f}")
+
+    return evaluation, artifact
@@ -1,5 +1,9 @@
+import json
+import os
+
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
 
 from mlserver.rest.responses import Response
 
@@ -14,17 +18,40 @@ def preprocess_request_input(breeds_categories_used_in_train: list, data_preproc
         
         return x
     
-def convert_prediction_input(x: np.array):
+def convert_prediction_input(x):
+    """V2 추론 요청. 희소 행렬은 펼치지 않고 CSR 구성 배열(data/indices/indptr)을 텐서 세 개로 보낸다. (mlserver/runtime.py)"""
+    if sp.issparse(x):
+        x = sp.csr_matrix(x)
+        return {
+            "parameters": {"sparse_format": "csr", "sparse_shape": list(x.shape)},
+            "inputs": [
+                {"name": "pet_info.data", "shape": [x.nnz], "datatype": "FP32", "data": x.data.tolist()},
+                {"name": "pet_info.indices", "shape": [x.nnz], "datatype": "INT32", "data": x.indices.tolist()},
+                {"name": "pet_info.indptr", "shape": [len(x.indptr)], "datatype": "INT32", "data": x.indptr.tolist()},
+            ]
+        }
     return {
         "inputs": [
             {
                 "name": "pet_info",
-                "shape": x.shape,
+                "shape": list(x.shape),
                 "datatype": "FP32",
-                "data": x.toarray().tolist()
+                "data": np.asarray(x).tolist()
             }
         ]
     }
+
+def dump_warmup_requests(x, save_dir: str, num_samples: int = 20) -> str:
+    """MLServer warm-up에 사용할 V2 추론 요청 샘플을 모델 디렉토리에 저장합니다. (백엔드가 보내는 것과 같은 형식)"""
+    rows = x[:num_samples]
+    if not sp.issparse(rows):
+        rows = np.asarray(rows, dtype=np.float32)
+
+    file_path = os.path.join(save_dir, "warmup_requests.jsonl")
+    with open(file_path, "w") as f:
+        for i in range(rows.shape[0]):
+            f.write(json.dumps(convert_prediction_input(rows[i:i + 1])) + "\n")
+    return file_path
     
 def postprocess_output(input: PetInfo, prediction_response: Response) -> PetPredictResult:
     predicted_claim_price = [res['data'][0] for res in prediction_response.json()['outputs']][0] # batch or parallel model deployment will be different.
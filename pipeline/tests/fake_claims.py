@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from src.models.light_gbm_regression import LightGBMRegressionModelServing
+
+BREEDS = ["말티즈", "푸들", "진돗개", "시바견"]
+
+# 범주는 one-hot, 수치는 그대로 쓰는 전처리 설정 (config.yml의 preprocessing과 같은 형식)
+PREPROCESSING = {
+    "columns": {
+        "breed": {"type": "categorical", "handling": "one_hot", "missing_value": "mode"},
+        "gender": {"type": "categorical", "handling": "one_hot", "missing_value": "mode"},
+        "neutralized": {"type": "categorical", "handling": "one_hot", "missing_value": "mode"},
+        "age": {"type": "numeric"},
+        "weight": {"type": "numeric"},
+    },
+    "drop_columns": [],
+}
+
+
+def make_claims(num_rows: int = 400, seed: int = 0, issued_at: str = "2024-01-01", first_id: int = 0) -> pd.DataFrame:
+    """
+    테스트용 보험 청구 기록. 청구 금액은 견종, 나이, 체중으로 정해진다.
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "claim_id": np.arange(first_id, first_id + num_rows),
+        "breed": rng.choice(BREEDS, num_rows),
+        "gender": rng.choice(["남자", "여자"], num_rows),
+        "neutralized": rng.choice(["y", "n"], num_rows),
+        "age": rng.integers(0, 15, num_rows),
+        "weight": rng.uniform(1.0, 30.0, num_rows).round(1),
+        "issued_at": issued_at,
+    })
+    breed_price = df["breed"].map(dict(zip(BREEDS, [10000, 20000, 30000, 40000])))
+    df["price"] = (breed_price + df["age"] * 3000 + df["weight"] * 500 + rng.normal(0, 1000, num_rows)).astype(int)
+    return df
+
+
+def model_params(**overrides) -> dict:
+    # 서빙 모델 기본 파라미터에서 반복 수만 줄여 테스트가 빨리 끝나게 한다.
+    return {
+        **LightGBMRegressionModelServing().params,
+        "num_iterations": 200, "early_stopping_rounds": 20, "num_threads": 1,
+        **overrides,
+    }
@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.cache import PreprocessCache, _dir_size
+from src.preprocess import DataPreprocessPipeline
+from tests.fake_claims import PREPROCESSING, make_claims
+
+
+def pipeline(config=PREPROCESSING) -> DataPreprocessPipeline:
+    data_preprocess_pipeline = DataPreprocessPipeline(config)
+    data_preprocess_pipeline.define_pipeline()
+    return data_preprocess_pipeline
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PreprocessCache(cache_dir=str(tmp_path / "preprocess_cache"))
+
+
+def test_key_changes_with_data_split_and_preprocessing(cache):
+    df = make_claims(100)
+    key, _ = cache.make_key(df, PREPROCESSING, 0.2, 42)
+
+    assert cache.make_key(df.copy(), PREPROCESSING, 0.2, 42)[0] == key
+    changed = df.copy()
+    changed.loc[0, "weight"] += 1
+    assert cache.make_key(changed, PREPROCESSING, 0.2, 42)[0] != key
+    # 행 순서도 분할 결과를 바꾸므로 키에 들어간다.
+    assert cache.make_key(df.iloc[::-1], PREPROCESSING, 0.2, 42)[0] != key
+    assert cache.make_key(df, PREPROCESSING, 0.3, 42)[0] != key
+    assert cache.make_key(df, PREPROCESSING, 0.2, 0)[0] != key
+    without_weight = {**PREPROCESSING, "drop_columns": ["weight"]}
+    assert cache.make_key(df, without_weight, 0.2, 42)[0] != key
+
+
+def test_second_split_loads_same_arrays_from_cache(cache):
+    df = make_claims(200)
+
+    xy_train, xy_test, report = cache.split_train_test(df, 0.2, pipeline())
+    cached_train, cached_test, cached_report = cache.split_train_test(df, 0.2, pipeline())
+
+    assert not report["hit"] and cached_report["hit"]
+    assert cached_report["key"] == report["key"]
+    np.testing.assert_array_equal(np.asarray(cached_train.x), np.asarray(xy_train.x))
+    np.testing.assert_array_equal(cached_test.y.to_numpy(), xy_test.y.to_numpy())
+    assert cached_test.y.index.tolist() == xy_test.y.index.tolist()
+
+
+def test_evicts_least_recently_used_entries(cache):
+    keys = []
+    for i in range(3):
+        _, _, report = cache.split_train_test(make_claims(200, seed=i), 0.2, pipeline())
+        keys.append(report["key"])
+        # 디렉토리 수정 시각으로 LRU 순서를 정하므로 항목마다 다른 시각을 둔다.
+        os.utime(cache.entry_dir(report["key"]), (1000 + i, 1000 + i))
+    entry_size = max(_dir_size(cache.entry_dir(key)) for key in keys)
+
+    # 가장 오래된 항목을 다시 사용하면 가장 최근 항목이 된다.
+    cache.split_train_test(make_claims(200, seed=0), 0.2, pipeline())
+    assert cache.latest_key() == keys[0]
+
+    # 두 항목만 들어가는 크기로 줄이면 사용한 지 오래된 순서(keys[1], keys[2])로 지운다.
+    cache.max_bytes = entry_size * 2
+    assert cache.evict() == [keys[1]]
+    assert sorted(os.path.basename(entry) for entry in cache._entries()) == sorted([keys[0], keys[2]])
+
+    # 방금 저장한 항목(keep)은 한도보다 커도 지우지 않는다.
+    cache.max_bytes = 0
+    assert cache.evict(keep=cache.entry_dir(keys[0])) == [keys[2]]
+    assert cache.latest_key() == keys[0]
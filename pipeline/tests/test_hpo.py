@@ -0,0 +1,110 @@
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.hpo import HyperparameterSearch, _median_pruning_callback
+
+BASE_PARAMS = {"objective": "regression", "num_leaves": 7, "learning_rate": 0.1, "seed": 1234, "early_stopping_rounds": 200}
+
+
+def make_xy(num_rows: int = 800, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=(num_rows, 4))
+    y = 3 * x[:, 0] - 2 * x[:, 1] + x[:, 2] * x[:, 3] + rng.normal(0, 0.1, num_rows)
+    return x, y
+
+
+def search(tmp_path, **search_cfg) -> HyperparameterSearch:
+    search_cfg = {"cpu_budget": 2, "threads_per_trial": 1, "max_boost_round": 300, "early_stopping_rounds": 10, **search_cfg}
+    return HyperparameterSearch(search_cfg, BASE_PARAMS, metric="rmse", save_dir=str(tmp_path / "hpo"))
+
+
+def test_grid_search_picks_lowest_validation_score(tmp_path):
+    x, y = make_xy()
+    result = search(
+        tmp_path, mode="grid", prune_min_trials=100,
+        search_space={"learning_rate": {"type": "float", "values": [0.001, 0.1]}, "num_leaves": {"type": "int", "values": [3, 15]}},
+    ).run(x, y)
+
+    assert len(result.trials) == 4
+    best = min(result.trials, key=lambda t: t.score)
+    assert result.best_score == best.score
+    assert result.best_params == best.params
+    assert result.best_params["learning_rate"] == 0.1
+    # 기록한 trial 결과도 같은 순위를 가진다.
+    trials = pd.read_csv(tmp_path / "hpo" / "trials.csv")
+    assert trials.loc[trials["score"].idxmin(), "trial_id"] == best.trial_id
+
+
+def test_best_iteration_comes_from_early_stopping_of_best_trial(tmp_path):
+    x, y = make_xy()
+    result = search(
+        tmp_path, mode="grid", prune_min_trials=100, max_boost_round=2000,
+        search_space={"learning_rate": {"type": "float", "values": [0.3]}},
+    ).run(x, y)
+
+    best = result.trials[0]
+    # 검증 점수가 더 좋아지지 않아 max_boost_round 전에 멈추고, 그 반복 수를 다시 학습에 쓴다.
+    assert best.best_iteration < 2000
+    assert result.best_iteration == best.best_iteration
+    assert result.summary()["best_iteration"] == best.best_iteration
+
+
+def test_trial_worse_than_median_is_pruned(tmp_path):
+    x, y = make_xy()
+    # 워커 1개로 순서대로 실행하여, 먼저 끝난 좋은 trial의 점수와 비교한다.
+    result = search(
+        tmp_path, mode="grid", cpu_budget=1, prune_interval=10, prune_min_trials=1,
+        search_space={"learning_rate": {"type": "float", "values": [0.1, 0.0001]}},
+    ).run(x, y)
+
+    statuses = {t.params["learning_rate"]: t.status for t in result.trials}
+    assert statuses == {0.1: "completed", 0.0001: "pruned"}
+    assert result.best_params["learning_rate"] == 0.1
+
+
+def test_pruning_callback_stops_only_below_median():
+    shared_scores = {10: [1.0, 2.0, 3.0]}
+
+    class Lock:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+    def env(score):
+        return lgb.callback.CallbackEnv(
+            model=None, params={}, iteration=9, begin_iteration=0, end_iteration=100,
+            evaluation_result_list=[("valid", "rmse", score, False)],
+        )
+
+    state = {"pruned": False}
+    callback = _median_pruning_callback(shared_scores, Lock(), interval=10, min_trials=3, state=state)
+    callback(env(1.5))
+    assert not state["pruned"]
+    with pytest.raises(lgb.callback.EarlyStopException):
+        callback(env(2.5))
+    assert state["pruned"]
+    assert shared_scores[10] == [1.0, 2.0, 3.0, 1.5, 2.5]
+
+
+def test_successive_halving_keeps_top_trials_with_more_rounds(tmp_path):
+    x, y = make_xy()
+    result = search(
+        tmp_path, mode="successive_halving", num_trials=9, eta=3, max_boost_round=270, prune_interval=10,
+        early_stopping_rounds=1000, seed=7,
+        search_space={"learning_rate": {"type": "log_float", "low": 0.001, "high": 0.3}},
+    ).run(x, y)
+
+    rungs = {}
+    for trial in result.trials:
+        rungs.setdefault(trial.rung, []).append(trial)
+    assert [len(rungs[rung]) for rung in sorted(rungs)] == [9, 3, 1]
+    assert [rungs[rung][0].num_boost_round for rung in sorted(rungs)] == [30, 90, 270]
+    # 다음 rung에는 이전 rung 점수 상위 1/eta만 올라간다.
+    for rung in (1, 2):
+        previous = sorted(rungs[rung - 1], key=lambda t: t.score)
+        assert {t.trial_id for t in rungs[rung]} == {t.trial_id for t in previous[:len(rungs[rung])]}
+    assert result.best_params == rungs[2][0].params
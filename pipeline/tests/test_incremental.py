@@ -0,0 +1,59 @@
+import pytest
+
+from src.incremental import sample_records, split_incremental_data
+from src.record_store import RecordStore
+from tests.fake_claims import make_claims
+
+OLD_DATES = ["2024-01-01", "2024-01-02"]
+NEW_DATES = ["2024-01-03", "2024-01-04"]
+ROWS_PER_DATE = 100
+
+
+@pytest.fixture
+def record_store(tmp_path):
+    # 날짜별 파티션마다 claim_id가 겹치지 않게 기록한다. (0~199: 배포 모델 학습 기간, 200~399: 새 데이터)
+    record_store = RecordStore(str(tmp_path / "records"))
+    for i, date in enumerate(OLD_DATES + NEW_DATES):
+        record_store.write(make_claims(ROWS_PER_DATE, seed=i, issued_at=date, first_id=i * ROWS_PER_DATE), date)
+    return record_store
+
+
+def test_sample_records_draws_without_replacement_across_partitions(record_store):
+    sources = record_store.sources()
+
+    sample = sample_records(sources, 150, seed=1)
+
+    assert len(sample) == 150
+    assert sample["claim_id"].is_unique
+    assert sample["issued_at"].nunique() > 1
+    # 같은 seed면 같은 표본을 뽑는다.
+    assert sample["claim_id"].tolist() == sample_records(sources, 150, seed=1)["claim_id"].tolist()
+    # 전체 행보다 많이 요청하면 전체 행을 반환한다.
+    assert sorted(sample_records(sources, 1000)["claim_id"]) == list(range(len(sources) * ROWS_PER_DATE))
+    assert sample_records([], 10).empty
+
+
+def test_split_incremental_data_keeps_holdout_and_validation_in_new_data(record_store):
+    train_df, valid, holdout, report = split_incremental_data(
+        record_store, base_date_to=OLD_DATES[-1], replay_ratio=0.5, holdout_ratio=0.25, validation_ratio=0.2, seed=0,
+    )
+
+    new_ids = set(range(len(OLD_DATES) * ROWS_PER_DATE, (len(OLD_DATES) + len(NEW_DATES)) * ROWS_PER_DATE))
+    # 검증셋과 holdout은 배포 모델이 본 적 없는 새 데이터에서만 떼어내고, 서로/학습셋과 겹치지 않는다.
+    assert set(valid["claim_id"]) <= new_ids
+    assert set(holdout["claim_id"]) <= new_ids
+    assert not set(valid["claim_id"]) & set(holdout["claim_id"])
+    assert not set(train_df["claim_id"]) & (set(valid["claim_id"]) | set(holdout["claim_id"]))
+
+    new_train_rows = report["new_rows"] - report["holdout_rows"] - report["valid_rows"]
+    replay = train_df[~train_df["claim_id"].isin(new_ids)]
+    assert len(replay) == report["replay_rows"] == int(new_train_rows * 0.5)
+    assert report == {
+        "date_from": NEW_DATES[0],
+        "date_to": NEW_DATES[-1],
+        "new_rows": len(NEW_DATES) * ROWS_PER_DATE,
+        "replay_rows": len(replay),
+        "train_rows": len(train_df),
+        "valid_rows": len(valid),
+        "holdout_rows": len(holdout),
+    }
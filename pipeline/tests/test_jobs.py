@@ -0,0 +1,85 @@
+import logging
+import os
+
+import pytest
+
+from src.jobs import QUEUED, RUNNING, JobQueue, _JobLogHandler, limit_cpu
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs"))
+    queue.heartbeat(os.getpid(), cpu_slots=4, max_jobs=2)
+    return queue
+
+
+def submit(queue: JobQueue, run_name: str, cpu_slots: int, created_at: str) -> str:
+    # created_at은 초 단위이므로 순서를 정해 두지 않으면 같은 초에 등록한 작업의 순서가 정해지지 않는다.
+    job_id = queue.submit({"run_name": run_name}, cpu_slots=cpu_slots)
+    queue.update(job_id, created_at=created_at)
+    return job_id
+
+
+def test_claim_takes_oldest_job_that_fits_free_slots(queue):
+    large = submit(queue, "large", cpu_slots=3, created_at="2024-01-01T00:00:00")
+    small = submit(queue, "small", cpu_slots=1, created_at="2024-01-01T00:00:01")
+
+    # 남은 슬롯이 2개면 먼저 등록된 3슬롯 작업을 건너뛰고 1슬롯 작업을 가져간다.
+    job = queue.claim(free_slots=2, total_slots=4)
+    assert job.id == small
+    assert job.status == RUNNING
+    assert queue.get(large).status == QUEUED
+
+    assert queue.claim(free_slots=1, total_slots=4) is None
+    assert queue.claim(free_slots=3, total_slots=4).id == large
+
+
+def test_oversized_jobs_are_clamped_to_worker_slots(queue):
+    # 등록 시 살아 있는 워커의 슬롯 수로 줄인다.
+    job_id = submit(queue, "oversized", cpu_slots=16, created_at="2024-01-01T00:00:00")
+    assert queue.get(job_id).cpu_slots == 4
+
+    # 더 작은 워커가 가져가면 그 워커의 전체 슬롯으로 다시 줄인다.
+    job = queue.claim(free_slots=2, total_slots=2)
+    assert job.id == job_id
+    assert job.cpu_slots == 2
+
+
+def test_submit_rejects_duplicated_run_name(queue):
+    job_id = submit(queue, "run", cpu_slots=1, created_at="2024-01-01T00:00:00")
+
+    with pytest.raises(ValueError):
+        queue.submit({"run_name": "run"}, cpu_slots=1)
+    assert [job.id for job in queue.list()] == [job_id]
+    # 거절된 작업의 디렉토리(저장한 설정)는 남기지 않는다.
+    assert [name for name in os.listdir(queue.jobs_dir) if os.path.isdir(os.path.join(queue.jobs_dir, name))] == [job_id]
+
+    # 취소된 작업과 같은 이름은 다시 등록할 수 있다.
+    queue.cancel(job_id)
+    assert queue.submit({"run_name": "run"}, cpu_slots=1) != job_id
+
+
+def test_limit_cpu_keeps_smaller_settings():
+    config = {
+        "model": {"params": {"num_threads": 2}, "search": {"cpu_budget": 8}},
+        "hpo": {"cpu_budget": None},
+    }
+
+    limit_cpu(config, cpu_slots=4)
+
+    assert config["model"]["params"]["num_threads"] == 2
+    assert config["model"]["search"]["cpu_budget"] == 4
+    assert config["hpo"]["cpu_budget"] == 4
+    # 0(LightGBM 기본값: 모든 코어)은 슬롯 수로 바꾼다.
+    assert limit_cpu({"model": {"params": {"num_threads": 0}}}, cpu_slots=4)["model"]["params"]["num_threads"] == 4
+
+
+def test_progress_follows_model_logger(queue):
+    job_id = submit(queue, "run", cpu_slots=1, created_at="2024-01-01T00:00:00")
+    handler = _JobLogHandler(queue, job_id, interval=0)
+
+    handler.emit(logging.LogRecord("light_gbm_regression", logging.INFO, __file__, 0, "모델 학습을 시작합니다.", None, None))
+
+    job = queue.get(job_id)
+    assert job.progress == 0.6
+    assert job.message == "모델 학습을 시작합니다."
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from src.model_trainer import summarize_folds
+
+VALUES = [100.0, 110.0, 90.0, 105.0, 95.0]
+
+
+def test_summarize_folds_uses_corrected_t_interval():
+    # 5-fold에서 fold마다 test/train = 1/4
+    summary = summarize_folds(VALUES, test_train_ratio=0.25)
+
+    std = np.std(VALUES, ddof=1)
+    half_width = stats.t.ppf(0.975, 4) * std * np.sqrt(1 / 5 + 0.25)
+    assert summary.mean == pytest.approx(100.0)
+    assert summary.std == pytest.approx(std)
+    assert (summary.ci_low, summary.ci_high) == pytest.approx((100.0 - half_width, 100.0 + half_width))
+    assert summary.values == VALUES
+
+    # fold 간 학습 데이터가 겹치는 만큼 독립 표본을 가정한 구간보다 넓다.
+    naive_half_width = stats.t.ppf(0.975, 4) * std / np.sqrt(5)
+    assert summary.ci_high - summary.mean > naive_half_width
+    # 신뢰수준을 낮추면 구간이 좁아진다.
+    assert summarize_folds(VALUES, 0.25, confidence=0.8).ci_high < summary.ci_high
+
+
+def test_summarize_single_fold_has_no_interval():
+    summary = summarize_folds([42.0], test_train_ratio=0.25)
+
+    assert (summary.mean, summary.std, summary.ci_low, summary.ci_high) == (42.0, 0.0, 42.0, 42.0)
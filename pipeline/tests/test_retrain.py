@@ -0,0 +1,51 @@
+import json
+import os
+
+import yaml
+
+import src.retrain
+from src.incremental import record_deployment
+from src.record_store import RecordStore
+from src.train import train_model
+from tests.fake_claims import PREPROCESSING, make_claims, model_params
+
+DATES = ["2024-01-01", "2024-01-02"]
+
+
+def test_full_retrain_reads_records_in_job(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    artifact_path = str(tmp_path / "train_results")
+    monkeypatch.setattr(src.retrain, "ARTIFACT_PATH", artifact_path)
+    monkeypatch.setattr("src.train.ARTIFACT_PATH", artifact_path)
+    monkeypatch.setattr(src.retrain, "CONFIG_PATH", str(tmp_path / "config.yml"))
+    with open(tmp_path / "config.yml", "w", encoding="utf-8") as f:
+        yaml.safe_dump({"data_dir": str(tmp_path / "records"), "profiling": {"enabled": False}}, f)
+
+    record_store = RecordStore(str(tmp_path / "records"))
+    for i, date in enumerate(DATES):
+        record_store.write(make_claims(200, seed=i, issued_at=date, first_id=i * 200), date)
+
+    model_dir = os.path.join(artifact_path, "deployed_model")
+    os.makedirs(model_dir)
+    with open(os.path.join(model_dir, "metadata.json"), "w") as f:
+        json.dump({
+            "model_name": "light_gbm_regression_serving",
+            "eval_metrics": "rmse",
+            "model_params": model_params(),
+            "preprocessing": PREPROCESSING,
+        }, f)
+    record_deployment(artifact_path, "deployed_model")
+
+    # 스케줄러는 배포 모델이 바뀐 것을 보고 drift 비교 기준을 바꾼다.
+    assert src.retrain.deployment()["model_name"] == "deployed_model"
+
+    config = src.retrain.build_retrain_config("full", reason="drift")
+
+    # 재학습 요청은 기록을 읽지 않고 파일 경로만 작업 설정에 담는다.
+    assert config["data"]["dataframe"] is None
+    assert config["data"]["source"] == record_store.sources()
+
+    evaluation, artifact = train_model(config)
+
+    assert evaluation.root_mean_squared_error > 0
+    assert os.path.exists(artifact.model_file_path)
@@ -0,0 +1,59 @@
+import copy
+import json
+
+import pytest
+
+from src.train import train_model
+from tests.fake_claims import PREPROCESSING, make_claims, model_params
+
+SEARCH = {
+    "mode": "grid",
+    "search_space": {"num_leaves": {"type": "int", "values": [3, 15]}},
+    "max_boost_round": 300,
+    "early_stopping_rounds": 10,
+    "cpu_budget": 2,
+    "threads_per_trial": 1,
+}
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    # 학습 결과, 전처리 캐시 경로가 현재 디렉토리 기준(./data_storage)이므로 임시 디렉토리에서 실행한다.
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("src.train.ARTIFACT_PATH", str(tmp_path / "train_results"))
+    return {
+        "name": "petcare_cost_prediction",
+        "run_name": "hpo",
+        "data": {
+            "dataframe": make_claims(),
+            "source": ["2024-01-01"],
+            "details": {"date_from": "2024-01-01", "date_to": "2024-01-01", "test_split_ratio": 0.2},
+        },
+        "model": {
+            "name": "light_gbm_regression_serving",
+            "params": model_params(),
+            "eval_metrics": "rmse",
+            "search": copy.deepcopy(SEARCH),
+            "evaluate_train_set": False,
+        },
+        "preprocessing": copy.deepcopy(PREPROCESSING),
+        "autotune": {"apply": False},
+        "profiling": {"enabled": False},
+    }
+
+
+def test_train_model_with_search_refits_best_iteration(config, tmp_path):
+    evaluation, artifact = train_model(config)
+
+    with open(tmp_path / "train_results" / "light_gbm_regression_serving_hpo" / "metadata.json") as f:
+        metadata = json.load(f)
+    with open(tmp_path / "train_results" / "light_gbm_regression_serving_hpo" / "metrics.json") as f:
+        metrics = json.load(f)
+
+    # 다시 학습할 때는 탐색 검증셋에서 찾은 반복 수로 early stopping 없이 학습한다.
+    assert metadata["early_stopping_rounds"] is None
+    assert metadata["num_iterations"] == metadata["hpo"]["best_iteration"]
+    assert metadata["model_params"]["num_leaves"] == metadata["hpo"]["best_params"]["num_leaves"]
+    assert metadata["hpo"]["num_trials"] == 2
+    assert metrics["root_mean_squared_error"] == evaluation.root_mean_squared_error
+    assert artifact.model_file_path.endswith("light_gbm_regression_serving_hpo")
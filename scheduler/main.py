@@ -1,14 +1,19 @@
+import asyncio
 import os
+import signal
 from omegaconf import DictConfig
 from datetime import datetime
 
-from apscheduler.schedulers.blocking import BlockingScheduler
-
-from src.jobs.retrieve import Retriever
-from src.jobs.monitor import Monitor, DataAmountAlertPolicy
+from src.jobs.retrieve import IncrementalRetriever
+from src.jobs.monitor import Monitor, DataAmountAlertPolicy, DistributionDriftAlertPolicy, RetrainModePolicy
 from src.jobs.notify import Notifier, EmailSender, HttpRequestSender, Receiver
+from src.jobs.deployment import DeploymentClient
 from src.jobs.report import Reporter
 from src.middleware.db_client import DBClient
+from src.middleware.logger import configure_logger
+from src.middleware.runtime import AsyncScheduler
+
+logger = configure_logger(__name__)
 
 
 DB_URL = os.getenv('DB_URL')
@@ -22,9 +27,35 @@ SEND_EMAIL_PASSWORD = os.getenv("SEND_EMAIL_PASSWORD")
 RECEIVE_EMAIL_ADDRESS= os.getenv("RECEIVE_EMAIL_ADDRESS")
 
 MODEL_SERVER_URL=os.getenv("MODEL_SERVER_URL")
+# 학습 파이프라인의 배포 모델 조회(GET /deployment). 있으면 재학습 모델이 배포된 뒤에 drift 비교 기준을 바꾼다.
+DEPLOYMENT_URL = os.getenv("DEPLOYMENT_URL")
+# 요청한 재학습 모델이 이 시간 안에 배포되지 않으면(학습 실패, 증분 학습 거절 등) 다시 요청한다.
+RETRAIN_PENDING_TIMEOUT_HOURS = float(os.getenv("RETRAIN_PENDING_TIMEOUT_HOURS", 24))
 RECORD_SAVE_PATH = os.getenv("RECORD_SAVE_PATH")
 
-MONITORING_INTERVAL_HOURS = os.getenv("MONITORING_INTERVAL_HOURS")
+MONITORING_INTERVAL_HOURS = float(os.getenv("MONITORING_INTERVAL_HOURS", 1))
+MONITORING_TIMEOUT_SECONDS = float(os.getenv("MONITORING_TIMEOUT_SECONDS", 600))
+# 작업 통계(실행 시간, 실패/timeout/건너뜀) 메일 주기. 0이면 보내지 않는다.
+REPORT_INTERVAL_HOURS = float(os.getenv("REPORT_INTERVAL_HOURS", 24))
+REPORT_TIMEOUT_SECONDS = float(os.getenv("REPORT_TIMEOUT_SECONDS", 60))
+# 여러 인스턴스가 같은 시각에 DB를 조회하지 않도록 시작 시각을 0~JITTER초 늦춘다.
+SCHEDULER_JITTER_SECONDS = float(os.getenv("SCHEDULER_JITTER_SECONDS", 30))
+SCHEDULER_METRICS_PATH = os.getenv("SCHEDULER_METRICS_PATH", f"{RECORD_SAVE_PATH}.jobs.json")
+# 외부 호출 제한 시간 (DB / SMTP / 재학습 요청)
+IO_TIMEOUT_SECONDS = float(os.getenv("IO_TIMEOUT_SECONDS", 30))
+
+# 증분 조회: RECORD_ID_COLUMN(새 행마다 커지는 컬럼) 기준으로 마지막으로 기록한 행 이후만 가져온다.
+RECORD_TABLE = os.getenv("RECORD_TABLE", "pet_insurance_claim_ml_fake_data")
+RECORD_ID_COLUMN = os.getenv("RECORD_ID_COLUMN", "id")
+RECORD_CREATED_AT_COLUMN = os.getenv("RECORD_CREATED_AT_COLUMN", "created_at") or None
+RECORD_COLUMNS = ["pet_breed_id", "birth", "age", "gender", "neuter_yn", "weight_kg", "claim_price", "disease_name"]
+
+# 재학습 요청 조건: drift(컬럼 분포 변화, PSI/KS) 또는 amount(쌓인 행 수)
+ALERT_POLICY = os.getenv("ALERT_POLICY", "drift")
+DRIFT_NUMERIC_COLUMNS = ["weight_kg", "age", "claim_price"]
+DRIFT_CATEGORICAL_COLUMNS = ["pet_breed_id", "disease_name"]
+DRIFT_PSI_THRESHOLD = float(os.getenv("DRIFT_PSI_THRESHOLD", 0.2))
+DRIFT_KS_THRESHOLD = float(os.getenv("DRIFT_KS_THRESHOLD", 0.1))
 
 cfg = DictConfig(
     {
@@ -33,51 +64,94 @@ cfg = DictConfig(
         "user": USER_NAME,
         "password": DB_PASSWORD,
         "name": DB_NAME,
+        "timeout": IO_TIMEOUT_SECONDS,
     }
 )
 
-email_sender = EmailSender('smtp.naver.com', 587, SEND_EMAIL_ADDRESS, SEND_EMAIL_PASSWORD)
-server_request_sender = HttpRequestSender()
+email_sender = EmailSender('smtp.naver.com', 587, SEND_EMAIL_ADDRESS, SEND_EMAIL_PASSWORD, timeout = IO_TIMEOUT_SECONDS)
+server_request_sender = HttpRequestSender(timeout = IO_TIMEOUT_SECONDS)
 
 email_receiver = Receiver(email = RECEIVE_EMAIL_ADDRESS)
 server = Receiver(http_server = MODEL_SERVER_URL) # TODO: receiver가 서버 주소를 갖고 있는 건 조금 이상하다.. 이메일 수신 리시버와 학습요청을 받는 서버가 같은 리시버 클래스를 갖기 때문에 혼동이 생긴다.
 
 notifier = Notifier()
 
-policy = DataAmountAlertPolicy()
+if ALERT_POLICY == "drift":
+    policy = DistributionDriftAlertPolicy(
+        f"{RECORD_SAVE_PATH}.drift.json",
+        DRIFT_NUMERIC_COLUMNS,
+        DRIFT_CATEGORICAL_COLUMNS,
+        psi_threshold=DRIFT_PSI_THRESHOLD,
+        ks_threshold=DRIFT_KS_THRESHOLD,
+    )
+else:
+    policy = DataAmountAlertPolicy()
+retrain_mode_policy = RetrainModePolicy()
+deployment_client = DeploymentClient(DEPLOYMENT_URL, timeout = IO_TIMEOUT_SECONDS) if DEPLOYMENT_URL else None
 monitor = Monitor(RECORD_SAVE_PATH, policy)
 reporter = Reporter()
 
 db_client = DBClient(cfg)
-retriever = Retriever(db_client)
+retriever = IncrementalRetriever(db_client, RECORD_TABLE, RECORD_COLUMNS, RECORD_ID_COLUMN, RECORD_CREATED_AT_COLUMN)
 
 def db_monitoring():
-    sql = """
-    SELECT pet_breed_id, birth, age, gender, neuter_yn, weight_kg, claim_price, disease_name
-    FROM pet_insurance_claim_ml_fake_data;
-    """
-    retrieved_data = retriever.retrieve_dataset(sql)#date_from="2021-01-01", date_to=datetime.now().strftime("%Y-%m-%d"))
-    monitor.update_record(retrieved_data)
+    # 테이블 전체 대신 행 수/마지막 id와 그 이후의 행만 조회하여 기록 뒤에 붙인다.
+    delta_data = monitor.sync(retriever)
+    logger.info(f"새 데이터#: {len(delta_data)}, watermark: {monitor.watermark}")
     
+    # 요청한 재학습 모델이 배포되었으면 그 모델이 학습한 데이터를 비교 기준으로 삼는다.
+    deployment = deployment_client.current() if deployment_client is not None else None
+    monitor.on_deployment(deployment)
+    if monitor.retrain_pending(RETRAIN_PENDING_TIMEOUT_HOURS * 3600):
+        logger.info(f"재학습 모델 배포 대기 중 (요청 시점 {monitor.watermark.requested_count}행)")
+        return
     
-    try:
-        # 데이터를 확인하고 필요시 재학습을 요청한다.
-        alert = monitor.alert(retrieved_data)
-        if alert:
-            notifier.send(server_request_sender, None, server)
-            
-    except Exception as e: 
-        report = reporter.generate_report(e)
-        notifier.send(email_sender, report, email_receiver)
-
+    # 비교 기준 이후 쌓인 데이터를 확인하고 필요시 재학습을 요청한다.
+    # 실패하면 스케줄러가 오류 메일을 따로 보내므로(report_error) 다음 모니터링 주기를 늦추지 않는다.
+    alert = monitor.alert_new_rows()
+    if alert:
+        # 재학습 방식(full/incremental)은 비교 기준(배포 모델이 학습한 기록)과 비교하여 정한다.
+        previous_record, record = monitor.split_record()
+        retrain_request = retrain_mode_policy.decide(previous_record, record)
+        if policy.reasons:
+            # 재학습 요청 조건을 넘은 컬럼과 지표 (예: weight_kg:psi=0.312>=0.2)
+            retrain_request["reason"] = f"{retrain_request['reason']};alert:{','.join(policy.reasons)}"
+        response = notifier.send(server_request_sender, retrain_request, server)
+        # 요청이 실패하면 비교 기준을 유지하여 다음 주기에 다시 요청한다.
+        # 요청이 받아들여져도 학습/배포가 실패할 수 있으므로 기준은 모델이 배포된 뒤에 바꾼다. (배포를 확인할 수 없으면 바로 바꾼다)
+        if response is not None and deployment_client is not None:
+            monitor.request_retrain(deployment)
+        elif response is not None:
+            monitor.update_baseline()
+
+
+def report_error(job_name: str, e: Exception):
+    report = reporter.generate_report(e)
+    notifier.send(email_sender, report, email_receiver)
+
+
+def report_job_metrics():
+    report = reporter.generate_metrics_report(scheduler.metrics())
+    notifier.send(email_sender, report, email_receiver)
+
+
+scheduler = AsyncScheduler(on_error = report_error, error_timeout_seconds = REPORT_TIMEOUT_SECONDS, metrics_path = SCHEDULER_METRICS_PATH)
+scheduler.add_job('db_monitoring', db_monitoring, MONITORING_INTERVAL_HOURS * 3600,
+                  timeout_seconds = MONITORING_TIMEOUT_SECONDS, jitter_seconds = SCHEDULER_JITTER_SECONDS)
+if REPORT_INTERVAL_HOURS > 0:
+    scheduler.add_job('job_report', report_job_metrics, REPORT_INTERVAL_HOURS * 3600,
+                      timeout_seconds = REPORT_TIMEOUT_SECONDS, jitter_seconds = SCHEDULER_JITTER_SECONDS)
+
+
+async def main():
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, scheduler.stop)
+    await scheduler.run()
 
 
 if __name__ == '__main__':
-    scheduler = BlockingScheduler()
-    scheduler.add_job(db_monitoring, 'interval', hours=MONITORING_INTERVAL_HOURS)
-    
-
     try:
-        scheduler.start()
-    except (KeyboardInterrupt, SystemExit):
-        pass
\ No newline at end of file
+        asyncio.run(main())
+    finally:
+        scheduler.shutdown()
@@ -7,10 +7,10 @@ def get_connection(db_client: DBClient):
     return db_client.get_connection()
 
 
-def load_data(db_client: DBClient, sql_command):
+def load_data(db_client: DBClient, sql_command, params=None):
     cursor = db_client.get_connection().cursor()
     with cursor as c:
-        c.execute(sql_command)
+        c.execute(sql_command, params)
         result = c.fetchall()
         columns = [col[0] for col in cursor.description]
     return pd.DataFrame(result, columns=columns)
@@ -0,0 +1,30 @@
+from typing import Optional
+
+import requests
+
+from src.middleware.logger import configure_logger
+
+logger = configure_logger(__name__)
+
+
+class DeploymentClient:
+    """
+    학습 파이프라인(src.retrain)의 GET /deployment로 현재 배포된 모델을 조회한다.
+    재학습 요청 후 새 모델이 실제로 배포되었는지 확인하여 drift 비교 기준을 바꿀 때 쓴다.
+    """
+    def __init__(self, url: str, timeout: float = 30):
+        self.url = url
+        self.timeout = timeout
+
+    def current(self) -> Optional[str]:
+        """배포 모델 식별자(모델 이름@배포 시각). 배포된 모델이 없거나 조회에 실패하면 None."""
+        try:
+            response = requests.get(self.url, timeout = self.timeout)
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"배포 모델 조회 실패: {e}")
+            return None
+        deployment = response.json()
+        return f"{deployment['model_name']}@{deployment['deployed_at']}"
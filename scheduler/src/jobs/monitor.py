@@ -1,40 +1,255 @@
 from abc import ABC, abstractmethod
+from dataclasses import replace
 from datetime import datetime
 
+import json
 import os
+import time
 from glob import glob
+from typing import Dict, List, Optional
 
 import pandas as pd
 
 from src.middleware.logger import configure_logger
+from src.dataset.record_store import read_file, write_file
+from src.jobs.sketch import CategoryCounter, NumericHistogram, sketch_from_dict
+from src.jobs.watermark import Watermark, WatermarkStore
 
 
 logger = configure_logger(__name__)
 
 class AlertPolicy(ABC):
+    # 마지막 판단에서 재학습을 요청한 이유 (재학습 요청의 reason에 덧붙인다)
+    reasons: List[str] = []
+
     @abstractmethod
     def analyze(self, df: pd.DataFrame) -> bool:
         raise NotImplementedError
 
+    @abstractmethod
+    def analyze_count(self, previous_count: int, new_count: int) -> bool:
+        # Monitor는 매 주기 이 메서드로 판단한다. 행 수만으로 판단할 수 없는 정책은 observe에서 쌓은 요약을 본다.
+        raise NotImplementedError
+
+    def observe(self, delta_df: pd.DataFrame, watermark: Watermark) -> bool:
+        """새로 기록된 행을 반영합니다. 기록 전체로 다시 만들어야 하면 False를 반환한다. (refit)"""
+        return True
+
+    def refit(self, previous_df: pd.DataFrame, delta_df: pd.DataFrame, watermark: Watermark):
+        pass
+
+    def rebase(self, watermark: Watermark):
+        """재학습 모델이 배포된 뒤, 지금까지의 데이터를 새 비교 기준으로 삼습니다."""
+        pass
+
 class DataAmountAlertPolicy(AlertPolicy):
     def analyze(self, previous_df: pd.DataFrame, new_df: pd.DataFrame):
         # 전에 있던 정보들이 필요하다.
-            
-        prev_row_cnt, new_row_cnt = len(previous_df), len(new_df)
-        logger.info(f"이전 데이터#: {prev_row_cnt}, 업데이트 데이터#: {new_row_cnt}")
+        return self.analyze_count(len(previous_df), len(new_df))
+
+    def analyze_count(self, previous_count: int, new_count: int) -> bool:
+        logger.info(f"이전 데이터#: {previous_count}, 업데이트 데이터#: {new_count}")
         
-        return (new_row_cnt - prev_row_cnt) >= 30
+        return (new_count - previous_count) >= 30
         
 
+class DistributionDriftAlertPolicy(AlertPolicy):
+    """
+    컬럼별 분포 요약(src.jobs.sketch)을 새 데이터로 갱신하고, 배포 모델이 학습한 데이터(비교 기준)와의 PSI/KS로 재학습 요청 여부를 정한다.
+    - 수치형 컬럼: 고정 구간 히스토그램으로 PSI, KS 계산
+    - 범주형 컬럼: 범주별 개수로 PSI, 기준에 없던 범주 비율 계산
+    - 비교 기준 이후 min_rows 행 이상 쌓였을 때만 판단하고, 한 컬럼이라도 기준을 넘으면 요청한다.
+    요약은 summary_path(JSON)에 저장하므로 재시작해도 기록 전체를 다시 읽지 않는다.
+    """
+    def __init__(
+        self,
+        summary_path: str,
+        numeric_columns: List[str],
+        categorical_columns: List[str],
+        psi_threshold: float = 0.2,
+        ks_threshold: float = 0.1,
+        unseen_category_threshold: float = 0.05,
+        min_rows: int = 30,
+        num_bins: int = 10,
+        max_categories: int = 1000,
+    ):
+        self.summary_path = summary_path
+        self.numeric_columns = numeric_columns
+        self.categorical_columns = categorical_columns
+        self.psi_threshold = psi_threshold
+        self.ks_threshold = ks_threshold
+        self.unseen_category_threshold = unseen_category_threshold
+        self.min_rows = min_rows
+        self.num_bins = num_bins
+        self.max_categories = max_categories
+        self.reasons = []
+        self.report = {}
+
+        # 기준(baseline)은 배포된 모델이 학습한 데이터까지, current는 그 이후의 데이터 요약
+        self.observed_count, self.baseline_count = 0, 0
+        self.baseline, self.current = self._empty_summaries(), self._empty_summaries()
+        if os.path.exists(summary_path):
+            with open(summary_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.observed_count, self.baseline_count = state["observed_count"], state["baseline_count"]
+            self.baseline = {column: sketch_from_dict(summary) for column, summary in state["baseline"].items()}
+            self.current = {column: sketch_from_dict(summary) for column, summary in state["current"].items()}
+
+    def _empty_summaries(self) -> Dict:
+        return {
+            **{column: NumericHistogram(num_bins=self.num_bins) for column in self.numeric_columns},
+            **{column: CategoryCounter(max_categories=self.max_categories) for column in self.categorical_columns},
+        }
+
+    def _update(self, summaries: Dict, df: pd.DataFrame):
+        for column, summary in summaries.items():
+            if column in df.columns:
+                summary.update(df[column])
+
+    def save(self):
+        state = {
+            "observed_count": self.observed_count,
+            "baseline_count": self.baseline_count,
+            "baseline": {column: summary.to_dict() for column, summary in self.baseline.items()},
+            "current": {column: summary.to_dict() for column, summary in self.current.items()},
+        }
+        tmp_path = f"{self.summary_path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.summary_path)
+
+    def observe(self, delta_df: pd.DataFrame, watermark: Watermark) -> bool:
+        # 요약이 기록과 어긋났으면(처음 실행, 기록 재작성, 요약 파일 없음) 기록 전체로 다시 만든다.
+        if self.observed_count + len(delta_df) != watermark.count or self.baseline_count != watermark.baseline_count:
+            return False
+        self._update(self.current, delta_df)
+        self.observed_count = watermark.count
+        self.save()
+        return True
+
+    def refit(self, previous_df: pd.DataFrame, delta_df: pd.DataFrame, watermark: Watermark):
+        logger.info(f"[분포 요약 다시 만들기] 기준 {len(previous_df)}행, 이후 {len(delta_df)}행")
+        self.baseline = self._empty_summaries()
+        self._update(self.baseline, previous_df)
+        self.current = {column: summary.empty_like() for column, summary in self.baseline.items()}
+        self._update(self.current, delta_df)
+        self.observed_count, self.baseline_count = watermark.count, watermark.baseline_count
+        self.save()
+
+    def rebase(self, watermark: Watermark):
+        for column, summary in self.baseline.items():
+            summary.merge(self.current[column])
+        self.current = {column: summary.empty_like() for column, summary in self.baseline.items()}
+        self.observed_count, self.baseline_count = watermark.count, watermark.baseline_count
+        self.save()
+
+    def drift(self) -> Dict[str, Dict]:
+        report = {}
+        for column, baseline in self.baseline.items():
+            current = self.current[column]
+            if baseline.total == 0 or current.total == 0:
+                continue
+            if isinstance(baseline, NumericHistogram):
+                metrics = {"psi": baseline.psi(current), "ks": baseline.ks(current)}
+                thresholds = {"psi": self.psi_threshold, "ks": self.ks_threshold}
+            else:
+                metrics = {"psi": baseline.psi(current), "unseen": baseline.unseen_ratio(current)}
+                thresholds = {"psi": self.psi_threshold, "unseen": self.unseen_category_threshold}
+            report[column] = {
+                **metrics,
+                "thresholds": thresholds,
+                "drifted": [name for name, value in metrics.items() if value >= thresholds[name]],
+            }
+        return report
+
+    def analyze_count(self, previous_count: int, new_count: int) -> bool:
+        self.reasons, self.report = [], {}
+        if new_count - previous_count < self.min_rows:
+            logger.info(f"분포 비교 보류: 새 데이터# {new_count - previous_count} < {self.min_rows}")
+            return False
+        if all(summary.total == 0 for summary in self.baseline.values()):
+            self.reasons = ["no_baseline"]
+            return True
+
+        self.report = self.drift()
+        self.reasons = [
+            f"{column}:{name}={values[name]:.3f}>={values['thresholds'][name]}"
+            for column, values in self.report.items() for name in values["drifted"]
+        ]
+        logger.info(f"분포 비교: {self.report}")
+        return len(self.reasons) > 0
+
+    def analyze(self, previous_df: pd.DataFrame, new_df: pd.DataFrame) -> bool:
+        # 기록 전체를 받는 경우: 이전 기록을 기준으로, 그 뒤의 행을 새 데이터로 요약하여 비교한다.
+        previous_df = previous_df if previous_df is not None else new_df.iloc[:0]
+        delta_df = new_df.iloc[len(previous_df):]
+        watermark = Watermark(count=len(new_df), baseline_count=len(previous_df))
+        self.refit(previous_df, delta_df, watermark)
+        return self.analyze_count(len(previous_df), len(new_df))
+
+
+class RetrainModePolicy:
+    """
+    재학습 요청 시 전체 재학습(full)과 증분 학습(incremental) 중 하나를 고른다.
+    - 이전 기록이 없거나 새 데이터가 기존 대비 full_retrain_ratio 이상이면 full
+    - 새 데이터에 기존에 없던 범주의 비율이 unseen_category_threshold 이상이면 full (증분 학습은 기존 전처리를 그대로 쓰므로)
+    - 수치형 컬럼 평균이 기존 표준편차 대비 mean_shift_threshold 이상 움직였으면 full
+    - 그 외에는 incremental
+    """
+    def __init__(self, full_retrain_ratio: float = 0.3, unseen_category_threshold: float = 0.05, mean_shift_threshold: float = 0.5):
+        self.full_retrain_ratio = full_retrain_ratio
+        self.unseen_category_threshold = unseen_category_threshold
+        self.mean_shift_threshold = mean_shift_threshold
+
+    def drift(self, previous_df: pd.DataFrame, delta_df: pd.DataFrame) -> dict:
+        drift = {}
+        for column in delta_df.columns.intersection(previous_df.columns):
+            previous, delta = previous_df[column].dropna(), delta_df[column].dropna()
+            if delta.empty or previous.empty:
+                continue
+            if pd.api.types.is_numeric_dtype(previous) and pd.api.types.is_numeric_dtype(delta):
+                std = previous.std()
+                drift[column] = abs(delta.mean() - previous.mean()) / std if std else 0.0
+            else:
+                drift[column] = float((~delta.isin(set(previous.unique()))).mean())
+        return drift
+
+    def decide(self, previous_df: pd.DataFrame, new_df: pd.DataFrame) -> dict:
+        if previous_df is None or len(previous_df) == 0:
+            return {"mode": "full", "reason": "no_previous_record"}
+
+        # 기록은 뒤에 추가만 된다고 보고 이전 기록 이후의 행을 새 데이터로 본다.
+        delta_df = new_df.iloc[len(previous_df):]
+        new_ratio = len(delta_df) / len(previous_df)
+        if new_ratio >= self.full_retrain_ratio:
+            return {"mode": "full", "reason": f"volume:{new_ratio:.3f}"}
+
+        drift = self.drift(previous_df, delta_df)
+        for column, value in drift.items():
+            threshold = self.mean_shift_threshold if pd.api.types.is_numeric_dtype(previous_df[column]) else self.unseen_category_threshold
+            if value >= threshold:
+                return {"mode": "full", "reason": f"drift:{column}:{value:.3f}"}
+        logger.info(f"증분 학습 선택: 새 데이터 비율 {new_ratio:.3f}, drift {drift}")
+        return {"mode": "incremental", "reason": f"volume:{new_ratio:.3f}"}
+
+
 class Monitor:
-    def __init__(self, pd_record_path: str, alert_policy: AlertPolicy):
+    def __init__(self, pd_record_path: str, alert_policy: AlertPolicy, watermark_path: str = None):
+        # pd_record_path가 .parquet이면 타입이 고정된 Parquet로 비교 기준을 저장한다. (그 외에는 CSV)
+        # 증분 조회 기준(watermark)은 기본으로 기록 파일 옆의 {pd_record_path}.watermark.json에 저장한다.
         self.alert_policy = alert_policy
         self.pd_record_path = pd_record_path
         try:
-            self.current_record = pd.read_csv(pd_record_path)
+            self.current_record = read_file(pd_record_path)
         except:
             logger.info("[비교대상 데이터 로컬에 없음]")
             self.current_record = None
+
+        self.watermark_store = WatermarkStore(watermark_path or f"{pd_record_path}.watermark.json")
+        self.watermark = self.watermark_store.load()
+        if not self.watermark_store.exists() and self.current_record is not None:
+            # watermark 없이 전체를 저장하던 기록: 첫 동기화 때 기록을 새로 쓰고, 기존 기록의 행 수를 비교 기준으로 이어받는다.
+            self.watermark = Watermark(baseline_count=len(self.current_record))
     
     def alert(self, df: pd.DataFrame)-> bool:
         trigger_on = self.alert_policy.analyze(self.current_record, df)
@@ -43,11 +258,105 @@ class Monitor:
     def update_record(self, df: pd.DataFrame):
         now = datetime.now().strftime("%d/%m/%Y, %H:%M:%S")
         logger.info(f"[{now} 레코드 업데이트]")
-        df.to_csv(self.pd_record_path, index = False)
+        write_file(df, self.pd_record_path)
         
         if self.current_record is None:
-            self.current_record = pd.read_csv(self.pd_record_path)
+            self.current_record = read_file(self.pd_record_path)
     
 
+    def read_record(self) -> pd.DataFrame:
+        return read_file(self.pd_record_path)
+
+    def append_record(self, delta_df: pd.DataFrame, watermark: Watermark):
+        """새로 들어온 행만 기록 뒤에 붙이고 watermark를 갱신합니다. 반영된 행이 없던 기록(count == 0)은 새로 쓴다."""
+        logger.info(f"[레코드 추가] {len(delta_df)}행, watermark: {watermark.last_id} / {watermark.last_created_at}")
+        if self.watermark.count == 0 or not os.path.exists(self.pd_record_path):
+            write_file(delta_df, self.pd_record_path)
+        elif self.pd_record_path.endswith(".parquet"):
+            # Parquet 파일은 뒤에 이어 쓸 수 없으므로 로컬 기록과 합쳐 다시 쓴다. (DB 조회량과는 무관)
+            write_file(pd.concat([self.read_record(), delta_df], ignore_index=True), self.pd_record_path)
+        else:
+            delta_df.to_csv(self.pd_record_path, mode="a", header=False, index=False)
+        # 테이블 watermark에는 조회 기준만 있으므로 비교 기준과 재학습 요청 상태는 이어받는다.
+        self.watermark = replace(
+            self.watermark,
+            last_id=watermark.last_id,
+            last_created_at=watermark.last_created_at,
+            count=watermark.count,
+            baseline_count=min(self.watermark.baseline_count, watermark.count),
+        )
+        self.watermark_store.save(self.watermark)
+        if not self.alert_policy.observe(delta_df, self.watermark):
+            previous_record, record = self.split_record()
+            self.alert_policy.refit(previous_record, record.iloc[len(previous_record):], self.watermark)
+
+    def reset_watermark(self):
+        self.watermark = replace(self.watermark, last_id=None, last_created_at=None, count=0)
+
+    def sync(self, retriever) -> pd.DataFrame:
+        """
+        retriever(IncrementalRetriever)로 행 수/마지막 id와 watermark 이후의 행만 조회해 기록에 더하고, 추가된 행을 반환합니다.
+        행 수가 줄었거나 추가된 행 수와 맞지 않으면(삭제/수정) 테이블 전체를 다시 기록한다.
+        """
+        table_watermark = retriever.retrieve_watermark()
+        if table_watermark.count < self.watermark.count:
+            logger.warning(f"테이블 행 수가 줄었습니다({self.watermark.count} -> {table_watermark.count}). 전체를 다시 기록합니다.")
+            self.reset_watermark()
+        if table_watermark.last_id == self.watermark.last_id and table_watermark.count == self.watermark.count:
+            logger.info("[새 데이터 없음]")
+            return pd.DataFrame(columns=retriever.columns)
+
+        delta_df = retriever.retrieve_since(self.watermark.last_id, table_watermark.last_id)
+        if self.watermark.count + len(delta_df) != table_watermark.count:
+            logger.warning(
+                f"기록 {self.watermark.count}행 + 추가 {len(delta_df)}행이 테이블 {table_watermark.count}행과 다릅니다. 전체를 다시 기록합니다."
+            )
+            self.reset_watermark()
+            delta_df = retriever.retrieve_since(None, table_watermark.last_id)
+        self.append_record(delta_df, table_watermark)
+        return delta_df
+
+    def alert_new_rows(self) -> bool:
+        """비교 기준(배포 모델이 학습한 행) 이후 기록된 행 수로 재학습 요청 여부를 정합니다. (데이터를 다시 읽지 않는다)"""
+        return self.alert_policy.analyze_count(self.watermark.baseline_count, self.watermark.count)
+
+    def split_record(self):
+        """기록을 비교 기준(배포 모델이 학습한 행)과 전체로 나누어 반환합니다."""
+        record = self.read_record()
+        return record.iloc[:self.watermark.baseline_count], record
+
+    def request_retrain(self, deployment: Optional[str]):
+        """
+        재학습 요청이 받아들여졌을 때 요청 시점의 행 수를 남깁니다. 비교 기준은 새 모델이 배포된 뒤에 바꾼다. (on_deployment)
+        deployment는 요청 시점에 배포되어 있던 모델로, 이와 다른 모델이 배포되면 재학습 모델이 배포된 것으로 본다.
+        """
+        self.watermark = replace(
+            self.watermark, requested_count=self.watermark.count, requested_at=time.time(), requested_deployment=deployment,
+        )
+        self.watermark_store.save(self.watermark)
+
+    def retrain_pending(self, timeout_seconds: float) -> bool:
+        """요청한 재학습 모델이 아직 배포되지 않았으면 True. timeout_seconds가 지나면 (학습 실패, 배포 거절 등) 다시 요청할 수 있다."""
+        return self.watermark.requested_at is not None and time.time() - self.watermark.requested_at < timeout_seconds
 
+    def on_deployment(self, deployment: Optional[str]) -> bool:
+        """재학습 요청 이후 다른 모델이 배포되었으면 요청 시점까지의 데이터(배포 모델이 학습한 데이터)를 비교 기준으로 삼습니다."""
+        if self.watermark.requested_count is None or deployment is None or deployment == self.watermark.requested_deployment:
+            return False
+        logger.info(f"[재학습 모델 배포 확인] {deployment}, 비교 기준 {self.watermark.baseline_count} -> {self.watermark.requested_count}행")
+        self.update_baseline(self.watermark.requested_count)
+        return True
 
+    def update_baseline(self, count: Optional[int] = None):
+        # 요청 이후 기록을 다시 썼으면 요청 시점의 행 수가 기록보다 많을 수 있다.
+        count = self.watermark.count if count is None else min(count, self.watermark.count)
+        self.watermark = replace(
+            self.watermark, baseline_count=count, requested_count=None, requested_at=None, requested_deployment=None,
+        )
+        self.watermark_store.save(self.watermark)
+        if count == self.watermark.count:
+            self.alert_policy.rebase(self.watermark)
+        else:
+            # 요청 이후에 들어온 행은 배포 모델이 학습하지 않았으므로 기준에서 빼고 요약을 기록에서 다시 만든다.
+            previous_record, record = self.split_record()
+            self.alert_policy.refit(previous_record, record.iloc[len(previous_record):], self.watermark)
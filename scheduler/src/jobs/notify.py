@@ -29,17 +29,18 @@ class Receiver:
 class Notifier:
         
     def send(self, sender: Sender, message: dict, receiver: Receiver):
-        sender.send(message, receiver)
+        return sender.send(message, receiver)
 
 
 
 class EmailSender(Sender):
     type = 'email'
-    def __init__(self, smtp_server: str, port: int, email: str, password: str):
+    def __init__(self, smtp_server: str, port: int, email: str, password: str, timeout: float = 30):
         self.smtp_server = smtp_server
         self.port = port
         self.email = email
         self.password = password
+        self.timeout = timeout
         self.context = ssl.create_default_context()
 
     def send(self, message: dict, receiver: Receiver):
@@ -50,7 +51,7 @@ class EmailSender(Sender):
         msg['From'] = self.email
         msg['To'] = receiver.email
         
-        with smtplib.SMTP(self.smtp_server, self.port) as server:
+        with smtplib.SMTP(self.smtp_server, self.port, timeout=self.timeout) as server:
             server.starttls()
             server.login(self.email, self.password)
             server.sendmail(self.email, receiver.email, msg.as_string())
@@ -58,11 +59,14 @@ class EmailSender(Sender):
 
 class HttpRequestSender(Sender):
     type = 'http_server'
+
+    def __init__(self, timeout: float = 30):
+        self.timeout = timeout
         
     def send(self, message: Optional[str], receiver: Receiver): 
         receiver.validate_necessary_info(self)
         try:
-            response = requests.post(receiver.http_server, params=message)
+            response = requests.post(receiver.http_server, params=message, timeout=self.timeout)
             response.raise_for_status()
             return response
         except requests.exceptions.RequestException as e:
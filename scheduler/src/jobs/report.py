@@ -18,5 +18,17 @@ class Reporter:
         '''
         
         return {'subject': subject, 'content' : content}
-                
-        
\ No newline at end of file
+
+    def generate_metrics_report(self, metrics: dict) -> dict:
+        """스케줄러 작업별 실행 통계 (src.middleware.runtime.AsyncScheduler.metrics)"""
+        when = datetime.now().strftime("%Y-%m-%d, %H:%M:%S")
+
+        subject = f'[양육비 예측 스케줄러 작업 통계({when})]'
+        lines = []
+        for name, job in metrics.items():
+            average = job['total_duration_seconds'] / job['runs'] if job['runs'] else 0.0
+            lines.append(
+                f"{name}: 실행 {job['runs']}회 (성공 {job['successes']}, 실패 {job['failures']}, timeout {job['timeouts']}, 건너뜀 {job['skipped']}), "
+                f"평균 {average:.3f}초, 최대 {job['max_duration_seconds']:.3f}초, 마지막 오류: {job['last_error']}"
+            )
+        return {'subject': subject, 'content' : '\n'.join(lines)}
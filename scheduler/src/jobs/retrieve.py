@@ -1,9 +1,10 @@
 from datetime import date
 import pandas as pd
 
-from typing import Optional
+from typing import List, Optional
 
 from src.dataset.data_manager import load_data
+from src.jobs.watermark import Watermark
 from src.middleware.db_client import DBClient
 from src.middleware.logger import configure_logger
 
@@ -32,4 +33,45 @@ class Retriever:
         
         
         # TODO: DB VPC 설정 확인
-        return load_data(self.db_client, sql_command)
\ No newline at end of file
+        return load_data(self.db_client, sql_command)
+
+
+class IncrementalRetriever(Retriever):
+    """
+    테이블 전체 대신 행 수/마지막 id(watermark)와 그 이후의 행만 조회한다.
+    id_column은 새 행이 들어올 때마다 커지는 컬럼(AUTO_INCREMENT 등)이어야 한다.
+    """
+    def __init__(self, db_client: DBClient, table: str, columns: List[str], id_column: str = "id", created_at_column: Optional[str] = None):
+        super().__init__(db_client)
+        self.table = table
+        self.columns = columns
+        self.id_column = id_column
+        self.created_at_column = created_at_column
+
+    def retrieve_watermark(self) -> Watermark:
+        aggregates = ["COUNT(*) AS num_rows", f"MAX({self.id_column}) AS last_id"]
+        if self.created_at_column:
+            aggregates.append(f"MAX({self.created_at_column}) AS last_created_at")
+        row = load_data(self.db_client, f"SELECT {', '.join(aggregates)} FROM {self.table};").iloc[0]
+        last_created_at = row.get("last_created_at")
+        return Watermark(
+            last_id = None if pd.isna(row["last_id"]) else int(row["last_id"]),
+            last_created_at = None if last_created_at is None or pd.isna(last_created_at) else str(last_created_at),
+            count = int(row["num_rows"]),
+        )
+
+    def retrieve_since(self, last_id: Optional[int], until_id: Optional[int]) -> pd.DataFrame:
+        """last_id < id <= until_id 인 행. until_id로 상한을 두어 조회 도중 들어온 행은 다음 주기에 가져온다."""
+        if until_id is None:
+            return pd.DataFrame(columns=self.columns)
+        conditions, params = [f"{self.id_column} <= %s"], [until_id]
+        if last_id is not None:
+            conditions.insert(0, f"{self.id_column} > %s")
+            params.insert(0, last_id)
+        sql = f"""
+        SELECT {', '.join(self.columns)}
+        FROM {self.table}
+        WHERE {' AND '.join(conditions)}
+        ORDER BY {self.id_column};
+        """
+        return load_data(self.db_client, sql, params)
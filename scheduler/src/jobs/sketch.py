@@ -0,0 +1,139 @@
+"""
+컬럼별 분포 요약(sketch). 새로 들어온 행(delta)으로 갱신하고, 같은 구간/범주끼리 더할 수 있다(merge).
+
+- NumericHistogram: 처음 본 데이터의 분위수로 정한 구간 경계를 고정하고 구간별 개수만 센다. 경계 밖 값은 양 끝 구간에 들어간다.
+- CategoryCounter: 범주별 개수. 범주가 max_categories를 넘으면 새 범주는 OTHER로 묶는다.
+
+기록 전체를 다시 읽지 않고 두 요약(기준 / 이후 데이터)만으로 PSI, KS를 계산한다.
+KS는 구간 경계에서만 누적분포를 비교하므로 원본 데이터로 계산한 값보다 작거나 같다.
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+OTHER = "__other__"
+# 비어 있는 구간/범주에서 log(0)이 되지 않도록 비율의 하한을 둔다.
+EPSILON = 1e-4
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Population Stability Index. 두 개수 배열을 비율로 바꿔 비교한다."""
+    if expected.sum() == 0 or actual.sum() == 0:
+        return 0.0
+    expected = np.clip(expected / expected.sum(), EPSILON, None)
+    actual = np.clip(actual / actual.sum(), EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+class NumericHistogram:
+    def __init__(self, edges: Optional[List[float]] = None, num_bins: int = 10, counts: Optional[List[int]] = None, missing: int = 0):
+        self.num_bins = num_bins
+        self.edges = None if edges is None else np.asarray(edges, dtype=np.float64)
+        self.counts = None if counts is None else np.asarray(counts, dtype=np.int64)
+        if self.edges is not None and self.counts is None:
+            self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)
+        self.missing = missing
+
+    @property
+    def total(self) -> int:
+        return 0 if self.counts is None else int(self.counts.sum())
+
+    def empty_like(self) -> "NumericHistogram":
+        return NumericHistogram(None if self.edges is None else self.edges.tolist(), self.num_bins)
+
+    def update(self, values: pd.Series):
+        values = pd.to_numeric(values, errors="coerce")
+        self.missing += int(values.isna().sum())
+        values = values.dropna().to_numpy(dtype=np.float64)
+        if self.edges is None:
+            if len(values) == 0:
+                return
+            # 양 끝(최소/최대)을 뺀 내부 경계. 같은 값이 많으면 구간 수가 줄어든다.
+            self.edges = np.unique(np.quantile(values, np.linspace(0, 1, self.num_bins + 1)[1:-1]))
+            self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)
+        self.counts += np.bincount(np.searchsorted(self.edges, values, side="right"), minlength=len(self.counts))
+
+    def merge(self, other: "NumericHistogram"):
+        if other.counts is None:
+            return
+        if self.counts is None:
+            self.edges, self.counts = other.edges.copy(), other.counts.copy()
+        else:
+            self.counts = self.counts + other.counts
+        self.missing += other.missing
+
+    def psi(self, other: "NumericHistogram") -> float:
+        if self.counts is None or other.counts is None:
+            return 0.0
+        return psi(self.counts, other.counts)
+
+    def ks(self, other: "NumericHistogram") -> float:
+        if self.total == 0 or other.total == 0:
+            return 0.0
+        return float(np.max(np.abs(np.cumsum(self.counts) / self.total - np.cumsum(other.counts) / other.total)))
+
+    def to_dict(self) -> Dict:
+        return {
+            "type": "numeric",
+            "num_bins": self.num_bins,
+            "edges": None if self.edges is None else self.edges.tolist(),
+            "counts": None if self.counts is None else self.counts.tolist(),
+            "missing": self.missing,
+        }
+
+
+class CategoryCounter:
+    def __init__(self, counts: Optional[Dict[str, int]] = None, max_categories: int = 1000, missing: int = 0):
+        self.counts = dict(counts or {})
+        self.max_categories = max_categories
+        self.missing = missing
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def empty_like(self) -> "CategoryCounter":
+        return CategoryCounter(max_categories=self.max_categories)
+
+    def _add(self, category: str, count: int):
+        if category not in self.counts and len(self.counts) >= self.max_categories:
+            category = OTHER
+        self.counts[category] = self.counts.get(category, 0) + count
+
+    def update(self, values: pd.Series):
+        self.missing += int(values.isna().sum())
+        values = values.dropna()
+        if pd.api.types.is_float_dtype(values) and (values % 1 == 0).all():
+            # 결측치 때문에 float로 읽힌 정수 범주(견종 id 등)는 DB에서 읽은 값과 같은 키("3")로 센다.
+            values = values.astype(np.int64)
+        for category, count in values.astype(str).value_counts().items():
+            self._add(category, int(count))
+
+    def merge(self, other: "CategoryCounter"):
+        for category, count in other.counts.items():
+            self._add(category, count)
+        self.missing += other.missing
+
+    def psi(self, other: "CategoryCounter") -> float:
+        categories = sorted(set(self.counts) | set(other.counts))
+        return psi(
+            np.array([self.counts.get(category, 0) for category in categories], dtype=np.float64),
+            np.array([other.counts.get(category, 0) for category in categories], dtype=np.float64),
+        )
+
+    def unseen_ratio(self, other: "CategoryCounter") -> float:
+        """other 중 기준(self)에 없던 범주의 비율."""
+        if other.total == 0:
+            return 0.0
+        return sum(count for category, count in other.counts.items() if category not in self.counts) / other.total
+
+    def to_dict(self) -> Dict:
+        return {"type": "categorical", "counts": self.counts, "max_categories": self.max_categories, "missing": self.missing}
+
+
+def sketch_from_dict(state: Dict):
+    state = dict(state)
+    if state.pop("type") == "numeric":
+        return NumericHistogram(**state)
+    return CategoryCounter(**state)
@@ -0,0 +1,45 @@
+"""
+DB 테이블 증분 조회 기준(watermark).
+
+매 주기마다 테이블 전체를 SELECT 하지 않도록, 로컬 기록에 마지막으로 반영한 id/created_at과 행 수를 JSON 파일로 남긴다.
+다음 주기에는 COUNT(*)/MAX(id)와 마지막 id 이후의 행만 조회하므로, 한 주기에 읽는 양이 테이블 크기와 관계없이 새로 들어온 행 수에 비례한다.
+"""
+import json
+import os
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+
+@dataclass
+class Watermark:
+    last_id: Optional[int] = None
+    last_created_at: Optional[str] = None
+    # 로컬 기록에 반영된 행 수
+    count: int = 0
+    # 마지막으로 배포된 재학습 모델이 학습한 행 수 (재학습 요청 조건의 비교 기준)
+    baseline_count: int = 0
+    # 받아들여졌지만 아직 배포되지 않은 재학습 요청: 요청 시점의 행 수/시각과 그때 배포되어 있던 모델
+    requested_count: Optional[int] = None
+    requested_at: Optional[float] = None
+    requested_deployment: Optional[str] = None
+
+
+class WatermarkStore:
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.file_path)
+
+    def load(self) -> Watermark:
+        if not self.exists():
+            return Watermark()
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            return Watermark(**json.load(f))
+
+    def save(self, watermark: Watermark):
+        # 기록 파일과 어긋나지 않도록 임시 파일에 쓴 뒤 이름을 바꾼다.
+        tmp_path = f"{self.file_path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(watermark), f, ensure_ascii=False)
+        os.replace(tmp_path, self.file_path)
@@ -22,4 +22,8 @@ class DBClient(AbstractDBClient):
             db=self.cfg.name,
             port=self.cfg.port,
             host=self.cfg.url,
+            # 응답 없는 DB가 모니터링 작업을 붙잡고 있지 않도록 제한 시간을 둔다.
+            connect_timeout=self.cfg.get("timeout", 30),
+            read_timeout=self.cfg.get("timeout", 30),
+            write_timeout=self.cfg.get("timeout", 30),
         )
@@ -0,0 +1,182 @@
+"""
+asyncio 기반 작업 스케줄러.
+
+- 작업마다 실행 주기, 제한 시간(timeout), 시작 시각 흔들기(jitter)를 둔다.
+- 이전 실행이 끝나지 않았으면 이번 주기는 건너뛴다. (같은 작업이 겹쳐 실행되지 않음)
+- 서로 다른 작업은 동시에 실행되므로 느린 SMTP 서버가 다음 모니터링 주기를 늦추지 않는다.
+- 코루틴 함수는 이벤트 루프에서, 일반 함수(pymysql, smtplib 등 blocking I/O)는 작업별 스레드에서 실행한다.
+  스레드는 중간에 멈출 수 없으므로, 제한 시간을 넘기면 timeout으로 기록하고 스레드가 끝날 때까지 다음 실행을 건너뛴다.
+- 작업별 실행 횟수/실패/timeout/건너뜀과 실행 시간을 metrics()로 제공한다.
+"""
+import asyncio
+import inspect
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from src.middleware.logger import configure_logger
+
+logger = configure_logger(__name__)
+
+
+@dataclass
+class JobMetrics:
+    runs: int = 0
+    successes: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    # 이전 실행이 끝나지 않아 건너뛴 주기
+    skipped: int = 0
+    last_started_at: Optional[str] = None
+    last_duration_seconds: Optional[float] = None
+    max_duration_seconds: float = 0.0
+    total_duration_seconds: float = 0.0
+    last_error: Optional[str] = None
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable
+    interval_seconds: float
+    timeout_seconds: Optional[float] = None
+    jitter_seconds: float = 0.0
+    run_immediately: bool = False
+    metrics: JobMetrics = field(default_factory=JobMetrics)
+    # 실행 중인 작업(스레드 작업은 스레드가 끝날 때 완료된다)
+    running: Optional[asyncio.Future] = None
+    executor: Optional[ThreadPoolExecutor] = None
+
+
+class AsyncScheduler:
+    def __init__(self, on_error: Optional[Callable] = None, error_timeout_seconds: float = 60, metrics_path: Optional[str] = None):
+        # on_error(job_name, exception): 작업이 실패하거나 제한 시간을 넘겼을 때 호출. 별도 스레드에서 실행되어 작업 주기를 막지 않는다.
+        self.on_error = on_error
+        self.error_timeout_seconds = error_timeout_seconds
+        self.metrics_path = metrics_path
+        self.jobs: Dict[str, Job] = {}
+        self._error_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="on_error")
+        self._stopped: Optional[asyncio.Event] = None
+        # 실행/오류 알림 task (참조를 남겨 두어야 중간에 사라지지 않는다)
+        self._tasks = set()
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable,
+        interval_seconds: float,
+        timeout_seconds: Optional[float] = None,
+        jitter_seconds: float = 0.0,
+        run_immediately: bool = False,
+    ) -> Job:
+        if interval_seconds <= 0:
+            raise ValueError(f"실행 주기는 0보다 커야 합니다: {name} ({interval_seconds})")
+        job = Job(name, func, float(interval_seconds), timeout_seconds, jitter_seconds, run_immediately)
+        if not inspect.iscoroutinefunction(func):
+            job.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self.jobs[name] = job
+        return job
+
+    def metrics(self) -> Dict[str, Dict]:
+        return {name: asdict(job.metrics) for name, job in self.jobs.items()}
+
+    def _save_metrics(self):
+        if not self.metrics_path:
+            return
+        tmp_path = f"{self.metrics_path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.metrics(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.metrics_path)
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _start(self, job: Job) -> asyncio.Future:
+        if job.executor is not None:
+            return asyncio.get_running_loop().run_in_executor(job.executor, job.func)
+        return asyncio.ensure_future(job.func())
+
+    async def run_once(self, job: Job):
+        if job.running is not None and not job.running.done():
+            job.metrics.skipped += 1
+            logger.warning(f"[{job.name}] 이전 실행이 끝나지 않아 이번 주기를 건너뜁니다.")
+            return
+
+        job.metrics.runs += 1
+        job.metrics.last_started_at = datetime.now().isoformat(timespec="seconds")
+        started_at = time.perf_counter()
+        job.running = self._start(job)
+        error = None
+        try:
+            # shield: 제한 시간을 넘겨도 스레드 작업은 끝까지 실행되므로, 완료될 때까지 running으로 남긴다.
+            await asyncio.wait_for(asyncio.shield(job.running), job.timeout_seconds)
+            job.metrics.successes += 1
+        except asyncio.TimeoutError:
+            job.metrics.timeouts += 1
+            if job.executor is None:
+                job.running.cancel()
+            error = TimeoutError(f"{job.name} 작업이 제한 시간({job.timeout_seconds}초)을 넘겼습니다.")
+        except Exception as e:
+            job.metrics.failures += 1
+            error = e
+
+        duration = time.perf_counter() - started_at
+        job.metrics.last_duration_seconds = duration
+        job.metrics.max_duration_seconds = max(job.metrics.max_duration_seconds, duration)
+        job.metrics.total_duration_seconds += duration
+        job.metrics.last_error = None if error is None else f"{type(error).__name__}: {error}"
+        logger.info(f"[{job.name}] {'완료' if error is None else '실패'} ({duration:.3f}초) {job.metrics.last_error or ''}")
+        self._save_metrics()
+        if error is not None and self.on_error is not None:
+            self._spawn(self._report_error(job.name, error))
+
+    async def _report_error(self, job_name: str, error: Exception):
+        try:
+            await asyncio.wait_for(
+                asyncio.get_running_loop().run_in_executor(self._error_executor, self.on_error, job_name, error),
+                self.error_timeout_seconds,
+            )
+        except Exception as e:
+            logger.error(f"[{job_name}] 오류 알림 실패: {type(e).__name__}: {e}")
+
+    async def _loop(self, job: Job):
+        next_run = time.monotonic() + (0 if job.run_immediately else job.interval_seconds)
+        while not self._stopped.is_set():
+            delay = max(0.0, next_run - time.monotonic()) + random.uniform(0, job.jitter_seconds)
+            try:
+                await asyncio.wait_for(self._stopped.wait(), delay)
+                break
+            except asyncio.TimeoutError:
+                pass
+            # 다음 실행 시각은 실행 시간과 관계없이 주기에 맞춘다. (밀린 주기는 한 번만 실행)
+            while next_run <= time.monotonic():
+                next_run += job.interval_seconds
+            self._spawn(self.run_once(job))
+
+    async def run(self):
+        self._stopped = asyncio.Event()
+        logger.info(f"스케줄러 시작: {[(job.name, job.interval_seconds) for job in self.jobs.values()]}")
+        await asyncio.gather(*(self._loop(job) for job in self.jobs.values()))
+        # 실행 중인 작업과 오류 알림이 끝날 때까지 기다린다.
+        running = [job.running for job in self.jobs.values() if job.running is not None and not job.running.done()]
+        if running:
+            await asyncio.wait(running)
+        while self._tasks:
+            await asyncio.wait(list(self._tasks))
+
+    def stop(self):
+        if self._stopped is not None:
+            self._stopped.set()
+
+    def shutdown(self):
+        for job in self.jobs.values():
+            if job.executor is not None:
+                job.executor.shutdown(wait=False)
+        self._error_executor.shutdown(wait=False)
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+from src.jobs.monitor import DistributionDriftAlertPolicy, Monitor
+from src.jobs.sketch import CategoryCounter, NumericHistogram
+from src.jobs.watermark import Watermark
+
+
+def _claims(ids, weight_mean = 5.0, breeds = ('말티즈', '푸들'), seed = 0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame.from_dict({
+        'id': list(ids),
+        'weight_kg': rng.normal(weight_mean, 1.0, len(ids)),
+        'pet_breed_id': rng.choice(list(breeds), len(ids)),
+    })
+
+
+class ClaimRetriever:
+    columns = ['weight_kg', 'pet_breed_id']
+
+    def __init__(self, table):
+        self.table = table
+
+    def retrieve_watermark(self):
+        return Watermark(last_id = int(self.table['id'].max()), count = len(self.table))
+
+    def retrieve_since(self, last_id, until_id):
+        rows = self.table[(self.table['id'] > (last_id if last_id is not None else -1)) & (self.table['id'] <= until_id)]
+        return rows[self.columns].reset_index(drop = True)
+
+
+def _policy(tmp_path):
+    return DistributionDriftAlertPolicy(str(tmp_path / 'record.csv.drift.json'), ['weight_kg'], ['pet_breed_id'])
+
+
+def test_sketches_merge_and_compare():
+    values = pd.Series(np.random.default_rng(0).normal(5, 1, 2000))
+    whole = NumericHistogram(num_bins = 10)
+    whole.update(values)
+    first, second = whole.empty_like(), whole.empty_like()
+    first.update(values[:500])
+    second.update(values[500:])
+    first.merge(second)
+    assert first.counts.tolist() == whole.counts.tolist()
+
+    shifted = whole.empty_like()
+    shifted.update(values + 2)
+    assert whole.psi(first) == 0 and whole.ks(first) == 0
+    assert whole.psi(shifted) > 1 and whole.ks(shifted) > 0.5
+
+    breeds = CategoryCounter(max_categories = 2)
+    breeds.update(pd.Series(['말티즈', '푸들', '말티즈', '비숑', None]))
+    assert breeds.counts == {'말티즈': 2, '푸들': 1, '__other__': 1}
+    assert breeds.missing == 1
+
+
+def test_drift_policy_alerts_on_distribution_change_not_volume(tmp_path):
+    '''
+    분포가 같은 새 데이터는 양이 많아도 요청하지 않고, 분포가 바뀐 컬럼과 지표를 이유로 남긴다.
+    '''
+    record_path = str(tmp_path / 'record.csv')
+    table = _claims(range(1, 1001))
+    retriever = ClaimRetriever(table)
+    monitor = Monitor(record_path, _policy(tmp_path))
+    monitor.sync(retriever)
+    # 기준이 없으면 요청하고, 요청 이후의 데이터를 기준으로 삼는다.
+    assert monitor.alert_new_rows() and monitor.alert_policy.reasons == ['no_baseline']
+    monitor.update_baseline()
+
+    retriever.table = table = pd.concat([table, _claims(range(1001, 1501), seed = 1)], ignore_index = True)
+    monitor.sync(retriever)
+    assert not monitor.alert_new_rows()
+
+    # 재시작해도 저장된 요약으로 이어서 비교한다.
+    retriever.table = pd.concat([table, _claims(range(1501, 2001), weight_mean = 7.0, breeds = ('비숑',), seed = 2)], ignore_index = True)
+    monitor = Monitor(record_path, _policy(tmp_path))
+    monitor.sync(retriever)
+    assert monitor.alert_new_rows()
+    reasons = monitor.alert_policy.reasons
+    assert any(reason.startswith('weight_kg:psi=') for reason in reasons)
+    assert any(reason.startswith('weight_kg:ks=') for reason in reasons)
+    assert any(reason.startswith('pet_breed_id:unseen=') for reason in reasons)
+    assert monitor.alert_policy.report['weight_kg']['thresholds'] == {'psi': 0.2, 'ks': 0.1}
+
+
+def test_drift_policy_refits_from_record_when_summary_missing(tmp_path):
+    record_path = str(tmp_path / 'record.csv')
+    retriever = ClaimRetriever(_claims(range(1, 1001)))
+    monitor = Monitor(record_path, _policy(tmp_path))
+    monitor.sync(retriever)
+    monitor.update_baseline()
+
+    (tmp_path / 'record.csv.drift.json').unlink()
+    retriever.table = pd.concat([retriever.table, _claims(range(1001, 1101), weight_mean = 8.0, seed = 1)], ignore_index = True)
+    monitor = Monitor(record_path, _policy(tmp_path))
+    monitor.sync(retriever)
+
+    assert monitor.alert_policy.baseline['weight_kg'].total == 1000
+    assert monitor.alert_policy.current['weight_kg'].total == 100
+    assert monitor.alert_new_rows()
+
+
+def test_baseline_moves_only_after_retrained_model_is_deployed(tmp_path):
+    '''
+    재학습 요청이 받아들여져도 기준은 그대로 두고, 다른 모델이 배포된 뒤에 요청 시점까지의 행(배포 모델이 학습한 데이터)을 기준으로 삼는다.
+    '''
+    record_path = str(tmp_path / 'record.csv')
+    retriever = ClaimRetriever(_claims(range(1, 1001)))
+    monitor = Monitor(record_path, _policy(tmp_path))
+    monitor.sync(retriever)
+    assert monitor.alert_new_rows()
+    monitor.request_retrain('model-a@2024-01-01T00:00:00')
+
+    # 배포 전에 들어온 데이터는 기준에 들어가지 않고, 같은 모델이 배포되어 있으면 기준을 바꾸지 않는다.
+    retriever.table = pd.concat([retriever.table, _claims(range(1001, 1201), seed = 1)], ignore_index = True)
+    monitor.sync(retriever)
+    assert not monitor.on_deployment('model-a@2024-01-01T00:00:00')
+    assert not monitor.on_deployment(None)
+    assert monitor.retrain_pending(timeout_seconds = 3600)
+    assert not monitor.retrain_pending(timeout_seconds = 0)
+    assert monitor.watermark.baseline_count == 0
+
+    # 재시작해도 요청 상태는 watermark에 남아 있다.
+    monitor = Monitor(record_path, _policy(tmp_path))
+    assert monitor.on_deployment('model-b@2024-01-02T00:00:00')
+    assert monitor.watermark.baseline_count == 1000
+    assert monitor.watermark.requested_count is None
+    assert not monitor.retrain_pending(timeout_seconds = 3600)
+    assert monitor.alert_policy.baseline['weight_kg'].total == 1000
+    assert monitor.alert_policy.current['weight_kg'].total == 200
@@ -3,7 +3,7 @@ import pytest
 import pandas as pd
 
 from src.jobs.notify import EmailSender, Receiver
-from src.jobs.monitor import DataAmountAlertPolicy, Monitor
+from src.jobs.monitor import AlertPolicy, DataAmountAlertPolicy, Monitor, RetrainModePolicy
 
 def test_send_email(mocker):
     # smtp 서버 모킹
@@ -58,4 +58,45 @@ def test_monitor_keeps_record_new(mocker):
     pd_to_csv_mocking.assert_called_once()
     pd_read_csv_mocking.assert_called_once()
     
-    
\ No newline at end of file
+    
+
+
+def test_retrain_mode_policy_incremental_for_small_similar_delta():
+    '''
+    기존과 분포가 같은 소량의 새 데이터는 증분 학습을 요청한다.
+    '''
+    previous_df = pd.DataFrame.from_dict({'breed': ['말티즈', '푸들'] * 500, 'age': [3, 5] * 500})
+    new_df = pd.concat([previous_df, previous_df.iloc[:40]], ignore_index = True)
+
+    request = RetrainModePolicy().decide(previous_df, new_df)
+
+    assert request['mode'] == 'incremental'
+
+
+def test_retrain_mode_policy_full_for_volume_or_drift():
+    '''
+    새 데이터가 많거나, 기존에 없던 범주/평균 이동이 크면 전체 재학습을 요청한다.
+    '''
+    previous_df = pd.DataFrame.from_dict({'breed': ['말티즈', '푸들'] * 500, 'age': [3, 5] * 500})
+    policy = RetrainModePolicy()
+
+    large_df = pd.concat([previous_df, previous_df.iloc[:400]], ignore_index = True)
+    unseen_df = pd.concat([previous_df, pd.DataFrame.from_dict({'breed': ['시바견'] * 40, 'age': [3] * 40})], ignore_index = True)
+    shifted_df = pd.concat([previous_df, pd.DataFrame.from_dict({'breed': ['말티즈'] * 40, 'age': [12] * 40})], ignore_index = True)
+
+    assert policy.decide(None, previous_df)['mode'] == 'full'
+    assert policy.decide(previous_df, large_df)['reason'].startswith('volume')
+    assert policy.decide(previous_df, unseen_df)['reason'].startswith('drift:breed')
+    assert policy.decide(previous_df, shifted_df)['reason'].startswith('drift:age')
+
+
+def test_alert_policy_requires_analyze_count():
+    '''
+    Monitor는 analyze_count로 판단하므로, 이를 구현하지 않은 정책은 만들 수 없다.
+    '''
+    class DataOnlyAlertPolicy(AlertPolicy):
+        def analyze(self, df):
+            return True
+
+    with pytest.raises(TypeError):
+        DataOnlyAlertPolicy()
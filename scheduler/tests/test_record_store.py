@@ -0,0 +1,77 @@
+import os
+
+import pandas as pd
+
+from src.dataset.record_store import RecordStore
+from src.jobs.monitor import DataAmountAlertPolicy, Monitor
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+RECORD_STORE_COPIES = [
+    os.path.join(ROOT, 'scheduler', 'src', 'dataset', 'record_store.py'),
+    os.path.join(ROOT, 'pipeline', 'src', 'record_store.py'),
+    os.path.join(ROOT, 'dashboard', 'src', 'services', 'record_store.py'),
+]
+
+
+def _records(num_rows, date):
+    return pd.DataFrame.from_dict({
+        'claim_id': list(range(num_rows)),
+        'breed': ['말티즈'] * num_rows,
+        'age': [3] * num_rows,
+        'weight': [2.5] * num_rows,
+        'price': [40000] * num_rows,
+        'issued_at': [date] * num_rows,
+    })
+
+
+def test_record_store_migrate_and_read_date_range(tmp_path):
+    '''
+    CSV 파티션을 Parquet로 옮긴 뒤, 날짜 범위 밖 파티션은 읽지 않고 지정한 컬럼만 읽는다.
+    '''
+    for i, date in enumerate(['2024-01-01', '2024-01-02', '2024-01-03']):
+        (tmp_path / date).mkdir()
+        _records(10 + i, date).to_csv(tmp_path / date / 'insurance_claim.csv', index = False)
+    (tmp_path / 'archive').mkdir()
+
+    store = RecordStore(str(tmp_path))
+    reports = store.migrate()
+
+    assert [report['date'] for report in reports] == ['2024-01-01', '2024-01-02', '2024-01-03']
+    assert store.files('2024-01-02') == [str(tmp_path / '2024-01-02' / 'insurance_claim.parquet')]
+
+    df = store.read(date_from = '2024-01-02', date_to = '2024-01-03', columns = ['age', 'price'])
+    assert df.columns.tolist() == ['age', 'price']
+    assert len(df) == 11 + 12
+    assert str(df['age'].dtype) == 'int64'
+
+    # 이미 옮긴 파티션은 다시 변환하지 않는다.
+    assert store.migrate() == []
+
+
+def test_monitor_keeps_parquet_record(tmp_path):
+    record_path = str(tmp_path / 'record.parquet')
+
+    monitor = Monitor(record_path, DataAmountAlertPolicy())
+    assert monitor.current_record is None
+
+    monitor.update_record(_records(10, '2024-01-01'))
+    assert len(monitor.current_record) == 10
+    assert not monitor.alert(_records(20, '2024-01-02'))
+    assert monitor.alert(_records(40, '2024-01-02'))
+
+
+def _without_usage(path):
+    # 서비스마다 다른 모듈 경로(python -m ...) 사용법 줄과 줄바꿈 문자는 비교하지 않는다.
+    with open(path, 'r', encoding = 'utf-8') as f:
+        lines = f.read().replace('\r\n', '\n').split('\n')
+    return [line for line in lines if not line.strip().startswith('python -m ')]
+
+
+def test_record_store_copies_match():
+    '''
+    이미지마다 따로 둔 record_store.py 세 벌이 사용법 예시를 빼고 같아야 한다.
+    '''
+    scheduler_copy, *other_copies = [_without_usage(path) for path in RECORD_STORE_COPIES]
+
+    for path, copy in zip(RECORD_STORE_COPIES[1:], other_copies):
+        assert copy == scheduler_copy, path
@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+import pytest
+
+from src.middleware.runtime import AsyncScheduler
+
+
+def run_for(scheduler, seconds):
+    async def main():
+        asyncio.get_running_loop().call_later(seconds, scheduler.stop)
+        await scheduler.run()
+    asyncio.run(main())
+    scheduler.shutdown()
+
+
+def test_slow_job_does_not_delay_other_jobs():
+    '''
+    느린 blocking 작업(SMTP 등)이 실행 중이어도 다른 작업은 주기대로 실행된다.
+    '''
+    ticks = []
+
+    async def monitoring():
+        ticks.append(time.monotonic())
+
+    scheduler = AsyncScheduler()
+    scheduler.add_job('monitoring', monitoring, 0.05)
+    scheduler.add_job('report', lambda: time.sleep(0.5), 0.05, run_immediately = True)
+    run_for(scheduler, 0.5)
+
+    metrics = scheduler.metrics()
+    assert metrics['monitoring']['successes'] >= 6
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.2
+    # 이전 실행이 끝나지 않은 주기는 건너뛴다.
+    assert metrics['report']['runs'] == 1
+    assert metrics['report']['skipped'] >= 5
+
+
+def test_timeout_and_failure_are_recorded_and_reported(tmp_path):
+    errors = []
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    def fail():
+        raise ValueError('DB 연결 실패')
+
+    scheduler = AsyncScheduler(on_error = lambda name, e: errors.append((name, type(e).__name__)), metrics_path = str(tmp_path / 'jobs.json'))
+    scheduler.add_job('hang', hang, 0.1, timeout_seconds = 0.05, run_immediately = True)
+    scheduler.add_job('fail', fail, 0.1, run_immediately = True)
+    run_for(scheduler, 0.25)
+
+    metrics = scheduler.metrics()
+    assert metrics['hang']['timeouts'] >= 2 and metrics['hang']['successes'] == 0
+    assert metrics['fail']['failures'] >= 2
+    assert metrics['fail']['last_error'] == 'ValueError: DB 연결 실패'
+    assert ('hang', 'TimeoutError') in errors and ('fail', 'ValueError') in errors
+    assert (tmp_path / 'jobs.json').exists()
+
+
+def test_interval_must_be_positive():
+    with pytest.raises(ValueError):
+        AsyncScheduler().add_job('monitoring', lambda: None, 0)
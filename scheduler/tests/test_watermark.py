@@ -0,0 +1,97 @@
+import pandas as pd
+
+from src.jobs.monitor import DataAmountAlertPolicy, Monitor
+from src.jobs.retrieve import IncrementalRetriever
+from src.jobs.watermark import Watermark
+
+
+class TableRetriever:
+    '''
+    DB 테이블 대신 DataFrame에서 IncrementalRetriever와 같은 조회를 하고, 조회한 행 수를 센다.
+    '''
+    columns = ['breed', 'age']
+
+    def __init__(self, table):
+        self.table = table
+        self.scanned_rows = 0
+
+    def retrieve_watermark(self):
+        return Watermark(last_id = int(self.table['id'].max()) if len(self.table) else None, count = len(self.table))
+
+    def retrieve_since(self, last_id, until_id):
+        rows = self.table[(self.table['id'] > (last_id if last_id is not None else -1)) & (self.table['id'] <= until_id)]
+        self.scanned_rows += len(rows)
+        return rows[self.columns].reset_index(drop = True)
+
+
+def _table(ids):
+    return pd.DataFrame.from_dict({'id': list(ids), 'breed': ['말티즈'] * len(ids), 'age': [3] * len(ids)})
+
+
+def test_monitor_sync_appends_only_new_rows(tmp_path):
+    '''
+    watermark 이후의 행만 조회해 기록 뒤에 붙이고, watermark는 재시작 후에도 이어진다.
+    '''
+    record_path = str(tmp_path / 'record.csv')
+    retriever = TableRetriever(_table(range(1, 101)))
+
+    monitor = Monitor(record_path, DataAmountAlertPolicy())
+    assert len(monitor.sync(retriever)) == 100
+    assert monitor.alert_new_rows()
+    monitor.update_baseline()
+
+    retriever.table = _table(range(1, 121))
+    retriever.scanned_rows = 0
+    monitor = Monitor(record_path, DataAmountAlertPolicy())
+    assert monitor.watermark.last_id == 100
+    assert len(monitor.sync(retriever)) == 20
+    assert retriever.scanned_rows == 20
+    assert len(monitor.read_record()) == 120
+    # 재학습 요청 이후 20행만 쌓였으므로 아직 요청하지 않는다.
+    assert not monitor.alert_new_rows()
+    previous_record, record = monitor.split_record()
+    assert (len(previous_record), len(record)) == (100, 120)
+
+    assert len(monitor.sync(retriever)) == 0
+    assert retriever.scanned_rows == 20
+
+
+def test_monitor_sync_rewrites_record_when_rows_deleted(tmp_path):
+    record_path = str(tmp_path / 'record.parquet')
+    retriever = TableRetriever(_table(range(1, 51)))
+    monitor = Monitor(record_path, DataAmountAlertPolicy())
+    monitor.sync(retriever)
+
+    # 10행이 삭제되고 5행이 새로 들어와 행 수가 맞지 않으면 전체를 다시 기록한다.
+    retriever.table = _table([*range(11, 51), *range(51, 56)])
+    monitor.sync(retriever)
+
+    assert len(monitor.read_record()) == 45
+    assert monitor.watermark.count == 45
+
+
+def test_monitor_keeps_legacy_record_as_baseline(tmp_path):
+    '''
+    watermark 없이 전체를 저장하던 기록은 행 수를 비교 기준으로 이어받고, 첫 동기화 때 새로 쓴다.
+    '''
+    record_path = str(tmp_path / 'record.csv')
+    _table(range(1, 41))[TableRetriever.columns].to_csv(record_path, index = False)
+
+    monitor = Monitor(record_path, DataAmountAlertPolicy())
+    monitor.sync(TableRetriever(_table(range(1, 61))))
+
+    assert len(monitor.read_record()) == 60
+    assert not monitor.alert_new_rows()
+
+
+def test_incremental_retriever_queries_since_watermark(mocker):
+    load_data = mocker.patch('src.jobs.retrieve.load_data', return_value = pd.DataFrame({'num_rows': [3], 'last_id': [7], 'last_created_at': ['2024-01-02 00:00:00']}))
+    retriever = IncrementalRetriever(mocker.MagicMock(), 'claims', ['breed', 'age'], 'id', 'created_at')
+
+    assert retriever.retrieve_watermark() == Watermark(last_id = 7, last_created_at = '2024-01-02 00:00:00', count = 3)
+    assert 'COUNT(*)' in load_data.call_args.args[1]
+
+    retriever.retrieve_since(5, 7)
+    sql, params = load_data.call_args.args[1:]
+    assert 'WHERE id > %s AND id <= %s' in sql
+    assert params == [5, 7]